@@ -8,6 +8,9 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 
+from voucher_validity import (build_invalid_voucher_report, classify_invalid_reasons,
+                              normalize_link_reference_series)
+
 def normalize_reference(ref):
     """Normalize reference numbers by handling leading zeros."""
     if pd.isna(ref):
@@ -115,39 +118,17 @@ def analyze_corrected_voucher_references():
     print(f"💰 Value of non-PDF-linked invalid vouchers: R{non_pdf_linked_invalid['nett_grn_amt'].sum():,.2f}")
     
     # Create detailed analysis report
-    create_corrected_analysis_report(pdf_linked_invalid_vouchers, non_pdf_linked_invalid, invalid_voucher_refs)
+    create_corrected_analysis_report(grn_df, voucher_df, hr185_df)
     
     return pdf_linked_invalid_vouchers, non_pdf_linked_invalid
 
-def create_corrected_analysis_report(pdf_linked_invalid, non_pdf_invalid, all_invalid_refs):
-    """Create a corrected analysis report with proper linkage."""
+def create_corrected_analysis_report(grn_df, voucher_df, hr185_df):
+    """Create a corrected analysis report with proper linkage from the loaded GRN, voucher and HR185 data."""
     
     print(f"\n=== CREATING CORRECTED ANALYSIS REPORT ===")
     
-    # Load base data again for report
-    grn_df = pd.read_csv('output/hr995_grn.csv')
-    grn_df['voucher_normalized'] = grn_df['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
-    
-    # Get all invalid voucher GRNs
-    all_invalid_grns = grn_df[grn_df['voucher_normalized'].isin(all_invalid_refs)].copy()
-    
-    # Add analysis columns
-    all_invalid_grns['invalid_reason'] = all_invalid_grns['voucher_normalized'].apply(determine_invalid_reason)
-    all_invalid_grns['voucher_prefix'] = all_invalid_grns['voucher_normalized'].astype(str).str.extract(r'^([A-Z]*)')
-    all_invalid_grns['has_pdf_link'] = all_invalid_grns['inv_no'].apply(
-        lambda x: 'Yes' if has_pdf_reference(x) else 'No'
-    )
-    
-    # Select columns for report
-    report_columns = [
-        'grn_no', 'inv_no', 'voucher', 'voucher_normalized', 'supplier_name', 'date', 
-        'nett_grn_amt', 'invalid_reason', 'voucher_prefix', 'has_pdf_link',
-        'fin_period', 'item_no', 'description'
-    ]
-    
-    available_columns = [col for col in report_columns if col in all_invalid_grns.columns]
-    report_df = all_invalid_grns[available_columns].copy()
-    report_df = report_df.sort_values(['has_pdf_link', 'invalid_reason', 'voucher_normalized'], ascending=[False, True, True])
+    # The engine classifies every invalid voucher in one pass
+    report_df = build_invalid_voucher_report(grn_df, voucher_df, hr185_df)
     
     # Save corrected report
     output_file = 'output/invalid_voucher_references_corrected.csv'
@@ -177,36 +158,25 @@ def create_corrected_analysis_report(pdf_linked_invalid, non_pdf_invalid, all_in
     
     return report_df
 
+_pdf_reference_set = None
+
 def has_pdf_reference(inv_no):
     """Check if an invoice number has a corresponding PDF reference."""
+    global _pdf_reference_set
+    if pd.isna(inv_no):
+        return False
     try:
-        hr185_df = pd.read_csv('output/individual_hr185_transactions.csv')
-        normalized_inv = normalize_reference(inv_no)
-        pdf_refs = hr185_df['reference'].apply(normalize_reference)
-        return normalized_inv in pdf_refs.values
+        if _pdf_reference_set is None:
+            # HR185 references are read and normalized once, then reused for every lookup
+            hr185_df = pd.read_csv('output/individual_hr185_transactions.csv')
+            _pdf_reference_set = set(normalize_link_reference_series(hr185_df['reference'].dropna()))
+        return normalize_link_reference_series(pd.Series([inv_no])).iloc[0] in _pdf_reference_set
     except:
         return False
 
 def determine_invalid_reason(voucher_ref):
     """Determine the most likely reason for an invalid voucher reference."""
-    
-    if pd.isna(voucher_ref):
-        return "Missing voucher reference"
-    
-    voucher_str = str(voucher_ref).strip().upper()
-    
-    if voucher_str.startswith('INVI'):
-        return "INVI sequence gap or timing issue"
-    elif voucher_str.startswith('999I'):
-        return "Special/manual voucher not in payment system"
-    elif voucher_str.startswith('SINA'):
-        return "Different supplier/system voucher"
-    elif voucher_str.isdigit():
-        return "Numeric voucher not in payment system"
-    elif len(voucher_str) < 4:
-        return "Invalid voucher format"
-    else:
-        return "Unknown voucher system or data entry error"
+    return classify_invalid_reasons(pd.Series([voucher_ref], dtype=object)).iloc[0]
 
 def create_validation_summary():
     """Create a summary of the validation improvements."""
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Anomaly Scoring Engine
+Batch anomaly detection over the HR995 GRN and issue data, run by the pipeline.
+
+The GRN and issue files are read and typed once (numeric quantities and amounts, parsed
+dates, normalized item codes, derived unit prices) and every detector works on those
+shared frames. The detectors are independent of each other and run in a thread pool.
+Each detector returns rows in one scored layout:
+
+    detector       detector name (see DETECTORS)
+    category       financial / volume / timing / pattern / stock
+    severity       high / medium / low
+    score          how far the record is past its threshold (value / threshold for
+                   upper thresholds); 1.0 for yes/no findings
+    record_type    GRN / Issue / Item / Supplier / Month
+    record_id      GRN number, requisition number, item code, supplier or month
+    value          the measured value
+    threshold      the threshold it was compared with
+    evidence       one-line explanation
+    suppliers      the record's supplier, or for item-level rows every supplier that
+                   delivered the item (SUPPLIER_SEPARATOR-joined), so views can filter
+                   the table by supplier without re-reading the GRN lines
+
+The dashboard's anomaly views and anomaly_detection_demo read the saved table
+(anomaly_scores.csv); the threshold helpers are shared with the dashboard's charts.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from price_history import DEFAULT_SPIKE_THRESHOLD, PriceHistory, unit_prices
+from stock_ledger import load_stock_ledger, normalize_item_codes
+
+ANOMALY_FILE = 'anomaly_scores.csv'
+
+ANOMALY_COLUMNS = [
+    'detector', 'category', 'severity', 'score', 'record_type', 'record_id', 'item_code',
+    'supplier_name', 'date', 'value', 'threshold', 'evidence', 'suppliers'
+]
+
+ANOMALY_DTYPES = {
+    'score': float, 'record_id': object, 'item_code': object, 'supplier_name': object,
+    'date': 'datetime64[ns]', 'value': float, 'threshold': float, 'suppliers': object
+}
+
+SUPPLIER_SEPARATOR = ' | '
+
+SEVERITY_ORDER = ['high', 'medium', 'low']
+
+# Score bands for detectors with a continuous score
+HIGH_SEVERITY_SCORE = 3.0
+MEDIUM_SEVERITY_SCORE = 1.5
+
+# Detector thresholds (the values the dashboard has always used)
+HIGH_VALUE_IQR_MULTIPLIER = 1.5
+QUANTITY_IQR_MULTIPLIER = 2.0
+SUPPLIER_SPEND_IQR_MULTIPLIER = 1.5
+OUTLIER_STD_MULTIPLIER = 2.0
+PRICE_VOLATILITY_CV = 50.0
+PRICE_VOLATILITY_MIN_TRANSACTIONS = 3
+OVER_STOCKED_RATIO = 5.0
+UNDER_STOCKED_RATIO = 0.5
+MAX_SUPPLIERS_PER_ITEM = 3
+
+
+def iqr_upper_fence(values, multiplier=1.5):
+    """Q3 + multiplier × IQR of the non-null values."""
+    values = pd.Series(values).dropna()
+    q1, q3 = values.quantile(0.25), values.quantile(0.75)
+    return q3 + multiplier * (q3 - q1)
+
+
+def mean_std_threshold(values, n_std=2.0):
+    """Mean + n_std standard deviations of the non-null values."""
+    values = pd.Series(values).dropna()
+    return values.mean() + n_std * values.std()
+
+
+def score_severity(score):
+    """Map exceedance scores to high / medium / low."""
+    return np.select([score >= HIGH_SEVERITY_SCORE, score >= MEDIUM_SEVERITY_SCORE],
+                     ['high', 'medium'], default='low')
+
+
+def prepare_grn(grn_df):
+    """Typed GRN lines: item_code, numeric quantity/amount, parsed date and unit_price."""
+    grn = pd.DataFrame({
+        'grn_no': grn_df['grn_no'].astype(str) if 'grn_no' in grn_df.columns else None,
+        'item_code': normalize_item_codes(grn_df['item_no' if 'item_no' in grn_df.columns else 'item_code']),
+        'supplier_name': grn_df['supplier_name'] if 'supplier_name' in grn_df.columns else None,
+        'date': pd.to_datetime(grn_df['date'], errors='coerce'),
+        'quantity': pd.to_numeric(grn_df['quantity'], errors='coerce'),
+        'amount': pd.to_numeric(grn_df['nett_grn_amt'], errors='coerce'),
+    }, index=grn_df.index)
+    if 'unit_price' in grn_df.columns:
+        grn['unit_price'] = pd.to_numeric(grn_df['unit_price'], errors='coerce')
+    else:
+        grn['unit_price'] = unit_prices(grn['amount'], grn['quantity'])
+    return grn
+
+
+def prepare_issue(issue_df):
+    """Typed issue lines: item_code, numeric quantity/cost and parsed date."""
+    return pd.DataFrame({
+        'requisition_no': issue_df['requisition_no'].astype(str) if 'requisition_no' in issue_df.columns else None,
+        'item_code': normalize_item_codes(issue_df['item_code' if 'item_code' in issue_df.columns else 'item_no']),
+        'date': pd.to_datetime(issue_df['date'], errors='coerce'),
+        'quantity': pd.to_numeric(issue_df['quantity'], errors='coerce'),
+        'amount': pd.to_numeric(issue_df['issue_cost'], errors='coerce') if 'issue_cost' in issue_df.columns else np.nan,
+    }, index=issue_df.index)
+
+
+def prepare_anomaly_inputs(grn_df, issue_df, ledger=None):
+    """
+    Type the detector inputs once.
+
+    Args:
+        grn_df (pd.DataFrame): HR995 GRN lines
+        issue_df (pd.DataFrame): HR995 issue lines
+        ledger (StockLedger): Optional stock ledger for the negative stock detector
+
+    Returns:
+        dict: 'grn', 'issue' (typed frames) and 'balances' (ledger balances or None)
+    """
+    return {
+        'grn': prepare_grn(grn_df) if not grn_df.empty else None,
+        'issue': prepare_issue(issue_df) if not issue_df.empty else None,
+        'balances': ledger.balances() if ledger is not None and not ledger.ledger.empty else None
+    }
+
+
+def price_statistics(grn, min_transactions=PRICE_VOLATILITY_MIN_TRANSACTIONS):
+    """Unit price count, mean, std, min, max and coefficient of variation (%) per item."""
+    stats = grn.dropna(subset=['unit_price']).groupby('item_code')['unit_price'].agg(
+        ['count', 'mean', 'std', 'min', 'max']).reset_index()
+    stats['cv'] = stats['std'] / stats['mean'] * 100
+    return stats[stats['count'] >= min_transactions]
+
+
+def supplier_spending(grn):
+    """Total, count and mean GRN amount per supplier."""
+    return grn.groupby('supplier_name')['amount'].agg(['sum', 'count', 'mean']).reset_index()
+
+
+def monthly_activity(grn):
+    """GRN value and transaction count per calendar month (all years together)."""
+    dated = grn.dropna(subset=['date'])
+    monthly = dated.groupby(dated['date'].dt.month)['amount'].agg(['sum', 'count']).reset_index()
+    monthly.columns = ['month', 'total_value', 'transaction_count']
+    monthly['month_name'] = pd.to_datetime(monthly['month'], format='%m').dt.strftime('%B')
+    return monthly
+
+
+def grn_issue_ratios(grn, issue):
+    """Received and issued quantity per item and their ratio, for items with issues."""
+    received = grn.groupby('item_code')['quantity'].sum().rename('total_grn')
+    issued = issue.groupby('item_code')['quantity'].sum().rename('total_issue')
+    ratios = pd.concat([received, issued], axis=1, join='inner').reset_index()
+    ratios = ratios[ratios['total_issue'] > 0]
+    return ratios.assign(grn_issue_ratio=ratios['total_grn'] / ratios['total_issue'])
+
+
+def _text(values, template):
+    """Format a numeric column as text (also for empty detector results)."""
+    return values.map(template.format).astype(str)
+
+
+def item_suppliers(grn):
+    """SUPPLIER_SEPARATOR-joined names of the suppliers that delivered each item."""
+    delivered = grn.dropna(subset=['item_code', 'supplier_name']).drop_duplicates(['item_code', 'supplier_name'])
+    return delivered.sort_values('supplier_name').groupby('item_code')['supplier_name'].agg(SUPPLIER_SEPARATOR.join)
+
+
+def _anomalies(detector, category, frame, record_type, record_id, value, threshold, evidence,
+               score=None, severity=None, item_code=None, supplier_name=None, date=None):
+    """Assemble detector output in the ANOMALY_COLUMNS layout."""
+    if score is None:
+        score = pd.Series(1.0, index=frame.index)
+    result = pd.DataFrame({
+        'detector': detector,
+        'category': category,
+        'severity': severity if severity is not None else score_severity(score),
+        'score': score,
+        'record_type': record_type,
+        'record_id': record_id,
+        'item_code': item_code,
+        'supplier_name': supplier_name,
+        'date': date,
+        'value': value,
+        'threshold': threshold,
+        'evidence': evidence,
+        'suppliers': supplier_name
+    }, index=frame.index)
+    return result[ANOMALY_COLUMNS].astype(ANOMALY_DTYPES)
+
+
+def detect_high_value_grns(inputs):
+    """GRN lines above the IQR fence of GRN amounts."""
+    grn = inputs['grn']
+    threshold = iqr_upper_fence(grn['amount'], HIGH_VALUE_IQR_MULTIPLIER)
+    hits = grn[grn['amount'] > threshold]
+    return _anomalies('high_value_grn', 'financial', hits, 'GRN', hits['grn_no'], hits['amount'], threshold,
+                      'GRN amount R' + _text(hits['amount'], '{:,.2f}') + f' above R{threshold:,.2f}',
+                      score=hits['amount'] / threshold, item_code=hits['item_code'],
+                      supplier_name=hits['supplier_name'], date=hits['date'])
+
+
+def detect_price_volatility(inputs):
+    """Items whose unit price varies by more than the volatility threshold."""
+    stats = price_statistics(inputs['grn'])
+    hits = stats[stats['cv'] > PRICE_VOLATILITY_CV]
+    evidence = ('Unit price CV ' + _text(hits['cv'], '{:.1f}%') + ' over ' + hits['count'].astype(str)
+                + ' GRNs (R' + _text(hits['min'], '{:,.2f}') + ' – R' + _text(hits['max'], '{:,.2f}') + ')')
+    return _anomalies('price_volatility', 'financial', hits, 'Item', hits['item_code'], hits['cv'],
+                      PRICE_VOLATILITY_CV, evidence, score=hits['cv'] / PRICE_VOLATILITY_CV,
+                      item_code=hits['item_code'])
+
+
+def detect_price_spikes(inputs):
+    """GRN unit prices far from the median of the item's previous prices (rolling median / MAD)."""
+    spikes = PriceHistory(inputs['grn']).spikes()
+    evidence = ('Unit price R' + _text(spikes['unit_price'], '{:,.2f}') + ' vs median R'
+                + _text(spikes['rolling_median'], '{:,.2f}') + ' of the previous '
+                + spikes['history_count'].astype(str) + ' GRNs (' + _text(spikes['price_ratio'], '{:.2f}x') + ')')
+    return _anomalies('price_spike', 'financial', spikes, 'GRN', spikes['grn_no'], spikes['unit_price'],
+                      spikes['rolling_median'], evidence,
+                      score=spikes['robust_z'].abs() / DEFAULT_SPIKE_THRESHOLD, item_code=spikes['item_code'],
+                      supplier_name=spikes['supplier_name'], date=spikes['date'])
+
+
+def detect_supplier_spending(inputs):
+    """Suppliers with unusually high total spend or transaction counts."""
+    spending = supplier_spending(inputs['grn'])
+    spend_threshold = iqr_upper_fence(spending['sum'], SUPPLIER_SPEND_IQR_MULTIPLIER)
+    count_threshold = mean_std_threshold(spending['count'], OUTLIER_STD_MULTIPLIER)
+    high_spend = spending[spending['sum'] > spend_threshold]
+    high_count = spending[spending['count'] > count_threshold]
+    return pd.concat([
+        _anomalies('supplier_high_spend', 'financial', high_spend, 'Supplier', high_spend['supplier_name'],
+                   high_spend['sum'], spend_threshold,
+                   'Total spend R' + _text(high_spend['sum'], '{:,.2f}') + f' above R{spend_threshold:,.2f}',
+                   score=high_spend['sum'] / spend_threshold, supplier_name=high_spend['supplier_name']),
+        _anomalies('supplier_high_frequency', 'financial', high_count, 'Supplier', high_count['supplier_name'],
+                   high_count['count'], count_threshold,
+                   high_count['count'].astype(str) + f' GRN lines, above {count_threshold:.0f}',
+                   score=high_count['count'] / count_threshold, supplier_name=high_count['supplier_name'])
+    ])
+
+
+def _quantity_outliers(detector, frame, record_type, record_column, label):
+    positive = frame[frame['quantity'] > 0]
+    threshold = iqr_upper_fence(positive['quantity'], QUANTITY_IQR_MULTIPLIER)
+    hits = positive[positive['quantity'] > threshold]
+    return _anomalies(detector, 'volume', hits, record_type, hits[record_column], hits['quantity'], threshold,
+                      f'{label} quantity ' + _text(hits['quantity'], '{:,.0f}') + f' above {threshold:,.0f}',
+                      score=hits['quantity'] / threshold, item_code=hits['item_code'],
+                      supplier_name=hits['supplier_name'] if 'supplier_name' in hits.columns else None,
+                      date=hits['date'])
+
+
+def detect_grn_quantity_outliers(inputs):
+    """GRN lines with quantities above the IQR fence."""
+    return _quantity_outliers('grn_quantity_outlier', inputs['grn'], 'GRN', 'grn_no', 'GRN')
+
+
+def detect_issue_quantity_outliers(inputs):
+    """Issue lines with quantities above the IQR fence."""
+    return _quantity_outliers('issue_quantity_outlier', inputs['issue'], 'Issue', 'requisition_no', 'Issue')
+
+
+def detect_weekend_activity(inputs):
+    """GRN documents and requisitions dated on a Saturday or Sunday."""
+    parts = []
+    for frame, record_type, record_column in [(inputs['grn'], 'GRN', 'grn_no'),
+                                              (inputs['issue'], 'Issue', 'requisition_no')]:
+        if frame is None:
+            continue
+        weekend = frame[frame['date'].dt.dayofweek >= 5]
+        aggregations = {'amount': ('amount', 'sum'), 'lines': ('item_code', 'size')}
+        if 'supplier_name' in weekend.columns:
+            aggregations['supplier_name'] = ('supplier_name', 'first')
+        documents = weekend.groupby([record_column, 'date'], sort=False).agg(**aggregations).reset_index()
+        parts.append(_anomalies(
+            'weekend_activity', 'timing', documents, record_type, documents[record_column], documents['amount'],
+            np.nan, f'{record_type} dated ' + documents['date'].dt.strftime('%A %Y-%m-%d') + ', '
+            + documents['lines'].astype(str) + ' lines',
+            severity='low', supplier_name=documents.get('supplier_name'), date=documents['date']))
+    return pd.concat(parts) if parts else None
+
+
+def detect_outlier_months(inputs):
+    """Calendar months with GRN value or transaction count above mean + 2 std."""
+    monthly = monthly_activity(inputs['grn'])
+    value_threshold = mean_std_threshold(monthly['total_value'], OUTLIER_STD_MULTIPLIER)
+    count_threshold = mean_std_threshold(monthly['transaction_count'], OUTLIER_STD_MULTIPLIER)
+    value_hits = monthly[monthly['total_value'] > value_threshold]
+    count_hits = monthly[monthly['transaction_count'] > count_threshold]
+    return pd.concat([
+        _anomalies('outlier_month_value', 'timing', value_hits, 'Month', value_hits['month_name'],
+                   value_hits['total_value'], value_threshold,
+                   'GRN value R' + _text(value_hits['total_value'], '{:,.2f}') + f' above R{value_threshold:,.2f}',
+                   score=value_hits['total_value'] / value_threshold),
+        _anomalies('outlier_month_count', 'timing', count_hits, 'Month', count_hits['month_name'],
+                   count_hits['transaction_count'], count_threshold,
+                   count_hits['transaction_count'].astype(str) + f' GRN lines, above {count_threshold:.0f}',
+                   score=count_hits['transaction_count'] / count_threshold)
+    ])
+
+
+def detect_grn_issue_ratios(inputs):
+    """Items received far more (over-stocked) or far less (under-stocked) than issued."""
+    ratios = grn_issue_ratios(inputs['grn'], inputs['issue'])
+    over = ratios[ratios['grn_issue_ratio'] > OVER_STOCKED_RATIO]
+    under = ratios[ratios['grn_issue_ratio'] < UNDER_STOCKED_RATIO]
+
+    def evidence(frame):
+        return ('Received ' + _text(frame['total_grn'], '{:,.0f}') + ', issued '
+                + _text(frame['total_issue'], '{:,.0f}') + ' (' + _text(frame['grn_issue_ratio'], '{:.2f}x') + ')')
+
+    return pd.concat([
+        _anomalies('over_stocked_item', 'pattern', over, 'Item', over['item_code'], over['grn_issue_ratio'],
+                   OVER_STOCKED_RATIO, evidence(over), score=over['grn_issue_ratio'] / OVER_STOCKED_RATIO,
+                   item_code=over['item_code']),
+        _anomalies('under_stocked_item', 'pattern', under, 'Item', under['item_code'], under['grn_issue_ratio'],
+                   UNDER_STOCKED_RATIO, evidence(under),
+                   score=UNDER_STOCKED_RATIO / under['grn_issue_ratio'].clip(lower=1e-9), item_code=under['item_code'])
+    ])
+
+
+def detect_multi_supplier_items(inputs):
+    """Items supplied by more than MAX_SUPPLIERS_PER_ITEM suppliers."""
+    counts = inputs['grn'].groupby('item_code')['supplier_name'].nunique().rename('supplier_count').reset_index()
+    hits = counts[counts['supplier_count'] > MAX_SUPPLIERS_PER_ITEM]
+    return _anomalies('multi_supplier_item', 'pattern', hits, 'Item', hits['item_code'], hits['supplier_count'],
+                      MAX_SUPPLIERS_PER_ITEM, hits['supplier_count'].astype(str) + ' suppliers',
+                      score=hits['supplier_count'] / MAX_SUPPLIERS_PER_ITEM, item_code=hits['item_code'])
+
+
+def detect_negative_stock(inputs):
+    """Items whose current ledger balance is negative."""
+    balances = inputs['balances']
+    hits = balances[balances['balance'] < 0]
+    return _anomalies('negative_stock', 'stock', hits, 'Item', hits['item_code'], hits['balance'], 0.0,
+                      'Balance ' + _text(hits['balance'], '{:,.0f}') + ' after '
+                      + hits['movements_to_date'].astype(str) + ' movements',
+                      severity='high', item_code=hits['item_code'], date=hits['last_movement_date'])
+
+
+# Detector name → (function, inputs it needs)
+DETECTORS = {
+    'high_value_grn': (detect_high_value_grns, ['grn']),
+    'price_volatility': (detect_price_volatility, ['grn']),
+    'price_spike': (detect_price_spikes, ['grn']),
+    'supplier_spending': (detect_supplier_spending, ['grn']),
+    'grn_quantity_outlier': (detect_grn_quantity_outliers, ['grn']),
+    'issue_quantity_outlier': (detect_issue_quantity_outliers, ['issue']),
+    'weekend_activity': (detect_weekend_activity, []),
+    'outlier_month': (detect_outlier_months, ['grn']),
+    'grn_issue_ratio': (detect_grn_issue_ratios, ['grn', 'issue']),
+    'multi_supplier_item': (detect_multi_supplier_items, ['grn']),
+    'negative_stock': (detect_negative_stock, ['balances']),
+}
+
+
+def run_anomaly_detectors(inputs, detectors=None, max_workers=None):
+    """
+    Run the detectors on the prepared inputs in a thread pool.
+
+    Args:
+        inputs (dict): prepare_anomaly_inputs output
+        detectors (list): Detector names to run (default: all of DETECTORS)
+        max_workers (int): Thread pool size (default: one thread per detector)
+
+    Returns:
+        pd.DataFrame: Anomalies in ANOMALY_COLUMNS layout, highest severity and score first
+    """
+    selected = [name for name in (detectors or DETECTORS)
+                if all(inputs.get(needed) is not None for needed in DETECTORS[name][1])]
+    if selected:
+        with ThreadPoolExecutor(max_workers=max_workers or len(selected)) as pool:
+            results = list(pool.map(lambda name: DETECTORS[name][0](inputs), selected))
+    else:
+        results = []
+    results = [result for result in results if result is not None and not result.empty]
+    if not results:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+
+    anomalies = pd.concat(results, ignore_index=True)
+    if inputs.get('grn') is not None:
+        # Rows without a supplier of their own carry the suppliers of their item
+        anomalies['suppliers'] = anomalies['suppliers'].fillna(anomalies['item_code'].map(item_suppliers(inputs['grn'])))
+    severity_rank = anomalies['severity'].map({severity: rank for rank, severity in enumerate(SEVERITY_ORDER)})
+    order = np.lexsort((-anomalies['score'].to_numpy(dtype=float), severity_rank.to_numpy()))
+    return anomalies.iloc[order].reset_index(drop=True)
+
+
+def load_anomaly_inputs(output_folder="output"):
+    """Read and type the detector inputs from the output folder."""
+    output_folder = Path(output_folder)
+
+    def read(filename):
+        file_path = output_folder / filename
+        return pd.read_csv(file_path, low_memory=False) if file_path.exists() else pd.DataFrame()
+
+    return prepare_anomaly_inputs(read('hr995_grn.csv'), read('hr995_issue.csv'), load_stock_ledger(output_folder))
+
+
+def filter_supplier_anomalies(anomalies, supplier):
+    """Rows of one supplier, plus the item-level rows of the items it delivered."""
+    suppliers = SUPPLIER_SEPARATOR + anomalies['suppliers'].fillna('') + SUPPLIER_SEPARATOR
+    return anomalies[suppliers.str.contains(SUPPLIER_SEPARATOR + supplier + SUPPLIER_SEPARATOR, regex=False)]
+
+
+def summarize_anomalies(anomalies):
+    """Anomaly count per detector and severity."""
+    summary = anomalies.groupby(['category', 'detector', 'severity']).size().unstack('severity', fill_value=0)
+    summary = summary.reindex(columns=SEVERITY_ORDER, fill_value=0)
+    return summary.assign(total=summary.sum(axis=1)).reset_index()
+
+
+def write_anomaly_scores(output_folder="output", max_workers=None):
+    """Run every detector and save the scored anomaly table as anomaly_scores.csv."""
+    inputs = load_anomaly_inputs(output_folder)
+    if inputs['grn'] is None and inputs['issue'] is None:
+        print(f"⚠️ No GRN or issue data found in {output_folder}; anomaly scores not generated")
+        return None
+    anomalies = run_anomaly_detectors(inputs, max_workers=max_workers)
+    output_file = Path(output_folder) / ANOMALY_FILE
+    anomalies.to_csv(output_file, index=False)
+    print(f"📄 Saved anomaly scores ({len(anomalies):,} anomalies from "
+          f"{anomalies['detector'].nunique()} detectors) to: {output_file}")
+    return anomalies
+
+
+def load_anomaly_scores(output_folder="output"):
+    """Load the saved anomaly table, or None when the engine has not been run."""
+    anomaly_file = Path(output_folder) / ANOMALY_FILE
+    if not anomaly_file.exists():
+        return None
+    return pd.read_csv(anomaly_file, low_memory=False, parse_dates=['date'],
+                       dtype={'record_id': str, 'item_code': str, 'suppliers': str})
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Chart Data Reduction
+Point budgets and WebGL traces for high-cardinality dashboard scatter plots.
+
+Per-transaction charts used to ship every GRN row to the browser as JSON. This module
+reduces the "normal" background points to a per-chart budget while callers keep every
+flagged point (outliers, top items) exact:
+
+* Series plotted against an ordered x (e.g. transaction index) use a min/max bucket
+  downsampler, which keeps the peaks and troughs of every bucket so the visual shape
+  of the series is preserved.
+* Two-dimensional scatters (e.g. received vs issued quantities) use density binning:
+  one representative point is kept per occupied grid cell, so the extent and clusters
+  of the cloud survive while dense regions are thinned.
+
+Traces are emitted as ``go.Scattergl`` so the browser renders them with WebGL.
+"""
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Maximum number of background points sent to the browser per chart
+DEFAULT_POINT_BUDGET = 4000
+
+
+def minmax_downsample(x, y, budget=DEFAULT_POINT_BUDGET):
+    """
+    Select indices that preserve the shape of an ordered series within a point budget.
+
+    Points with a missing y are dropped (they are not drawn). The remaining series is
+    split into budget/2 equal-width buckets along its order and the minimum and maximum
+    y of each bucket are kept.
+
+    Args:
+        x (array-like): Ordered x values
+        y (array-like): y values aligned with x
+        budget (int): Maximum number of points to keep
+
+    Returns:
+        np.ndarray: Sorted positional indices of the points to keep
+    """
+    y = np.asarray(y, dtype=float)
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if n <= budget:
+        return valid
+
+    n_buckets = max(1, budget // 2)
+    bucket = (np.arange(n) * n_buckets) // n
+    order = np.lexsort((y[valid], bucket))
+    sorted_buckets = bucket[order]
+    first = np.flatnonzero(np.r_[True, sorted_buckets[1:] != sorted_buckets[:-1]])
+    last = np.r_[first[1:] - 1, n - 1]
+    return valid[np.unique(np.concatenate([order[first], order[last]]))]
+
+
+def density_downsample(x, y, budget=DEFAULT_POINT_BUDGET, log_scale=False):
+    """
+    Thin a two-dimensional scatter by keeping one point per occupied grid cell.
+
+    Args:
+        x (array-like): x values
+        y (array-like): y values
+        budget (int): Maximum number of points to keep (sets the grid resolution)
+        log_scale (bool): Bin on log10(1 + |v|) so heavy-tailed values spread across cells
+
+    Returns:
+        np.ndarray: Sorted positional indices of the points to keep
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= budget:
+        return np.arange(n)
+
+    if log_scale:
+        x = np.sign(x) * np.log10(1 + np.abs(x))
+        y = np.sign(y) * np.log10(1 + np.abs(y))
+
+    cells_per_axis = max(1, int(np.sqrt(budget)))
+
+    def to_cell(values):
+        finite = np.isfinite(values)
+        if not finite.any():
+            return np.zeros(len(values), dtype=np.int64)
+        low, high = values[finite].min(), values[finite].max()
+        span = high - low if high > low else 1.0
+        cells = np.floor((np.where(finite, values, low) - low) / span * (cells_per_axis - 1))
+        return cells.astype(np.int64)
+
+    cell_id = to_cell(x) * cells_per_axis + to_cell(y)
+    _, keep = np.unique(cell_id, return_index=True)
+    return np.sort(keep)
+
+
+def reduced_scatter(x, y, budget=DEFAULT_POINT_BUDGET, method='minmax', text=None, **trace_kwargs):
+    """
+    Build a WebGL scatter trace reduced to a point budget.
+
+    Args:
+        x (array-like): x values
+        y (array-like): y values
+        budget (int): Maximum number of points in the trace
+        method (str): 'minmax' for ordered series, 'density' or 'density_log' for 2-D clouds
+        text (array-like): Optional per-point hover text, reduced with the points
+        **trace_kwargs: Passed through to go.Scattergl
+
+    Returns:
+        tuple: (go.Scattergl trace, number of points kept, number of input points)
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == 'minmax':
+        keep = minmax_downsample(x, y, budget)
+    elif method in ('density', 'density_log'):
+        keep = density_downsample(x, y, budget, log_scale=(method == 'density_log'))
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    if text is not None:
+        trace_kwargs['text'] = np.asarray(text)[keep]
+    trace = go.Scattergl(x=x[keep], y=y[keep], **trace_kwargs)
+    return trace, len(keep), len(x)
+
+
+def point_budget_caption(shown, total):
+    """Describe how many background points a reduced chart displays."""
+    if shown >= total:
+        return None
+    return (f"Showing {shown:,} of {total:,} normal points (shape-preserving sample); "
+            f"all flagged points are plotted exactly.")
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Vectorized CHQ Inheritance Linking
+==================================
+Builds the enhanced HR185 transaction trail in one pass using joins and group counts.
+
+Every HR185 transaction is matched to HR995 GRN records on the normalized invoice
+reference. CHQ transactions without a direct match inherit the GRN match of the INV
+they pay (same supplier, same date, same amount). This replaces the per-row scans in
+``fix_chq_linking.implement_chq_linking_fix`` and the dashboard's
+``enhanced_hr185_transaction_analysis``.
+"""
+
+import numpy as np
+import pandas as pd
+
+TRAIL_COLUMNS = [
+    'hr185_reference', 'hr185_reference_normalized', 'supplier_code', 'supplier_name',
+    'transaction_date', 'transaction_type', 'amount', 'has_direct_grn_match',
+    'grn_match_type', 'grn_match_count', 'linking_method', 'has_inherited_grn_match',
+    'match_notes', 'grn_voucher', 'grn_inv_no', 'grn_supplier', 'paired_inv_reference'
+]
+
+AMOUNT_TOLERANCE = 0.01
+
+
+def normalize_reference_series(refs):
+    """
+    Normalize references for HR185 ↔ HR995GRN linking.
+
+    Numeric references lose their leading zeros ('0001015578' → '1015578'); other
+    references are stripped of surrounding whitespace. Missing values become ''.
+
+    Args:
+        refs (pd.Series): Raw reference values (numeric or text)
+
+    Returns:
+        pd.Series: Normalized references as strings
+    """
+    if pd.api.types.is_numeric_dtype(refs):
+        as_int = pd.to_numeric(refs, errors='coerce')
+        whole = as_int.notna() & (as_int % 1 == 0)
+        result = refs.astype(str)
+        result[whole] = as_int[whole].astype('int64').astype(str)
+        result[refs.isna()] = ''
+        return result
+
+    text = refs.astype(str).str.strip()
+    is_numeric = text.str.fullmatch(r'[+-]?\d+', na=False)
+    digits = text[is_numeric]
+    sign = np.where(digits.str.startswith('-'), '-', '')
+    stripped = digits.str.lstrip('+-').str.lstrip('0').replace('', '0')
+    normalized = pd.Series(sign, index=digits.index) + stripped
+    # str(int('-0')) is '0'
+    normalized = normalized.where(normalized != '-0', '0')
+    text[is_numeric] = normalized
+    text[refs.isna()] = ''
+    return text
+
+
+def identify_inv_chq_payment_pairs(hr185_df):
+    """
+    Pair each INV with the CHQ transactions that pay it.
+
+    A CHQ pays an INV when both belong to the same supplier, share the transaction
+    date and their amounts agree within one cent.
+
+    Args:
+        hr185_df (pd.DataFrame): HR185 transactions
+
+    Returns:
+        pd.DataFrame: One row per INV-CHQ pair
+    """
+    pair_columns = ['supplier_code', 'supplier_name', 'date', 'inv_reference', 'chq_reference',
+                    'amount', 'inv_ref_normalized', 'chq_ref_normalized']
+    if hr185_df is None or hr185_df.empty:
+        return pd.DataFrame(columns=pair_columns)
+
+    transaction_type = hr185_df['transaction_type'].astype(str).str.upper()
+    keys = ['supplier_code', 'transaction_date']
+    inv = hr185_df.loc[transaction_type == 'INV', keys + ['supplier_name', 'reference', 'amount']]
+    chq = hr185_df.loc[transaction_type == 'CHQ', keys + ['reference', 'amount']]
+
+    pairs = inv.merge(chq, on=keys, suffixes=('_inv', '_chq'))
+    pairs = pairs[(pairs['amount_inv'] - pairs['amount_chq']).abs() < AMOUNT_TOLERANCE]
+    pairs = pairs.sort_values(keys, kind='stable')
+
+    return pd.DataFrame({
+        'supplier_code': pairs['supplier_code'].values,
+        'supplier_name': pairs['supplier_name'].values,
+        'date': pairs['transaction_date'].values,
+        'inv_reference': pairs['reference_inv'].values,
+        'chq_reference': pairs['reference_chq'].values,
+        'amount': pairs['amount_inv'].values,
+        'inv_ref_normalized': normalize_reference_series(pairs['reference_inv']).values,
+        'chq_ref_normalized': normalize_reference_series(pairs['reference_chq']).values
+    }, columns=pair_columns)
+
+
+def build_enhanced_transaction_trail(hr185_df, grn_df, pairs_df=None):
+    """
+    Build the enhanced HR185 transaction trail with CHQ inheritance.
+
+    Args:
+        hr185_df (pd.DataFrame): HR185 transactions
+        grn_df (pd.DataFrame): HR995 GRN records (needs inv_no, voucher, supplier_name)
+        pairs_df (pd.DataFrame): INV-CHQ pairs with inv_reference/chq_reference columns;
+            computed from hr185_df when not given
+
+    Returns:
+        pd.DataFrame: One row per HR185 transaction with TRAIL_COLUMNS
+    """
+    if hr185_df is None or hr185_df.empty:
+        return pd.DataFrame(columns=TRAIL_COLUMNS)
+    if pairs_df is None:
+        pairs_df = identify_inv_chq_payment_pairs(hr185_df)
+
+    trail = pd.DataFrame({
+        'hr185_reference': hr185_df['reference'].values,
+        'hr185_reference_normalized': normalize_reference_series(hr185_df['reference']).values,
+        'supplier_code': hr185_df['supplier_code'].values,
+        'supplier_name': hr185_df['supplier_name'].values,
+        'transaction_date': hr185_df['transaction_date'].values,
+        'transaction_type': hr185_df['transaction_type'].values,
+        'amount': hr185_df['amount'].values
+    })
+
+    # GRN lookup: match count and first matching GRN line per normalized invoice number
+    if grn_df is not None and not grn_df.empty:
+        grn_keys = normalize_reference_series(grn_df['inv_no'])
+        grn_lookup = pd.DataFrame({
+            'key': grn_keys.values,
+            'grn_voucher': grn_df['voucher'].values if 'voucher' in grn_df.columns else np.nan,
+            'grn_inv_no': grn_df['inv_no'].values,
+            'grn_supplier': grn_df['supplier_name'].values if 'supplier_name' in grn_df.columns else np.nan
+        })
+        grn_lookup = grn_lookup[grn_lookup['key'] != '']
+        match_counts = grn_lookup.groupby('key').size().rename('grn_match_count')
+        grn_lookup = grn_lookup.drop_duplicates('key', keep='first').set_index('key').join(match_counts)
+    else:
+        grn_lookup = pd.DataFrame(columns=['grn_voucher', 'grn_inv_no', 'grn_supplier', 'grn_match_count'])
+
+    direct = grn_lookup.reindex(trail['hr185_reference_normalized'].values)
+    direct_count = direct['grn_match_count'].fillna(0).astype(int).values
+    trail['has_direct_grn_match'] = direct_count > 0
+    trail['grn_match_type'] = np.where(trail['has_direct_grn_match'], 'direct', 'none')
+    trail['grn_match_count'] = direct_count
+    trail['linking_method'] = 'standard'
+    trail['has_inherited_grn_match'] = False
+
+    # CHQ inheritance: unmatched CHQs take the GRN match of their paired INV
+    is_chq = trail['transaction_type'].astype(str).str.upper() == 'CHQ'
+    needs_pair = is_chq & ~trail['has_direct_grn_match']
+    first_pairs = pairs_df.assign(chq_key=pairs_df['chq_reference'].astype(str)).drop_duplicates('chq_key', keep='first')
+    pair_lookup = first_pairs.set_index('chq_key')['inv_reference'].astype(object)
+    paired_inv = pd.Series(trail['hr185_reference'].astype(str).map(pair_lookup).values, index=trail.index)
+    paired_inv = paired_inv.where(needs_pair)
+    has_pair = paired_inv.notna()
+
+    inherited = grn_lookup.reindex(normalize_reference_series(paired_inv.fillna('')).values)
+    inherited_count = pd.Series(inherited['grn_match_count'].fillna(0).astype(int).values, index=trail.index)
+    inherits = has_pair & (inherited_count > 0)
+
+    trail['has_inherited_grn_match'] = inherits
+    trail.loc[inherits, 'grn_match_type'] = 'inherited_from_inv'
+    trail.loc[inherits, 'grn_match_count'] = inherited_count[inherits]
+    trail.loc[inherits, 'linking_method'] = 'inv_chq_inheritance'
+    trail['paired_inv_reference'] = paired_inv
+
+    # Matched GRN details come from the direct match, or from the paired INV when inherited
+    for col in ['grn_voucher', 'grn_inv_no', 'grn_supplier']:
+        values = pd.Series(direct[col].values, index=trail.index)
+        values[inherits] = inherited[col].values[inherits.values]
+        trail[col] = values
+
+    # Match notes
+    transaction_type = trail['transaction_type'].astype(str)
+    paired_text = paired_inv.astype(str)
+    trail['match_notes'] = np.select(
+        [
+            inherits,
+            has_pair,
+            needs_pair,
+            transaction_type == 'INV',
+            is_chq & trail['has_direct_grn_match']
+        ],
+        [
+            'Payment for INV ' + paired_text,
+            'Payment for INV ' + paired_text + ' (INV also unmatched)',
+            'Standalone CHQ transaction',
+            'Invoice transaction',
+            'CHQ with direct GRN match'
+        ],
+        default=transaction_type + ' transaction'
+    )
+
+    return trail[TRAIL_COLUMNS]
+
+
+def summarize_trail(trail_df):
+    """
+    Summarize match outcomes of an enhanced transaction trail.
+
+    Returns:
+        dict: Totals for direct, inherited and unmatched transactions
+    """
+    transaction_type = trail_df['transaction_type'].astype(str).str.upper()
+    direct = int(trail_df['has_direct_grn_match'].sum())
+    inherited = int(trail_df['has_inherited_grn_match'].sum())
+    return {
+        'total_transactions': len(trail_df),
+        'inv_transactions': int((transaction_type == 'INV').sum()),
+        'chq_transactions': int((transaction_type == 'CHQ').sum()),
+        'direct_matches': direct,
+        'inherited_matches': inherited,
+        'unmatched': len(trail_df) - direct - inherited,
+        'chq_fixed': int((trail_df['has_inherited_grn_match'] & (transaction_type == 'CHQ')).sum())
+    }
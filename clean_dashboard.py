@@ -12,8 +12,15 @@ from pathlib import Path
 import numpy as np
 from datetime import datetime, timedelta
 import warnings
+from description_classifier import attach_categories
+from scoa_votes import decompose_votes, SCOA_MIN_LENGTH
+from data_residency import enable_copy_on_write, render_memory_panel, shared_store, streamlit_session_id
+from table_search import file_snapshot
 warnings.filterwarnings('ignore')
 
+# Datasets are shared read-only across sessions; views are copy-on-write
+enable_copy_on_write()
+
 # Configure Streamlit page
 st.set_page_config(
     page_title="Stock Management Dashboard",
@@ -38,13 +45,13 @@ class StockDashboard:
         self.data_path = Path("output")
         self.cache_data()
     
-    @st.cache_data
-    def load_data(_self, filename):
-        """Load CSV data with caching."""
+    def load_data(self, filename):
+        """Load CSV data as a shared read-only view (one copy per file snapshot for all sessions)."""
         try:
-            file_path = _self.data_path / filename
+            file_path = self.data_path / filename
             if file_path.exists():
-                return pd.read_csv(file_path)
+                return shared_store().get(f"clean:{filename}", file_snapshot(file_path),
+                                          lambda: pd.read_csv(file_path), session_id=streamlit_session_id())
             else:
                 st.warning(f"File not found: {filename}")
                 return pd.DataFrame()
@@ -88,16 +95,11 @@ class StockDashboard:
                               'breaker', 'transformer', 'conductor', 'insulator', 'voltage', 'current', 
                               'meter', 'panel', 'junction', 'fuse', 'relay', 'contactor']
         
-        # Create regex patterns
-        ppe_pattern = '|'.join(ppe_patterns)
-        electrical_pattern = '|'.join(electrical_patterns)
-        
-        # Find matches
-        ppe_mask = df['description'].str.contains(ppe_pattern, case=False, na=False)
-        electrical_mask = df['description'].str.contains(electrical_pattern, case=False, na=False)
+        # Classify each unique description once, then select rows by flag
+        categorized = attach_categories(df, taxonomy={'PPE': ppe_patterns, 'Electrical': electrical_patterns})
         
-        ppe_items = df[ppe_mask].copy()
-        electrical_items = df[electrical_mask].copy()
+        ppe_items = df[categorized['is_ppe'].values].copy()
+        electrical_items = df[categorized['is_electrical'].values].copy()
         
         # Add category labels
         ppe_items['category'] = 'PPE'
@@ -122,46 +124,25 @@ class StockDashboard:
         
         return auth_analysis.reset_index()
     
-    def parse_vote_number(self, vote_no):
-        """Parse SCOA vote number into components."""
-        if pd.isna(vote_no):
-            return None, None, None, None, None
-        
-        vote_str = str(vote_no).strip()
-        
-        # SCOA format typically: AAAABBBBBBCCCDDDDD where:
-        # AAAA = Department/Entity (4 digits)
-        # BBBBBB = Programme (6 digits) 
-        # CCC = Sub-programme (3 digits)
-        # DDDDD = Project/Item (5 digits)
-        
-        if len(vote_str) >= 18:
-            department = vote_str[:4] if len(vote_str) >= 4 else vote_str
-            programme = vote_str[4:10] if len(vote_str) >= 10 else None
-            sub_programme = vote_str[10:13] if len(vote_str) >= 13 else None
-            project = vote_str[13:18] if len(vote_str) >= 18 else None
-            remainder = vote_str[18:] if len(vote_str) > 18 else None
-            
-            return department, programme, sub_programme, project, remainder
-        
-        return vote_str, None, None, None, None
-    
     def analyze_scoa_structure(self, df, vote_field):
         """Analyze SCOA vote structure in dataset."""
         if vote_field not in df.columns:
             return pd.DataFrame()
         
-        # Parse vote numbers
-        vote_components = df[vote_field].apply(self.parse_vote_number)
-        
-        # Create components dataframe
-        components_df = pd.DataFrame(vote_components.tolist(), 
-                                   columns=['department', 'programme', 'sub_programme', 'project', 'remainder'])
+        # SCOA format: AAAABBBBBBCCCDDDDD (department, programme, sub-programme, project/item),
+        # split with vectorized fixed-position slicing into categorical columns
+        components = decompose_votes(df[vote_field])
+        vote_str = components['vote_str']
         
-        # Add back to original dataframe
         result_df = df.copy()
-        for col in components_df.columns:
-            result_df[f'scoa_{col}'] = components_df[col]
+        # Votes shorter than 18 characters keep the whole vote as the department code
+        result_df['scoa_department'] = components['department'].astype(object).where(
+            components['is_valid_scoa'], vote_str.astype(object)).astype('category')
+        result_df['scoa_programme'] = components['programme']
+        result_df['scoa_sub_programme'] = components['sub_programme']
+        result_df['scoa_project'] = components['economic_class']
+        result_df['scoa_remainder'] = vote_str.str.slice(SCOA_MIN_LENGTH).where(
+            components['vote_length'] > SCOA_MIN_LENGTH).astype('category')
         
         return result_df
     
@@ -193,6 +174,7 @@ class StockDashboard:
             "Select Analysis",
             ["📈 Overview", "🏪 Supplier Analytics", "📦 Inventory Analytics", "💰 Financial Analytics", "🔗 Data Relationships", "📋 Comprehensive Report"]
         )
+        render_memory_panel(st)
         
         # Main content
         if page == "📈 Overview":
@@ -2215,7 +2197,7 @@ class StockDashboard:
             if 'scoa_department' in scoa_df.columns:
                 st.markdown("#### Department Analysis")
                 
-                dept_analysis = scoa_df.groupby('scoa_department').agg({
+                dept_analysis = scoa_df.groupby('scoa_department', observed=True).agg({
                     'vote_no': 'count',
                     'issue_cost': 'sum' if 'issue_cost' in scoa_df.columns else 'count'
                 }).round(2)
@@ -2254,7 +2236,7 @@ class StockDashboard:
             if 'scoa_programme' in scoa_df.columns:
                 st.markdown("#### Programme Analysis")
                 
-                prog_analysis = scoa_df.groupby('scoa_programme').agg({
+                prog_analysis = scoa_df.groupby('scoa_programme', observed=True).agg({
                     'vote_no': 'count',
                     'issue_cost': 'sum' if 'issue_cost' in scoa_df.columns else 'count'
                 }).round(2)
@@ -2401,7 +2383,7 @@ class StockDashboard:
                 
                 # Department usage for PPE/Electrical
                 if 'scoa_department' in ppe_electrical_scoa.columns and 'category' in ppe_electrical_scoa.columns:
-                    dept_category_analysis = ppe_electrical_scoa.groupby(['scoa_department', 'category']).size().reset_index(name='count')
+                    dept_category_analysis = ppe_electrical_scoa.groupby(['scoa_department', 'category'], observed=True).size().reset_index(name='count')
                     
                     fig = px.bar(
                         dept_category_analysis,
@@ -12,14 +12,11 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import seaborn as sns
-import matplotlib.pyplot as plt
 from pathlib import Path
 import numpy as np
 from datetime import datetime, timedelta
 import warnings
 from typing import Dict, List, Optional
-import calendar
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
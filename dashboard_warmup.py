@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Dashboard Cache Warm-up
+Pre-loads the shared dataset store before the first user request.
+
+Without warm-up the first session after a server start (or after new pipeline output)
+pays for every CSV parse, the linked-data normalization, the aggregate artifacts and
+the Data Tables search indexes. Warm-up runs the same loaders ahead of time so those
+entries are already resident in the process-wide store (see data_residency).
+
+Warm-up can run synchronously before the server starts (the pre-warmed option of
+``launch_dashboard_enhanced.py``) or on a background thread started by the app itself.
+Progress, readiness and the warm-up time are kept in a process-wide WarmupState and
+shown in the dashboard sidebar. A forced refresh requested while a warm-up is running
+is queued and runs as soon as the current one finishes.
+
+Warm-up tasks run outside any Streamlit script run, so they must call the pure loaders
+(no st.* calls).
+"""
+
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WarmupState:
+    """Thread-safe progress of the current (or last) warm-up run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.status = 'idle'
+        self.started_at = None
+        self.finished_at = None
+        self.tasks_total = 0
+        self.tasks_done = 0
+        self.current_task = None
+        self.timings = []
+        self.errors = []
+        # Tasks of a refresh requested while a warm-up was running
+        self.pending_tasks = None
+
+    def begin(self, total):
+        with self._lock:
+            self.status = 'warming'
+            self.started_at = time.time()
+            self.finished_at = None
+            self.tasks_total = total
+            self.tasks_done = 0
+            self.current_task = None
+            self.timings = []
+            self.errors = []
+
+    def task_started(self, name):
+        with self._lock:
+            self.current_task = name
+
+    def task_finished(self, name, seconds, error=None):
+        with self._lock:
+            self.tasks_done += 1
+            self.timings.append((name, seconds))
+            if error is not None:
+                self.errors.append((name, error))
+
+    def finish(self):
+        """Mark the run finished, or hand back the queued refresh tasks to run next."""
+        with self._lock:
+            if self.pending_tasks is not None:
+                tasks, self.pending_tasks = self.pending_tasks, None
+                return tasks
+            self.status = 'ready'
+            self.finished_at = time.time()
+            self.current_task = None
+            return None
+
+    def claim(self, force=False, tasks=None):
+        """
+        Mark a warm-up as pending.
+
+        Returns False when one is running or has already run. A forced claim while a
+        warm-up is running queues `tasks` to run after it instead.
+        """
+        with self._lock:
+            if self.status == 'warming':
+                if force and tasks is not None:
+                    self.pending_tasks = tasks
+                return False
+            if self.status == 'ready' and not force:
+                return False
+            self.status = 'warming'
+            return True
+
+    def snapshot(self):
+        """Return a consistent copy of the progress for display."""
+        with self._lock:
+            end = self.finished_at or time.time()
+            return {
+                'status': self.status,
+                'tasks_total': self.tasks_total,
+                'tasks_done': self.tasks_done,
+                'current_task': self.current_task,
+                'seconds': end - self.started_at if self.started_at else None,
+                'slowest': sorted(self.timings, key=lambda t: t[1], reverse=True)[:5],
+                'errors': list(self.errors),
+                'refresh_queued': self.pending_tasks is not None
+            }
+
+
+_state = WarmupState()
+
+
+def warmup_state():
+    """Return the process-wide warm-up state."""
+    return _state
+
+
+def run_warmup(tasks, state=None, verbose=False):
+    """
+    Run warm-up tasks in order, recording progress and per-task timings.
+
+    A failing task is logged and recorded; the remaining tasks still run. A refresh
+    queued while the tasks run is run straight after them.
+
+    Args:
+        tasks (list): (name, callable) pairs
+        state (WarmupState): Progress holder; defaults to the process-wide state
+        verbose (bool): Print one line per task (launcher use)
+
+    Returns:
+        dict: Final progress snapshot (status, tasks, seconds, slowest tasks, errors)
+    """
+    state = state or _state
+    while tasks is not None:
+        state.begin(len(tasks))
+        for name, task in tasks:
+            state.task_started(name)
+            start = time.perf_counter()
+            error = None
+            try:
+                task()
+            except Exception as e:
+                error = str(e)
+                logger.warning("Warm-up task %s failed: %s", name, e)
+            seconds = time.perf_counter() - start
+            state.task_finished(name, seconds, error)
+            if verbose:
+                marker = "❌" if error else "✅"
+                print(f"   {marker} {name} ({seconds:.2f}s)")
+        tasks = state.finish()
+    return state.snapshot()
+
+
+def start_background_warmup(tasks, force=False, state=None):
+    """
+    Start warm-up on a daemon thread unless one is running or has already completed.
+
+    Args:
+        tasks (list): (name, callable) pairs
+        force (bool): Re-warm even if a previous warm-up completed (new data snapshot); while
+            a warm-up is running the refresh is queued to run after it
+
+    Returns:
+        threading.Thread or None: The warm-up thread, or None when nothing was started
+    """
+    state = state or _state
+    if not state.claim(force, tasks):
+        return None
+    thread = threading.Thread(target=run_warmup, args=(tasks, state), name="dashboard-warmup", daemon=True)
+    thread.start()
+    return thread
+
+
+def format_warmup_report(progress):
+    """Return a short human-readable warm-up report."""
+    lines = [f"Cache warm-up {progress['status']}: {progress['tasks_done']}/{progress['tasks_total']} tasks"
+             + (f" in {progress['seconds']:.1f}s" if progress['seconds'] is not None else "")]
+    if progress['slowest']:
+        lines.append("Slowest: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in progress['slowest']))
+    for name, error in progress['errors']:
+        lines.append(f"Failed: {name}: {error}")
+    return "\n".join(lines)
+
+
+def render_warmup_status(st_module, state=None):
+    """Render warm-up readiness in the sidebar."""
+    progress = (state or _state).snapshot()
+    if progress['status'] == 'warming':
+        st_module.sidebar.caption(f"🔥 Warming caches: {progress['tasks_done']}/{progress['tasks_total']}"
+                                  + (f" ({progress['current_task']})" if progress['current_task'] else "")
+                                  + ("; refresh queued" if progress['refresh_queued'] else ""))
+    elif progress['status'] == 'ready':
+        st_module.sidebar.caption(f"✅ Caches ready: {progress['tasks_total']} items warmed in "
+                                  f"{progress['seconds']:.1f}s"
+                                  + (f", {len(progress['errors'])} failed" if progress['errors'] else ""))
+
+
+def serve_warmed(script, tasks, streamlit_args=()):
+    """
+    Warm the caches, then start the Streamlit server in this same process.
+
+    The shared store is per process, so the server must run in the process that was
+    warmed; ``streamlit run`` in a subprocess would start cold.
+
+    Args:
+        script (str): Dashboard script to serve
+        tasks (list): (name, callable) warm-up pairs built from the dashboard
+        streamlit_args (iterable): Extra ``streamlit run`` options, e.g. ('--server.port', '8502')
+    """
+    from streamlit.web import cli as streamlit_cli
+
+    print("🔥 Warming dashboard caches...")
+    progress = run_warmup(tasks, verbose=True)
+    print(format_warmup_report(progress))
+    print("✅ Caches ready; starting server")
+
+    sys.argv = ["streamlit", "run", script, *streamlit_args]
+    sys.exit(streamlit_cli.main())
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+On-Demand Data Export
+Streams filtered dashboard views to CSV, compressed CSV or Parquet files only when an
+export is requested.
+
+Rows are written in chunks so a large view never has to be serialized into a single
+in-memory string. Exports above a row threshold run on a background worker thread
+that reports progress, so the dashboard stays interactive while the file is built.
+
+Only the most recent exports are kept: older finished jobs and their files are pruned
+whenever a new export is submitted.
+"""
+
+import gzip
+import importlib.util
+import re
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+# pyarrow.parquet is only imported when a Parquet export is written
+PARQUET_AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+# Export formats: label -> (file suffix, mime type)
+EXPORT_FORMATS = {
+    'CSV': ('.csv', 'text/csv'),
+    'Compressed CSV (gzip)': ('.csv.gz', 'application/gzip'),
+}
+if PARQUET_AVAILABLE:
+    EXPORT_FORMATS['Parquet (columnar)'] = ('.parquet', 'application/octet-stream')
+
+DEFAULT_CHUNK_ROWS = 50000
+BACKGROUND_ROW_THRESHOLD = 100000
+# Finished export files (and jobs) kept in the export folder
+DEFAULT_MAX_EXPORTS = 20
+
+
+def iter_csv_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Yield a DataFrame as CSV text, one chunk of rows at a time.
+
+    Args:
+        df (pd.DataFrame): Data to serialize
+        chunk_rows (int): Rows per chunk
+
+    Yields:
+        str: CSV text for the chunk (the first chunk includes the header)
+    """
+    if df.empty:
+        yield df.to_csv(index=False)
+        return
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, header=(start == 0))
+
+
+def write_export(df, file_path, export_format='CSV', chunk_rows=DEFAULT_CHUNK_ROWS, progress_callback=None):
+    """
+    Write a DataFrame to disk in the requested format, chunk by chunk.
+
+    Args:
+        df (pd.DataFrame): Data to export
+        file_path (Path): Destination file
+        export_format (str): One of the EXPORT_FORMATS labels
+        chunk_rows (int): Rows written per chunk
+        progress_callback (callable): Called with the fraction of rows written
+
+    Returns:
+        Path: The written file
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    file_path = Path(file_path)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    total_rows = max(len(df), 1)
+
+    def report(rows_written):
+        if progress_callback:
+            progress_callback(min(rows_written / total_rows, 1.0))
+
+    if export_format == 'Parquet (columnar)':
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        # Object columns with mixed types are written as text so every chunk shares one schema
+        export_df = df.copy()
+        for col in export_df.select_dtypes(include=['object']).columns:
+            export_df[col] = export_df[col].astype('string')
+        schema = pa.Schema.from_pandas(export_df.head(0), preserve_index=False)
+        with pq.ParquetWriter(file_path, schema) as writer:
+            for start in range(0, len(export_df), chunk_rows):
+                chunk = export_df.iloc[start:start + chunk_rows]
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+                report(start + len(chunk))
+    else:
+        opener = gzip.open if export_format == 'Compressed CSV (gzip)' else open
+        with opener(file_path, 'wt', encoding='utf-8', newline='') as handle:
+            rows_written = 0
+            for text in iter_csv_chunks(df, chunk_rows):
+                handle.write(text)
+                rows_written += chunk_rows
+                report(rows_written)
+
+    report(total_rows)
+    return file_path
+
+
+class ExportJob:
+    """A single export request and its progress."""
+
+    def __init__(self, df, file_path, export_format):
+        self.job_id = uuid.uuid4().hex[:12]
+        self.df = df
+        self.file_path = Path(file_path)
+        self.export_format = export_format
+        self.row_count = len(df)
+        self.progress = 0.0
+        self.status = 'queued'
+        self.error = None
+        self.created_at = datetime.now()
+
+    @property
+    def mime_type(self):
+        return EXPORT_FORMATS[self.export_format][1]
+
+    @property
+    def done(self):
+        return self.status in ('completed', 'failed')
+
+    def _set_progress(self, fraction):
+        self.progress = fraction
+
+    def run(self):
+        """Write the export file, recording progress and any error."""
+        self.status = 'running'
+        try:
+            write_export(self.df, self.file_path, self.export_format, progress_callback=self._set_progress)
+            self.status = 'completed'
+        except Exception as e:
+            self.error = str(e)
+            self.status = 'failed'
+        finally:
+            # The frame is no longer needed once the file is written
+            self.df = None
+
+
+class ExportManager:
+    """Creates export jobs and runs large ones on background worker threads."""
+
+    def __init__(self, export_folder, background_row_threshold=BACKGROUND_ROW_THRESHOLD,
+                 max_exports=DEFAULT_MAX_EXPORTS):
+        """
+        Initialize the export manager.
+
+        Args:
+            export_folder (str): Folder where export files are written
+            background_row_threshold (int): Exports larger than this run in the background
+            max_exports (int): Number of most recent export files to keep
+        """
+        self.export_folder = Path(export_folder)
+        self.background_row_threshold = background_row_threshold
+        self.max_exports = max_exports
+        self.jobs = {}
+        self._lock = threading.Lock()
+
+    def build_file_name(self, base_name, export_format):
+        """Build a unique timestamped export file name from a dataset or section name."""
+        stem = re.sub(r'[^\w\-]+', '_', Path(base_name).stem).strip('_') or 'export'
+        suffix = EXPORT_FORMATS[export_format][0]
+        # The random token keeps exports started within the same second apart
+        return f"{stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}{suffix}"
+
+    def submit(self, df, base_name, export_format='CSV'):
+        """
+        Start an export of the given view.
+
+        Small exports are written immediately; larger ones run on a worker thread.
+
+        Args:
+            df (pd.DataFrame): Current filtered view
+            base_name (str): Name used to build the export file name
+            export_format (str): One of the EXPORT_FORMATS labels
+
+        Returns:
+            ExportJob: The submitted job
+        """
+        file_path = self.export_folder / self.build_file_name(base_name, export_format)
+        job = ExportJob(df, file_path, export_format)
+        with self._lock:
+            self.jobs[job.job_id] = job
+        self.prune()
+
+        if job.row_count > self.background_row_threshold:
+            worker = threading.Thread(target=job.run, name=f"export-{job.job_id}", daemon=True)
+            worker.start()
+        else:
+            job.run()
+        return job
+
+    def prune(self):
+        """
+        Delete finished exports beyond the most recent max_exports.
+
+        Jobs still running are never pruned. Export files left by earlier dashboard
+        processes (no job) are pruned oldest first by the same limit.
+
+        Returns:
+            int: Number of files deleted
+        """
+        with self._lock:
+            finished = sorted((job for job in self.jobs.values() if job.done), key=lambda job: job.created_at)
+            active = {job.file_path for job in self.jobs.values() if not job.done}
+            stale_jobs = finished[:max(len(finished) - self.max_exports, 0)]
+            for job in stale_jobs:
+                del self.jobs[job.job_id]
+            kept = {job.file_path for job in self.jobs.values()}
+
+        removed = 0
+        if not self.export_folder.exists():
+            return removed
+        files = sorted((path for path in self.export_folder.iterdir() if path.is_file() and path not in active),
+                       key=lambda path: path.stat().st_mtime)
+        stale_files = {job.file_path for job in stale_jobs}
+        remaining = len(files)
+        for path in files:
+            if path in kept or (path not in stale_files and remaining <= self.max_exports):
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except FileNotFoundError:
+                pass
+            remaining -= 1
+        return removed
+
+    def get(self, job_id):
+        """Return a job by id, or None if it is unknown."""
+        return self.jobs.get(job_id)
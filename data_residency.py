@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Shared Dataset Residency
+One read-only copy of each output dataset (and of the artifacts derived from it) per
+server process, shared by every Streamlit session.
+
+``st.cache_data`` pickles its return value and hands every caller a fresh unpickled
+copy, so each concurrent session (and each section that reloads a dataset) holds its
+own full copy of the tables. The DatasetStore instead keeps exactly one resident frame
+per dataset snapshot (file modification time and size) and hands out shallow views.
+
+Views share the resident column buffers. With pandas Copy-on-Write enabled
+(``enable_copy_on_write``), a view that adds or overwrites columns copies only what it
+changes, so the resident frame is never modified and no session can affect another.
+When Copy-on-Write is off the store falls back to handing out deep copies.
+
+The store also keeps memory accounting (resident bytes per dataset and the sessions
+sharing it) for the dashboard's memory readout.
+"""
+
+import os
+import threading
+import time
+
+import pandas as pd
+
+# Sessions not seen for this long no longer count as sharing a dataset
+SESSION_TTL_SECONDS = 30 * 60
+
+
+def enable_copy_on_write():
+    """Turn on pandas Copy-on-Write so shallow views of shared frames are safe to modify."""
+    pd.set_option('mode.copy_on_write', True)
+
+
+def copy_on_write_enabled():
+    return pd.get_option('mode.copy_on_write') is True
+
+
+def frame_nbytes(df):
+    """Return the in-memory size of a DataFrame, including Python string payloads."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def value_nbytes(value):
+    """Return the in-memory size of a stored value (DataFrame or dict of DataFrames; 0 otherwise)."""
+    if isinstance(value, pd.DataFrame):
+        return frame_nbytes(value)
+    if isinstance(value, dict):
+        return sum(value_nbytes(v) for v in value.values())
+    return 0
+
+
+def value_rows(value):
+    if isinstance(value, pd.DataFrame):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(value_rows(v) for v in value.values())
+    return 0
+
+
+def make_view(value):
+    """Return a caller-safe view of a stored value; DataFrames (also inside dicts) are shallow-copied."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy(deep=not copy_on_write_enabled())
+    if isinstance(value, dict):
+        return {k: make_view(v) for k, v in value.items()}
+    return value
+
+
+def process_rss_bytes():
+    """Return the resident set size of this process, or None when it cannot be read."""
+    try:
+        import psutil
+        return int(psutil.Process(os.getpid()).memory_info().rss)
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class DatasetStore:
+    """Process-wide store of read-only datasets keyed by name and file snapshot."""
+
+    def __init__(self, session_ttl=SESSION_TTL_SECONDS):
+        self.session_ttl = session_ttl
+        self._entries = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+
+    def _key_lock(self, name):
+        with self._lock:
+            return self._key_locks.setdefault(name, threading.Lock())
+
+    def get(self, name, snapshot, loader, session_id=None):
+        """
+        Return a view of a resident value, loading it once per snapshot.
+
+        Values are usually DataFrames; dicts of DataFrames (linked bundles, report sets)
+        and other read-only objects (search indexes, profiles) can be stored as well.
+
+        Args:
+            name (str): Entry name, e.g. 'hr995_grn.csv'
+            snapshot (tuple): Source snapshot; a new snapshot replaces the resident value
+            loader (callable): Zero-argument function returning the value
+            session_id (str): Optional id of the requesting session for memory accounting
+
+        Returns:
+            A view sharing the resident column buffers (see make_view)
+        """
+        with self._key_lock(name):
+            entry = self._entries.get(name)
+            if entry is None or entry['snapshot'] != snapshot:
+                value = loader()
+                entry = {
+                    'snapshot': snapshot,
+                    'value': value,
+                    'rows': value_rows(value),
+                    'nbytes': value_nbytes(value),
+                    'loaded_at': time.time(),
+                    'views': 0,
+                    'sessions': {}
+                }
+                self._entries[name] = entry
+            entry['views'] += 1
+            if session_id is not None:
+                entry['sessions'][session_id] = time.time()
+            value = entry['value']
+
+        return make_view(value)
+
+    def is_current(self, name, snapshot):
+        """Check whether an entry is resident for the given snapshot."""
+        with self._lock:
+            entry = self._entries.get(name)
+        return entry is not None and entry['snapshot'] == snapshot
+
+    def clear(self):
+        """Drop every resident dataset; the next request reloads from disk."""
+        with self._lock:
+            self._entries.clear()
+
+    def _active_sessions(self, entry, now):
+        return sum(1 for seen in entry['sessions'].values() if now - seen <= self.session_ttl)
+
+    def memory_report(self):
+        """
+        Per-dataset memory accounting.
+
+        Returns:
+            pd.DataFrame: Rows, resident MB, active sessions, views served and the MB a
+                copy-per-session cache would hold for the same sessions
+        """
+        now = time.time()
+        with self._lock:
+            entries = list(self._entries.items())
+        rows = []
+        for name, entry in entries:
+            sessions = self._active_sessions(entry, now)
+            resident_mb = entry['nbytes'] / 1024 ** 2
+            rows.append({
+                'dataset': name,
+                'rows': entry['rows'],
+                'resident_mb': round(resident_mb, 1),
+                'sessions': sessions,
+                'views_served': entry['views'],
+                # st.cache_data keeps the pickled entry plus one unpickled copy per session
+                'copy_per_session_mb': round(resident_mb * (sessions + 1), 1)
+            })
+        columns = ['dataset', 'rows', 'resident_mb', 'sessions', 'views_served', 'copy_per_session_mb']
+        return pd.DataFrame(rows, columns=columns).sort_values('resident_mb', ascending=False)
+
+    def summary(self):
+        """Totals for the memory readout."""
+        report = self.memory_report()
+        now = time.time()
+        with self._lock:
+            all_sessions = set()
+            for entry in self._entries.values():
+                all_sessions.update(s for s, seen in entry['sessions'].items() if now - seen <= self.session_ttl)
+        resident_mb = float(report['resident_mb'].sum())
+        copy_mb = float(report['copy_per_session_mb'].sum())
+        rss = process_rss_bytes()
+        return {
+            'datasets': len(report),
+            'active_sessions': len(all_sessions),
+            'resident_mb': resident_mb,
+            'copy_per_session_mb': copy_mb,
+            'saved_mb': max(copy_mb - resident_mb, 0.0),
+            'process_rss_mb': rss / 1024 ** 2 if rss is not None else None,
+            'copy_on_write': copy_on_write_enabled()
+        }
+
+
+def streamlit_session_id():
+    """Return the id of the Streamlit session running the current script, if any."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+_shared_store = DatasetStore()
+
+
+def shared_store():
+    """Return the process-wide dataset store."""
+    return _shared_store
+
+
+def render_memory_panel(st_module, store=None):
+    """Render the shared dataset memory readout in the sidebar."""
+    store = store or shared_store()
+    summary = store.summary()
+    with st_module.sidebar.expander("💾 Memory (shared datasets)", expanded=False):
+        st_module.metric("Resident Datasets", f"{summary['resident_mb']:,.1f} MB",
+                         help=f"{summary['datasets']} datasets held once for all sessions")
+        st_module.metric("Active Sessions", f"{summary['active_sessions']:,}")
+        st_module.metric("Saved vs Copy-per-Session", f"{summary['saved_mb']:,.1f} MB",
+                         help="Estimated against a cache that keeps a pickled entry plus one copy per session")
+        if summary['process_rss_mb'] is not None:
+            st_module.caption(f"Process RSS: {summary['process_rss_mb']:,.0f} MB")
+        if not summary['copy_on_write']:
+            st_module.caption("⚠️ pandas Copy-on-Write is off; sessions receive deep copies")
+        report = store.memory_report()
+        if not report.empty:
+            st_module.dataframe(report, hide_index=True)
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Dataset Profiler
+Writes a profile artifact for every output dataset produced by the Stock Data Processor.
+
+Each profile records column dtypes, null counts, distinct counts, top-k values,
+numeric summaries and histograms, so dashboard panels such as "Column Information"
+and "Quick Analysis" can read precomputed statistics instead of scanning the table on
+every rerun. Profiles are keyed by the source file's snapshot (modification time and
+size); re-running the profiler only re-profiles datasets whose files have changed.
+"""
+
+import json
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from table_search import file_snapshot
+
+PROFILE_FOLDER_NAME = "profiles"
+PROFILE_VERSION = 1
+
+
+def _to_builtin(value):
+    """Convert numpy/pandas scalars to JSON-serializable Python values."""
+    if value is None:
+        return None
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.floating, float)):
+        return None if np.isnan(value) else float(value)
+    if isinstance(value, (np.bool_,)):
+        return bool(value)
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    return value if isinstance(value, (int, str, bool)) else str(value)
+
+
+def profile_dataframe(df, top_k=10, histogram_bins=20):
+    """
+    Compute column statistics for a DataFrame.
+
+    Args:
+        df (pd.DataFrame): Dataset to profile
+        top_k (int): Number of most frequent values kept per text column
+        histogram_bins (int): Number of histogram bins per numeric column
+
+    Returns:
+        dict: Profile with row count and per-column statistics
+    """
+    columns = {}
+    null_counts = df.isna().sum()
+    distinct_counts = df.nunique(dropna=True)
+
+    for col in df.columns:
+        series = df[col]
+        column_profile = {
+            'dtype': str(series.dtype),
+            'non_null_count': int(len(series) - null_counts[col]),
+            'null_count': int(null_counts[col]),
+            'distinct_count': int(distinct_counts[col]),
+        }
+
+        if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            values = series.dropna()
+            summary = values.describe()
+            column_profile['numeric_summary'] = {stat: _to_builtin(summary.get(stat)) for stat in
+                                                 ['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']}
+            finite_values = values[np.isfinite(values)]
+            if len(finite_values) > 0:
+                counts, edges = np.histogram(finite_values, bins=histogram_bins)
+                column_profile['histogram'] = {
+                    'counts': [int(c) for c in counts],
+                    'bin_edges': [float(e) for e in edges]
+                }
+        else:
+            top_values = series.value_counts(dropna=True).head(top_k)
+            column_profile['top_values'] = [
+                {'value': _to_builtin(value), 'count': int(count)} for value, count in top_values.items()
+            ]
+
+        columns[col] = column_profile
+
+    return {
+        'row_count': int(len(df)),
+        'column_count': int(len(df.columns)),
+        'columns': columns
+    }
+
+
+def profile_path(output_folder, filename):
+    """Return the profile artifact path for an output dataset."""
+    return Path(output_folder) / PROFILE_FOLDER_NAME / f"{Path(filename).stem}.profile.json"
+
+
+def load_profile(output_folder, filename):
+    """
+    Load the profile for an output dataset if it matches the current file snapshot.
+
+    Args:
+        output_folder (str): Folder containing the output CSV files
+        filename (str): Dataset file name, e.g. 'hr995_grn.csv'
+
+    Returns:
+        dict or None: The profile, or None when it is missing or stale
+    """
+    artifact = profile_path(output_folder, filename)
+    if not artifact.exists():
+        return None
+    try:
+        with open(artifact, 'r', encoding='utf-8') as f:
+            profile = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    snapshot = file_snapshot(Path(output_folder) / filename)
+    if snapshot is None or profile.get('source_snapshot') != list(snapshot):
+        return None
+    if profile.get('profile_version') != PROFILE_VERSION:
+        return None
+    return profile
+
+
+def column_info_table(profile):
+    """Build the dashboard "Column Information" table from a profile."""
+    return pd.DataFrame([
+        {
+            'Column': col,
+            'Data Type': stats['dtype'],
+            'Non-Null Count': f"{stats['non_null_count']:,}",
+            'Null Count': f"{stats['null_count']:,}",
+            'Unique Values': f"{stats['distinct_count']:,}"
+        }
+        for col, stats in profile['columns'].items()
+    ])
+
+
+def numeric_summary_table(profile):
+    """Build a describe()-style numeric summary table from a profile."""
+    summaries = {col: stats['numeric_summary'] for col, stats in profile['columns'].items()
+                 if 'numeric_summary' in stats}
+    return pd.DataFrame(summaries)
+
+
+def top_values_series(profile, column):
+    """Return the stored top values of a text column as a Series of counts."""
+    top_values = profile['columns'].get(column, {}).get('top_values', [])
+    return pd.Series({str(item['value']): item['count'] for item in top_values}, dtype='int64')
+
+
+class DatasetProfiler:
+    """Writes and incrementally refreshes profile artifacts for output datasets."""
+
+    def __init__(self, output_folder="output", top_k=10, histogram_bins=20):
+        """
+        Initialize the profiler.
+
+        Args:
+            output_folder (str): Folder containing the output CSV files
+            top_k (int): Number of most frequent values kept per text column
+            histogram_bins (int): Number of histogram bins per numeric column
+        """
+        self.output_folder = Path(output_folder)
+        self.profile_folder = self.output_folder / PROFILE_FOLDER_NAME
+        self.top_k = top_k
+        self.histogram_bins = histogram_bins
+
+    def profile_file(self, filename):
+        """Profile a single output dataset and write its artifact."""
+        file_path = self.output_folder / filename
+        df = pd.read_csv(file_path, low_memory=False)
+
+        profile = profile_dataframe(df, self.top_k, self.histogram_bins)
+        profile['profile_version'] = PROFILE_VERSION
+        profile['dataset'] = Path(filename).name
+        profile['source_snapshot'] = list(file_snapshot(file_path))
+        profile['profiled_at'] = datetime.now().isoformat(timespec='seconds')
+
+        self.profile_folder.mkdir(parents=True, exist_ok=True)
+        with open(profile_path(self.output_folder, filename), 'w', encoding='utf-8') as f:
+            json.dump(profile, f, indent=1)
+        return profile
+
+    def refresh_profiles(self, force=False):
+        """
+        Profile every output dataset whose file changed since it was last profiled.
+
+        Args:
+            force (bool): Re-profile every dataset regardless of snapshot
+
+        Returns:
+            dict: Counts of 'profiled', 'unchanged' and 'failed' datasets
+        """
+        summary = {'profiled': 0, 'unchanged': 0, 'failed': 0}
+        for file_path in sorted(self.output_folder.glob("*.csv")):
+            if not force and load_profile(self.output_folder, file_path.name) is not None:
+                summary['unchanged'] += 1
+                continue
+            try:
+                self.profile_file(file_path.name)
+                summary['profiled'] += 1
+            except Exception as e:
+                print(f"⚠️ Failed to profile {file_path.name}: {str(e)}")
+                summary['failed'] += 1
+
+        # Remove artifacts for datasets that no longer exist
+        if self.profile_folder.exists():
+            for artifact in self.profile_folder.glob("*.profile.json"):
+                dataset_name = artifact.name[:-len(".profile.json")] + ".csv"
+                if not (self.output_folder / dataset_name).exists():
+                    artifact.unlink()
+
+        return summary
+
+
+def main():
+    """Refresh dataset profiles for the output folder."""
+    import sys
+
+    force = '--force' in sys.argv
+    profiler = DatasetProfiler("output")
+    summary = profiler.refresh_profiles(force=force)
+    print(f"✅ Dataset profiles: {summary['profiled']} profiled, "
+          f"{summary['unchanged']} unchanged, {summary['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Item Description Classifier
+Categorizes stock item descriptions (PPE, Electrical, ...) once per unique description.
+
+Item descriptions repeat heavily across GRN, issue and voucher-linked transactions.
+Instead of running keyword regexes over every transaction row, each unique
+description is normalized (lower case, punctuation collapsed to single spaces) and
+matched against a keyword taxonomy once. The result is an item description → category
+dimension table; category analytics then join transactions against that table.
+
+The taxonomy is an ordered mapping of category name → keywords. Keywords match as
+substrings of the normalized description, so 'glove' also matches 'gloves'. A custom
+taxonomy can be passed in directly or loaded from a JSON file with the same shape.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DIMENSION_FILE = 'item_category_dimension.csv'
+OTHER_CATEGORY = 'Other'
+CATEGORY_SEPARATOR = ' & '
+
+DEFAULT_TAXONOMY = {
+    'PPE': [
+        'helmet', 'hard hat', 'safety boot', 'safety shoe', 'glove', 'goggle',
+        'mask', 'respirator', 'harness', 'vest', 'hi-vis', 'high-vis',
+        'protective', 'safety', 'ppe', 'coverall', 'overall'
+    ],
+    'Electrical': [
+        'cable', 'wire', 'electrical', 'switch', 'plug', 'socket', 'circuit',
+        'breaker', 'fuse', 'transformer', 'conductor', 'insulator', 'voltage',
+        'amp', 'watt', 'motor', 'generator', 'battery', 'led', 'light'
+    ]
+}
+
+# Descriptions are reduced to lower-case words separated by single spaces; hyphens are kept ('hi-vis')
+_NON_WORD = re.compile(r'[^a-z0-9\-]+')
+
+
+def load_taxonomy(path=None):
+    """
+    Load a category taxonomy from a JSON file ({"Category": ["keyword", ...], ...}).
+
+    Returns:
+        dict: The taxonomy, or DEFAULT_TAXONOMY when no path is given
+    """
+    if path is None:
+        return DEFAULT_TAXONOMY
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def category_flag_column(category):
+    """Return the boolean flag column name for a category, e.g. 'PPE' → 'is_ppe'."""
+    return 'is_' + re.sub(r'[^a-z0-9]+', '_', category.lower()).strip('_')
+
+
+def normalize_description_series(descriptions):
+    """Lower-case descriptions and collapse punctuation and whitespace runs to single spaces."""
+    text = descriptions.astype(str).str.lower()
+    return text.str.replace(_NON_WORD, ' ', regex=True).str.strip()
+
+
+def _keyword_pattern(keywords):
+    """Compile one alternation pattern for a category's keywords (normalized like descriptions)."""
+    normalized = sorted({_NON_WORD.sub(' ', k.lower()).strip() for k in keywords if k}, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(k) for k in normalized)) if normalized else None
+
+
+def classify_descriptions(descriptions, taxonomy=None):
+    """
+    Classify unique descriptions against a taxonomy.
+
+    Args:
+        descriptions (array-like): Raw descriptions; duplicates and missing values are dropped
+        taxonomy (dict): Ordered category → keywords mapping; defaults to DEFAULT_TAXONOMY
+
+    Returns:
+        pd.DataFrame: One row per unique description with description_normalized, one
+            is_<category> flag per category and the combined 'category' label
+    """
+    taxonomy = DEFAULT_TAXONOMY if taxonomy is None else taxonomy
+    unique = pd.Series(pd.unique(pd.Series(descriptions).dropna()), dtype=object)
+    dimension = pd.DataFrame({'description': unique, 'description_normalized': normalize_description_series(unique)})
+
+    # Identical normalized texts are matched once
+    normalized_unique = pd.Series(dimension['description_normalized'].unique())
+    labels = pd.Series('', index=normalized_unique.index, dtype=object)
+    flag_columns = []
+    for category, keywords in taxonomy.items():
+        pattern = _keyword_pattern(keywords)
+        flags = normalized_unique.str.contains(pattern, na=False) if pattern is not None else \
+            pd.Series(False, index=normalized_unique.index)
+        flag_column = category_flag_column(category)
+        dimension[flag_column] = dimension['description_normalized'].map(
+            pd.Series(flags.values, index=normalized_unique.values)).astype(bool)
+        labels = labels.where(~flags, np.where(labels == '', category, labels + CATEGORY_SEPARATOR + category))
+        flag_columns.append(flag_column)
+
+    labels = labels.replace('', OTHER_CATEGORY)
+    dimension['category'] = dimension['description_normalized'].map(pd.Series(labels.values, index=normalized_unique.values))
+    return dimension[['description', 'description_normalized'] + flag_columns + ['category']]
+
+
+def attach_categories(df, dimension=None, taxonomy=None, description_column='description'):
+    """
+    Join category flags and labels onto transactions via the description dimension.
+
+    Descriptions missing from the dimension (e.g. new items) are classified on the fly.
+
+    Args:
+        df (pd.DataFrame): Transactions with a description column
+        dimension (pd.DataFrame): Precomputed dimension from classify_descriptions
+        taxonomy (dict): Taxonomy used for descriptions not in the dimension
+        description_column (str): Name of the description column in df
+
+    Returns:
+        pd.DataFrame: Copy of df with the is_<category> flags and 'category' added
+    """
+    descriptions = df[description_column]
+    if dimension is None or dimension.empty:
+        dimension = classify_descriptions(descriptions, taxonomy)
+    else:
+        missing = pd.Series(pd.unique(descriptions.dropna()))
+        missing = missing[~missing.isin(dimension['description'])]
+        if len(missing) > 0:
+            dimension = pd.concat([dimension, classify_descriptions(missing, taxonomy)], ignore_index=True)
+
+    lookup = dimension.drop(columns=['description_normalized']).drop_duplicates('description').set_index('description')
+    # Existing category columns are replaced, as with a plain column assignment
+    result = df.drop(columns=[col for col in lookup.columns if col in df.columns]).join(lookup, on=description_column)
+    for col in lookup.columns:
+        if col.startswith('is_'):
+            result[col] = result[col].fillna(False).astype(bool)
+    result['category'] = result['category'].fillna(OTHER_CATEGORY)
+    return result
+
+
+def build_item_category_dimension(output_folder="output", taxonomy=None,
+                                  source_files=('hr995_grn.csv', 'individual_hr995grn.csv', 'hr995_issue.csv')):
+    """
+    Classify every unique item description in the output datasets.
+
+    Returns:
+        pd.DataFrame: The dimension table, or None when no source has a description column
+    """
+    output_folder = Path(output_folder)
+    descriptions = []
+    for filename in source_files:
+        file_path = output_folder / filename
+        if file_path.exists():
+            columns = pd.read_csv(file_path, nrows=0).columns
+            if 'description' in columns:
+                descriptions.append(pd.read_csv(file_path, usecols=['description'])['description'])
+    if not descriptions:
+        return None
+    return classify_descriptions(pd.concat(descriptions, ignore_index=True), taxonomy)
+
+
+def write_item_category_dimension(output_folder="output", taxonomy=None):
+    """Build the item description → category dimension and save it as item_category_dimension.csv."""
+    dimension = build_item_category_dimension(output_folder, taxonomy)
+    if dimension is None:
+        print(f"⚠️ No item descriptions found in {output_folder}; category dimension not generated")
+        return None
+    output_file = Path(output_folder) / DIMENSION_FILE
+    dimension.to_csv(output_file, index=False)
+    print(f"📄 Saved item category dimension ({len(dimension):,} descriptions) to: {output_file}")
+    return dimension
+
+
+def load_item_category_dimension(output_folder="output"):
+    """Load the saved dimension table, or None when it has not been generated."""
+    dimension_file = Path(output_folder) / DIMENSION_FILE
+    if not dimension_file.exists():
+        return None
+    return pd.read_csv(dimension_file, dtype={'description': str, 'description_normalized': str})
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+GRN Document Chain (Objective 4)
+One end-to-end row per GRN document: receipt → voucher → payment → HR185 invoice/cheque,
+with stage dates, stage durations, the amounts and suppliers found at each stage and the
+current stock balance of the received items.
+
+Uses the corrected business relationships:
+
+    HR995GRN.Voucher ↔ HR995VOUCHER.Voucher No    (normalized voucher key)
+    HR995GRN.Inv No  ↔ HR185.Reference (INV)      (normalized reference key)
+    HR995GRN.Cheque No ↔ HR185.Reference (CHQ)    (normalized reference key)
+
+Every lookup table is reduced to one row per normalized key before it is joined, so
+each stage is a single hash join (DataFrame.merge) over the GRN documents. The chain
+is written partitioned by financial year (July-June) so the dashboard's process-flow
+section loads only the years it shows.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chq_linking import identify_inv_chq_payment_pairs, normalize_reference_series
+from stock_ledger import load_stock_ledger, normalize_item_codes
+from voucher_validity import normalize_voucher_series
+
+CHAIN_FOLDER = 'objective_4_document_chain'
+PARTITION_PREFIX = 'document_chain_'
+# Partition for GRN documents without a parseable date (no financial year)
+UNKNOWN_PARTITION = 'unknown'
+
+CHEQUE_COLUMNS = ['cheq/acb/bdb/ele_no', 'cheq_acb_bdb_ele_no', 'cheque_no']
+PAYMENT_DATE_COLUMNS = ['cheq_date', 'date']
+
+CHAIN_COLUMNS = [
+    'financial_year', 'grn_no', 'supplier', 'supplier_name', 'order_no', 'store_no', 'lines', 'items',
+    'quantity', 'grn_amount', 'inv_no', 'voucher', 'has_voucher', 'voucher_amount', 'vouch_auth_name',
+    'payment_cheque', 'payment_source', 'payment_amount', 'payment_supplier', 'hr185_inv_reference',
+    'hr185_inv_amount', 'hr185_inv_supplier', 'hr185_chq_reference',
+    'grn_date', 'invoice_date', 'payment_date', 'grn_to_invoice_days', 'invoice_to_payment_days',
+    'grn_to_payment_days', 'current_item_balance', 'chain_status'
+]
+
+
+def financial_year_labels(dates):
+    """
+    Financial year (July-June) of each date as '2023/24', the labels of the stock roll-forward
+    (stock_reconciliation.CLOSING_BALANCES); missing dates stay missing.
+    """
+    # Nullable integers keep '2023' from becoming '2023.0' when some dates are missing
+    end_year = dates.dt.year.astype('Int64') + (dates.dt.month >= 7).astype('Int64')
+    start = (end_year - 1).astype('string')
+    return (start + '/' + (end_year % 100).astype('string').str.zfill(2)).astype(object).where(dates.notna())
+
+
+def grn_documents(grn_df):
+    """
+    Collapse GRN lines into one row per GRN document with pre-normalized join keys.
+
+    Returns:
+        pd.DataFrame: GRN document header fields, line/item counts, totals, voucher_key,
+            inv_key and cheque_key
+    """
+    net_quantity = pd.to_numeric(grn_df['quantity'], errors='coerce').fillna(0.0)
+    if 'return_qty' in grn_df.columns:
+        net_quantity = net_quantity - pd.to_numeric(grn_df['return_qty'], errors='coerce').fillna(0.0)
+    grn = grn_df.assign(
+        date=pd.to_datetime(grn_df['date'], errors='coerce'),
+        item_code=normalize_item_codes(grn_df['item_no'] if 'item_no' in grn_df.columns else grn_df['item_code']),
+        net_quantity=net_quantity,
+        nett_grn_amt=pd.to_numeric(grn_df['nett_grn_amt'], errors='coerce')
+    )
+    aggregations = {
+        'supplier': ('supplier', 'first'),
+        'supplier_name': ('supplier_name', 'first'),
+        'order_no': ('order_no', 'first'),
+        'store_no': ('store_no', 'first'),
+        'grn_date': ('date', 'min'),
+        'inv_no': ('inv_no', 'first'),
+        'voucher': ('voucher', 'first'),
+        'cheque_no': ('cheque_no', 'first'),
+        'lines': ('item_code', 'size'),
+        'items': ('item_code', 'nunique'),
+        'quantity': ('net_quantity', 'sum'),
+        'grn_amount': ('nett_grn_amt', 'sum')
+    }
+    aggregations = {name: spec for name, spec in aggregations.items() if spec[0] in grn.columns}
+    documents = grn.groupby('grn_no', sort=False).agg(**aggregations).reset_index()
+    for name in ('inv_no', 'voucher', 'cheque_no'):
+        if name not in documents.columns:
+            documents[name] = np.nan
+
+    documents['voucher_key'] = normalize_voucher_series(documents['voucher'])
+    documents['inv_key'] = normalize_reference_series(documents['inv_no'])
+    documents['cheque_key'] = normalize_reference_series(documents['cheque_no'])
+    return documents
+
+
+def voucher_lookup(voucher_df):
+    """One row per normalized voucher number: paid amount, cheque, payment date and authoriser."""
+    columns = ['voucher_key', 'voucher_amount', 'voucher_cheque', 'voucher_date', 'voucher_payee', 'vouch_auth_name']
+    if voucher_df is None or voucher_df.empty or 'voucher_no' not in voucher_df.columns:
+        return pd.DataFrame(columns=columns)
+    cheque_col = next((col for col in CHEQUE_COLUMNS if col in voucher_df.columns), None)
+    date_col = next((col for col in PAYMENT_DATE_COLUMNS if col in voucher_df.columns), None)
+
+    def column(name):
+        return voucher_df[name] if name in voucher_df.columns else pd.Series(np.nan, index=voucher_df.index)
+
+    vouchers = pd.DataFrame({
+        'voucher_key': normalize_voucher_series(voucher_df['voucher_no']),
+        'voucher_amount': pd.to_numeric(column('cheq_amt'), errors='coerce'),
+        'voucher_cheque': voucher_df[cheque_col] if cheque_col else np.nan,
+        'voucher_date': pd.to_datetime(voucher_df[date_col], errors='coerce') if date_col else pd.NaT,
+        'voucher_payee': column('payee_ref'),
+        'vouch_auth_name': column('vouch_auth_name')
+    }).dropna(subset=['voucher_key'])
+    return vouchers.groupby('voucher_key', as_index=False).agg(
+        voucher_amount=('voucher_amount', 'sum'),
+        voucher_cheque=('voucher_cheque', 'first'),
+        voucher_date=('voucher_date', 'min'),
+        voucher_payee=('voucher_payee', 'first'),
+        vouch_auth_name=('vouch_auth_name', 'first'))[columns]
+
+
+def hr185_lookups(hr185_df):
+    """
+    HR185 INV rows by normalized invoice reference (with the CHQ paying each INV) and
+    HR185 CHQ rows by normalized cheque reference.
+
+    Returns:
+        tuple: (invoices, cheques) DataFrames keyed by inv_key / cheque_key
+    """
+    invoice_columns = ['inv_key', 'hr185_inv_reference', 'invoice_date', 'hr185_inv_amount', 'hr185_inv_supplier',
+                       'paired_chq_reference', 'paired_chq_date', 'paired_chq_amount']
+    cheque_columns = ['cheque_key', 'hr185_chq_reference', 'hr185_chq_date', 'hr185_chq_amount', 'hr185_chq_supplier']
+    if hr185_df is None or hr185_df.empty:
+        return pd.DataFrame(columns=invoice_columns), pd.DataFrame(columns=cheque_columns)
+
+    transaction_type = hr185_df['transaction_type'].astype(str).str.upper()
+    dates = pd.to_datetime(hr185_df['transaction_date'], errors='coerce')
+
+    inv = hr185_df[transaction_type == 'INV']
+    invoices = pd.DataFrame({
+        'inv_key': normalize_reference_series(inv['reference']),
+        'hr185_inv_reference': inv['reference'],
+        'invoice_date': dates[inv.index],
+        'hr185_inv_amount': pd.to_numeric(inv['amount'], errors='coerce'),
+        'hr185_inv_supplier': inv['supplier_code']
+    })
+    invoices = invoices[invoices['inv_key'] != ''].sort_values('invoice_date').drop_duplicates('inv_key')
+
+    pairs = identify_inv_chq_payment_pairs(hr185_df)
+    paid = pd.DataFrame({
+        'inv_key': pairs['inv_ref_normalized'],
+        'paired_chq_reference': pairs['chq_reference'],
+        'paired_chq_date': pd.to_datetime(pairs['date'], errors='coerce'),
+        'paired_chq_amount': pd.to_numeric(pairs['amount'], errors='coerce')
+    }).drop_duplicates('inv_key')
+    invoices = invoices.merge(paid, on='inv_key', how='left')
+
+    chq = hr185_df[transaction_type == 'CHQ']
+    cheques = pd.DataFrame({
+        'cheque_key': normalize_reference_series(chq['reference']),
+        'hr185_chq_reference': chq['reference'],
+        'hr185_chq_date': dates[chq.index],
+        'hr185_chq_amount': pd.to_numeric(chq['amount'], errors='coerce'),
+        'hr185_chq_supplier': chq['supplier_code']
+    })
+    cheques = cheques[cheques['cheque_key'] != ''].sort_values('hr185_chq_date').drop_duplicates('cheque_key')
+    return invoices[invoice_columns], cheques[cheque_columns]
+
+
+def item_balances(grn_df, balances):
+    """Current stock balance summed over the distinct items of each GRN document."""
+    if balances is None or balances.empty:
+        return pd.Series(dtype=float, name='current_item_balance')
+    items = pd.DataFrame({
+        'grn_no': grn_df['grn_no'],
+        'item_code': normalize_item_codes(grn_df['item_no'] if 'item_no' in grn_df.columns else grn_df['item_code'])
+    }).drop_duplicates()
+    items = items.merge(balances[['item_code', 'balance']], on='item_code', how='inner')
+    return items.groupby('grn_no')['balance'].sum().rename('current_item_balance')
+
+
+def build_document_chain(grn_df, voucher_df=None, hr185_df=None, balances=None):
+    """
+    Build one end-to-end chain row per GRN document.
+
+    Args:
+        grn_df (pd.DataFrame): HR995 GRN lines
+        voucher_df (pd.DataFrame): HR995 vouchers (optional)
+        hr185_df (pd.DataFrame): HR185 transactions (optional)
+        balances (pd.DataFrame): Current item balances (item_code, balance), e.g.
+            StockLedger.balances() (optional)
+
+    Returns:
+        pd.DataFrame: CHAIN_COLUMNS, ordered by GRN date
+    """
+    documents = grn_documents(grn_df)
+    invoices, cheques = hr185_lookups(hr185_df)
+
+    chain = (documents
+             .merge(voucher_lookup(voucher_df), on='voucher_key', how='left')
+             .merge(invoices, on='inv_key', how='left')
+             .merge(cheques, on='cheque_key', how='left')
+             .join(item_balances(grn_df, balances), on='grn_no'))
+
+    for col in ('voucher_date', 'invoice_date', 'paired_chq_date', 'hr185_chq_date'):
+        chain[col] = pd.to_datetime(chain[col], errors='coerce')
+    chain['has_voucher'] = chain['voucher_amount'].notna()
+    # Payment: the voucher's cheque and date, else the GRN cheque found in HR185, else the
+    # CHQ paying the HR185 invoice
+    sources = [chain['voucher_date'].notna(), chain['hr185_chq_date'].notna(), chain['paired_chq_date'].notna()]
+    chain['payment_source'] = np.select(sources, ['voucher', 'hr185_cheque', 'hr185_inv_pair'], default=None)
+    chain['payment_cheque'] = np.select(
+        sources, [chain['voucher_cheque'], chain['hr185_chq_reference'], chain['paired_chq_reference']], default=None)
+    chain['payment_amount'] = np.select(
+        sources, [chain['voucher_amount'], chain['hr185_chq_amount'], chain['paired_chq_amount']], default=np.nan)
+    chain['payment_supplier'] = np.select(
+        sources, [chain['voucher_payee'], chain['hr185_chq_supplier'], chain['hr185_inv_supplier']], default=None)
+    chain['payment_date'] = chain['voucher_date'].fillna(chain['hr185_chq_date']).fillna(chain['paired_chq_date'])
+    chain['hr185_chq_reference'] = chain['hr185_chq_reference'].where(chain['hr185_chq_date'].notna(),
+                                                                      chain['paired_chq_reference'])
+
+    chain['grn_to_invoice_days'] = (chain['invoice_date'] - chain['grn_date']).dt.days
+    chain['invoice_to_payment_days'] = (chain['payment_date'] - chain['invoice_date']).dt.days
+    chain['grn_to_payment_days'] = (chain['payment_date'] - chain['grn_date']).dt.days
+
+    chain['chain_status'] = np.select(
+        [chain['payment_date'].notna(), chain['invoice_date'].notna(), chain['has_voucher']],
+        ['paid', 'invoiced', 'vouchered'], default='received')
+    chain['financial_year'] = financial_year_labels(chain['grn_date'])
+    return chain.sort_values('grn_date', kind='stable').reset_index(drop=True)[CHAIN_COLUMNS]
+
+
+def chain_partition_path(output_folder, financial_year):
+    # '2023/24' is written as document_chain_2023-24.csv
+    return Path(output_folder) / CHAIN_FOLDER / f"{PARTITION_PREFIX}{financial_year.replace('/', '-')}.csv"
+
+
+def chain_partitions(output_folder="output"):
+    """Financial years with a written chain partition, oldest first."""
+    folder = Path(output_folder) / CHAIN_FOLDER
+    if not folder.exists():
+        return []
+    return sorted(path.stem[len(PARTITION_PREFIX):].replace('-', '/')
+                  for path in folder.glob(f"{PARTITION_PREFIX}*.csv"))
+
+
+def load_chain_partition(output_folder, financial_year):
+    """Load one financial year of the document chain with dates parsed."""
+    file_path = chain_partition_path(output_folder, financial_year)
+    if not file_path.exists():
+        return None
+    return pd.read_csv(file_path, low_memory=False, dtype={'financial_year': str},
+                       parse_dates=['grn_date', 'invoice_date', 'payment_date'])
+
+
+def write_document_chain(output_folder="output"):
+    """
+    Build the GRN document chain from the output datasets and write one CSV per financial year.
+
+    GRN documents without a parseable date go to the 'unknown' partition. Partitions of
+    years no longer present are removed.
+
+    Returns:
+        pd.DataFrame or None: The full chain, or None when hr995_grn.csv is missing
+    """
+    output_folder = Path(output_folder)
+    grn_file = output_folder / 'hr995_grn.csv'
+    if not grn_file.exists():
+        print(f"⚠️ No GRN data found in {output_folder}; document chain not generated")
+        return None
+
+    def read(filename):
+        file_path = output_folder / filename
+        return pd.read_csv(file_path, low_memory=False) if file_path.exists() else None
+
+    ledger = load_stock_ledger(output_folder)
+    balances = ledger.balances() if not ledger.ledger.empty else None
+    chain = build_document_chain(read('hr995_grn.csv'), read('hr995_voucher.csv'),
+                                 read('individual_hr185_transactions.csv'), balances)
+
+    folder = output_folder / CHAIN_FOLDER
+    folder.mkdir(exist_ok=True)
+    partition_names = chain['financial_year'].fillna(UNKNOWN_PARTITION)
+    undated = int(chain['financial_year'].isna().sum())
+    for stale in set(chain_partitions(output_folder)) - set(partition_names):
+        chain_partition_path(output_folder, stale).unlink()
+    for financial_year, partition in chain.groupby(partition_names, sort=True):
+        partition.to_csv(chain_partition_path(output_folder, financial_year), index=False)
+    years = chain['financial_year'].nunique()
+    print(f"📄 Saved GRN document chain ({len(chain):,} documents, {years} financial years"
+          + (f", {undated:,} undated in '{UNKNOWN_PARTITION}'" if undated else "") + f") to: {folder}")
+    if undated:
+        print(f"⚠️ {undated:,} GRN document(s) have no parseable date and no financial year")
+    return chain
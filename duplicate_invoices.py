@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Duplicate Invoice Detector
+Finds invoice numbers captured more than once: against different suppliers, or again for
+the same supplier, including cosmetic variations of the number (prefixes, leading zeros,
+punctuation).
+
+Invoice records come from two reference families:
+
+    invoice_register     HR995GRN.inv_no (one record per invoice number and supplier) and
+                         HR185 INV references (the same internal numbering)
+    supplier_reference   HR995GRN.supp_own_ref, the supplier's own invoice number (one
+                         record per GRN document)
+
+Every reference is canonicalized with vectorized string operations (upper case,
+punctuation and spaces removed, INV/INVOICE/NO-style prefixes dropped, leading zeros
+stripped). Records are then hash-grouped by (family, canonical key, amount to the cent),
+so candidate groups come from one groupby pass instead of comparing every pair of records.
+
+A GRN invoice and the HR185 INV row for the same supplier are the same invoice seen
+twice, so a group is a candidate only when it spans suppliers or holds several records
+of one supplier from the same source. Candidates are scored from weighted signals:
+
+    cross_supplier      the number and amount appear under more than one supplier
+    repeated_document   one supplier has the number on several records of one source
+    format_variants     the raw numbers differ (prefix, zeros, punctuation)
+    cross_period        the records fall in different financial years
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from document_chain import financial_year_labels
+
+DUPLICATE_INVOICES_FILE = 'duplicate_invoice_groups.csv'
+
+# Canonical keys shorter than this (after stripping) are too generic to compare ('3', '12')
+MIN_KEY_LENGTH = 4
+
+# Invoice-word prefixes dropped when directly followed by the number
+INVOICE_PREFIXES = ['TAXINVOICE', 'TAXINV', 'INVOICE', 'INVNO', 'INV', 'IN', 'NO', 'NR']
+
+SIGNAL_WEIGHTS = {
+    'cross_supplier': 0.4,
+    'repeated_document': 0.3,
+    'format_variants': 0.2,
+    'cross_period': 0.1,
+}
+
+RECORD_COLUMNS = ['family', 'source', 'record_id', 'supplier', 'supplier_name', 'reference', 'date', 'amount']
+
+DUPLICATE_INVOICE_COLUMNS = [
+    'group_id', 'score', 'family', 'canonical_key', 'records', 'suppliers', 'financial_years',
+    'cross_supplier', 'repeated_document', 'format_variants', 'cross_period',
+    'source', 'record_id', 'supplier', 'supplier_name', 'reference', 'date', 'financial_year', 'amount'
+]
+
+_PREFIX_PATTERN = r'^(?:' + '|'.join(INVOICE_PREFIXES) + r')(?=\d)'
+
+
+def canonical_invoice_numbers(values):
+    """
+    Canonical form of invoice numbers for duplicate matching.
+
+    'INV-000123', 'inv 123', '0000123' and '123.0' all become '123'.
+
+    Args:
+        values (pd.Series): Raw invoice numbers (text or numeric)
+
+    Returns:
+        pd.Series: Canonical keys ('' for missing or empty numbers)
+    """
+    text = values.astype(str).where(values.notna(), '').str.upper().str.strip()
+    text = text.str.replace(r'\.0$', '', regex=True).str.replace(r'[^0-9A-Z]', '', regex=True)
+    text = text.str.replace(_PREFIX_PATTERN, '', regex=True)
+    return text.str.lstrip('0')
+
+
+def _supplier_codes(values):
+    return values.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+
+
+def grn_invoice_records(grn_df):
+    """
+    Invoice records from GRN lines.
+
+    Returns:
+        pd.DataFrame: invoice_register records (one per inv_no and supplier) and
+            supplier_reference records (one per GRN document with a supp_own_ref), in
+            RECORD_COLUMNS layout
+    """
+    grn = grn_df.assign(
+        supplier=_supplier_codes(grn_df['supplier']),
+        grn_no=grn_df['grn_no'].astype(str).str.strip(),
+        date=pd.to_datetime(grn_df['date'], errors='coerce'),
+        amount=pd.to_numeric(grn_df['nett_grn_amt'], errors='coerce'))
+    parts = []
+    for family, column, keys in [('invoice_register', 'inv_no', ['inv_no', 'supplier']),
+                                 ('supplier_reference', 'supp_own_ref', ['grn_no', 'supplier', 'supp_own_ref'])]:
+        if column not in grn.columns:
+            continue
+        lines = grn[grn[column].notna()].assign(**{column: lambda df, c=column: df[c].astype(str).str.strip()})
+        records = lines.groupby(keys, sort=False).agg(
+            supplier_name=('supplier_name', 'first'), date=('date', 'min'), amount=('amount', 'sum')).reset_index()
+        if 'grn_no' not in keys:
+            # GRN numbers of each record; only keys spanning several GRNs need a join
+            pairs = lines.drop_duplicates(keys + ['grn_no'])
+            shared = pairs.duplicated(keys, keep=False)
+            grns = pd.concat([pairs.loc[~shared].set_index(keys)['grn_no'],
+                              pairs.loc[shared].groupby(keys, sort=False)['grn_no'].agg(', '.join)])
+            records = records.join(grns, on=keys)
+        parts.append(pd.DataFrame({
+            'family': family,
+            'source': f'HR995GRN.{column}',
+            'record_id': records['grn_no'],
+            'supplier': records['supplier'],
+            'supplier_name': records['supplier_name'],
+            'reference': records[column],
+            'date': records['date'],
+            'amount': records['amount']
+        }))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=RECORD_COLUMNS)
+
+
+def hr185_invoice_records(hr185_df):
+    """Invoice register records from HR185 INV transactions, in RECORD_COLUMNS layout."""
+    inv = hr185_df[hr185_df['transaction_type'].astype(str).str.strip().str.upper() == 'INV']
+    inv = inv[inv['reference'].notna()]
+    return pd.DataFrame({
+        'family': 'invoice_register',
+        'source': 'HR185.INV',
+        'record_id': inv['reference'].astype(str).str.strip(),
+        'supplier': _supplier_codes(inv['supplier_code']),
+        'supplier_name': inv['supplier_name'] if 'supplier_name' in inv.columns else None,
+        'reference': inv['reference'].astype(str).str.strip(),
+        'date': pd.to_datetime(inv['transaction_date'], errors='coerce'),
+        'amount': pd.to_numeric(inv['amount'], errors='coerce')
+    }).reset_index(drop=True)
+
+
+def detect_duplicate_invoices(records, min_key_length=MIN_KEY_LENGTH):
+    """
+    Group invoice records that share a canonical invoice number and amount, and score the candidates.
+
+    Args:
+        records (pd.DataFrame): Invoice records in RECORD_COLUMNS layout
+        min_key_length (int): Shortest canonical key considered
+
+    Returns:
+        pd.DataFrame: One row per record of every candidate group, highest-scoring groups
+            first, in DUPLICATE_INVOICE_COLUMNS layout
+    """
+    records = records.assign(canonical_key=canonical_invoice_numbers(records['reference']))
+    records = records[(records['canonical_key'].str.len() >= min_key_length) & records['amount'].notna()
+                      & (records['amount'] != 0)].reset_index(drop=True)
+    if records.empty:
+        return pd.DataFrame(columns=DUPLICATE_INVOICE_COLUMNS)
+    records['cents'] = np.round(records['amount'].to_numpy(dtype=float) * 100).astype(np.int64)
+    records['financial_year'] = financial_year_labels(records['date'])
+    records['raw_form'] = records['reference'].str.upper().str.replace(r'\.0$', '', regex=True)
+
+    # Hash blocks on (family, key, amount): one groupby pass, no pairwise comparison
+    keys = ['family', 'canonical_key', 'cents']
+    groups = records.groupby(keys, sort=False)
+    repeats = records.groupby(keys + ['supplier', 'source'], sort=False)['record_id'].transform('size')
+    members = records.assign(
+        records=groups['record_id'].transform('size'),
+        suppliers=groups['supplier'].transform('nunique'),
+        financial_years=groups['financial_year'].transform('nunique'),
+        repeated_document=repeats.groupby([records[key] for key in keys], sort=False).transform('max') > 1,
+        format_variants=groups['raw_form'].transform('nunique') > 1)
+    members['cross_supplier'] = members['suppliers'] > 1
+    members['cross_period'] = members['financial_years'] > 1
+    members = members[members['cross_supplier'] | members['repeated_document']]
+    if members.empty:
+        return pd.DataFrame(columns=DUPLICATE_INVOICE_COLUMNS)
+
+    members['score'] = sum(weight * members[signal].astype(float) for signal, weight in SIGNAL_WEIGHTS.items())
+    members = members.sort_values(['score', 'amount', 'canonical_key', 'date'], ascending=[False, False, True, True],
+                                  kind='stable')
+    members['group_id'] = members.groupby(keys, sort=False).ngroup() + 1
+    return members[DUPLICATE_INVOICE_COLUMNS].reset_index(drop=True)
+
+
+def summarize_duplicate_invoices(members):
+    """
+    One row per candidate group.
+
+    Returns:
+        pd.DataFrame: group_id, score, family, canonical_key, signal flags,
+            supplier names, raw references, amount range and date range
+    """
+    group_columns = ['group_id', 'score', 'family', 'canonical_key', 'records', 'suppliers', 'financial_years',
+                     'cross_supplier', 'repeated_document', 'format_variants', 'cross_period']
+    if members is None or members.empty:
+        return pd.DataFrame(columns=group_columns + ['supplier_names', 'references', 'min_amount', 'max_amount',
+                                                     'first_date', 'last_date'])
+    joined = lambda values: ', '.join(values.dropna().astype(str).unique())
+    return members.groupby(group_columns, sort=False).agg(
+        supplier_names=('supplier_name', joined), references=('reference', joined),
+        min_amount=('amount', 'min'), max_amount=('amount', 'max'),
+        first_date=('date', 'min'), last_date=('date', 'max')).reset_index()
+
+
+def load_invoice_records(output_folder="output"):
+    """Invoice records from hr995_grn.csv and the HR185 transactions (None if neither exists)."""
+    output_folder = Path(output_folder)
+    parts = []
+    grn_file = output_folder / 'hr995_grn.csv'
+    if grn_file.exists():
+        parts.append(grn_invoice_records(pd.read_csv(grn_file, low_memory=False,
+                                                     dtype={'grn_no': str, 'inv_no': str, 'supp_own_ref': str})))
+    hr185_file = output_folder / 'individual_hr185_transactions.csv'
+    if hr185_file.exists():
+        parts.append(hr185_invoice_records(pd.read_csv(hr185_file, low_memory=False, dtype={'reference': str})))
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def write_duplicate_invoice_findings(output_folder="output", min_key_length=MIN_KEY_LENGTH):
+    """
+    Run the duplicate-invoice detector and save duplicate_invoice_groups.csv.
+
+    Args:
+        output_folder (str): Folder with the processed CSV files
+        min_key_length (int): Shortest canonical invoice number considered
+
+    Returns:
+        pd.DataFrame or None: Candidate group members, or None when there are no invoice records
+    """
+    records = load_invoice_records(output_folder)
+    if records is None:
+        print(f"⚠️ No GRN or HR185 data found in {output_folder}; duplicate-invoice detection not run")
+        return None
+    members = detect_duplicate_invoices(records, min_key_length)
+    output_file = Path(output_folder) / DUPLICATE_INVOICES_FILE
+    members.to_csv(output_file, index=False)
+    groups = members['group_id'].nunique() if not members.empty else 0
+    print(f"📄 Saved duplicate-invoice candidates ({groups:,} groups, {len(members):,} records from "
+          f"{len(records):,} invoice records) to: {output_file}")
+    return members
+
+
+def load_duplicate_invoice_findings(output_folder="output"):
+    """Load the saved candidate group members, or None when the detector has not been run."""
+    findings_file = Path(output_folder) / DUPLICATE_INVOICES_FILE
+    if not findings_file.exists():
+        return None
+    return pd.read_csv(findings_file, dtype={'canonical_key': str, 'record_id': str, 'supplier': str,
+                                             'reference': str}, parse_dates=['date'])
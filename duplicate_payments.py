@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Duplicate Payment Detection Engine
+Scores every HR995 payment voucher for duplicate and near-duplicate payments.
+
+* Duplicate vouchers: every voucher number paid more than once is scored in a single
+  groupby (payment count, total paid, expected payment, overpayment).
+* Same-day duplicates: payments to the same payee for the same amount on the same date.
+* Near-duplicates: payments to the same payee whose amounts agree within a tolerance
+  and whose dates fall within an N-day window. Payments are sorted by payee and date
+  and each payment is compared only with the following payments inside its window,
+  so the cost grows with the window size rather than with the square of the history.
+
+The pipeline writes the results for the full voucher history; the dashboard reads the
+precomputed reports and only recomputes when its voucher view is filtered.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from voucher_validity import normalize_voucher_series
+
+DUPLICATE_VOUCHERS_FILE = 'duplicate_voucher_payments.csv'
+SAME_DAY_DUPLICATES_FILE = 'same_day_duplicate_payments.csv'
+NEAR_DUPLICATES_FILE = 'near_duplicate_payments.csv'
+
+DEFAULT_AMOUNT_TOLERANCE = 1.00
+DEFAULT_RELATIVE_TOLERANCE = 0.005
+DEFAULT_WINDOW_DAYS = 7
+
+NEAR_DUPLICATE_COLUMNS = [
+    'payee_name', 'voucher_no_a', 'voucher_no_b', 'date_a', 'date_b', 'days_apart',
+    'amount_a', 'amount_b', 'amount_difference', 'match_type'
+]
+
+
+def prepare_payments(voucher_df):
+    """
+    Build the normalized payment frame used by the detectors.
+
+    Returns:
+        pd.DataFrame: voucher_no_normalized, payee_name, amount and payment_date columns
+    """
+    date_col = 'date' if 'date' in voucher_df.columns else ('cheq_date' if 'cheq_date' in voucher_df.columns else None)
+    payee = voucher_df['payee_name'] if 'payee_name' in voucher_df.columns else pd.Series(np.nan, index=voucher_df.index)
+    return pd.DataFrame({
+        'voucher_no_normalized': normalize_voucher_series(voucher_df['voucher_no']),
+        'payee_name': payee.astype(str).str.strip().where(payee.notna()),
+        'amount': pd.to_numeric(voucher_df['cheq_amt'], errors='coerce'),
+        'payment_date': pd.to_datetime(voucher_df[date_col], errors='coerce') if date_col else pd.NaT
+    }, index=voucher_df.index)
+
+
+def score_duplicate_vouchers(payments):
+    """
+    Score every voucher number that was paid more than once.
+
+    The first payment of a voucher is treated as the expected payment; everything paid
+    on top of it is potential overpayment.
+
+    Args:
+        payments (pd.DataFrame): Output of prepare_payments
+
+    Returns:
+        pd.DataFrame: One row per duplicated voucher, largest overpayment first
+    """
+    grouped = payments.dropna(subset=['voucher_no_normalized']).groupby('voucher_no_normalized', sort=False)
+    scores = grouped.agg(
+        payee_name=('payee_name', 'first'),
+        payment_count=('amount', 'size'),
+        total_paid=('amount', 'sum'),
+        expected_payment=('amount', 'first'),
+        first_payment_date=('payment_date', 'min'),
+        last_payment_date=('payment_date', 'max'),
+        distinct_amounts=('amount', 'nunique')
+    )
+    scores = scores[scores['payment_count'] > 1].copy()
+    scores['overpayment'] = scores['total_paid'] - scores['expected_payment']
+    scores = scores.reset_index().rename(columns={'voucher_no_normalized': 'voucher_no'})
+    return scores.sort_values(['overpayment', 'payment_count'], ascending=False, kind='stable')
+
+
+def find_same_day_duplicates(payments):
+    """
+    Group payments to the same payee for the same amount on the same date.
+
+    Returns:
+        pd.DataFrame: One row per group with more than one payment
+    """
+    keys = ['payee_name', 'amount', 'payment_date']
+    keyed = payments.dropna(subset=keys)
+    keyed = keyed[keyed.duplicated(keys, keep=False)]
+    groups = keyed.groupby(keys, sort=False).agg(
+        payment_count=('voucher_no_normalized', 'size'),
+        vouchers=('voucher_no_normalized', lambda v: ', '.join(sorted(v.dropna().astype(str).unique())))
+    ).reset_index()
+    groups['duplicate_value'] = groups['amount'] * (groups['payment_count'] - 1)
+    return groups.sort_values('duplicate_value', ascending=False, kind='stable')
+
+
+def find_near_duplicates(payments, amount_tolerance=DEFAULT_AMOUNT_TOLERANCE,
+                         relative_tolerance=DEFAULT_RELATIVE_TOLERANCE, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Find pairs of payments to the same payee with similar amounts within a date window.
+
+    Payments are sorted by payee and date. For offset k = 1, 2, ... every payment is
+    compared with the k-th following payment; the scan stops once no payment has a
+    k-th neighbour of the same payee inside the window.
+
+    Args:
+        payments (pd.DataFrame): Output of prepare_payments
+        amount_tolerance (float): Absolute amount tolerance in Rand
+        relative_tolerance (float): Tolerance as a fraction of the larger amount
+        window_days (int): Maximum days between the two payments
+
+    Returns:
+        pd.DataFrame: One row per payment pair with NEAR_DUPLICATE_COLUMNS
+    """
+    ordered = payments.dropna(subset=['payee_name', 'amount', 'payment_date'])
+    ordered = ordered.sort_values(['payee_name', 'payment_date'], kind='stable')
+    if len(ordered) < 2:
+        return pd.DataFrame(columns=NEAR_DUPLICATE_COLUMNS)
+
+    payee = ordered['payee_name'].to_numpy()
+    dates = ordered['payment_date'].to_numpy()
+    amounts = ordered['amount'].to_numpy(dtype=float)
+    vouchers = ordered['voucher_no_normalized'].to_numpy()
+    window = np.timedelta64(int(window_days), 'D')
+
+    pair_frames = []
+    for k in range(1, len(ordered)):
+        same_payee = payee[k:] == payee[:-k]
+        in_window = same_payee & ((dates[k:] - dates[:-k]) <= window)
+        if not in_window.any():
+            break
+
+        difference = np.abs(amounts[k:] - amounts[:-k])
+        tolerance = np.maximum(amount_tolerance, relative_tolerance * np.maximum(np.abs(amounts[k:]), np.abs(amounts[:-k])))
+        # Re-payments of one voucher are scored by score_duplicate_vouchers
+        matched = in_window & (difference <= tolerance) & (vouchers[k:] != vouchers[:-k])
+        if matched.any():
+            a = np.flatnonzero(matched)
+            pair_frames.append(pd.DataFrame({
+                'payee_name': payee[a],
+                'voucher_no_a': vouchers[a],
+                'voucher_no_b': vouchers[a + k],
+                'date_a': dates[a],
+                'date_b': dates[a + k],
+                'amount_a': amounts[a],
+                'amount_b': amounts[a + k]
+            }))
+
+    if not pair_frames:
+        return pd.DataFrame(columns=NEAR_DUPLICATE_COLUMNS)
+
+    pairs = pd.concat(pair_frames, ignore_index=True)
+    pairs['days_apart'] = (pairs['date_b'] - pairs['date_a']).dt.days
+    pairs['amount_difference'] = (pairs['amount_b'] - pairs['amount_a']).abs()
+    exact_amount = pairs['amount_difference'] < 0.005
+    pairs['match_type'] = np.select(
+        [exact_amount & (pairs['days_apart'] == 0), exact_amount],
+        ['Same amount, same day', 'Same amount within window'],
+        default='Similar amount within window'
+    )
+    return pairs[NEAR_DUPLICATE_COLUMNS].sort_values(['payee_name', 'date_a'], kind='stable').reset_index(drop=True)
+
+
+def detect_duplicate_payments(voucher_df, amount_tolerance=DEFAULT_AMOUNT_TOLERANCE,
+                              relative_tolerance=DEFAULT_RELATIVE_TOLERANCE, window_days=DEFAULT_WINDOW_DAYS):
+    """
+    Run all duplicate payment detectors over a voucher table.
+
+    Returns:
+        dict: 'duplicate_vouchers', 'same_day' and 'near_duplicates' DataFrames
+    """
+    payments = prepare_payments(voucher_df)
+    return {
+        'duplicate_vouchers': score_duplicate_vouchers(payments),
+        'same_day': find_same_day_duplicates(payments),
+        'near_duplicates': find_near_duplicates(payments, amount_tolerance, relative_tolerance, window_days)
+    }
+
+
+def reports_current(output_folder="output"):
+    """Check that the precomputed reports exist and are newer than hr995_voucher.csv."""
+    output_folder = Path(output_folder)
+    voucher_file = output_folder / 'hr995_voucher.csv'
+    report_files = [output_folder / name for name in (DUPLICATE_VOUCHERS_FILE, SAME_DAY_DUPLICATES_FILE, NEAR_DUPLICATES_FILE)]
+    if not voucher_file.exists() or not all(f.exists() for f in report_files):
+        return False
+    voucher_mtime = voucher_file.stat().st_mtime_ns
+    return all(f.stat().st_mtime_ns >= voucher_mtime for f in report_files)
+
+
+def load_duplicate_payment_reports(output_folder="output"):
+    """
+    Load the precomputed duplicate payment reports.
+
+    Returns:
+        dict or None: Same keys as detect_duplicate_payments, or None when missing or stale
+    """
+    if not reports_current(output_folder):
+        return None
+    output_folder = Path(output_folder)
+    results = {
+        'duplicate_vouchers': pd.read_csv(output_folder / DUPLICATE_VOUCHERS_FILE),
+        'same_day': pd.read_csv(output_folder / SAME_DAY_DUPLICATES_FILE),
+        'near_duplicates': pd.read_csv(output_folder / NEAR_DUPLICATES_FILE)
+    }
+    for name, columns in (('duplicate_vouchers', ['first_payment_date', 'last_payment_date']),
+                          ('same_day', ['payment_date']),
+                          ('near_duplicates', ['date_a', 'date_b'])):
+        for col in columns:
+            results[name][col] = pd.to_datetime(results[name][col], errors='coerce')
+    return results
+
+
+def write_duplicate_payment_reports(output_folder="output", **detector_kwargs):
+    """
+    Detect duplicate payments over the full voucher history and write the reports.
+
+    Returns:
+        dict or None: The detector results, or None when hr995_voucher.csv is missing
+    """
+    output_folder = Path(output_folder)
+    voucher_file = output_folder / 'hr995_voucher.csv'
+    if not voucher_file.exists():
+        print(f"⚠️ Voucher data missing in {output_folder}; duplicate payment reports not generated")
+        return None
+
+    voucher_df = pd.read_csv(voucher_file, low_memory=False)
+    results = detect_duplicate_payments(voucher_df, **detector_kwargs)
+    results['duplicate_vouchers'].to_csv(output_folder / DUPLICATE_VOUCHERS_FILE, index=False)
+    results['same_day'].to_csv(output_folder / SAME_DAY_DUPLICATES_FILE, index=False)
+    results['near_duplicates'].to_csv(output_folder / NEAR_DUPLICATES_FILE, index=False)
+    print(f"📊 Duplicate vouchers: {len(results['duplicate_vouchers'])}, "
+          f"same-day groups: {len(results['same_day'])}, "
+          f"near-duplicate pairs: {len(results['near_duplicates'])}")
+    return results
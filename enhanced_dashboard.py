@@ -12,18 +12,46 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import matplotlib.pyplot as plt
 import os
 from pathlib import Path
 import numpy as np
-from datetime import datetime, timedelta
 import warnings
 from typing import Dict, List, Optional
-import calendar
+from table_search import TableSearchIndex, file_snapshot, get_page, page_count, PAGE_SIZE_OPTIONS
+from data_export import ExportManager, EXPORT_FORMATS
+from dataset_profiler import load_profile, profile_path, column_info_table, numeric_summary_table, top_values_series
+from chart_reduction import reduced_scatter, point_budget_caption, DEFAULT_POINT_BUDGET
+from chq_linking import (build_enhanced_transaction_trail, identify_inv_chq_payment_pairs, normalize_reference_series,
+                         summarize_trail)
+from voucher_validity import build_invalid_voucher_report
+from description_classifier import attach_categories, load_item_category_dimension
+from scoa_votes import (VOTE_COLUMNS, add_scoa_columns, build_scoa_cube, cube_current, cube_level,
+                        find_vote_column, load_scoa_cube, NON_COMPLIANT_LEVEL, VOTE_LENGTH_LEVEL)
+from data_residency import enable_copy_on_write, render_memory_panel, shared_store, streamlit_session_id
+from dashboard_warmup import render_warmup_status, start_background_warmup
+from stock_ledger import LEDGER_SOURCE_FILES, load_stock_ledger
+from price_history import DEFAULT_SPIKE_THRESHOLD, DEFAULT_WINDOW, MIN_PRICE_CHANGE, load_price_history
+from document_chain import chain_partition_path, chain_partitions, load_chain_partition
+from anomaly_engine import (ANOMALY_FILE, HIGH_VALUE_IQR_MULTIPLIER, MAX_SUPPLIERS_PER_ITEM, OUTLIER_STD_MULTIPLIER,
+                            OVER_STOCKED_RATIO, PRICE_VOLATILITY_CV, QUANTITY_IQR_MULTIPLIER, SEVERITY_ORDER,
+                            SUPPLIER_SPEND_IQR_MULTIPLIER, UNDER_STOCKED_RATIO, filter_supplier_anomalies,
+                            load_anomaly_scores, summarize_anomalies)
+from sequence_analysis import FINDING_TYPES, SEQUENCE_FINDINGS_FILE, SEQUENCE_SUMMARY_FILE, load_sequence_analysis
+from split_purchases import DEFAULT_WINDOW_DAYS as SPLIT_WINDOW_DAYS, SPLIT_PURCHASES_FILE, load_split_purchase_findings
+from duplicate_invoices import DUPLICATE_INVOICES_FILE, load_duplicate_invoice_findings, summarize_duplicate_invoices
+from three_way_match import EXCEPTIONS_FILE, EXCEPTION_TYPES, load_three_way_exceptions, summarize_exceptions
+from duplicate_payments import (detect_duplicate_payments, load_duplicate_payment_reports,
+                                DEFAULT_AMOUNT_TOLERANCE, DEFAULT_WINDOW_DAYS, DUPLICATE_VOUCHERS_FILE,
+                                SAME_DAY_DUPLICATES_FILE, NEAR_DUPLICATES_FILE)
+from render_telemetry import (RenderTelemetry, MetricsLog, instrument_methods, install_plotly_chart_hook,
+                              note_cache_miss, render_debug_panel, telemetry_enabled)
 
 # Suppress warnings for cleaner output
 warnings.filterwarnings('ignore')
 
+# Datasets are shared read-only across sessions; sections work on copy-on-write views
+enable_copy_on_write()
+
 # Hide Streamlit style elements
 hide_streamlit_style = """
     <style>
@@ -102,9 +130,12 @@ class AdvancedStockDashboard:
             'hr450_data.csv': 'HR450 Data - Additional inventory tracking data',
             'objective_1_item_frequency_by_supplier.csv': 'Analysis Report - Item frequency by supplier',
             'objective_2_stock_audit_trail.csv': 'Analysis Report - Stock audit trail',
+            'objective_2_requisition_fill_status.csv': 'Analysis Report - Requisition fill status against GRN receipts',
+            'objective_2_unmatched_receipts.csv': 'Analysis Report - GRN receipts not issued',
             'objective_3_hr995_report.csv': 'Analysis Report - HR995 comprehensive report',
             'objective_4_end_to_end_process.csv': 'Analysis Report - End-to-end process analysis',
-            'objective_5_stock_balances_by_year.csv': 'Analysis Report - Stock balances by year'
+            'objective_5_stock_balances_by_year.csv': 'Analysis Report - Stock balances by year',
+            'objective_5_stock_roll_forward.csv': 'Analysis Report - Yearly stock roll-forward reconciliation'
         }
     
     def get_data_source_tooltip(self, data_files):
@@ -121,89 +152,54 @@ class AdvancedStockDashboard:
             return f"Data Sources:<br>{'<br>'.join(sources)}"
         return "Data source information not available"
         
-    @st.cache_data
-    def load_data(_self, filename):
-        """Load and cache data files with improved date handling for multiple formats."""
-        file_path = _self.output_folder / filename
-        if file_path.exists():
-            try:
-                df = pd.read_csv(file_path, low_memory=False)
-                
-                # Handle different date formats
-                for col in df.columns:
-                    if 'date' in col.lower():
-                        if df[col].dtype == 'object':
-                            df[col] = pd.to_datetime(df[col], errors='coerce')
-                        
-                        # Check if dates are invalid (showing as 1900-01-01 or similar)
-                        if df[col].notna().any():
-                            valid_dates = df[col].dropna()
-                            if len(valid_dates) > 0:
-                                # If most dates are 1900-01-01, they're likely corrupted
-                                year_1900_count = (valid_dates.dt.year == 1900).sum()
-                                if year_1900_count > len(valid_dates) * 0.8:
-                                    # Try to convert as YYYYMMDD format
-                                    numeric_dates = pd.to_numeric(df[col].astype(str).str.replace('-', ''), errors='coerce')
-                                    valid_numeric = numeric_dates.dropna()
-                                    
-                                    if len(valid_numeric) > 0:
-                                        df[f'{col}_converted'] = pd.NaT
-                                        for idx in valid_numeric.index:
-                                            try:
-                                                date_str = str(int(valid_numeric.loc[idx]))
-                                                if len(date_str) == 8:  # YYYYMMDD
-                                                    year = int(date_str[:4])
-                                                    month = int(date_str[4:6])
-                                                    day = int(date_str[6:8])
-                                                    if 2000 <= year <= 2030 and 1 <= month <= 12 and 1 <= day <= 31:
-                                                        df.loc[idx, f'{col}_converted'] = pd.Timestamp(year=year, month=month, day=day)
-                                            except:
-                                                continue
-                                        
-                                        # Replace original column if conversion successful
-                                        if df[f'{col}_converted'].notna().sum() > 0:
-                                            df[col] = df[f'{col}_converted']
-                                            df = df.drop(columns=[f'{col}_converted'])
-                
-                # Convert fin_period to proper dates (YYYYMM format)
-                if 'fin_period' in df.columns:
-                    fin_period_series = pd.to_numeric(df['fin_period'], errors='coerce')
-                    valid_periods = fin_period_series.dropna()
-                    
-                    if len(valid_periods) > 0:
-                        # Convert YYYYMM to datetime
-                        df['period_date'] = pd.NaT
-                        for idx in valid_periods.index:
-                            try:
-                                year = int(valid_periods.loc[idx] // 100)
-                                month = int(valid_periods.loc[idx] % 100)
-                                if 1 <= month <= 12 and year >= 2000:
-                                    df.loc[idx, 'period_date'] = pd.Timestamp(year=year, month=month, day=1)
-                            except:
-                                continue
-                        
-                        # Format period for display
-                        df['period_display'] = df['period_date'].dt.strftime('%Y-%m')
+    def load_data(self, filename):
+        """Return a shared read-only view of a data file, loaded once per file snapshot for all sessions."""
+        if file_snapshot(self.output_folder / filename) is None:
+            st.warning(f"File {filename} not found. Please run the data processor first.")
+            return pd.DataFrame()
+        try:
+            return self.shared_dataset(filename)
+        except Exception as e:
+            st.error(f"Error loading {filename}: {str(e)}")
+            return pd.DataFrame()
+    
+    def shared_dataset(self, filename):
+        """Shared dataset without any Streamlit output (empty if missing); safe off the script thread."""
+        snapshot = file_snapshot(self.output_folder / filename)
+        if snapshot is None:
+            return pd.DataFrame()
+        return shared_store().get(filename, snapshot, lambda: self.read_dataset(filename),
+                                  session_id=streamlit_session_id())
+    
+    def read_dataset(self, filename):
+        """Read a data file with improved date handling for multiple formats."""
+        note_cache_miss('load_data')
+        file_path = self.output_folder / filename
+        # Vote numbers are codes; keep them as text so fixed-position SCOA slicing holds
+        df = pd.read_csv(file_path, low_memory=False, dtype={col: str for col in VOTE_COLUMNS})
+                
+        # Handle different date formats
+        for col in df.columns:
+            if 'date' in col.lower():
+                if df[col].dtype == 'object':
+                    df[col] = pd.to_datetime(df[col], errors='coerce')
                         
-                        # If original date column is mostly empty, use period_date as primary date
-                        if 'date' in df.columns and df['date'].isna().sum() > len(df) * 0.8:
-                            df['date'] = df['period_date']
-                
-                # Handle other YYYYMMDD date columns that might not have been caught
-                for col in df.columns:
-                    if any(term in col.lower() for term in ['grn_date', 'cheq_date', 'last_move_date', 'issue_date']):
-                        if df[col].dtype in ['object', 'int64', 'float64']:
-                            # Try to convert YYYYMMDD format
-                            numeric_dates = pd.to_numeric(df[col], errors='coerce')
+                # Check if dates are invalid (showing as 1900-01-01 or similar)
+                if df[col].notna().any():
+                    valid_dates = df[col].dropna()
+                    if len(valid_dates) > 0:
+                        # If most dates are 1900-01-01, they're likely corrupted
+                        year_1900_count = (valid_dates.dt.year == 1900).sum()
+                        if year_1900_count > len(valid_dates) * 0.8:
+                            # Try to convert as YYYYMMDD format
+                            numeric_dates = pd.to_numeric(df[col].astype(str).str.replace('-', ''), errors='coerce')
                             valid_numeric = numeric_dates.dropna()
-                            
+                                    
                             if len(valid_numeric) > 0:
                                 df[f'{col}_converted'] = pd.NaT
                                 for idx in valid_numeric.index:
                                     try:
-                                        date_val = int(valid_numeric.loc[idx])
-                                        date_str = str(date_val)
-                                        
+                                        date_str = str(int(valid_numeric.loc[idx]))
                                         if len(date_str) == 8:  # YYYYMMDD
                                             year = int(date_str[:4])
                                             month = int(date_str[4:6])
@@ -212,26 +208,164 @@ class AdvancedStockDashboard:
                                                 df.loc[idx, f'{col}_converted'] = pd.Timestamp(year=year, month=month, day=day)
                                     except:
                                         continue
-                                
+                                        
                                 # Replace original column if conversion successful
                                 if df[f'{col}_converted'].notna().sum() > 0:
                                     df[col] = df[f'{col}_converted']
                                     df = df.drop(columns=[f'{col}_converted'])
                 
-                return df
-            except Exception as e:
-                st.error(f"Error loading {filename}: {str(e)}")
-                return pd.DataFrame()
+        # Convert fin_period to proper dates (YYYYMM format)
+        if 'fin_period' in df.columns:
+            fin_period_series = pd.to_numeric(df['fin_period'], errors='coerce')
+            valid_periods = fin_period_series.dropna()
+                    
+            if len(valid_periods) > 0:
+                # Convert YYYYMM to datetime
+                df['period_date'] = pd.NaT
+                for idx in valid_periods.index:
+                    try:
+                        year = int(valid_periods.loc[idx] // 100)
+                        month = int(valid_periods.loc[idx] % 100)
+                        if 1 <= month <= 12 and year >= 2000:
+                            df.loc[idx, 'period_date'] = pd.Timestamp(year=year, month=month, day=1)
+                    except:
+                        continue
+                        
+                # Format period for display
+                df['period_display'] = df['period_date'].dt.strftime('%Y-%m')
+                        
+                # If original date column is mostly empty, use period_date as primary date
+                if 'date' in df.columns and df['date'].isna().sum() > len(df) * 0.8:
+                    df['date'] = df['period_date']
+                
+        # Handle other YYYYMMDD date columns that might not have been caught
+        for col in df.columns:
+            if any(term in col.lower() for term in ['grn_date', 'cheq_date', 'last_move_date', 'issue_date']):
+                if df[col].dtype in ['object', 'int64', 'float64']:
+                    # Try to convert YYYYMMDD format
+                    numeric_dates = pd.to_numeric(df[col], errors='coerce')
+                    valid_numeric = numeric_dates.dropna()
+                            
+                    if len(valid_numeric) > 0:
+                        df[f'{col}_converted'] = pd.NaT
+                        for idx in valid_numeric.index:
+                            try:
+                                date_val = int(valid_numeric.loc[idx])
+                                date_str = str(date_val)
+                                        
+                                if len(date_str) == 8:  # YYYYMMDD
+                                    year = int(date_str[:4])
+                                    month = int(date_str[4:6])
+                                    day = int(date_str[6:8])
+                                    if 2000 <= year <= 2030 and 1 <= month <= 12 and 1 <= day <= 31:
+                                        df.loc[idx, f'{col}_converted'] = pd.Timestamp(year=year, month=month, day=day)
+                            except:
+                                continue
+                                
+                        # Replace original column if conversion successful
+                        if df[f'{col}_converted'].notna().sum() > 0:
+                            df[col] = df[f'{col}_converted']
+                            df = df.drop(columns=[f'{col}_converted'])
+                
+        # Decompose SCOA vote numbers into categorical component columns
+        df = add_scoa_columns(df)
+                
+        return df
+    
+    def get_shared(self, name, snapshot, loader):
+        """Return a process-wide artifact (index, profile, cube, report set) built once per snapshot."""
+        return shared_store().get(name, snapshot, loader, session_id=streamlit_session_id())
+    
+    def get_search_index(self, filename, snapshot, df):
+        """Build the Data Tables search index once per file snapshot."""
+        return self.get_shared(f"index:{filename}", snapshot, lambda: TableSearchIndex(df))
+    
+    def get_dataset_profile(self, filename):
+        """Return the current profile artifact for an output dataset, if one exists."""
+        snapshot = (file_snapshot(self.output_folder / filename),
+                    file_snapshot(profile_path(self.output_folder, filename)))
+        return self.get_shared(f"profile:{filename}", snapshot, lambda: load_profile(self.output_folder, filename))
+    
+    def filters_active(self, filters):
+        """Check whether the sidebar filters narrow the row set of the linked datasets."""
+        if not filters:
+            return False
+        return ((filters.get('supplier') and filters['supplier'] != "All Suppliers") or
+                (filters.get('department') and filters['department'] != "All Departments") or
+                filters.get('min_value', 0) > 0)
+    
+    def get_item_category_dimension(self):
+        """Return the pipeline's item description → category dimension (None if not generated)."""
+        snapshot = file_snapshot(self.output_folder / "item_category_dimension.csv")
+        return self.get_shared("dimension:item_category", snapshot,
+                               lambda: load_item_category_dimension(self.output_folder))
+    
+    def get_stock_ledger(self):
+        """Return the per-item stock ledger, rebuilt once per snapshot of its source files."""
+        snapshot = tuple(file_snapshot(self.output_folder / filename) for filename in LEDGER_SOURCE_FILES)
+        return self.get_shared("ledger:stock", snapshot, lambda: load_stock_ledger(self.output_folder))
+    
+    def get_price_history(self):
+        """Return the per-item unit price history, rebuilt once per snapshot of the GRN file."""
+        snapshot = file_snapshot(self.output_folder / "hr995_grn.csv")
+        return self.get_shared("prices:history", snapshot, lambda: load_price_history(self.output_folder))
+    
+    def get_document_chain(self, financial_years):
+        """Return the GRN document chain for the given financial years (one shared entry per partition)."""
+        parts = []
+        for financial_year in financial_years:
+            path = chain_partition_path(self.output_folder, financial_year)
+            part = self.get_shared(f"chain:{financial_year}", file_snapshot(path),
+                                   lambda fy=financial_year: load_chain_partition(self.output_folder, fy))
+            if part is not None:
+                parts.append(part)
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+    
+    @st.cache_resource(show_spinner=False)
+    def get_export_manager(_self):
+        """Shared export manager; background jobs outlive individual reruns."""
+        return ExportManager(_self.output_folder / "exports")
+    
+    def render_export_controls(self, df, base_name, key, container=st):
+        """Render on-demand export controls for the current view of a section.
+        
+        Nothing is serialized until the user asks for an export.
+        """
+        export_manager = self.get_export_manager()
+        job_key = f"export_job_{key}"
+        
+        export_format = container.selectbox("Export format:", options=list(EXPORT_FORMATS.keys()),
+                                            key=f"export_format_{key}")
+        if container.button(f"📦 Prepare Export ({len(df):,} rows)", key=f"export_start_{key}"):
+            job = export_manager.submit(df, base_name, export_format)
+            st.session_state[job_key] = job.job_id
+        
+        job = export_manager.get(st.session_state.get(job_key))
+        if job is None:
+            return
+        
+        if job.status == 'failed':
+            container.error(f"❌ Export failed: {job.error}")
+        elif not job.done:
+            container.progress(job.progress, text=f"Exporting {job.row_count:,} rows in the background...")
+            container.button("🔄 Check Export Progress", key=f"export_refresh_{key}")
         else:
-            st.warning(f"File {filename} not found. Please run the data processor first.")
-            return pd.DataFrame()
+            with open(job.file_path, 'rb') as export_file:
+                container.download_button(
+                    label=f"📥 Download {job.file_path.name}",
+                    data=export_file,
+                    file_name=job.file_path.name,
+                    mime=job.mime_type,
+                    key=f"export_download_{key}"
+                )
     
     def apply_filters(self, df, filters):
         """Apply sidebar filters to dataframe."""
         if df.empty:
             return df
         
-        filtered_df = df.copy()
+        # Copy-on-write view: the shared dataset is never modified by filtering
+        filtered_df = df.copy(deep=False)
         
         # Apply supplier filter
         if filters.get('supplier') and filters['supplier'] != "All Suppliers":
@@ -259,21 +393,12 @@ class AdvancedStockDashboard:
         
         return filtered_df
     
-    def normalize_reference(self, ref):
-        """Normalize reference numbers for proper data linkage."""
-        if pd.isna(ref):
-            return ref
+    def normalize_references(self, refs):
+        """Normalize a column of reference numbers for data linkage (leading zeros stripped, text upper-cased).
         
-        ref_str = str(ref).strip()
-        
-        # For numeric references, strip leading zeros and convert to int
-        if ref_str.isdigit() or (ref_str.startswith('0') and ref_str.lstrip('0').isdigit()):
-            try:
-                return int(ref_str.lstrip('0')) if ref_str.lstrip('0') else 0
-            except:
-                return ref_str
-        
-        return ref_str.upper()
+        Missing references stay missing so they never link to each other.
+        """
+        return normalize_reference_series(refs).str.upper().where(refs.notna())
     
     def normalize_hr185_reference(self, ref):
         """Normalize HR185 reference for linking to HR995grn Inv No.
@@ -295,56 +420,103 @@ class AdvancedStockDashboard:
         
         return ref_str
     
-    def load_linked_data(self, filters=None):
-        """Load all data with proper business logic linkages applied."""
-        # Load base datasets
-        grn_df = self.load_data("individual_hr995grn.csv")
-        issue_df = self.load_data("individual_hr995issue.csv") 
-        voucher_df = self.load_data("individual_hr995vouch.csv")
-        hr390_df = self.load_data("individual_hr390_movement_data.csv")
-        hr185_df = self.load_data("individual_hr185_transactions.csv")
+    # Data Tables selector: (display name, output file)
+    DATA_TABLES = [
+        ("HR995 GRN Records", "hr995_grn.csv"),
+        ("HR995 Issue Records", "hr995_issue.csv"),
+        ("HR995 Voucher Records", "hr995_voucher.csv"),
+        ("HR995 Redundant Records", "hr995_redundant.csv"),
+        ("All Stock Data (Combined)", "all_stock_data.csv"),
+        ("Suppliers Master Data", "suppliers.csv"),
+        ("Stock Adjustments", "stock_adjustments.csv"),
+        ("HR185 Transactions (PDF)", "individual_hr185_transactions.csv"),
+        ("HR990 Expenditure (PDF)", "individual_hr990_expenditure.csv"),
+        ("Variance Report", "variance_report.csv"),
+        ("HR450 Data", "hr450_data.csv"),
+        ("2023 Suppliers List", "individual_2023_list_of_suppliers.csv"),
+        ("2024 Suppliers List", "individual_2024_list_of_suppliers.csv"),
+        ("Final Stock Listing 2023", "individual_final_stock_listing_2023.csv"),
+        ("Stock Balance 2023-2024", "individual_final_stock_list_2324.csv"),
+        ("Stock Adjustments 2024", "individual_stock_adjustment_item_2024.csv"),
+        ("Objective 1: Item Frequency", "objective_1_item_frequency_by_supplier.csv"),
+        ("Objective 2: Audit Trail", "objective_2_stock_audit_trail.csv"),
+        ("Objective 2: Requisition Fill Status", "objective_2_requisition_fill_status.csv"),
+        ("Objective 2: Unmatched Receipts", "objective_2_unmatched_receipts.csv"),
+        ("Objective 3: HR995 Report", "objective_3_hr995_report.csv"),
+        ("Objective 4: End-to-End Process", "objective_4_end_to_end_process.csv"),
+        ("Objective 5: Stock Balances by Year", "objective_5_stock_balances_by_year.csv"),
+        ("Objective 5: Stock Roll-Forward", "objective_5_stock_roll_forward.csv"),
+        ("❌ Invalid Voucher References", "invalid_voucher_references.csv")
+    ]
+    
+    LINKED_DATASETS = {
+        'grn': "individual_hr995grn.csv",
+        'issue': "individual_hr995issue.csv",
+        'voucher': "individual_hr995vouch.csv",
+        'hr390': "individual_hr390_movement_data.csv",
+        'hr185': "individual_hr185_transactions.csv"
+    }
+    
+    def get_linked_bundle(self):
+        """Return the unfiltered linked datasets, normalized once per snapshot of the source files."""
+        snapshot = tuple(file_snapshot(self.output_folder / filename) for filename in self.LINKED_DATASETS.values())
+        return self.get_shared("linked:bundle", snapshot, self.build_linked_bundle)
+    
+    def build_linked_bundle(self):
+        """Load the linked datasets and add the normalized reference columns used for linkage."""
+        note_cache_miss('load_linked_data')
+        grn_df = self.shared_dataset(self.LINKED_DATASETS['grn'])
+        issue_df = self.shared_dataset(self.LINKED_DATASETS['issue'])
+        voucher_df = self.shared_dataset(self.LINKED_DATASETS['voucher'])
+        hr390_df = self.shared_dataset(self.LINKED_DATASETS['hr390'])
+        hr185_df = self.shared_dataset(self.LINKED_DATASETS['hr185'])
         
         # Apply normalization for proper linkages
         if not grn_df.empty:
-            grn_df['inv_no_normalized'] = grn_df['inv_no'].apply(self.normalize_reference)
+            grn_df['inv_no_normalized'] = self.normalize_references(grn_df['inv_no'])
             grn_df['voucher_normalized'] = grn_df['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         
         if not issue_df.empty:
             # HR995Issue 'Requisition No' links with HR390 'reference number'
-            issue_df['requisition_no_normalized'] = issue_df['requisition_no'].apply(self.normalize_reference)
+            issue_df['requisition_no_normalized'] = self.normalize_references(issue_df['requisition_no'])
         
         if not voucher_df.empty:
             voucher_df['voucher_no_normalized'] = voucher_df['voucher_no'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         
         if hr390_df is not None and not hr390_df.empty:
-            hr390_df['reference_normalized'] = hr390_df['reference'].apply(self.normalize_reference)
+            hr390_df['reference_normalized'] = self.normalize_references(hr390_df['reference'])
         
         if hr185_df is not None and not hr185_df.empty:
             # Special handling for HR185: INV transactions link to HR995grn Inv No
             # HR185 reference (e.g., '0001015578') → HR995grn Inv No (e.g., '1015578')
             hr185_df['reference_normalized'] = hr185_df['reference'].apply(self.normalize_hr185_reference)
             
-            # Apply CHQ exclusion if requested
-            if filters and filters.get('exclude_chq', False):
-                # Focus on primary business transactions only (exclude CHQ payment confirmations)
-                primary_transaction_types = ['INV', 'VCH', 'CN', 'DN']
-                if 'transaction_type' in hr185_df.columns:
-                    hr185_df = hr185_df[hr185_df['transaction_type'].str.upper().isin(primary_transaction_types)].copy()
-                    # Add performance indicator
-                    hr185_df['is_primary_transaction'] = True
-            
             # Filter for INV transactions only (these link to HR995grn)
             if 'transaction_type' in hr185_df.columns:
                 hr185_df['is_inv_transaction'] = hr185_df['transaction_type'].str.upper() == 'INV'
         
         # Create linked datasets with proper relationships
-        linked_data = {
+        return {
             'grn': grn_df,
             'issue': issue_df,
             'voucher': voucher_df,
             'hr390': hr390_df,
             'hr185': hr185_df
         }
+    
+    def load_linked_data(self, filters=None):
+        """Load all data with proper business logic linkages applied."""
+        linked_data = self.get_linked_bundle()
+        
+        hr185_df = linked_data['hr185']
+        if filters and filters.get('exclude_chq', False) and not hr185_df.empty:
+            # Focus on primary business transactions only (exclude CHQ payment confirmations)
+            primary_transaction_types = ['INV', 'VCH', 'CN', 'DN']
+            if 'transaction_type' in hr185_df.columns:
+                hr185_df = hr185_df[hr185_df['transaction_type'].str.upper().isin(primary_transaction_types)].copy(deep=False)
+                # Add performance indicator
+                hr185_df['is_primary_transaction'] = True
+                linked_data['hr185'] = hr185_df
         
         # Apply filters to all datasets
         if filters:
@@ -354,6 +526,45 @@ class AdvancedStockDashboard:
         
         return linked_data
     
+    # Datasets loaded by analytics sections outside the Data Tables list
+    WARMUP_DATASETS = ["individual_hr990_expenditure.csv", "individual_hr995vouch.csv"]
+    
+    def warmup_tasks(self):
+        """
+        Cache warm-up tasks for the current output snapshot.
+        
+        Returns:
+            list: (name, callable) pairs loading every dataset, the linked bundle, the
+                aggregate artifacts and the Data Tables search indexes into the shared store
+        """
+        tables = [filename for _, filename in self.DATA_TABLES]
+        datasets = list(dict.fromkeys(tables + list(self.LINKED_DATASETS.values()) + self.WARMUP_DATASETS))
+        available = [filename for filename in datasets if (self.output_folder / filename).exists()]
+        
+        # Tasks run on the warm-up thread: pure loaders only, no st.* calls
+        tasks = [(f"dataset {filename}", lambda f=filename: self.shared_dataset(f)) for filename in available]
+        tasks.append(("linked bundle", self.get_linked_bundle))
+        tasks.append(("item category dimension", self.get_item_category_dimension))
+        tasks.append(("SCOA rollup cube", self.load_scoa_cube))
+        tasks.append(("duplicate payment reports", self.load_duplicate_payment_reports))
+        tasks.append(("three-way match exceptions", self.load_three_way_exceptions))
+        tasks.append(("anomaly scores", self.load_anomaly_scores))
+        tasks.append(("price history", self.get_price_history))
+        tasks.append(("sequence analysis", self.load_sequence_analysis))
+        tasks.append(("split-purchase findings", self.load_split_purchase_findings))
+        tasks.append(("duplicate-invoice findings", self.load_duplicate_invoice_findings))
+        tasks.append(("stock ledger", self.get_stock_ledger))
+        tasks.append(("document chain", lambda: self.get_document_chain(chain_partitions(self.output_folder))))
+        for filename in tables:
+            if filename in available:
+                tasks.append((f"profile {filename}", lambda f=filename: self.get_dataset_profile(f)))
+        for filename in tables:
+            # The invalid voucher table has its own view without the search box
+            if filename in available and filename != "invalid_voucher_references.csv":
+                tasks.append((f"search index {filename}", lambda f=filename: self.get_search_index(
+                    f, file_snapshot(self.output_folder / f), self.shared_dataset(f))))
+        return tasks
+    
     def enhanced_reference_matching(self, hr390_ref, hr995_refs):
         """4-Strategy Enhanced Reference Matching as documented.
         Handles leading zero mismatches between HR390 and HR995 systems.
@@ -418,39 +629,7 @@ class AdvancedStockDashboard:
         if hr185_df is None or hr185_df.empty:
             return []
         
-        # Find suppliers with both INV and CHQ transactions
-        suppliers_with_inv = set(hr185_df[hr185_df['transaction_type'] == 'INV']['supplier_code'])
-        suppliers_with_chq = set(hr185_df[hr185_df['transaction_type'] == 'CHQ']['supplier_code'])
-        common_suppliers = suppliers_with_inv.intersection(suppliers_with_chq)
-        
-        payment_pairs = []
-        
-        for supplier_code in common_suppliers:
-            supplier_data = hr185_df[hr185_df['supplier_code'] == supplier_code].copy()
-            supplier_data = supplier_data.sort_values(['transaction_date', 'transaction_type'])
-            
-            # Find matching INV-CHQ pairs within supplier
-            for i, inv_row in supplier_data[supplier_data['transaction_type'] == 'INV'].iterrows():
-                # Look for CHQ transactions with same date and amount
-                matching_chq = supplier_data[
-                    (supplier_data['transaction_type'] == 'CHQ') &
-                    (supplier_data['transaction_date'] == inv_row['transaction_date']) &
-                    (abs(supplier_data['amount'] - inv_row['amount']) < 0.01)
-                ]
-                
-                for j, chq_row in matching_chq.iterrows():
-                    payment_pairs.append({
-                        'supplier_code': supplier_code,
-                        'supplier_name': inv_row['supplier_name'],
-                        'date': inv_row['transaction_date'],
-                        'inv_reference': inv_row['reference'],
-                        'chq_reference': chq_row['reference'],
-                        'amount': inv_row['amount'],
-                        'inv_ref_normalized': inv_row.get('reference_normalized', ''),
-                        'chq_ref_normalized': chq_row.get('reference_normalized', '')
-                    })
-        
-        return payment_pairs
+        return identify_inv_chq_payment_pairs(hr185_df).to_dict('records')
     
     def enhanced_hr185_transaction_analysis(self, linked_data):
         """Enhanced HR185 transaction analysis with CHQ inheritance linking."""
@@ -460,86 +639,13 @@ class AdvancedStockDashboard:
         if hr185_df is None or hr185_df.empty or grn_df is None or grn_df.empty:
             return {}
         
-        # Normalize reference function
-        def normalize_reference(ref):
-            if pd.isna(ref):
-                return ''
-            ref_str = str(ref).strip()
-            try:
-                return str(int(ref_str))
-            except ValueError:
-                return ref_str
+        # Vectorized trail: direct GRN matches plus CHQ inheritance from paired INVs
+        payment_pairs = identify_inv_chq_payment_pairs(hr185_df)
+        trail_df = build_enhanced_transaction_trail(hr185_df, grn_df, payment_pairs)
         
-        # Ensure normalized columns exist
-        if 'reference_normalized' not in hr185_df.columns:
-            hr185_df['reference_normalized'] = hr185_df['reference'].apply(normalize_reference)
-        if 'inv_no_normalized' not in grn_df.columns:
-            grn_df['inv_no_normalized'] = grn_df['inv_no'].apply(normalize_reference)
-        
-        # Identify INV-CHQ payment pairs
-        payment_pairs = self.identify_inv_chq_payment_pairs(hr185_df)
-        
-        # Create mapping for quick lookup
-        chq_to_inv_map = {}
-        for pair in payment_pairs:
-            chq_to_inv_map[str(pair['chq_reference'])] = pair['inv_reference']
-        
-        # Analyze each transaction
-        analysis_results = {
-            'total_transactions': len(hr185_df),
-            'inv_transactions': len(hr185_df[hr185_df['transaction_type'] == 'INV']),
-            'chq_transactions': len(hr185_df[hr185_df['transaction_type'] == 'CHQ']),
-            'direct_matches': 0,
-            'inherited_matches': 0,
-            'unmatched': 0,
-            'payment_pairs_identified': len(payment_pairs),
-            'chq_fixed': 0,
-            'detailed_results': []
-        }
-        
-        for _, row in hr185_df.iterrows():
-            ref = str(row['reference'])
-            ref_norm = normalize_reference(ref)
-            transaction_type = row['transaction_type']
-            
-            # Check for direct GRN match
-            direct_match = len(grn_df[grn_df['inv_no_normalized'] == ref_norm]) > 0
-            inherited_match = False
-            match_notes = ''
-            
-            if direct_match:
-                analysis_results['direct_matches'] += 1
-                match_notes = 'Direct GRN match'
-            elif transaction_type == 'CHQ' and ref in chq_to_inv_map:
-                # CHQ inheritance logic
-                paired_inv_ref = chq_to_inv_map[ref]
-                paired_inv_norm = normalize_reference(paired_inv_ref)
-                
-                # Check if paired INV has GRN match
-                if len(grn_df[grn_df['inv_no_normalized'] == paired_inv_norm]) > 0:
-                    inherited_match = True
-                    analysis_results['inherited_matches'] += 1
-                    analysis_results['chq_fixed'] += 1
-                    match_notes = f'Payment for INV {paired_inv_ref} (inherited GRN match)'
-                else:
-                    analysis_results['unmatched'] += 1
-                    match_notes = f'Payment for INV {paired_inv_ref} (INV also unmatched)'
-            else:
-                analysis_results['unmatched'] += 1
-                if transaction_type == 'CHQ':
-                    match_notes = 'Standalone CHQ transaction'
-                else:
-                    match_notes = f'{transaction_type} transaction'
-            
-            analysis_results['detailed_results'].append({
-                'reference': ref,
-                'transaction_type': transaction_type,
-                'supplier_name': row['supplier_name'],
-                'amount': row['amount'],
-                'has_direct_match': direct_match,
-                'has_inherited_match': inherited_match,
-                'match_notes': match_notes
-            })
+        analysis_results = summarize_trail(trail_df)
+        analysis_results['payment_pairs_identified'] = len(payment_pairs)
+        analysis_results['trail'] = trail_df
         
         return analysis_results
     
@@ -815,13 +921,13 @@ class AdvancedStockDashboard:
                 """)
             
             # Sample fixed CHQ transactions
-            fixed_chqs = [result for result in hr185_analysis['detailed_results'] 
-                         if result['has_inherited_match'] and result['transaction_type'] == 'CHQ']
+            trail_df = hr185_analysis['trail']
+            fixed_chqs = trail_df[trail_df['has_inherited_grn_match'] & (trail_df['transaction_type'] == 'CHQ')]
             
-            if fixed_chqs:
+            if not fixed_chqs.empty:
                 st.markdown("---")
                 st.markdown("### 🔧 Sample Fixed CHQ Transactions")
-                sample_fixed = pd.DataFrame(fixed_chqs[:10])  # Show first 10
+                sample_fixed = fixed_chqs.head(10).rename(columns={'hr185_reference': 'reference'})  # Show first 10
                 st.dataframe(
                     sample_fixed[['reference', 'supplier_name', 'amount', 'match_notes']],
                     use_container_width=True,
@@ -1355,7 +1461,8 @@ class AdvancedStockDashboard:
         if filters and filters.get('supplier') and filters['supplier'] != "All Suppliers":
             st.info(f"📊 Filtered by Supplier: **{filters['supplier']}**")
         
-        tab1, tab2, tab3 = st.tabs(["📈 Stock Movement", "🔄 Turnover Analysis", "⚠️ Stock Alerts"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📈 Stock Movement", "🔄 Turnover Analysis", "⚠️ Stock Alerts",
+                                          "📒 Stock Position"])
         
         with tab1:
             self.create_stock_movement_analysis(grn_df, issue_df)
@@ -1365,6 +1472,9 @@ class AdvancedStockDashboard:
         
         with tab3:
             self.create_stock_alerts(stock_df)
+        
+        with tab4:
+            self.create_stock_position_analysis(grn_df, issue_df, filters)
     
     def create_stock_movement_analysis(self, grn_df, issue_df):
         """Create stock movement analysis."""
@@ -1466,21 +1576,14 @@ class AdvancedStockDashboard:
             issued = issue_df.groupby(issue_item_col)['quantity'].sum()
             
             # Create unified item index
-            all_items = set(received.index) | set(issued.index)
-            turnover_data = []
-            
-            for item in all_items:
-                received_qty = received.get(item, 0)
-                issued_qty = issued.get(item, 0)
-                turnover_ratio = issued_qty / (received_qty + 0.001) if received_qty > 0 else 0
-                turnover_data.append({
-                    'item_id': item,
-                    'received': received_qty,
-                    'issued': issued_qty,
-                    'turnover_ratio': turnover_ratio
-                })
-            
-            turnover_df = pd.DataFrame(turnover_data)
+            turnover_df = pd.concat([received.rename('received'), issued.rename('issued')], axis=1).fillna(0)
+            turnover_df.index.name = 'item_id'
+            turnover_df = turnover_df.reset_index()
+            turnover_df['turnover_ratio'] = np.where(
+                turnover_df['received'] > 0,
+                turnover_df['issued'] / (turnover_df['received'] + 0.001),
+                0
+            )
             
             # High turnover items
             high_turnover = turnover_df.nlargest(15, 'turnover_ratio')
@@ -1491,12 +1594,36 @@ class AdvancedStockDashboard:
             fig1.update_xaxes(tickangle=45)
             st.plotly_chart(fig1, width="stretch", key="top_turnover_items")
             
-            # Turnover distribution
-            fig2 = px.scatter(turnover_df, x='received', y='issued',
-                             hover_data=['item_id'],
-                             title='Received vs Issued Quantities',
-                             labels={'received': 'Received Quantity', 'issued': 'Issued Quantity'})
+            # Turnover distribution: density-thinned background, top turnover items kept exact
+            background = turnover_df[~turnover_df['item_id'].isin(high_turnover['item_id'])]
+            hover_template = 'Item ID: %{text}<br>Received Quantity: %{x}<br>Issued Quantity: %{y}<extra></extra>'
+            background_trace, background_shown, background_total = reduced_scatter(
+                background['received'],
+                background['issued'],
+                budget=DEFAULT_POINT_BUDGET,
+                method='density_log',
+                text=background['item_id'].astype(str),
+                mode='markers',
+                name='Items',
+                marker=dict(color='#636efa', size=5),
+                hovertemplate=hover_template
+            )
+            fig2 = go.Figure([background_trace])
+            fig2.add_trace(go.Scattergl(
+                x=high_turnover['received'],
+                y=high_turnover['issued'],
+                text=high_turnover['item_id'].astype(str),
+                mode='markers',
+                name='Top Turnover Items',
+                marker=dict(color='red', size=7),
+                hovertemplate=hover_template
+            ))
+            fig2.update_layout(title='Received vs Issued Quantities',
+                               xaxis_title='Received Quantity', yaxis_title='Issued Quantity')
             st.plotly_chart(fig2, width="stretch", key="received_vs_issued_scatter")
+            budget_note = point_budget_caption(background_shown, background_total)
+            if budget_note:
+                st.caption(budget_note)
         else:
             st.warning("Required columns for turnover analysis not found")
     
@@ -1519,6 +1646,74 @@ class AdvancedStockDashboard:
         else:
             st.warning("No stock adjustment data available")
     
+    def create_stock_position_analysis(self, grn_df, issue_df, filters=None):
+        """Show per-item stock balances as of a chosen date from the stock ledger."""
+        st.subheader("Stock Position As Of Date")
+        
+        ledger = self.get_stock_ledger()
+        if ledger.ledger.empty:
+            st.warning("No stock movements available for the stock ledger")
+            return
+        
+        first_date = ledger.ledger['date'].min().date()
+        last_date = ledger.ledger['date'].max().date()
+        as_of = st.date_input("Balance as of:", value=last_date, min_value=first_date, max_value=last_date,
+                              key="stock_position_as_of")
+        
+        # Restrict to the items in the (filtered) GRN and issue data
+        item_col_grn = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
+        item_col_issue = 'item_code' if 'item_code' in issue_df.columns else 'item_no'
+        items = None
+        if self.filters_active(filters):
+            items = pd.concat([grn_df.get(item_col_grn, pd.Series(dtype=object)),
+                               issue_df.get(item_col_issue, pd.Series(dtype=object))])
+        balances = ledger.balances(as_of, items=items)
+        
+        # Value positive balances at the last unit price paid on or before the date
+        prices = self.get_price_history().prices_as_of(as_of, items=balances['item_code'])
+        balances = balances.merge(prices[['item_code', 'unit_price', 'price_date']], on='item_code', how='left')
+        balances['stock_value'] = balances['balance'].clip(lower=0) * balances['unit_price']
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            st.metric("Items with Movements", f"{len(balances):,}")
+        with col2:
+            st.metric("Items in Stock", f"{(balances['balance'] > 0).sum():,}")
+        with col3:
+            st.metric("Negative Balances", f"{(balances['balance'] < 0).sum():,}")
+        with col4:
+            st.metric("Units on Hand", f"{balances['balance'].clip(lower=0).sum():,.0f}")
+        with col5:
+            st.metric("Stock Value", f"R{balances['stock_value'].sum():,.2f}")
+        st.caption("Balances run from the GRN and issue lines plus HR390 adjustments, and reset to the counted "
+                   "quantity at each year-end stock listing. Stock is valued at the last GRN unit price paid "
+                   "on or before the date (items never received through a GRN carry no value).")
+        
+        top_balances = balances.nlargest(20, 'balance')
+        if not top_balances.empty:
+            fig = px.bar(top_balances, x='item_code', y='balance',
+                         title=f'Largest Stock Balances as of {as_of}',
+                         labels={'item_code': 'Item Code', 'balance': 'Balance'})
+            fig.update_layout(height=400, xaxis_tickangle=-45)
+            fig.update_xaxes(type='category')
+            st.plotly_chart(fig, width="stretch", key="stock_position_top_balances")
+        st.dataframe(balances.sort_values('balance', ascending=False), width="stretch", hide_index=True)
+        
+        # Running balance of one item
+        item_options = balances.sort_values('movements_to_date', ascending=False)['item_code'].tolist()
+        if item_options:
+            item = st.selectbox("Item history:", options=item_options, key="stock_position_item")
+            history = ledger.item_history(item)
+            fig = px.line(history, x='date', y='balance', line_shape='hv', markers=True,
+                          hover_data=['movement_type', 'quantity', 'reference'],
+                          title=f'Running Balance of Item {item}')
+            counts = history[history['is_count']]
+            if not counts.empty:
+                fig.add_trace(go.Scatter(x=counts['date'], y=counts['balance'], mode='markers', name='Stock Count',
+                                         marker=dict(symbol='diamond', size=10, color='orange')))
+            fig.update_layout(height=400)
+            st.plotly_chart(fig, width="stretch", key="stock_position_item_history")
+    
     def create_supplier_analytics(self, filters=None):
         """Create supplier analytics section."""
         st.header("🏪 Supplier Analytics")
@@ -1756,6 +1951,8 @@ class AdvancedStockDashboard:
                     voucher_rate = grns_with_vouchers / len(grn_df) * 100
                     st.metric("Voucher Assignment Rate", f"{voucher_rate:.1f}%")
         
+        self.create_document_chain_analysis()
+        
         # Process timing analysis
         if process_df is not None and not process_df.empty:
             st.markdown("### ⏱️ Process Timing Analysis")
@@ -1771,6 +1968,54 @@ class AdvancedStockDashboard:
                 )
                 st.plotly_chart(fig, use_container_width=True, key="process_step_duration")
     
+    def create_document_chain_analysis(self):
+        """GRN → voucher → payment → HR185 chain per GRN document, sliced by financial year."""
+        st.markdown("### 🔗 GRN Document Chain")
+        
+        years = chain_partitions(self.output_folder)
+        if not years:
+            st.info("Document chain not generated yet. Run the processing pipeline to build it.")
+            return
+        
+        selected_years = st.multiselect("Financial years:", options=years, default=years,
+                                        key="document_chain_years")
+        chain = self.get_document_chain(selected_years)
+        if chain.empty:
+            st.warning("No GRN documents in the selected financial years")
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("GRN Documents", f"{len(chain):,}")
+        with col2:
+            st.metric("Traced to Invoice", f"{chain['invoice_date'].notna().mean() * 100:.1f}%")
+        with col3:
+            st.metric("Traced to Payment", f"{(chain['chain_status'] == 'paid').mean() * 100:.1f}%")
+        with col4:
+            median_days = chain['grn_to_payment_days'].median()
+            st.metric("Median GRN → Payment", f"{median_days:.0f} days" if pd.notna(median_days) else "N/A")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            status_counts = chain['chain_status'].value_counts()
+            fig = px.funnel(y=status_counts.index, x=status_counts.values,
+                            title='Furthest Stage Reached per GRN Document')
+            st.plotly_chart(fig, width="stretch", key="document_chain_status")
+        with col2:
+            durations = chain[['grn_to_invoice_days', 'invoice_to_payment_days', 'grn_to_payment_days']].melt(
+                var_name='stage', value_name='days').dropna()
+            if not durations.empty:
+                fig = px.box(durations, x='stage', y='days', title='Stage Durations (Days)')
+                st.plotly_chart(fig, width="stretch", key="document_chain_durations")
+            else:
+                st.info("No documents with stage dates in the selected years")
+        
+        st.markdown("#### Slowest Documents to Payment")
+        slowest = chain.dropna(subset=['grn_to_payment_days']).nlargest(20, 'grn_to_payment_days')
+        st.dataframe(slowest[['grn_no', 'supplier_name', 'grn_date', 'invoice_date', 'payment_date',
+                              'grn_to_payment_days', 'grn_amount', 'payment_cheque', 'payment_source']],
+                     width="stretch", hide_index=True)
+    
     def create_audit_trail_analysis(self, audit_df):
         """Analyze audit trail data with enhanced insights."""
         st.subheader("📋 Audit Trail Analysis")
@@ -2113,21 +2358,46 @@ class AdvancedStockDashboard:
         # Refresh data
         st.sidebar.markdown("### 🔄 Data Management")
         if st.sidebar.button("Refresh Data"):
-            st.cache_data.clear()
-            st.rerun()
-        
-        # Export options
-        st.sidebar.markdown("### 📁 Export Options")
-        if st.sidebar.button("Export Current View"):
-            st.sidebar.success("Export functionality coming soon!")
+            # Re-warm the new snapshot in the background; entries for unchanged files are kept
+            if start_background_warmup(self.warmup_tasks(), force=True) is None:
+                st.sidebar.info("⏳ A cache warm-up is running; the refresh will start as soon as it finishes.")
+            else:
+                st.rerun()
+        render_warmup_status(st)
+        render_memory_panel(st)
         
-        return {
+        filters = {
             'supplier': selected_supplier,
             'date_range': date_range,
             'department': department,
             'exclude_chq': exclude_chq == "Exclude CHQ (Primary Business Transactions Only)",
             'min_value': min_value
         }
+        
+        # Export options
+        st.sidebar.markdown("### 📁 Export Options")
+        export_sections = {
+            "GRN Records": "individual_hr995grn.csv",
+            "Issue Records": "individual_hr995issue.csv",
+            "Voucher Records": "hr995_voucher.csv",
+            "HR390 Movements": "individual_hr390_movement_data.csv",
+            "HR185 Transactions": "individual_hr185_transactions.csv"
+        }
+        # Only offer datasets the pipeline has produced
+        export_sections = {section: filename for section, filename in export_sections.items()
+                           if (self.output_folder / filename).exists()}
+        if export_sections:
+            export_section = st.sidebar.selectbox("Dataset to export", list(export_sections.keys()),
+                                                  help="Exports the selected dataset with the current sidebar filters applied")
+            if st.sidebar.checkbox("Export Filtered Dataset"):
+                section_df = self.apply_filters(self.load_data(export_sections[export_section]), filters)
+                if section_df.empty:
+                    st.sidebar.info("No rows in this dataset match the current filters.")
+                else:
+                    self.render_export_controls(section_df, f"{export_section}_filtered",
+                                                key=f"sidebar_{export_section}", container=st.sidebar)
+        
+        return filters
     
     def create_anomaly_detection(self, filters=None):
         """Create comprehensive anomaly detection with corrected data relationships."""
@@ -2142,7 +2412,6 @@ class AdvancedStockDashboard:
         linked_data = self.load_linked_data(filters)
         grn_df = linked_data['grn']
         issue_df = linked_data['issue']
-        hr390_df = linked_data['hr390']
         hr185_df = linked_data['hr185']
         
         # Load voucher data separately (not filtered for anomaly detection)
@@ -2153,7 +2422,8 @@ class AdvancedStockDashboard:
             return
         
         # Create tabs for different anomaly types
-        anomaly_tab1, anomaly_tab2, anomaly_tab3, anomaly_tab4, anomaly_tab5 = st.tabs([
+        scored_tab, anomaly_tab1, anomaly_tab2, anomaly_tab3, anomaly_tab4, anomaly_tab5 = st.tabs([
+            "🧮 Scored Anomalies",
             "� Financial Anomalies",
             "� Relationship Anomalies", 
             "📊 Data Quality Issues",
@@ -2161,22 +2431,217 @@ class AdvancedStockDashboard:
             "🎯 Pattern Anomalies"
         ])
         
+        with scored_tab:
+            self.create_scored_anomalies(filters)
+        
         with anomaly_tab1:
-            self.create_financial_anomalies(grn_df, voucher_df)
-            self.create_volume_anomalies(grn_df, issue_df)
+            self.create_financial_anomalies(grn_df, filters)
+            self.create_price_spike_analysis(grn_df)
+            self.create_volume_anomalies(grn_df, issue_df, filters)
         
         with anomaly_tab2:
             self.create_relationship_anomalies(linked_data)
+            self.create_three_way_match_exceptions(filters)
+            self.create_duplicate_invoice_analysis(filters)
         
         with anomaly_tab3:
-            self.create_data_quality_anomalies(grn_df, issue_df)
+            # Unfiltered views can use the pipeline's dataset profiles for null counts
+            profiles = None
+            if not self.filters_active(filters):
+                profiles = {
+                    'grn': self.get_dataset_profile("individual_hr995grn.csv"),
+                    'issue': self.get_dataset_profile("individual_hr995issue.csv")
+                }
+            self.create_data_quality_anomalies(grn_df, issue_df, profiles)
+            self.create_sequence_analysis()
         
         with anomaly_tab4:
-            self.create_timing_anomalies(grn_df, issue_df)
+            self.create_timing_anomalies(grn_df, issue_df, filters)
         
         with anomaly_tab5:
-            self.create_pattern_anomalies(grn_df, issue_df, hr390_df)
+            self.create_pattern_anomalies(filters)
+            self.create_split_purchase_analysis(filters)
+    
     
+    def create_scored_anomalies(self, filters=None):
+        """Show the pipeline's scored anomaly table across all detectors."""
+        st.subheader("🧮 Scored Anomalies")
+        st.caption("Every detector run in one batch by the processing pipeline, ranked by severity and score")
+        
+        anomalies = self.load_anomaly_scores()
+        if anomalies is None:
+            st.info("Anomaly scores not generated yet. Run the processing pipeline to build them.")
+            return
+        if filters and filters.get('supplier') and filters['supplier'] != "All Suppliers":
+            # Rows of the selected supplier plus item rows for the items it supplied
+            anomalies = filter_supplier_anomalies(anomalies, filters['supplier'])
+        if anomalies.empty:
+            st.success("✅ No scored anomalies")
+            return
+        
+        severity_counts = anomalies['severity'].value_counts()
+        metric_cols = st.columns(len(SEVERITY_ORDER) + 1)
+        with metric_cols[0]:
+            st.metric("Total Anomalies", f"{len(anomalies):,}")
+        for column, severity in zip(metric_cols[1:], SEVERITY_ORDER):
+            with column:
+                st.metric(f"{severity.title()} Severity", f"{severity_counts.get(severity, 0):,}")
+        
+        summary = summarize_anomalies(anomalies)
+        fig = px.bar(summary, x='detector', y=SEVERITY_ORDER, title="Anomalies by Detector and Severity",
+                     color_discrete_map={'high': 'red', 'medium': 'orange', 'low': 'gold'})
+        fig.update_layout(height=400, xaxis_tickangle=-45, yaxis_title="Anomalies", legend_title="Severity")
+        st.plotly_chart(fig, use_container_width=True, key="scored_anomalies_by_detector")
+        
+        filter_col1, filter_col2 = st.columns(2)
+        with filter_col1:
+            detectors = st.multiselect("Detectors:", options=list(summary['detector']),
+                                       default=list(summary['detector']), key="scored_anomaly_detectors")
+        with filter_col2:
+            severities = st.multiselect("Severity:", options=SEVERITY_ORDER, default=SEVERITY_ORDER,
+                                        key="scored_anomaly_severity")
+        selected = anomalies[anomalies['detector'].isin(detectors) & anomalies['severity'].isin(severities)]
+        st.dataframe(selected, width="stretch", hide_index=True)
+        self.render_export_controls(selected, "anomaly_scores", "anomaly_scores")
+    
+    def create_sequence_analysis(self):
+        """Show gaps, duplicates and out-of-order dates in document numbering."""
+        st.markdown("### 🔢 Document Numbering Sequences")
+        st.caption("GRN, voucher, requisition and HR185 reference numbers split into prefix and number; "
+                   "findings are number ranges per numbering series (supplier filters do not apply)")
+        
+        analysis = self.load_sequence_analysis()
+        if analysis is None:
+            st.info("Sequence analysis not generated yet. Run the processing pipeline to build it.")
+            return
+        findings, summary = analysis
+        
+        seq_col1, seq_col2, seq_col3, seq_col4 = st.columns(4)
+        with seq_col1:
+            st.metric("Numbering Series", f"{len(summary):,}")
+        with seq_col2:
+            st.metric("Sequence Gaps", f"{summary['gaps'].sum():,}",
+                      help=f"{summary['missing_numbers'].sum():,} missing numbers")
+        with seq_col3:
+            st.metric("Duplicate Numbers", f"{summary['duplicate_numbers'].sum():,}")
+        with seq_col4:
+            st.metric("Out-of-Order Dates", f"{summary['out_of_order'].sum():,}")
+        
+        display_summary = summary.copy()
+        display_summary['completeness'] = display_summary['completeness'].map(lambda x: f"{x:.1%}")
+        st.dataframe(display_summary, width="stretch", hide_index=True)
+        
+        filter_col1, filter_col2 = st.columns(2)
+        with filter_col1:
+            sequences = st.multiselect("Numbering series:", options=sorted(findings['sequence'].unique()),
+                                       default=sorted(findings['sequence'].unique()), key="sequence_series")
+        with filter_col2:
+            finding_types = st.multiselect("Findings:", options=FINDING_TYPES, default=FINDING_TYPES,
+                                           key="sequence_finding_types")
+        selected = findings[findings['sequence'].isin(sequences) & findings['finding'].isin(finding_types)]
+        st.dataframe(selected, width="stretch", hide_index=True)
+        self.render_export_controls(selected, "sequence_findings", "sequence_findings")
+    
+    def create_split_purchase_analysis(self, filters=None):
+        """Show supplier transaction windows that cross an approval threshold no single transaction reaches."""
+        st.markdown("### ✂️ Split Purchases & Threshold Avoidance")
+        st.caption(f"Orders or vouchers to one supplier within {SPLIT_WINDOW_DAYS} days whose total crosses an "
+                   "approval threshold while each one stays below it")
+        
+        findings = self.load_split_purchase_findings()
+        if findings is None:
+            st.info("Split-purchase detection not generated yet. Run the processing pipeline to build it.")
+            return
+        if filters and filters.get('supplier') and filters['supplier'] != "All Suppliers":
+            findings = findings[findings['supplier_name'] == filters['supplier']]
+        if findings.empty:
+            st.success("✅ No split-purchase patterns detected")
+            return
+        
+        split_col1, split_col2, split_col3 = st.columns(3)
+        with split_col1:
+            st.metric("Flagged Windows", f"{len(findings):,}")
+        with split_col2:
+            st.metric("Suppliers Involved", f"{findings['supplier'].nunique():,}")
+        with split_col3:
+            st.metric("Value in Flagged Windows", f"R{findings['total_amount'].sum():,.2f}")
+        
+        by_threshold = findings.groupby('threshold').agg(windows=('supplier', 'size'),
+                                                         value=('total_amount', 'sum')).reset_index()
+        by_threshold['threshold'] = by_threshold['threshold'].map(lambda x: f"R{x:,.0f}")
+        fig = px.bar(by_threshold, x='threshold', y='windows', text='windows',
+                     title="Flagged Windows by Approval Threshold",
+                     labels={'threshold': 'Threshold', 'windows': 'Flagged Windows'})
+        fig.update_layout(height=350)
+        st.plotly_chart(fig, use_container_width=True, key="split_purchase_thresholds")
+        
+        st.dataframe(findings, width="stretch", hide_index=True)
+        self.render_export_controls(findings, "split_purchase_findings", "split_purchases")
+    
+    def create_three_way_match_exceptions(self, filters=None):
+        """Show the pipeline's GRN ↔ HR185 invoice ↔ payment exception queue."""
+        st.markdown("### ⚖️ Three-Way Match Exceptions")
+        st.caption("GRN amount vs HR185 invoice vs voucher/cheque payment, compared per invoice and per payment")
+        
+        exceptions = self.load_three_way_exceptions()
+        if exceptions is None:
+            st.info("Three-way match not generated yet. Run the processing pipeline to build it.")
+            return
+        if filters and filters.get('supplier') and filters['supplier'] != "All Suppliers":
+            exceptions = exceptions[exceptions['supplier_name'] == filters['supplier']]
+        if exceptions.empty:
+            st.success("✅ No three-way match exceptions")
+            return
+        
+        summary = summarize_exceptions(exceptions)
+        columns = st.columns(len(summary))
+        for column, row in zip(columns, summary.itertuples()):
+            with column:
+                st.metric(row.exception_type.replace('_', ' ').title(), f"{row.documents:,}",
+                          help=f"R{row.amount:,.2f} absolute exception amount across {row.groups:,} "
+                               "invoice/payment groups (each group counted once)")
+        
+        selected_types = st.multiselect("Exception types:", options=[t for t in EXCEPTION_TYPES
+                                                                      if t in set(summary['exception_type'])],
+                                        default=list(summary['exception_type']), key="three_way_exception_types")
+        queue = exceptions[exceptions['exception_type'].isin(selected_types)]
+        st.dataframe(queue, width="stretch", hide_index=True)
+        self.render_export_controls(queue, "three_way_match_exceptions", "three_way_exceptions")
+    
+    def create_duplicate_invoice_analysis(self, filters=None):
+        """Show invoice numbers captured more than once at the same amount, across suppliers or formats."""
+        st.markdown("### 🧾 Duplicate Invoices")
+        st.caption("GRN invoice numbers, supplier invoice references and HR185 INV references matched on a "
+                   "canonical number (prefixes, leading zeros and punctuation removed) and amount")
+        
+        members = self.load_duplicate_invoice_findings()
+        if members is None:
+            st.info("Duplicate-invoice detection not generated yet. Run the processing pipeline to build it.")
+            return
+        if filters and filters.get('supplier') and filters['supplier'] != "All Suppliers":
+            selected_groups = members.loc[members['supplier_name'] == filters['supplier'], 'group_id']
+            members = members[members['group_id'].isin(selected_groups)]
+        if members.empty:
+            st.success("✅ No duplicate-invoice candidates")
+            return
+        
+        groups = summarize_duplicate_invoices(members)
+        dup_col1, dup_col2, dup_col3, dup_col4 = st.columns(4)
+        with dup_col1:
+            st.metric("Candidate Groups", f"{len(groups):,}")
+        with dup_col2:
+            st.metric("Across Suppliers", f"{int(groups['cross_supplier'].sum()):,}")
+        with dup_col3:
+            st.metric("Format Variants", f"{int(groups['format_variants'].sum()):,}")
+        with dup_col4:
+            # Value captured on top of the first record of each group
+            st.metric("Potential Duplicate Value",
+                      f"R{(groups['max_amount'] * (groups['records'] - 1)).sum():,.2f}")
+        
+        st.dataframe(groups, width="stretch", hide_index=True)
+        with st.expander("🔍 Records in candidate groups"):
+            st.dataframe(members, width="stretch", hide_index=True)
+        self.render_export_controls(members, "duplicate_invoice_groups", "duplicate_invoices")
     
     def create_relationship_anomalies(self, linked_data):
         """Detect anomalies in data relationships using corrected business logic."""
@@ -2291,10 +2756,22 @@ class AdvancedStockDashboard:
             fig.update_layout(yaxis_title="Coverage Percentage (%)")
             st.plotly_chart(fig, use_container_width=True, key="data_coverage_metrics")
     
-    def create_data_quality_anomalies(self, grn_df, issue_df):
-        """Detect data quality issues and inconsistencies."""
+    def create_data_quality_anomalies(self, grn_df, issue_df, profiles=None):
+        """Detect data quality issues and inconsistencies.
+        
+        When dataset profiles are supplied (unfiltered view), null counts are read
+        from the precomputed profile instead of being recounted.
+        """
         st.subheader("📊 Data Quality Issues")
         
+        profiles = profiles or {}
+        
+        def missing_count_for(df, profile_key, col):
+            profile = profiles.get(profile_key)
+            if profile is not None and col in profile['columns'] and profile['row_count'] == len(df):
+                return profile['columns'][col]['null_count']
+            return df[col].isna().sum()
+        
         col1, col2 = st.columns(2)
         
         with col1:
@@ -2305,7 +2782,7 @@ class AdvancedStockDashboard:
                 missing_analysis = []
                 for col in ['supplier_name', 'item_no', 'voucher', 'nett_grn_amt']:
                     if col in grn_df.columns:
-                        missing_count = grn_df[col].isna().sum()
+                        missing_count = missing_count_for(grn_df, 'grn', col)
                         missing_pct = missing_count / len(grn_df) * 100
                         missing_analysis.append({
                             'Column': col,
@@ -2322,7 +2799,7 @@ class AdvancedStockDashboard:
                 issue_missing = []
                 for col in ['requisition_no', 'item_no', 'quantity']:
                     if col in issue_df.columns:
-                        missing_count = issue_df[col].isna().sum()
+                        missing_count = missing_count_for(issue_df, 'issue', col)
                         missing_pct = missing_count / len(issue_df) * 100
                         issue_missing.append({
                             'Column': col,
@@ -2377,52 +2854,61 @@ class AdvancedStockDashboard:
             
             st.info("💡 **Note**: Multiple line items per document (GRN/Requisition) are normal business practice, not data inconsistencies.")
     
-    def create_timing_anomalies(self, grn_df, issue_df):
-        """Detect timing-related anomalies in transaction processing."""
+    def create_timing_anomalies(self, grn_df, issue_df, filters=None):
+        """Show weekend documents and unusual months from the scored anomaly table."""
         st.subheader("⏱️ Timing Anomalies")
         
-        # Weekend transactions
-        weekend_anomalies = []
-        
-        if not grn_df.empty:
-            date_cols = [col for col in grn_df.columns if 'date' in col.lower()]
-            for date_col in date_cols:
-                if grn_df[date_col].notna().any():
-                    grn_df[f'{date_col}_parsed'] = pd.to_datetime(grn_df[date_col], errors='coerce')
-                    weekend_grns = grn_df[grn_df[f'{date_col}_parsed'].dt.weekday >= 5]
-                    if len(weekend_grns) > 0:
-                        weekend_anomalies.append(f"🟡 {len(weekend_grns)} GRN transactions on weekends")
-        
-        if not issue_df.empty:
-            date_cols = [col for col in issue_df.columns if 'date' in col.lower()]
-            for date_col in date_cols:
-                if issue_df[date_col].notna().any():
-                    issue_df[f'{date_col}_parsed'] = pd.to_datetime(issue_df[date_col], errors='coerce')
-                    weekend_issues = issue_df[issue_df[f'{date_col}_parsed'].dt.weekday >= 5]
-                    if len(weekend_issues) > 0:
-                        weekend_anomalies.append(f"🟡 {len(weekend_issues)} Issue transactions on weekends")
+        anomalies = self.load_detector_anomalies(['weekend_activity', 'outlier_month_value', 'outlier_month_count'],
+                                                 filters, grn_df, issue_df)
+        if anomalies is None:
+            st.info("Anomaly scores not generated yet. Run the processing pipeline to build them.")
+            return
         
         col1, col2 = st.columns(2)
         
         with col1:
             st.markdown("### 📅 Weekend Activity Analysis")
-            if weekend_anomalies:
-                for anomaly in weekend_anomalies:
-                    st.markdown(f"- {anomaly}")
-            else:
+            weekend = anomalies[anomalies['detector'] == 'weekend_activity']
+            if weekend.empty:
                 st.success("✅ No weekend transaction anomalies detected")
+            else:
+                counts = weekend['record_type'].value_counts()
+                for record_type, label in [('GRN', "GRN documents"), ('Issue', "requisitions")]:
+                    if counts.get(record_type, 0) > 0:
+                        st.markdown(f"- 🟡 {counts[record_type]:,} {label} dated on weekends")
+                weekend_grns = weekend[weekend['record_type'] == 'GRN']
+                st.metric("Weekend GRN Value", f"R{weekend_grns['value'].sum():,.2f}")
+                st.dataframe(weekend[['record_type', 'record_id', 'supplier_name', 'date', 'evidence']],
+                             width="stretch", hide_index=True)
         
         with col2:
             st.markdown("### ⏰ Processing Time Anomalies")
             # This would be enhanced with more sophisticated timing analysis
             st.info("Processing time analysis available in Operational Analytics → Processing Times")
+        
+        st.markdown("### 🍂 Seasonal & Monthly Anomalies")
+        st.caption(f"Calendar months with GRN value or line count above mean + {OUTLIER_STD_MULTIPLIER:.0f} std "
+                   "(all suppliers)")
+        months = anomalies[anomalies['detector'].isin(['outlier_month_value', 'outlier_month_count'])]
+        if months.empty:
+            st.success("✅ No months with unusual GRN value or activity detected")
+            return
+        month_col1, month_col2 = st.columns(2)
+        with month_col1:
+            st.metric("High Spending Months", f"{(months['detector'] == 'outlier_month_value').sum():,}")
+        with month_col2:
+            st.metric("High Activity Months", f"{(months['detector'] == 'outlier_month_count').sum():,}")
+        st.dataframe(months[['detector', 'record_id', 'value', 'threshold', 'evidence']], width="stretch",
+                     hide_index=True)
 
-    def create_financial_anomalies(self, grn_df, voucher_df):
-        """Detect financial anomalies and unusual spending patterns."""
+    def create_financial_anomalies(self, grn_df, filters=None):
+        """Show high-value GRNs, volatile prices and supplier spending from the scored anomaly table."""
         st.subheader("💸 Financial Anomalies & Unusual Spending")
         
-        if len(grn_df) == 0:
-            st.warning("No GRN data available for financial anomaly detection.")
+        anomalies = self.load_detector_anomalies(
+            ['high_value_grn', 'price_volatility', 'supplier_high_spend', 'supplier_high_frequency'], filters, grn_df)
+        if anomalies is None:
+            st.info("Anomaly scores not generated yet. Run the processing pipeline to build them.")
             return
         
         col1, col2 = st.columns(2)
@@ -2430,1046 +2916,405 @@ class AdvancedStockDashboard:
         with col1:
             # High-value transactions (outliers)
             st.markdown("### 💰 High-Value Transaction Outliers")
+            st.caption(f"GRN lines above Q3 + {HIGH_VALUE_IQR_MULTIPLIER} × IQR of all GRN amounts")
+            outliers = anomalies[anomalies['detector'] == 'high_value_grn']
             
-            # Use the correct column name for GRN values
-            value_col = None
-            for col in ['gross_value', 'nett_grn_amt', 'value', 'amount']:
-                if col in grn_df.columns:
-                    value_col = col
-                    break
-            
-            if value_col and len(grn_df[grn_df[value_col].notna()]) > 0:
-                # Filter out null values
-                valid_values = grn_df[grn_df[value_col].notna()]
-                
-                Q1 = valid_values[value_col].quantile(0.25)
-                Q3 = valid_values[value_col].quantile(0.75)
-                IQR = Q3 - Q1
-                outlier_threshold = Q3 + 1.5 * IQR
-                
-                outliers = valid_values[valid_values[value_col] > outlier_threshold].copy()
-                
-                if len(outliers) > 0:
-                    # Create outlier visualization
-                    fig = go.Figure()
-                    
-                    # Add normal transactions
-                    normal_data = valid_values[valid_values[value_col] <= outlier_threshold]
-                    fig.add_trace(go.Scatter(
-                        x=normal_data.index,
-                        y=normal_data[value_col],
-                        mode='markers',
-                        name='Normal Transactions',
-                        marker=dict(color='lightblue', size=4)
-                    ))
-                    
-                    # Add outliers
-                    fig.add_trace(go.Scatter(
-                        x=outliers.index,
-                        y=outliers[value_col],
-                        mode='markers',
-                        name='High-Value Outliers',
-                        marker=dict(color='red', size=8, symbol='diamond'),
-                        text=[f"Item: {item}<br>Value: R{value:,.2f}<br>Supplier: {supp}" 
-                              for item, value, supp in zip(
-                                  outliers.get('item_no', outliers.get('item_code', 'Unknown')),
-                                  outliers[value_col],
-                                  outliers.get('supplier_name', 'Unknown')
-                              )],
-                        hovertemplate='%{text}<extra></extra>'
-                    ))
-                    
-                    fig.add_hline(y=outlier_threshold, line_dash="dash", line_color="red",
-                                annotation_text=f"Outlier Threshold: R{outlier_threshold:,.2f}")
-                    
-                    fig.update_layout(
-                        title="High-Value Transaction Detection",
-                        xaxis_title="Transaction Index",
-                        yaxis_title=f"{value_col.replace('_', ' ').title()} (R)",
-                        height=400,
-                        annotations=[
-                            dict(
-                                text=self.get_data_source_tooltip('hr995_grn.csv'),
-                                showarrow=False,
-                                xref="paper", yref="paper",
-                                x=0.02, y=0.98,
-                                xanchor="left", yanchor="top",
-                                bgcolor="rgba(255,255,255,0.8)",
-                                bordercolor="gray",
-                                borderwidth=1,
-                                font=dict(size=10)
-                            )
-                        ]
-                    )
-                    
-                    # Update hover templates
-                    fig.update_traces(
-                        selector=dict(name='Normal Transactions'),
-                        hovertemplate="<b>Transaction Index:</b> %{x}<br>" +
-                                      f"<b>{value_col.replace('_', ' ').title()}:</b> R%{{y:,.2f}}<br>" +
-                                      "<b>Data Source:</b> GRN Records<br>" +
-                                      "<extra></extra>"
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True, key="financial_outliers_scatter")
-                    
-                    # Show outlier summary
-                    st.markdown("#### 🚨 Alert Summary:")
-                    total_outlier_value = outliers[value_col].sum()
-                    avg_outlier_value = outliers[value_col].mean()
-                    
-                    alert_col1, alert_col2, alert_col3 = st.columns(3)
-                    with alert_col1:
-                        st.metric("High-Value Transactions", len(outliers))
-                    with alert_col2:
-                        st.metric("Total Outlier Value", f"R{total_outlier_value:,.2f}")
-                    with alert_col3:
-                        st.metric("Average Outlier Value", f"R{avg_outlier_value:,.2f}")
-                    
-                    # Show top outliers table
-                    st.markdown("#### 📊 Top High-Value Transactions:")
-                    display_outliers = outliers.nlargest(10, value_col)[
-                        ['item_no' if 'item_no' in outliers.columns else 'item_code',
-                         'supplier_name', value_col, 'date']
-                    ].copy()
-                    display_outliers[value_col] = display_outliers[value_col].apply(lambda x: f"R{x:,.2f}")
-                    st.dataframe(display_outliers, use_container_width=True)
-                else:
-                    st.info("No high-value outliers detected in the current dataset.")
+            if len(outliers) > 0:
+                outlier_threshold = outliers['threshold'].iloc[0]
+                fig = go.Figure()
+                fig.add_trace(go.Scattergl(
+                    x=outliers['date'],
+                    y=outliers['value'],
+                    mode='markers',
+                    name='High-Value Outliers',
+                    marker=dict(color='red', size=8, symbol='diamond'),
+                    text=[f"GRN: {grn}<br>Item: {item}<br>Value: R{value:,.2f}<br>Supplier: {supp}"
+                          for grn, item, value, supp in zip(outliers['record_id'], outliers['item_code'],
+                                                            outliers['value'], outliers['supplier_name'])],
+                    hovertemplate='%{text}<extra></extra>'
+                ))
+                fig.add_hline(y=outlier_threshold, line_dash="dash", line_color="red",
+                              annotation_text=f"Outlier Threshold: R{outlier_threshold:,.2f}")
+                fig.update_layout(
+                    title="High-Value Transaction Detection",
+                    xaxis_title="GRN Date",
+                    yaxis_title="GRN Amount (R)",
+                    height=400
+                )
+                st.plotly_chart(fig, use_container_width=True, key="financial_outliers_scatter")
+                
+                # Show outlier summary
+                st.markdown("#### 🚨 Alert Summary:")
+                alert_col1, alert_col2, alert_col3 = st.columns(3)
+                with alert_col1:
+                    st.metric("High-Value Transactions", len(outliers))
+                with alert_col2:
+                    st.metric("Total Outlier Value", f"R{outliers['value'].sum():,.2f}")
+                with alert_col3:
+                    st.metric("Average Outlier Value", f"R{outliers['value'].mean():,.2f}")
+                
+                # Show top outliers table
+                st.markdown("#### 📊 Top High-Value Transactions:")
+                display_outliers = outliers.nlargest(10, 'value')[
+                    ['record_id', 'item_code', 'supplier_name', 'value', 'date']].copy()
+                display_outliers['value'] = display_outliers['value'].apply(lambda x: f"R{x:,.2f}")
+                display_outliers.columns = ['GRN', 'Item Code', 'Supplier', 'Amount', 'Date']
+                st.dataframe(display_outliers, use_container_width=True, hide_index=True)
             else:
-                st.warning("No value column found for financial analysis. Available columns: " + ", ".join(grn_df.columns))
+                st.info("No high-value outliers detected in the current dataset.")
         
         with col2:
             # Price volatility analysis
             st.markdown("### 📈 Price Volatility Alerts")
+            volatile_items = anomalies[anomalies['detector'] == 'price_volatility'].sort_values('value',
+                                                                                                 ascending=False)
             
-            if 'unit_price' in grn_df.columns:
-                # Group by item and calculate price volatility
-                item_col = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
-                if item_col in grn_df.columns:
-                    price_stats = grn_df.groupby(item_col)['unit_price'].agg([
-                        'count', 'mean', 'std', 'min', 'max'
-                    ]).reset_index()
-                    
-                    # Calculate coefficient of variation for volatility
-                    price_stats['cv'] = (price_stats['std'] / price_stats['mean']) * 100
-                    price_stats = price_stats[price_stats['count'] >= 3]  # Need at least 3 transactions
-                    
-                    # High volatility items (CV > 50%)
-                    volatile_items = price_stats[price_stats['cv'] > 50].sort_values('cv', ascending=False)
-                    
-                    if len(volatile_items) > 0:
-                        # Create volatility chart
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Bar(
-                            x=volatile_items[item_col].head(15),
-                            y=volatile_items['cv'].head(15),
-                            name='Price Volatility (CV%)',
-                            marker_color='orange',
-                            text=volatile_items['cv'].head(15).round(1),
-                            textposition='outside'
-                        ))
-                        
-                        fig.add_hline(y=50, line_dash="dash", line_color="red",
-                                    annotation_text="High Volatility Threshold (50%)")
-                        
-                        fig.update_layout(
-                            title="Items with High Price Volatility",
-                            xaxis_title="Item Code",
-                            yaxis_title="Coefficient of Variation (%)",
-                            height=400,
-                            xaxis_tickangle=-45
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="price_volatility_analysis")
-                        
-                        # Volatility metrics
-                        vol_col1, vol_col2, vol_col3 = st.columns(3)
-                        with vol_col1:
-                            st.metric("Volatile Items", len(volatile_items))
-                        with vol_col2:
-                            st.metric("Avg Volatility", f"{volatile_items['cv'].mean():.1f}%")
-                        with vol_col3:
-                            st.metric("Max Volatility", f"{volatile_items['cv'].max():.1f}%")
-                        
-                        # Show volatile items table
-                        st.markdown("#### 📊 Most Volatile Items:")
-                        display_volatile = volatile_items.head(10)[
-                            [item_col, 'count', 'mean', 'cv', 'min', 'max']
-                        ].copy()
-                        display_volatile['mean'] = display_volatile['mean'].apply(lambda x: f"R{x:.2f}")
-                        display_volatile['min'] = display_volatile['min'].apply(lambda x: f"R{x:.2f}")
-                        display_volatile['max'] = display_volatile['max'].apply(lambda x: f"R{x:.2f}")
-                        display_volatile['cv'] = display_volatile['cv'].apply(lambda x: f"{x:.1f}%")
-                        display_volatile.columns = ['Item Code', 'Transactions', 'Avg Price', 'Volatility', 'Min Price', 'Max Price']
-                        st.dataframe(display_volatile, use_container_width=True)
-                    else:
-                        st.info("No items with high price volatility detected.")
+            if len(volatile_items) > 0:
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=volatile_items['record_id'].head(15),
+                    y=volatile_items['value'].head(15),
+                    name='Price Volatility (CV%)',
+                    marker_color='orange',
+                    text=volatile_items['value'].head(15).round(1),
+                    textposition='outside'
+                ))
+                fig.add_hline(y=PRICE_VOLATILITY_CV, line_dash="dash", line_color="red",
+                              annotation_text=f"High Volatility Threshold ({PRICE_VOLATILITY_CV:.0f}%)")
+                fig.update_layout(
+                    title="Items with High Price Volatility",
+                    xaxis_title="Item Code",
+                    yaxis_title="Coefficient of Variation (%)",
+                    height=400,
+                    xaxis_tickangle=-45
+                )
+                st.plotly_chart(fig, use_container_width=True, key="price_volatility_analysis")
+                
+                # Volatility metrics
+                vol_col1, vol_col2, vol_col3 = st.columns(3)
+                with vol_col1:
+                    st.metric("Volatile Items", len(volatile_items))
+                with vol_col2:
+                    st.metric("Avg Volatility", f"{volatile_items['value'].mean():.1f}%")
+                with vol_col3:
+                    st.metric("Max Volatility", f"{volatile_items['value'].max():.1f}%")
+                
+                # Show volatile items table
+                st.markdown("#### 📊 Most Volatile Items:")
+                display_volatile = volatile_items.head(10)[['record_id', 'evidence']].copy()
+                display_volatile.columns = ['Item Code', 'Unit Price Variation']
+                st.dataframe(display_volatile, use_container_width=True, hide_index=True)
+            else:
+                st.info("No items with high price volatility detected.")
         
         # Supplier spending anomalies
         st.markdown("### 🏪 Supplier Spending Anomalies")
         
-        if 'supplier_name' in grn_df.columns and 'gross_value' in grn_df.columns:
-            supplier_spending = grn_df.groupby('supplier_name')['gross_value'].agg([
-                'sum', 'count', 'mean'
-            ]).reset_index()
-            
-            # Detect suppliers with unusually high spending
-            spending_Q3 = supplier_spending['sum'].quantile(0.75)
-            spending_IQR = supplier_spending['sum'].quantile(0.75) - supplier_spending['sum'].quantile(0.25)
-            spending_threshold = spending_Q3 + 1.5 * spending_IQR
-            
-            high_spending_suppliers = supplier_spending[
-                supplier_spending['sum'] > spending_threshold
-            ].sort_values('sum', ascending=False)
-            
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                if len(high_spending_suppliers) > 0:
-                    fig = go.Figure()
-                    
-                    fig.add_trace(go.Bar(
-                        x=high_spending_suppliers['supplier_name'],
-                        y=high_spending_suppliers['sum'],
-                        name='High Spending Suppliers',
-                        marker_color='red',
-                        text=[f"R{x:,.0f}" for x in high_spending_suppliers['sum']],
-                        textposition='outside'
-                    ))
-                    
-                    fig.update_layout(
-                        title="Suppliers with Unusually High Spending",
-                        xaxis_title="Supplier",
-                        yaxis_title="Total Spending (R)",
-                        height=400,
-                        xaxis_tickangle=-45
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True, key="high_spending_suppliers")
-                else:
-                    st.info("No suppliers with unusually high spending detected.")
-            
-            with col2:
-                # Transaction frequency anomalies
-                avg_transactions = supplier_spending['count'].mean()
-                high_freq_threshold = avg_transactions + 2 * supplier_spending['count'].std()
-                
-                high_freq_suppliers = supplier_spending[
-                    supplier_spending['count'] > high_freq_threshold
-                ].sort_values('count', ascending=False)
-                
-                if len(high_freq_suppliers) > 0:
-                    fig = go.Figure()
-                    
-                    fig.add_trace(go.Bar(
-                        x=high_freq_suppliers['supplier_name'],
-                        y=high_freq_suppliers['count'],
-                        name='High Frequency Suppliers',
-                        marker_color='orange',
-                        text=high_freq_suppliers['count'],
-                        textposition='outside'
-                    ))
-                    
-                    fig.add_hline(y=high_freq_threshold, line_dash="dash", line_color="red",
-                                annotation_text=f"High Frequency Threshold: {high_freq_threshold:.0f}")
-                    
-                    fig.update_layout(
-                        title="Suppliers with Unusually High Transaction Frequency",
-                        xaxis_title="Supplier",
-                        yaxis_title="Number of Transactions",
-                        height=400,
-                        xaxis_tickangle=-45
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True, key="high_frequency_suppliers")
-                else:
-                    st.info("No suppliers with unusually high transaction frequency detected.")
-    
-    def create_volume_anomalies(self, grn_df, issue_df):
-        """Detect volume and quantity anomalies."""
-        st.subheader("📊 Volume & Quantity Anomalies")
-        
         col1, col2 = st.columns(2)
         
         with col1:
-            # GRN quantity outliers
-            st.markdown("### 📈 Unusual GRN Quantities")
-            
-            # Use the correct quantity column name
-            qty_col_grn = None
-            for col in ['grn_qty', 'quantity', 'qty']:
-                if col in grn_df.columns:
-                    qty_col_grn = col
-                    break
-            
-            if qty_col_grn and len(grn_df) > 0:
-                # Remove zero and negative quantities
-                valid_grn = grn_df[grn_df[qty_col_grn] > 0].copy()
-                
-                if len(valid_grn) > 0:
-                    # Calculate outliers
-                    Q1 = valid_grn[qty_col_grn].quantile(0.25)
-                    Q3 = valid_grn[qty_col_grn].quantile(0.75)
-                    IQR = Q3 - Q1
-                    upper_threshold = Q3 + 2 * IQR  # More sensitive threshold
-                    
-                    qty_outliers = valid_grn[valid_grn[qty_col_grn] > upper_threshold].copy()
-                    
-                    if len(qty_outliers) > 0:
-                        # Create box plot with outliers
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Box(
-                            y=valid_grn[qty_col_grn],
-                            name='GRN Quantities',
-                            boxpoints='outliers',
-                            jitter=0.3,
-                            pointpos=-1.8,
-                            marker_color='lightblue'
-                        ))
-                        
-                        fig.update_layout(
-                            title="GRN Quantity Distribution with Outliers",
-                            yaxis_title="Quantity",
-                            height=400
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="grn_quantity_outliers")
-                        
-                        # Outlier metrics
-                        qty_col1, qty_col2, qty_col3 = st.columns(3)
-                        with qty_col1:
-                            st.metric("Quantity Outliers", len(qty_outliers))
-                        with qty_col2:
-                            st.metric("Max Quantity", f"{qty_outliers[qty_col_grn].max():,.0f}")
-                        with qty_col3:
-                            st.metric("Threshold", f"{upper_threshold:,.0f}")
-                        
-                        # Show outliers table
-                        if len(qty_outliers) > 0:
-                            st.markdown("#### 🚨 Unusual Quantity Transactions:")
-                            item_col = 'item_no' if 'item_no' in qty_outliers.columns else 'item_code'
-                            display_cols = [item_col, 'supplier_name', qty_col_grn]
-                            
-                            # Add value column if available
-                            value_col = None
-                            for col in ['gross_value', 'nett_grn_amt', 'value', 'amount']:
-                                if col in qty_outliers.columns:
-                                    value_col = col
-                                    display_cols.append(col)
-                                    break
-                            
-                            display_cols = [col for col in display_cols if col in qty_outliers.columns]
-                            
-                            display_qty = qty_outliers.nlargest(10, qty_col_grn)[display_cols].copy()
-                            if value_col and value_col in display_qty.columns:
-                                display_qty[value_col] = display_qty[value_col].apply(lambda x: f"R{x:,.2f}")
-                            st.dataframe(display_qty, use_container_width=True)
-                    else:
-                        st.info("No unusual GRN quantities detected.")
-                else:
-                    st.warning("No valid GRN quantity data available.")
+            high_spending_suppliers = anomalies[anomalies['detector'] == 'supplier_high_spend'].sort_values(
+                'value', ascending=False)
+            if len(high_spending_suppliers) > 0:
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=high_spending_suppliers['record_id'],
+                    y=high_spending_suppliers['value'],
+                    name='High Spending Suppliers',
+                    marker_color='red',
+                    text=[f"R{x:,.0f}" for x in high_spending_suppliers['value']],
+                    textposition='outside'
+                ))
+                fig.update_layout(
+                    title="Suppliers with Unusually High Spending",
+                    xaxis_title="Supplier",
+                    yaxis_title="Total Spending (R)",
+                    height=400,
+                    xaxis_tickangle=-45
+                )
+                st.plotly_chart(fig, use_container_width=True, key="high_spending_suppliers")
+                st.caption(f"Total spend above Q3 + {SUPPLIER_SPEND_IQR_MULTIPLIER} × IQR of supplier totals")
             else:
-                st.warning("No quantity column found in GRN data.")
+                st.info("No suppliers with unusually high spending detected.")
         
         with col2:
-            # Issue quantity outliers
-            st.markdown("### 📉 Unusual Issue Quantities")
-            
-            # Use the correct quantity column name for issues
-            qty_col_issue = None
-            for col in ['issue_qty', 'quantity', 'qty']:
-                if col in issue_df.columns:
-                    qty_col_issue = col
-                    break
-            
-            if qty_col_issue and len(issue_df) > 0:
-                valid_issue = issue_df[issue_df[qty_col_issue] > 0].copy()
-                
-                if len(valid_issue) > 0:
-                    # Calculate outliers
-                    Q1 = valid_issue[qty_col_issue].quantile(0.25)
-                    Q3 = valid_issue[qty_col_issue].quantile(0.75)
-                    IQR = Q3 - Q1
-                    upper_threshold = Q3 + 2 * IQR
-                    
-                    issue_outliers = valid_issue[valid_issue[qty_col_issue] > upper_threshold].copy()
-                    
-                    if len(issue_outliers) > 0:
-                        # Create histogram with outliers highlighted
-                        fig = go.Figure()
-                        
-                        # Normal data
-                        normal_issues = valid_issue[valid_issue[qty_col_issue] <= upper_threshold]
-                        fig.add_trace(go.Histogram(
-                            x=normal_issues[qty_col_issue],
-                            name='Normal Issues',
-                            opacity=0.7,
-                            marker_color='lightgreen'
-                        ))
-                        
-                        # Outliers
-                        fig.add_trace(go.Histogram(
-                            x=issue_outliers[qty_col_issue],
-                            name='Outlier Issues',
-                            opacity=0.7,
-                            marker_color='red'
-                        ))
-                        
-                        fig.update_layout(
-                            title="Issue Quantity Distribution",
-                            xaxis_title="Issue Quantity",
-                            yaxis_title="Frequency",
-                            height=400,
-                            barmode='overlay'
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="issue_quantity_outliers")
-                        
-                        # Outlier metrics
-                        issue_col1, issue_col2, issue_col3 = st.columns(3)
-                        with issue_col1:
-                            st.metric("Issue Outliers", len(issue_outliers))
-                        with issue_col2:
-                            st.metric("Max Issue Qty", f"{issue_outliers[qty_col_issue].max():,.0f}")
-                        with issue_col3:
-                            st.metric("Threshold", f"{upper_threshold:,.0f}")
-                    else:
-                        st.info("No unusual issue quantities detected.")
-                else:
-                    st.warning("No valid issue quantity data available.")
+            # Transaction frequency anomalies
+            high_freq_suppliers = anomalies[anomalies['detector'] == 'supplier_high_frequency'].sort_values(
+                'value', ascending=False)
+            if len(high_freq_suppliers) > 0:
+                high_freq_threshold = high_freq_suppliers['threshold'].iloc[0]
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=high_freq_suppliers['record_id'],
+                    y=high_freq_suppliers['value'],
+                    name='High Frequency Suppliers',
+                    marker_color='orange',
+                    text=high_freq_suppliers['value'].astype(int),
+                    textposition='outside'
+                ))
+                fig.add_hline(y=high_freq_threshold, line_dash="dash", line_color="red",
+                              annotation_text=f"High Frequency Threshold: {high_freq_threshold:.0f}")
+                fig.update_layout(
+                    title="Suppliers with Unusually High Transaction Frequency",
+                    xaxis_title="Supplier",
+                    yaxis_title="Number of Transactions",
+                    height=400,
+                    xaxis_tickangle=-45
+                )
+                st.plotly_chart(fig, use_container_width=True, key="high_frequency_suppliers")
             else:
-                st.warning("No quantity column found in Issue data.")
+                st.info("No suppliers with unusually high transaction frequency detected.")
+    
+    def create_price_spike_analysis(self, grn_df):
+        """Show unit price spikes against each item's recent GRN price history."""
+        st.markdown("### ⚡ Price Spikes vs Recent History")
+        st.caption(f"Each GRN unit price is compared with the median of the item's previous {DEFAULT_WINDOW} prices; "
+                   f"a spike is more than {DEFAULT_SPIKE_THRESHOLD} robust deviations (MAD of log prices) and "
+                   f"at least {1 + MIN_PRICE_CHANGE:.1f}x away. Lump-sum item codes (mostly quantity 1) are not flagged")
+        
+        history = self.get_price_history()
+        spikes = history.spikes()
+        if 'grn_no' in grn_df.columns:
+            spikes = spikes[spikes['grn_no'].isin(set(grn_df['grn_no'].astype(str)))]
+        if spikes.empty:
+            st.info("No unit price spikes detected.")
+            return
+        
+        spike_col1, spike_col2, spike_col3 = st.columns(3)
+        with spike_col1:
+            st.metric("Price Spikes", f"{len(spikes):,}")
+        with spike_col2:
+            st.metric("Price Jumps Up", f"{(spikes['spike_direction'] == 'up').sum():,}")
+        with spike_col3:
+            st.metric("Items Affected", f"{spikes['item_code'].nunique():,}")
+        st.dataframe(spikes.head(100), width="stretch", hide_index=True)
+        
+        item = st.selectbox("Price history of item:", options=spikes['item_code'].unique().tolist(),
+                            key="price_spike_item")
+        item_history = history.item_history(item)
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=item_history['date'], y=item_history['unit_price'], mode='lines+markers',
+                                 name='Unit Price', marker=dict(color='lightblue')))
+        fig.add_trace(go.Scatter(x=item_history['date'], y=item_history['rolling_median'], mode='lines',
+                                 name='Rolling Median', line=dict(dash='dash', color='gray')))
+        item_spikes = item_history[item_history['is_spike']]
+        fig.add_trace(go.Scatter(x=item_spikes['date'], y=item_spikes['unit_price'], mode='markers', name='Spike',
+                                 marker=dict(color='red', size=10, symbol='diamond')))
+        fig.update_layout(title=f"Unit Price History of Item {item}", xaxis_title="GRN Date",
+                          yaxis_title="Unit Price (R)", height=400)
+        st.plotly_chart(fig, width="stretch", key="price_spike_item_history")
+    
+    def create_volume_anomalies(self, grn_df, issue_df, filters=None):
+        """Show quantity outliers and stock level anomalies from the scored anomaly table."""
+        st.subheader("📊 Volume & Quantity Anomalies")
+        
+        anomalies = self.load_detector_anomalies(['grn_quantity_outlier', 'issue_quantity_outlier', 'negative_stock'],
+                                                 filters, grn_df, issue_df)
+        if anomalies is None:
+            st.info("Anomaly scores not generated yet. Run the processing pipeline to build them.")
+            return
         
-        # Stock level anomalies
-        st.markdown("### 📦 Stock Level Anomalies")
+        col1, col2 = st.columns(2)
         
-        if len(grn_df) > 0 and len(issue_df) > 0:
-            # Get correct column names
-            item_col_grn = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
-            item_col_issue = 'item_no' if 'item_no' in issue_df.columns else 'item_code'
-            
-            qty_col_grn = None
-            for col in ['grn_qty', 'quantity', 'qty']:
-                if col in grn_df.columns:
-                    qty_col_grn = col
-                    break
-            
-            qty_col_issue = None
-            for col in ['issue_qty', 'quantity', 'qty']:
-                if col in issue_df.columns:
-                    qty_col_issue = col
-                    break
-            
-            if (item_col_grn in grn_df.columns and item_col_issue in issue_df.columns and 
-                qty_col_grn and qty_col_issue):
-                
-                # Sum GRN quantities by item
-                grn_totals = grn_df.groupby(item_col_grn)[qty_col_grn].sum().reset_index()
-                grn_totals.columns = ['item_code', 'total_received']
-                
-                # Sum issue quantities by item
-                issue_totals = issue_df.groupby(item_col_issue)[qty_col_issue].sum().reset_index()
-                issue_totals.columns = ['item_code', 'total_issued']
-                
-                # Merge and calculate current stock
-                stock_balance = grn_totals.merge(issue_totals, on='item_code', how='outer').fillna(0)
-                stock_balance['current_stock'] = stock_balance['total_received'] - stock_balance['total_issued']
-                
-                # Detect negative stock (impossible situation)
-                negative_stock = stock_balance[stock_balance['current_stock'] < 0].copy()
-                
-                # Detect zero stock items that had recent activity
-                zero_stock = stock_balance[stock_balance['current_stock'] == 0].copy()
-                
-                col1, col2 = st.columns(2)
+        for column, detector, title, label, color, key in [
+                (col1, 'grn_quantity_outlier', "### 📈 Unusual GRN Quantities", "GRN", 'lightblue',
+                 "grn_quantity_outliers"),
+                (col2, 'issue_quantity_outlier', "### 📉 Unusual Issue Quantities", "Issue", 'red',
+                 "issue_quantity_outliers")]:
+            with column:
+                st.markdown(title)
+                qty_outliers = anomalies[anomalies['detector'] == detector]
+                if qty_outliers.empty:
+                    st.info(f"No unusual {label.lower()} quantities detected.")
+                    continue
+                upper_threshold = qty_outliers['threshold'].iloc[0]
                 
-                with col1:
-                    if len(negative_stock) > 0:
-                        st.markdown("#### 🚨 CRITICAL: Negative Stock Levels")
-                        
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Bar(
-                            x=negative_stock['item_code'].head(15),
-                            y=negative_stock['current_stock'].head(15),
-                            name='Negative Stock',
-                            marker_color='red',
-                            text=negative_stock['current_stock'].head(15),
-                            textposition='outside'
-                        ))
-                        
-                        fig.update_layout(
-                            title="Items with Negative Stock Levels",
-                            xaxis_title="Item Code",
-                            yaxis_title="Stock Level",
-                            height=400,
-                            xaxis_tickangle=-45
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="negative_stock_levels")
-                        
-                        st.error(f"🚨 ALERT: {len(negative_stock)} items have negative stock levels!")
-                        st.dataframe(negative_stock.head(10), use_container_width=True)
-                    else:
-                        st.success("✅ No negative stock levels detected.")
-                
-                with col2:
-                    if len(zero_stock) > 0:
-                        st.markdown("#### ⚠️ Zero Stock Items")
-                        
-                        st.metric("Items with Zero Stock", len(zero_stock))
-                        
-                        # Show items with highest issued quantities but zero stock
-                        zero_high_activity = zero_stock.nlargest(10, 'total_issued')
-                        
-                        if len(zero_high_activity) > 0:
-                            fig = go.Figure()
-                            
-                            fig.add_trace(go.Bar(
-                                x=zero_high_activity['item_code'],
-                                y=zero_high_activity['total_issued'],
-                                name='Total Issued',
-                                marker_color='orange'
-                            ))
-                            
-                            fig.update_layout(
-                                title="High-Activity Items with Zero Stock",
-                                xaxis_title="Item Code",
-                                yaxis_title="Total Issued Quantity",
-                                height=400,
-                                xaxis_tickangle=-45
-                            )
-                            
-                            st.plotly_chart(fig, use_container_width=True, key="zero_stock_high_activity")
-                    else:
-                        st.info("All items have positive stock levels.")
-            else:
-                st.warning("Unable to perform stock level analysis due to missing columns.")
-    
-    def create_time_anomalies(self, grn_df, issue_df):
-        """Detect time-based anomalies and unusual patterns."""
-        st.subheader("⏰ Time-based Anomalies & Unusual Patterns")
+                fig = go.Figure()
+                fig.add_trace(go.Histogram(
+                    x=qty_outliers['value'],
+                    name=f'{label} Quantity Outliers',
+                    marker_color=color
+                ))
+                fig.update_layout(
+                    title=f"{label} Quantities above Q3 + {QUANTITY_IQR_MULTIPLIER} × IQR",
+                    xaxis_title="Quantity",
+                    yaxis_title="Lines",
+                    height=400
+                )
+                st.plotly_chart(fig, use_container_width=True, key=key)
+                
+                # Outlier metrics
+                qty_col1, qty_col2, qty_col3 = st.columns(3)
+                with qty_col1:
+                    st.metric("Quantity Outliers", f"{len(qty_outliers):,}")
+                with qty_col2:
+                    st.metric("Max Quantity", f"{qty_outliers['value'].max():,.0f}")
+                with qty_col3:
+                    st.metric("Threshold", f"{upper_threshold:,.0f}")
+                
+                st.markdown("#### 🚨 Unusual Quantity Transactions:")
+                st.dataframe(qty_outliers.nlargest(10, 'value')[['record_id', 'item_code', 'supplier_name', 'value',
+                                                                 'date']],
+                             use_container_width=True, hide_index=True)
+        
+        # Stock level anomalies
+        st.markdown("### 📦 Stock Level Anomalies")
         
         col1, col2 = st.columns(2)
         
         with col1:
-            # Weekend/Holiday activity detection
-            st.markdown("### 📅 Weekend & Holiday Activity")
-            
-            # Use correct date column name
-            date_col = None
-            for col in ['grn_date', 'date', 'transaction_date']:
-                if col in grn_df.columns:
-                    date_col = col
-                    break
-            
-            if date_col and len(grn_df) > 0:
-                grn_df_copy = grn_df.copy()
-                grn_df_copy[date_col] = pd.to_datetime(grn_df_copy[date_col], errors='coerce')
-                grn_df_copy = grn_df_copy.dropna(subset=[date_col])
+            negative_stock = anomalies[anomalies['detector'] == 'negative_stock'].sort_values('value')
+            if len(negative_stock) > 0:
+                st.markdown("#### 🚨 CRITICAL: Negative Stock Levels")
                 
-                if len(grn_df_copy) > 0:
-                    grn_df_copy['day_of_week'] = grn_df_copy[date_col].dt.day_name()
-                    grn_df_copy['is_weekend'] = grn_df_copy[date_col].dt.dayofweek >= 5
-                    
-                    # Weekend transactions
-                    weekend_transactions = grn_df_copy[grn_df_copy['is_weekend']].copy()
-                    
-                    if len(weekend_transactions) > 0:
-                        # Create day of week activity chart
-                        daily_activity = grn_df_copy.groupby('day_of_week').size().reset_index()
-                        daily_activity.columns = ['day', 'count']
-                        
-                        # Order days properly
-                        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                        daily_activity['day'] = pd.Categorical(daily_activity['day'], categories=day_order, ordered=True)
-                        daily_activity = daily_activity.sort_values('day')
-                        
-                        # Color weekend days differently
-                        colors = ['lightblue' if day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'] 
-                                else 'red' for day in daily_activity['day']]
-                        
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Bar(
-                            x=daily_activity['day'],
-                            y=daily_activity['count'],
-                            name='Transactions by Day',
-                            marker_color=colors,
-                            text=daily_activity['count'],
-                            textposition='outside'
-                        ))
-                        
-                        fig.update_layout(
-                            title="Transaction Activity by Day of Week",
-                            xaxis_title="Day of Week",
-                            yaxis_title="Number of Transactions",
-                            height=400
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="weekly_transaction_activity")
-                        
-                        # Weekend metrics
-                        weekend_col1, weekend_col2, weekend_col3 = st.columns(3)
-                        with weekend_col1:
-                            st.metric("Weekend Transactions", len(weekend_transactions))
-                        with weekend_col2:
-                            # Use correct value column
-                            value_col = None
-                            for col in ['gross_value', 'nett_grn_amt', 'value', 'amount']:
-                                if col in weekend_transactions.columns:
-                                    value_col = col
-                                    break
-                            weekend_value = weekend_transactions[value_col].sum() if value_col else 0
-                            st.metric("Weekend Value", f"R{weekend_value:,.2f}")
-                        with weekend_col3:
-                            weekend_pct = (len(weekend_transactions) / len(grn_df_copy)) * 100
-                            st.metric("Weekend %", f"{weekend_pct:.1f}%")
-                        
-                        if len(weekend_transactions) > 0:
-                            st.warning(f"⚠️ {len(weekend_transactions)} transactions occurred on weekends")
-                    else:
-                        st.success("✅ No weekend transaction activity detected")
-                else:
-                    st.info("No valid date data available for analysis")
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=negative_stock['record_id'].head(15),
+                    y=negative_stock['value'].head(15),
+                    name='Negative Stock',
+                    marker_color='red',
+                    text=negative_stock['value'].head(15),
+                    textposition='outside'
+                ))
+                fig.update_layout(
+                    title="Items with Negative Stock Levels",
+                    xaxis_title="Item Code",
+                    yaxis_title="Stock Level",
+                    height=400,
+                    xaxis_tickangle=-45
+                )
+                st.plotly_chart(fig, use_container_width=True, key="negative_stock_levels")
+                
+                st.error(f"🚨 ALERT: {len(negative_stock)} items have negative stock levels!")
+                st.dataframe(negative_stock.head(10)[['record_id', 'value', 'date', 'evidence']],
+                             use_container_width=True, hide_index=True)
             else:
-                st.warning("No date column found for time-based analysis")
+                st.success("✅ No negative stock levels detected.")
         
         with col2:
-            # After-hours activity (if time data available)
-            st.markdown("### 🌙 After-Hours Activity Analysis")
-            
-            # Late/early transaction patterns
-            if date_col and len(grn_df) > 0:
-                grn_df_copy = grn_df.copy()
-                
-                # Check for unusual time patterns in transaction sequences
-                grn_df_copy[date_col] = pd.to_datetime(grn_df_copy[date_col], errors='coerce')
-                grn_df_copy = grn_df_copy.dropna(subset=[date_col])
+            # Zero balances are not anomalies on their own; read them from the shared ledger
+            ledger = self.get_stock_ledger()
+            items = None
+            if self.filters_active(filters):
+                items = pd.concat([pd.Series(dtype=object)] + [df['item_no' if 'item_no' in df.columns else 'item_code']
+                                                               for df in (grn_df, issue_df) if not df.empty])
+            balances = ledger.balances(items=items)
+            zero_stock = balances[balances['balance'] == 0]
+            if len(zero_stock) > 0:
+                st.markdown("#### ⚠️ Zero Stock Items")
+                
+                st.metric("Items with Zero Stock", len(zero_stock))
+                
+                # Show items with highest issued quantities but zero stock
+                zero_high_activity = zero_stock.nlargest(10, 'issued_to_date')
                 
-                if len(grn_df_copy) > 0:
-                    # Check for multiple transactions on same day by same supplier
-                    grn_df_copy['date_only'] = grn_df_copy[date_col].dt.date
-                    
-                    if 'supplier_name' in grn_df_copy.columns:
-                        daily_supplier_activity = grn_df_copy.groupby(['date_only', 'supplier_name']).size().reset_index()
-                        daily_supplier_activity.columns = ['date', 'supplier', 'transaction_count']
-                        
-                        # Multiple transactions per day per supplier
-                        multiple_daily = daily_supplier_activity[daily_supplier_activity['transaction_count'] > 3]
-                        
-                        if len(multiple_daily) > 0:
-                            fig = go.Figure()
-                            
-                            fig.add_trace(go.Scatter(
-                                x=multiple_daily['date'],
-                                y=multiple_daily['transaction_count'],
-                                mode='markers',
-                                marker=dict(
-                                    size=multiple_daily['transaction_count'] * 3,
-                                    color='red',
-                                    opacity=0.7
-                                ),
-                                text=[f"Supplier: {supp}<br>Transactions: {count}" 
-                                      for supp, count in zip(multiple_daily['supplier'], multiple_daily['transaction_count'])],
-                                hovertemplate='%{text}<br>Date: %{x}<extra></extra>',
-                                name='High Daily Activity'
-                            ))
-                            
-                            fig.update_layout(
-                                title="Days with Unusually High Transaction Activity",
-                                xaxis_title="Date",
-                                yaxis_title="Transactions per Day (per Supplier)",
-                                height=400
-                            )
-                            
-                            st.plotly_chart(fig, use_container_width=True, key="same_day_multi_supplier")
-                            
-                            # Activity metrics
-                            activity_col1, activity_col2, activity_col3 = st.columns(3)
-                            with activity_col1:
-                                st.metric("High Activity Days", len(multiple_daily))
-                            with activity_col2:
-                                st.metric("Max Daily Transactions", multiple_daily['transaction_count'].max())
-                            with activity_col3:
-                                st.metric("Avg High Activity", f"{multiple_daily['transaction_count'].mean():.1f}")
-                            
-                            if len(multiple_daily) > 0:
-                                st.warning(f"⚠️ {len(multiple_daily)} instances of high daily transaction activity detected")
-                        else:
-                            st.info("No unusual daily transaction patterns detected")
-                    else:
-                        st.info("Supplier information not available for activity analysis")
-                else:
-                    st.info("No valid date data available for activity analysis")
-        
-        # Seasonal anomalies
-        st.markdown("### 🍂 Seasonal & Monthly Anomalies")
-        
-        if date_col and len(grn_df) > 0:
-            grn_df_copy = grn_df.copy()
-            grn_df_copy[date_col] = pd.to_datetime(grn_df_copy[date_col], errors='coerce')
-            grn_df_copy = grn_df_copy.dropna(subset=[date_col])
-            
-            if len(grn_df_copy) > 0:
-                grn_df_copy['month'] = grn_df_copy[date_col].dt.month
-                grn_df_copy['month_name'] = grn_df_copy[date_col].dt.strftime('%B')
-                
-                # Use correct value column
-                value_col = None
-                for col in ['gross_value', 'nett_grn_amt', 'value', 'amount']:
-                    if col in grn_df_copy.columns:
-                        value_col = col
-                        break
-                
-                # Monthly activity analysis
-                if value_col:
-                    monthly_stats = grn_df_copy.groupby(['month', 'month_name']).agg({
-                        value_col: ['sum', 'count', 'mean']
-                    }).reset_index()
-                    monthly_stats.columns = ['month', 'month_name', 'total_value', 'transaction_count', 'avg_value']
-                    
-                    # Detect outlier months
-                    value_mean = monthly_stats['total_value'].mean()
-                    value_std = monthly_stats['total_value'].std()
-                    outlier_threshold = value_mean + 2 * value_std
-                    
-                    outlier_months = monthly_stats[monthly_stats['total_value'] > outlier_threshold]
-                    
-                    col1, col2 = st.columns(2)
-                    
-                    with col1:
-                        # Monthly spending pattern
-                        fig = go.Figure()
-                        
-                        colors = ['red' if value > outlier_threshold else 'lightblue' 
-                                for value in monthly_stats['total_value']]
-                        
-                        fig.add_trace(go.Bar(
-                            x=monthly_stats['month_name'],
-                            y=monthly_stats['total_value'],
-                            name='Monthly Spending',
-                            marker_color=colors,
-                            text=[f"R{x:,.0f}" for x in monthly_stats['total_value']],
-                            textposition='outside'
-                        ))
-                        
-                        if len(outlier_months) > 0:
-                            fig.add_hline(y=outlier_threshold, line_dash="dash", line_color="red",
-                                        annotation_text=f"Outlier Threshold: R{outlier_threshold:,.0f}")
-                        
-                        fig.update_layout(
-                            title="Monthly Spending Patterns",
-                            xaxis_title="Month",
-                            yaxis_title=f"Total {value_col.replace('_', ' ').title()} (R)",
-                            height=400,
-                            xaxis_tickangle=-45
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="after_hours_transactions")
-                    
-                    with col2:
-                        # Transaction count by month
-                        count_mean = monthly_stats['transaction_count'].mean()
-                        count_std = monthly_stats['transaction_count'].std()
-                        count_threshold = count_mean + 2 * count_std
-                        
-                        outlier_count_months = monthly_stats[monthly_stats['transaction_count'] > count_threshold]
-                        
-                        colors = ['orange' if count > count_threshold else 'lightgreen' 
-                                for count in monthly_stats['transaction_count']]
-                        
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Bar(
-                            x=monthly_stats['month_name'],
-                            y=monthly_stats['transaction_count'],
-                            name='Monthly Transactions',
-                            marker_color=colors,
-                            text=monthly_stats['transaction_count'],
-                            textposition='outside'
-                        ))
-                        
-                        if len(outlier_count_months) > 0:
-                            fig.add_hline(y=count_threshold, line_dash="dash", line_color="orange",
-                                        annotation_text=f"High Activity Threshold: {count_threshold:.0f}")
-                        
-                        fig.update_layout(
-                            title="Monthly Transaction Volume",
-                            xaxis_title="Month",
-                            yaxis_title="Number of Transactions",
-                            height=400,
-                            xaxis_tickangle=-45
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="bulk_transaction_pattern")
-                    
-                    # Summary of anomalies
-                    if len(outlier_months) > 0 or len(outlier_count_months) > 0:
-                        st.markdown("#### 🚨 Monthly Anomaly Summary:")
-                        
-                        anom_col1, anom_col2, anom_col3 = st.columns(3)
-                        with anom_col1:
-                            st.metric("High Spending Months", len(outlier_months))
-                        with anom_col2:
-                            st.metric("High Activity Months", len(outlier_count_months))
-                        with anom_col3:
-                            if len(outlier_months) > 0:
-                                max_spending_month = outlier_months.loc[outlier_months['total_value'].idxmax(), 'month_name']
-                                st.metric("Peak Spending Month", max_spending_month)
-                        
-                        # Show anomalous months
-                        if len(outlier_months) > 0:
-                            st.markdown("**High Spending Months:**")
-                            display_outlier_months = outlier_months[['month_name', 'total_value', 'transaction_count']].copy()
-                            display_outlier_months['total_value'] = display_outlier_months['total_value'].apply(lambda x: f"R{x:,.2f}")
-                            st.dataframe(display_outlier_months, use_container_width=True)
-                else:
-                    # Just show transaction count analysis if no value column
-                    monthly_counts = grn_df_copy.groupby(['month', 'month_name']).size().reset_index()
-                    monthly_counts.columns = ['month', 'month_name', 'transaction_count']
-                    
-                    fig = go.Figure()
-                    
-                    fig.add_trace(go.Bar(
-                        x=monthly_counts['month_name'],
-                        y=monthly_counts['transaction_count'],
-                        name='Monthly Transactions',
-                        marker_color='lightblue',
-                        text=monthly_counts['transaction_count'],
-                        textposition='outside'
-                    ))
-                    
-                    fig.update_layout(
-                        title="Monthly Transaction Volume",
-                        xaxis_title="Month",
-                        yaxis_title="Number of Transactions",
-                        height=400,
-                        xaxis_tickangle=-45
-                    )
-                    
-                    st.plotly_chart(fig, use_container_width=True, key="rapid_successive_transactions")
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=zero_high_activity['item_code'],
+                    y=zero_high_activity['issued_to_date'],
+                    name='Total Issued',
+                    marker_color='orange'
+                ))
+                fig.update_layout(
+                    title="High-Activity Items with Zero Stock",
+                    xaxis_title="Item Code",
+                    yaxis_title="Total Issued Quantity",
+                    height=400,
+                    xaxis_tickangle=-45
+                )
+                st.plotly_chart(fig, use_container_width=True, key="zero_stock_high_activity")
             else:
-                st.info("No valid date data available for seasonal analysis")
-        else:
-            st.warning("No date column found for seasonal analysis")
+                st.info("All items have positive stock levels.")
     
-    def create_pattern_anomalies(self, grn_df, issue_df, stock_df):
-        """Detect pattern anomalies and unusual behaviors."""
+    def create_pattern_anomalies(self, filters=None):
+        """Show supplier-item and GRN/issue ratio patterns from the scored anomaly table."""
         st.subheader("🎯 Pattern Anomalies & Behavioral Analysis")
         
+        anomalies = self.load_detector_anomalies(['multi_supplier_item', 'over_stocked_item', 'under_stocked_item'],
+                                                 filters)
+        if anomalies is None:
+            st.info("Anomaly scores not generated yet. Run the processing pipeline to build them.")
+            return
+        
         col1, col2 = st.columns(2)
         
         with col1:
             # Unusual supplier-item relationships
             st.markdown("### 🔗 Unusual Supplier-Item Patterns")
+            multi_supplier_items = anomalies[anomalies['detector'] == 'multi_supplier_item'].sort_values(
+                'value', ascending=False)
             
-            if len(grn_df) > 0 and 'supplier_name' in grn_df.columns:
-                item_col = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
-                if item_col in grn_df.columns:
-                    # Find items supplied by multiple suppliers
-                    supplier_item_counts = grn_df.groupby(item_col)['supplier_name'].nunique().reset_index()
-                    supplier_item_counts.columns = ['item_code', 'supplier_count']
-                    
-                    # Items with many suppliers (potential quality/consistency issues)
-                    multi_supplier_items = supplier_item_counts[
-                        supplier_item_counts['supplier_count'] > 3
-                    ].sort_values('supplier_count', ascending=False)
-                    
-                    if len(multi_supplier_items) > 0:
-                        # Create visualization
-                        fig = go.Figure()
-                        
-                        fig.add_trace(go.Bar(
-                            x=multi_supplier_items['item_code'].head(15),
-                            y=multi_supplier_items['supplier_count'].head(15),
-                            name='Supplier Count per Item',
-                            marker_color='purple',
-                            text=multi_supplier_items['supplier_count'].head(15),
-                            textposition='outside'
-                        ))
-                        
-                        fig.update_layout(
-                            title="Items with Multiple Suppliers",
-                            xaxis_title="Item Code",
-                            yaxis_title="Number of Suppliers",
-                            height=400,
-                            xaxis_tickangle=-45
-                        )
-                        
-                        st.plotly_chart(fig, use_container_width=True, key="multi_supplier_items")
-                        
-                        # Multi-supplier metrics
-                        multi_col1, multi_col2, multi_col3 = st.columns(3)
-                        with multi_col1:
-                            st.metric("Multi-Supplier Items", len(multi_supplier_items))
-                        with multi_col2:
-                            st.metric("Max Suppliers", multi_supplier_items['supplier_count'].max())
-                        with multi_col3:
-                            st.metric("Avg Suppliers", f"{multi_supplier_items['supplier_count'].mean():.1f}")
-                        
-                        # Show details
-                        st.markdown("#### 📊 Items with Most Suppliers:")
-                        st.dataframe(multi_supplier_items.head(10), use_container_width=True)
-                        
-                        st.warning(f"⚠️ {len(multi_supplier_items)} items are supplied by multiple suppliers. Consider supplier consolidation or quality standardization.")
-                    else:
-                        st.info("No items with excessive multiple suppliers detected.")
-                else:
-                    st.warning("No item column found for supplier analysis.")
+            if len(multi_supplier_items) > 0:
+                fig = go.Figure()
+                fig.add_trace(go.Bar(
+                    x=multi_supplier_items['record_id'].head(15),
+                    y=multi_supplier_items['value'].head(15),
+                    name='Supplier Count per Item',
+                    marker_color='purple',
+                    text=multi_supplier_items['value'].head(15).astype(int),
+                    textposition='outside'
+                ))
+                fig.update_layout(
+                    title="Items with Multiple Suppliers",
+                    xaxis_title="Item Code",
+                    yaxis_title="Number of Suppliers",
+                    height=400,
+                    xaxis_tickangle=-45
+                )
+                st.plotly_chart(fig, use_container_width=True, key="multi_supplier_items")
+                
+                # Multi-supplier metrics
+                multi_col1, multi_col2, multi_col3 = st.columns(3)
+                with multi_col1:
+                    st.metric("Multi-Supplier Items", len(multi_supplier_items))
+                with multi_col2:
+                    st.metric("Max Suppliers", f"{multi_supplier_items['value'].max():.0f}")
+                with multi_col3:
+                    st.metric("Avg Suppliers", f"{multi_supplier_items['value'].mean():.1f}")
+                
+                # Show details
+                st.markdown("#### 📊 Items with Most Suppliers:")
+                display_multi = multi_supplier_items.head(10)[['record_id', 'value', 'suppliers']].copy()
+                display_multi.columns = ['Item Code', 'Supplier Count', 'Suppliers']
+                st.dataframe(display_multi, use_container_width=True, hide_index=True)
+                
+                st.warning(f"⚠️ {len(multi_supplier_items)} items are supplied by more than "
+                           f"{MAX_SUPPLIERS_PER_ITEM} suppliers. Consider supplier consolidation or quality "
+                           "standardization.")
             else:
-                st.warning("Supplier data not available for pattern analysis.")
+                st.info("No items with excessive multiple suppliers detected.")
         
         with col2:
             # Unusual quantity patterns
             st.markdown("### 📏 Unusual Quantity Patterns")
-            
-            if len(grn_df) > 0 and len(issue_df) > 0:
-                item_col_grn = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
-                item_col_issue = 'item_no' if 'item_no' in issue_df.columns else 'item_code'
-                
-                # Get correct quantity column names
-                qty_col_grn = None
-                for col in ['grn_qty', 'quantity', 'qty']:
-                    if col in grn_df.columns:
-                        qty_col_grn = col
-                        break
-                
-                qty_col_issue = None
-                for col in ['issue_qty', 'quantity', 'qty']:
-                    if col in issue_df.columns:
-                        qty_col_issue = col
-                        break
-                
-                if (item_col_grn in grn_df.columns and item_col_issue in issue_df.columns and 
-                    qty_col_grn and qty_col_issue):
-                    # Calculate GRN vs Issue ratios
-                    grn_totals = grn_df.groupby(item_col_grn)[qty_col_grn].sum().reset_index()
-                    grn_totals.columns = ['item_code', 'total_grn']
-                    
-                    issue_totals = issue_df.groupby(item_col_issue)[qty_col_issue].sum().reset_index()
-                    issue_totals.columns = ['item_code', 'total_issue']
-                    
-                    # Merge and calculate ratios
-                    ratio_analysis = grn_totals.merge(issue_totals, on='item_code', how='inner')
-                    
-                    # Only analyze items with non-zero issues to avoid division by zero
-                    ratio_analysis = ratio_analysis[ratio_analysis['total_issue'] > 0]
-                    
-                    if len(ratio_analysis) > 0:
-                        ratio_analysis['grn_issue_ratio'] = ratio_analysis['total_grn'] / ratio_analysis['total_issue']
-                        
-                        # Find unusual ratios
-                        # Very high ratio (much more received than issued - potential waste)
-                        high_ratio_items = ratio_analysis[ratio_analysis['grn_issue_ratio'] > 5].copy()
-                        
-                        # Very low ratio (more issued than received - potential data error)
-                        low_ratio_items = ratio_analysis[ratio_analysis['grn_issue_ratio'] < 0.5].copy()
-                        
-                        if len(high_ratio_items) > 0 or len(low_ratio_items) > 0:
-                            # Create scatter plot of ratios
-                            fig = go.Figure()
-                            
-                            # Normal ratios
-                            normal_ratios = ratio_analysis[
-                                (ratio_analysis['grn_issue_ratio'] >= 0.5) & 
-                                (ratio_analysis['grn_issue_ratio'] <= 5)
-                            ]
-                            
-                            fig.add_trace(go.Scatter(
-                                x=normal_ratios['total_grn'],
-                                y=normal_ratios['total_issue'],
-                                mode='markers',
-                                name='Normal Items',
-                                marker=dict(color='lightblue', size=6),
-                                text=[f"Item: {item}<br>Ratio: {ratio:.2f}" 
-                                      for item, ratio in zip(normal_ratios['item_code'], normal_ratios['grn_issue_ratio'])],
-                                hovertemplate='%{text}<br>GRN: %{x}<br>Issue: %{y}<extra></extra>'
-                            ))
-                            
-                            # High ratio items
-                            if len(high_ratio_items) > 0:
-                                fig.add_trace(go.Scatter(
-                                    x=high_ratio_items['total_grn'],
-                                    y=high_ratio_items['total_issue'],
-                                    mode='markers',
-                                    name='Over-Stocked Items',
-                                    marker=dict(color='red', size=10, symbol='diamond'),
-                                    text=[f"Item: {item}<br>Ratio: {ratio:.2f}" 
-                                          for item, ratio in zip(high_ratio_items['item_code'], high_ratio_items['grn_issue_ratio'])],
-                                    hovertemplate='%{text}<br>GRN: %{x}<br>Issue: %{y}<extra></extra>'
-                                ))
-                            
-                            # Low ratio items
-                            if len(low_ratio_items) > 0:
-                                fig.add_trace(go.Scatter(
-                                    x=low_ratio_items['total_grn'],
-                                    y=low_ratio_items['total_issue'],
-                                    mode='markers',
-                                    name='Under-Stocked Items',
-                                    marker=dict(color='orange', size=10, symbol='square'),
-                                    text=[f"Item: {item}<br>Ratio: {ratio:.2f}" 
-                                          for item, ratio in zip(low_ratio_items['item_code'], low_ratio_items['grn_issue_ratio'])],
-                                    hovertemplate='%{text}<br>GRN: %{x}<br>Issue: %{y}<extra></extra>'
-                                ))
-                            
-                            # Add diagonal line for reference
-                            max_val = max(ratio_analysis['total_grn'].max(), ratio_analysis['total_issue'].max())
-                            fig.add_trace(go.Scatter(
-                                x=[0, max_val],
-                                y=[0, max_val],
-                                mode='lines',
-                                name='Equal Ratio Line',
-                                line=dict(dash='dash', color='gray'),
-                                showlegend=False
-                            ))
-                            
-                            fig.update_layout(
-                                title="GRN vs Issue Quantity Analysis",
-                                xaxis_title="Total GRN Quantity",
-                                yaxis_title="Total Issue Quantity",
-                                height=400
-                            )
-                            
-                            st.plotly_chart(fig, use_container_width=True, key="duplicate_transactions_analysis")
-                            
-                            # Ratio metrics
-                            ratio_col1, ratio_col2, ratio_col3 = st.columns(3)
-                            with ratio_col1:
-                                st.metric("Over-Stocked Items", len(high_ratio_items))
-                            with ratio_col2:
-                                st.metric("Under-Stocked Items", len(low_ratio_items))
-                            with ratio_col3:
-                                if len(high_ratio_items) > 0:
-                                    st.metric("Max Over-Stock Ratio", f"{high_ratio_items['grn_issue_ratio'].max():.1f}x")
-                            
-                            # Show problem items
-                            if len(high_ratio_items) > 0:
-                                st.markdown("#### 🚨 Over-Stocked Items (Potential Waste):")
-                                display_high = high_ratio_items.nlargest(10, 'grn_issue_ratio')[
-                                    ['item_code', 'total_grn', 'total_issue', 'grn_issue_ratio']
-                                ].copy()
-                                display_high['grn_issue_ratio'] = display_high['grn_issue_ratio'].apply(lambda x: f"{x:.2f}x")
-                                st.dataframe(display_high, use_container_width=True)
-                            
-                            if len(low_ratio_items) > 0:
-                                st.markdown("#### ⚠️ Under-Stocked Items (Potential Data Issues):")
-                                display_low = low_ratio_items.nsmallest(10, 'grn_issue_ratio')[
-                                    ['item_code', 'total_grn', 'total_issue', 'grn_issue_ratio']
-                                ].copy()
-                                display_low['grn_issue_ratio'] = display_low['grn_issue_ratio'].apply(lambda x: f"{x:.2f}x")
-                                st.dataframe(display_low, use_container_width=True)
-                        else:
-                            st.success("✅ All GRN/Issue ratios appear normal.")
-                    else:
-                        st.info("No common items found between GRN and Issue data for ratio analysis.")
-                else:
-                    st.warning("Unable to perform quantity pattern analysis due to missing columns.")
+            st.caption(f"Items received more than {OVER_STOCKED_RATIO:.0f}x or less than {UNDER_STOCKED_RATIO}x "
+                       "their issued quantity")
+            high_ratio_items = anomalies[anomalies['detector'] == 'over_stocked_item']
+            low_ratio_items = anomalies[anomalies['detector'] == 'under_stocked_item']
+            
+            if len(high_ratio_items) > 0 or len(low_ratio_items) > 0:
+                # Ratio metrics
+                ratio_col1, ratio_col2, ratio_col3 = st.columns(3)
+                with ratio_col1:
+                    st.metric("Over-Stocked Items", len(high_ratio_items))
+                with ratio_col2:
+                    st.metric("Under-Stocked Items", len(low_ratio_items))
+                with ratio_col3:
+                    if len(high_ratio_items) > 0:
+                        st.metric("Max Over-Stock Ratio", f"{high_ratio_items['value'].max():.1f}x")
+                
+                # Show problem items
+                for items, title, ascending in [
+                        (high_ratio_items, "#### 🚨 Over-Stocked Items (Potential Waste):", False),
+                        (low_ratio_items, "#### ⚠️ Under-Stocked Items (Potential Data Issues):", True)]:
+                    if len(items) > 0:
+                        st.markdown(title)
+                        display_ratio = items.sort_values('value', ascending=ascending).head(10)[
+                            ['record_id', 'evidence']].copy()
+                        display_ratio.columns = ['Item Code', 'Received vs Issued']
+                        st.dataframe(display_ratio, use_container_width=True, hide_index=True)
             else:
-                st.warning("Insufficient data for quantity pattern analysis.")
+                st.success("✅ All GRN/Issue ratios appear normal.")
         
         # Overall anomaly summary
         st.markdown("### 📋 Overall Anomaly Summary & Recommendations")
@@ -3649,26 +3494,20 @@ class AdvancedStockDashboard:
         st.markdown("### 📊 SCOA (Standard Chart of Accounts) Analysis")
         st.info("🇿🇦 **SCOA**: South African public sector Standard Chart of Accounts with vote structure AAAABBBBBBCCCDDDDD")
         
-        # Check for vote number column
-        vote_col = None
-        possible_vote_cols = ['vote_number', 'vote', 'vote_no', 'account', 'account_no']
-        
-        for col in possible_vote_cols:
-            if col in voucher_df.columns:
-                vote_col = col
-                break
+        vote_col = find_vote_column(voucher_df.columns)
         
         if not vote_col:
             st.warning("No vote number column found. SCOA analysis requires vote number data.")
             return
         
-        # Parse vote numbers
-        voucher_analysis = voucher_df.copy()
-        voucher_analysis['vote_parsed'] = voucher_analysis[vote_col].apply(self.parse_vote_number)
-        
-        # Extract SCOA components
-        voucher_analysis['vote_length'] = voucher_analysis[vote_col].astype(str).str.len()
-        voucher_analysis['is_valid_scoa'] = voucher_analysis['vote_length'] >= 18  # SCOA should be 18+ digits
+        # Render from the pre-aggregated SCOA rollup cube
+        scoa_cube = self.get_scoa_cube(voucher_df, vote_col)
+        vote_lengths = cube_level(scoa_cube, VOTE_LENGTH_LEVEL)
+        vote_lengths.index = vote_lengths.index.astype(int)
+        vote_lengths = vote_lengths.sort_index()
+        non_compliant_votes = cube_level(scoa_cube, NON_COMPLIANT_LEVEL)
+        total_votes = int(vote_lengths['Count'].sum())
+        non_compliant_count = int(non_compliant_votes['Count'].sum())
         
         col1, col2 = st.columns(2)
         
@@ -3676,19 +3515,17 @@ class AdvancedStockDashboard:
             st.markdown("#### 📏 Vote Number Structure Analysis")
             
             # Vote length distribution
-            vote_lengths = voucher_analysis['vote_length'].value_counts().sort_index()
-            
             fig = px.bar(
                 x=vote_lengths.index,
-                y=vote_lengths.values,
+                y=vote_lengths['Count'].values,
                 title="Vote Number Length Distribution",
                 labels={'x': 'Vote Number Length', 'y': 'Count'}
             )
             st.plotly_chart(fig, use_container_width=True, key="authorization_trends_timeline")
             
             # SCOA compliance metrics
-            scoa_compliant = voucher_analysis['is_valid_scoa'].sum()
-            scoa_rate = (scoa_compliant / len(voucher_analysis)) * 100
+            scoa_compliant = total_votes - non_compliant_count
+            scoa_rate = (scoa_compliant / total_votes) * 100 if total_votes > 0 else 0
             
             st.metric("SCOA Compliant Votes", f"{scoa_compliant:,}")
             st.metric("SCOA Compliance Rate", f"{scoa_rate:.1f}%")
@@ -3699,37 +3536,17 @@ class AdvancedStockDashboard:
         with col2:
             st.markdown("#### 🏛️ SCOA Component Analysis")
             
-            # Parse valid SCOA votes
-            valid_scoa = voucher_analysis[voucher_analysis['is_valid_scoa']].copy()
-            
-            if len(valid_scoa) > 0:
-                # Extract SCOA components (AAAABBBBBBCCCDDDDD)
-                valid_scoa['vote_str'] = valid_scoa[vote_col].astype(str)
-                valid_scoa['department'] = valid_scoa['vote_str'].str[:4]      # AAAA - Department
-                valid_scoa['programme'] = valid_scoa['vote_str'].str[4:10]     # BBBBBB - Programme  
-                valid_scoa['sub_programme'] = valid_scoa['vote_str'].str[10:13] # CCC - Sub-programme
-                valid_scoa['economic_class'] = valid_scoa['vote_str'].str[13:18] # DDDDD - Economic classification
-                
-                # Department analysis
-                dept_analysis = valid_scoa.groupby('department').agg({
-                    'voucher_no': 'count',
-                    'cheq_amt': lambda x: pd.to_numeric(x, errors='coerce').sum()
-                }).round(2)
-                dept_analysis.columns = ['Count', 'Amount']
-                dept_analysis = dept_analysis.sort_values('Amount', ascending=False)
+            if scoa_compliant > 0:
+                # Department analysis (AAAA)
+                dept_analysis = cube_level(scoa_cube, 'department').round(2)
                 
                 st.markdown("**Top Departments by Spending:**")
                 display_dept = dept_analysis.head(8).copy()
                 display_dept['Amount'] = display_dept['Amount'].apply(lambda x: f"R{x:,.2f}")
                 st.dataframe(display_dept, use_container_width=True)
                 
-                # Economic classification analysis
-                econ_analysis = valid_scoa.groupby('economic_class').agg({
-                    'voucher_no': 'count',
-                    'cheq_amt': lambda x: pd.to_numeric(x, errors='coerce').sum()
-                }).round(2)
-                econ_analysis.columns = ['Count', 'Amount']
-                econ_analysis = econ_analysis.sort_values('Amount', ascending=False)
+                # Economic classification analysis (DDDDD)
+                econ_analysis = cube_level(scoa_cube, 'economic_class').round(2)
                 
                 # Show economic classification pie chart
                 fig = px.pie(
@@ -3743,43 +3560,79 @@ class AdvancedStockDashboard:
         # SCOA compliance issues
         st.markdown("### 🚨 SCOA Compliance Issues")
         
-        non_compliant = voucher_analysis[~voucher_analysis['is_valid_scoa']]
-        
-        if len(non_compliant) > 0:
-            st.error(f"🚨 {len(non_compliant):,} transactions have non-compliant vote numbers")
-            
-            # Show sample non-compliant votes
-            non_compliant_sample = non_compliant.groupby(vote_col).agg({
-                'voucher_no': 'count',
-                'cheq_amt': lambda x: pd.to_numeric(x, errors='coerce').sum()
-            }).round(2)
-            non_compliant_sample.columns = ['Count', 'Amount']
-            non_compliant_sample = non_compliant_sample.sort_values('Amount', ascending=False)
+        if non_compliant_count > 0:
+            st.error(f"🚨 {non_compliant_count:,} transactions have non-compliant vote numbers")
             
             st.markdown("**Non-Compliant Vote Numbers (Top Issues):**")
-            display_non_compliant = non_compliant_sample.head(10).copy()
+            display_non_compliant = non_compliant_votes.round(2).head(10).copy()
             display_non_compliant['Amount'] = display_non_compliant['Amount'].apply(lambda x: f"R{x:,.2f}")
             st.dataframe(display_non_compliant, use_container_width=True)
         else:
             st.success("✅ All vote numbers are SCOA compliant")
 
-    def parse_vote_number(self, vote):
-        """Parse SCOA vote number structure."""
-        if pd.isna(vote):
-            return None
-        
-        vote_str = str(vote).strip()
-        
-        if len(vote_str) >= 18:
-            return {
-                'department': vote_str[:4],
-                'programme': vote_str[4:10],
-                'sub_programme': vote_str[10:13],
-                'economic_class': vote_str[13:18],
-                'full_vote': vote_str
-            }
+    def load_scoa_cube(self):
+        """Load the pipeline's SCOA rollup cube (None if not generated)."""
+        snapshot = file_snapshot(self.output_folder / "scoa_rollup_cube.csv")
+        return self.get_shared("cube:scoa", snapshot, lambda: load_scoa_cube(self.output_folder))
+    
+    def load_anomaly_scores(self):
+        """Load the pipeline's scored anomaly table (None if not generated)."""
+        snapshot = file_snapshot(self.output_folder / ANOMALY_FILE)
+        return self.get_shared("anomalies:scores", snapshot, lambda: load_anomaly_scores(self.output_folder))
+    
+    def load_detector_anomalies(self, detectors, filters=None, grn_df=None, issue_df=None):
+        """
+        Rows of the scored anomaly table from the given detectors (None if not generated).
         
-        return {'invalid': vote_str}
+        The supplier filter keeps the supplier's rows and the rows of the items it delivered;
+        with filters active, GRN and issue rows are limited to the documents in grn_df / issue_df.
+        """
+        anomalies = self.load_anomaly_scores()
+        if anomalies is None:
+            return None
+        anomalies = anomalies[anomalies['detector'].isin(detectors)]
+        if filters and filters.get('supplier') and filters['supplier'] != "All Suppliers":
+            anomalies = filter_supplier_anomalies(anomalies, filters['supplier'])
+        if self.filters_active(filters):
+            for record_type, frame, column in [('GRN', grn_df, 'grn_no'), ('Issue', issue_df, 'requisition_no')]:
+                if frame is not None and column in frame.columns:
+                    documents = set(frame[column].astype(str))
+                    anomalies = anomalies[(anomalies['record_type'] != record_type)
+                                          | anomalies['record_id'].isin(documents)]
+        return anomalies
+    
+    def load_sequence_analysis(self):
+        """Load the pipeline's document sequence (findings, summary) tables (None if not generated)."""
+        snapshot = (file_snapshot(self.output_folder / SEQUENCE_FINDINGS_FILE),
+                    file_snapshot(self.output_folder / SEQUENCE_SUMMARY_FILE))
+        return self.get_shared("sequences:analysis", snapshot, lambda: load_sequence_analysis(self.output_folder))
+    
+    def load_split_purchase_findings(self):
+        """Load the pipeline's split-purchase findings (None if not generated)."""
+        snapshot = file_snapshot(self.output_folder / SPLIT_PURCHASES_FILE)
+        return self.get_shared("anomalies:split_purchases", snapshot,
+                               lambda: load_split_purchase_findings(self.output_folder))
+    
+    def load_duplicate_invoice_findings(self):
+        """Load the pipeline's duplicate-invoice candidate groups (None if not generated)."""
+        snapshot = file_snapshot(self.output_folder / DUPLICATE_INVOICES_FILE)
+        return self.get_shared("anomalies:duplicate_invoices", snapshot,
+                               lambda: load_duplicate_invoice_findings(self.output_folder))
+    
+    def load_three_way_exceptions(self):
+        """Load the pipeline's three-way match exception queue (None if not generated)."""
+        snapshot = file_snapshot(self.output_folder / EXCEPTIONS_FILE)
+        return self.get_shared("exceptions:three_way", snapshot, lambda: load_three_way_exceptions(self.output_folder))
+    
+    def get_scoa_cube(self, voucher_df, vote_col):
+        """Use the precomputed voucher cube for the unfiltered voucher history, otherwise roll up live."""
+        if cube_current(self.output_folder, 'voucher'):
+            full_df = self.load_data("hr995_voucher.csv")
+            if len(voucher_df) == len(full_df):
+                cube = self.load_scoa_cube()
+                if cube is not None:
+                    return cube[cube['source'] == 'voucher']
+        return build_scoa_cube(voucher_df, 'cheq_amt', 'voucher', vote_col)
 
     def analyze_ppe_electrical_materials(self, voucher_df):
         """Analyze PPE and electrical materials with corrected data relationships."""
@@ -3809,36 +3662,8 @@ class AdvancedStockDashboard:
             st.warning("No voucher-item linkages found using corrected methodology.")
             return
         
-        # PPE identification keywords
-        ppe_keywords = [
-            'helmet', 'hard hat', 'safety boot', 'safety shoe', 'glove', 'goggle',
-            'mask', 'respirator', 'harness', 'vest', 'hi-vis', 'high-vis',
-            'protective', 'safety', 'ppe', 'coverall', 'overall'
-        ]
-        
-        # Electrical identification keywords  
-        electrical_keywords = [
-            'cable', 'wire', 'electrical', 'switch', 'plug', 'socket', 'circuit',
-            'breaker', 'fuse', 'transformer', 'conductor', 'insulator', 'voltage',
-            'amp', 'watt', 'motor', 'generator', 'battery', 'led', 'light'
-        ]
-        
-        # Categorize items
-        voucher_items['description_lower'] = voucher_items['description'].str.lower()
-        
-        # PPE identification
-        ppe_mask = voucher_items['description_lower'].str.contains('|'.join(ppe_keywords), na=False)
-        voucher_items['is_ppe'] = ppe_mask
-        
-        # Electrical identification  
-        electrical_mask = voucher_items['description_lower'].str.contains('|'.join(electrical_keywords), na=False)
-        voucher_items['is_electrical'] = electrical_mask
-        
-        # Both categories
-        voucher_items['category'] = 'Other'
-        voucher_items.loc[voucher_items['is_ppe'], 'category'] = 'PPE'
-        voucher_items.loc[voucher_items['is_electrical'], 'category'] = 'Electrical'
-        voucher_items.loc[voucher_items['is_ppe'] & voucher_items['is_electrical'], 'category'] = 'PPE & Electrical'
+        # Categorize items by joining against the item description → category dimension
+        voucher_items = attach_categories(voucher_items, self.get_item_category_dimension())
         
         col1, col2 = st.columns(2)
         
@@ -3984,7 +3809,7 @@ class AdvancedStockDashboard:
             return
         
         # Prepare data for analysis
-        auth_analysis = voucher_df.copy()
+        auth_analysis = voucher_df.copy(deep=False)
         auth_analysis['cheq_amt_numeric'] = pd.to_numeric(auth_analysis['cheq_amt'], errors='coerce')
         
         col1, col2 = st.columns(2)
@@ -4149,7 +3974,7 @@ class AdvancedStockDashboard:
         for rec in recommendations:
             st.markdown(f"- {rec}")
 
-    def create_grn_transaction_analysis(self, grn_df, voucher_df):
+    def create_grn_transaction_analysis(self, grn_df, voucher_df, filters=None):
         """Comprehensive GRN vs Transaction analysis with corrected PDF linkage."""
         st.subheader("🔗 GRN-Transaction Analysis (Corrected)")
         st.markdown("*Using corrected PDF → GRN → Voucher linkage methodology*")
@@ -4170,7 +3995,7 @@ class AdvancedStockDashboard:
             self.analyze_payment_status(grn_df, voucher_df)
         
         with grn_tab2:
-            self.analyze_multiple_payments(grn_df, voucher_df)
+            self.analyze_multiple_payments(grn_df, voucher_df, filters)
         
         with grn_tab3:
             self.analyze_supplier_linking(grn_df, voucher_df)
@@ -4187,14 +4012,14 @@ class AdvancedStockDashboard:
         pdf_df = None
         if os.path.exists('output/individual_hr185_transactions.csv'):
             pdf_df = pd.read_csv('output/individual_hr185_transactions.csv')
-            pdf_df['reference_normalized'] = pdf_df['reference'].apply(self.normalize_reference)
+            pdf_df['reference_normalized'] = self.normalize_references(pdf_df['reference'])
         
         # Normalize data
-        grn_analysis = grn_df.copy()
+        grn_analysis = grn_df.copy(deep=False)
         grn_analysis['voucher_normalized'] = grn_analysis['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
-        grn_analysis['inv_no_normalized'] = grn_analysis['inv_no'].apply(self.normalize_reference)
+        grn_analysis['inv_no_normalized'] = self.normalize_references(grn_analysis['inv_no'])
         
-        voucher_analysis = voucher_df.copy()
+        voucher_analysis = voucher_df.copy(deep=False)
         voucher_analysis['voucher_no_normalized'] = voucher_analysis['voucher_no'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         
         # Find payment status for each GRN
@@ -4335,7 +4160,24 @@ class AdvancedStockDashboard:
             for item in action_items:
                 st.markdown(f"- {item}")
 
-    def analyze_multiple_payments(self, grn_df, voucher_df):
+    def load_duplicate_payment_reports(self):
+        """Load the pipeline's duplicate payment reports (None if missing or stale)."""
+        files = ["hr995_voucher.csv", DUPLICATE_VOUCHERS_FILE, SAME_DAY_DUPLICATES_FILE, NEAR_DUPLICATES_FILE]
+        snapshot = tuple(file_snapshot(self.output_folder / name) for name in files)
+        return self.get_shared("reports:duplicate_payments", snapshot,
+                               lambda: load_duplicate_payment_reports(self.output_folder))
+    
+    def get_duplicate_payment_results(self, voucher_df, filters=None, amount_tolerance=DEFAULT_AMOUNT_TOLERANCE,
+                                      window_days=DEFAULT_WINDOW_DAYS):
+        """Use the precomputed reports for the unfiltered voucher history, otherwise run the detectors."""
+        if (not self.filters_active(filters) and amount_tolerance == DEFAULT_AMOUNT_TOLERANCE
+                and window_days == DEFAULT_WINDOW_DAYS):
+            results = self.load_duplicate_payment_reports()
+            if results is not None:
+                return results
+        return detect_duplicate_payments(voucher_df, amount_tolerance=amount_tolerance, window_days=window_days)
+    
+    def analyze_multiple_payments(self, grn_df, voucher_df, filters=None):
         """Detect multiple payments with corrected PDF linkage context."""
         st.markdown("### 💳 Multiple Payment Detection (Corrected)")
         st.info("✅ **Using Corrected Linkage**: PDF Reference → GRN inv_no → GRN voucher → Payment voucher_no")
@@ -4344,14 +4186,14 @@ class AdvancedStockDashboard:
         pdf_df = None
         if os.path.exists('output/individual_hr185_transactions.csv'):
             pdf_df = pd.read_csv('output/individual_hr185_transactions.csv')
-            pdf_df['reference_normalized'] = pdf_df['reference'].apply(self.normalize_reference)
+            pdf_df['reference_normalized'] = self.normalize_references(pdf_df['reference'])
         
         # Normalize data
-        grn_analysis = grn_df.copy()
+        grn_analysis = grn_df.copy(deep=False)
         grn_analysis['voucher_normalized'] = grn_analysis['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
-        grn_analysis['inv_no_normalized'] = grn_analysis['inv_no'].apply(self.normalize_reference)
+        grn_analysis['inv_no_normalized'] = self.normalize_references(grn_analysis['inv_no'])
         
-        voucher_analysis = voucher_df.copy()
+        voucher_analysis = voucher_df.copy(deep=False)
         voucher_analysis['voucher_no_normalized'] = voucher_analysis['voucher_no'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         voucher_analysis['cheq_amt_num'] = pd.to_numeric(voucher_analysis['cheq_amt'], errors='coerce')
         
@@ -4360,74 +4202,74 @@ class AdvancedStockDashboard:
         with col1:
             st.markdown("#### 🔍 Duplicate Payment Analysis")
             
-            # Method 1: Multiple payments to same voucher reference
-            voucher_counts = voucher_analysis['voucher_no_normalized'].value_counts()
-            duplicate_vouchers = voucher_counts[voucher_counts > 1]
+            # Tolerances for the near-duplicate scan; defaults match the pipeline reports
+            tol_col, window_col = st.columns(2)
+            with tol_col:
+                amount_tolerance = st.number_input("Amount tolerance (R)", min_value=0.0, value=DEFAULT_AMOUNT_TOLERANCE,
+                                                   step=0.5, key="near_duplicate_amount_tolerance")
+            with window_col:
+                window_days = st.number_input("Date window (days)", min_value=0, value=DEFAULT_WINDOW_DAYS,
+                                              step=1, key="near_duplicate_window_days")
+            
+            duplicate_results = self.get_duplicate_payment_results(voucher_df, filters, amount_tolerance,
+                                                                   int(window_days))
+            
+            # Method 1: Multiple payments to same voucher reference, scored for every voucher
+            duplicate_vouchers = duplicate_results['duplicate_vouchers']
             
             if len(duplicate_vouchers) > 0:
                 st.metric("Voucher Numbers with Multiple Payments", len(duplicate_vouchers))
-                
-                # Calculate potential overpayment
-                duplicate_details = []
-                total_overpayment = 0
-                
-                for voucher_no, count in duplicate_vouchers.head(10).items():
-                    voucher_payments = voucher_analysis[voucher_analysis['voucher_no_normalized'] == voucher_no]
-                    total_paid = voucher_payments['cheq_amt_num'].sum()
-                    expected_payment = voucher_payments['cheq_amt_num'].iloc[0]  # Assume first payment is correct
-                    overpayment = total_paid - expected_payment
-                    total_overpayment += overpayment
-                    
-                    duplicate_details.append({
-                        'Voucher No': voucher_no,
-                        'Payment Count': count,
-                        'Total Paid': f"R{total_paid:,.2f}",
-                        'Expected': f"R{expected_payment:,.2f}",
-                        'Overpayment': f"R{overpayment:,.2f}"
-                    })
-                
-                st.metric("Potential Overpayment (Top 10)", f"R{total_overpayment:,.2f}")
+                st.metric("Potential Overpayment (All Vouchers)", f"R{duplicate_vouchers['overpayment'].sum():,.2f}")
                 
                 # Show duplicate details
-                if duplicate_details:
-                    st.markdown("**Duplicate Voucher Payments:**")
-                    st.dataframe(pd.DataFrame(duplicate_details), use_container_width=True, hide_index=True)
+                duplicate_details = pd.DataFrame({
+                    'Voucher No': duplicate_vouchers['voucher_no'],
+                    'Payee': duplicate_vouchers['payee_name'],
+                    'Payment Count': duplicate_vouchers['payment_count'],
+                    'Total Paid': duplicate_vouchers['total_paid'].map(lambda x: f"R{x:,.2f}"),
+                    'Expected': duplicate_vouchers['expected_payment'].map(lambda x: f"R{x:,.2f}"),
+                    'Overpayment': duplicate_vouchers['overpayment'].map(lambda x: f"R{x:,.2f}")
+                })
+                st.markdown("**Duplicate Voucher Payments:**")
+                st.dataframe(duplicate_details, use_container_width=True, hide_index=True)
             else:
                 st.success("✅ No duplicate voucher payments detected")
             
             # Method 2: Same supplier, same amount, same date
             st.markdown("#### 📅 Same-Day Duplicate Analysis")
             
-            if 'date' in voucher_analysis.columns:
-                voucher_analysis['date_parsed'] = pd.to_datetime(voucher_analysis['date'], errors='coerce')
+            suspicious_same_day = duplicate_results['same_day']
+            if len(suspicious_same_day) > 0:
+                st.metric("Suspicious Same-Day Payments", len(suspicious_same_day))
                 
-                # Group by supplier, amount, and date
-                same_day_groups = voucher_analysis.groupby([
-                    'payee_name', 'cheq_amt_num', 'date_parsed'
-                ]).agg({
-                    'voucher_no_normalized': 'count',
-                    'cheq_amt': 'first'
-                }).reset_index()
+                # Value paid on top of the first payment of each group
+                st.metric("Potential Duplicate Value", f"R{suspicious_same_day['duplicate_value'].sum():,.2f}")
                 
-                same_day_groups.columns = ['Supplier', 'Amount', 'Date', 'Payment Count', 'Amount Display']
-                suspicious_same_day = same_day_groups[same_day_groups['Payment Count'] > 1]
-                
-                if len(suspicious_same_day) > 0:
-                    st.metric("Suspicious Same-Day Payments", len(suspicious_same_day))
-                    
-                    # Calculate potential duplicate value
-                    suspicious_value = suspicious_same_day['Amount'].sum()
-                    st.metric("Potential Duplicate Value", f"R{suspicious_value:,.2f}")
-                    
-                    # Show details
-                    display_suspicious = suspicious_same_day.copy()
-                    display_suspicious['Amount Display'] = display_suspicious['Amount'].apply(lambda x: f"R{x:,.2f}")
-                    st.dataframe(
-                        display_suspicious[['Supplier', 'Amount Display', 'Date', 'Payment Count']].head(10),
-                        use_container_width=True, hide_index=True
-                    )
-                else:
-                    st.success("✅ No suspicious same-day payments detected")
+                display_suspicious = pd.DataFrame({
+                    'Supplier': suspicious_same_day['payee_name'],
+                    'Amount Display': suspicious_same_day['amount'].map(lambda x: f"R{x:,.2f}"),
+                    'Date': suspicious_same_day['payment_date'].dt.date,
+                    'Payment Count': suspicious_same_day['payment_count'],
+                    'Vouchers': suspicious_same_day['vouchers']
+                })
+                st.dataframe(display_suspicious, use_container_width=True, hide_index=True)
+            else:
+                st.success("✅ No suspicious same-day payments detected")
+            
+            # Method 3: Same payee, similar amount, within the date window
+            st.markdown("#### 🔁 Near-Duplicate Payment Analysis")
+            
+            near_duplicates = duplicate_results['near_duplicates']
+            if len(near_duplicates) > 0:
+                st.metric("Near-Duplicate Payment Pairs", len(near_duplicates))
+                st.caption(f"Same payee, amounts within R{amount_tolerance:,.2f} (or 0.5%), "
+                           f"paid within {int(window_days)} days of each other")
+                display_near = near_duplicates.copy()
+                display_near['date_a'] = display_near['date_a'].dt.date
+                display_near['date_b'] = display_near['date_b'].dt.date
+                st.dataframe(display_near, use_container_width=True, hide_index=True)
+            else:
+                st.success("✅ No near-duplicate payments detected")
         
         with col2:
             st.markdown("#### 📊 Payment Pattern Analysis")
@@ -4502,9 +4344,12 @@ class AdvancedStockDashboard:
         if len(duplicate_vouchers) > 0:
             risk_items.append(f"🔴 **Duplicate Voucher Payments**: {len(duplicate_vouchers)} voucher numbers have multiple payments")
         
-        if 'suspicious_same_day' in locals() and len(suspicious_same_day) > 0:
+        if len(suspicious_same_day) > 0:
             risk_items.append(f"🟡 **Same-Day Duplicates**: {len(suspicious_same_day)} potential same-day duplicate payments")
         
+        if len(near_duplicates) > 0:
+            risk_items.append(f"🟡 **Near-Duplicates**: {len(near_duplicates)} payment pairs with similar amounts to the same payee")
+        
         if pdf_df is not None:
             pdf_payment_rate = len(pdf_payments) / len(voucher_analysis) * 100 if len(voucher_analysis) > 0 else 0
             if pdf_payment_rate < 50:
@@ -4541,7 +4386,7 @@ class AdvancedStockDashboard:
         pdf_df = None
         if os.path.exists('output/individual_hr185_transactions.csv'):
             pdf_df = pd.read_csv('output/individual_hr185_transactions.csv')
-            pdf_df['reference_normalized'] = pdf_df['reference'].apply(self.normalize_reference)
+            pdf_df['reference_normalized'] = self.normalize_references(pdf_df['reference'])
         
         col1, col2 = st.columns(2)
         
@@ -4575,8 +4420,8 @@ class AdvancedStockDashboard:
                 st.markdown("#### 📄 PDF-Linked Supplier Analysis")
                 
                 # Get suppliers from PDF-linked GRNs
-                grn_df_analysis = grn_df.copy()
-                grn_df_analysis['inv_no_normalized'] = grn_df_analysis['inv_no'].apply(self.normalize_reference)
+                grn_df_analysis = grn_df.copy(deep=False)
+                grn_df_analysis['inv_no_normalized'] = self.normalize_references(grn_df_analysis['inv_no'])
                 
                 pdf_linked_grns = grn_df_analysis[grn_df_analysis['inv_no_normalized'].isin(pdf_df['reference_normalized'])]
                 pdf_linked_suppliers = set(pdf_linked_grns[grn_supplier_col].dropna().astype(str).str.strip().str.upper())
@@ -4607,11 +4452,11 @@ class AdvancedStockDashboard:
             
             if 'voucher' in grn_df.columns and 'voucher_no' in voucher_df.columns:
                 # Use corrected linkage
-                grn_analysis = grn_df.copy()
+                grn_analysis = grn_df.copy(deep=False)
                 grn_analysis['voucher_normalized'] = grn_analysis['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
-                grn_analysis['inv_no_normalized'] = grn_analysis['inv_no'].apply(self.normalize_reference)
+                grn_analysis['inv_no_normalized'] = self.normalize_references(grn_analysis['inv_no'])
                 
-                voucher_analysis = voucher_df.copy()
+                voucher_analysis = voucher_df.copy(deep=False)
                 voucher_analysis['voucher_no_normalized'] = voucher_analysis['voucher_no'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
                 
                 grn_voucher_refs = set(grn_analysis['voucher_normalized'].dropna())
@@ -4715,15 +4560,15 @@ class AdvancedStockDashboard:
         pdf_df = None
         if os.path.exists('output/individual_hr185_transactions.csv'):
             pdf_df = pd.read_csv('output/individual_hr185_transactions.csv')
-            pdf_df['reference_normalized'] = pdf_df['reference'].apply(self.normalize_reference)
+            pdf_df['reference_normalized'] = self.normalize_references(pdf_df['reference'])
         
         # Normalize GRN data
-        grn_analysis = grn_df.copy()
-        grn_analysis['inv_no_normalized'] = grn_analysis['inv_no'].apply(self.normalize_reference)
+        grn_analysis = grn_df.copy(deep=False)
+        grn_analysis['inv_no_normalized'] = self.normalize_references(grn_analysis['inv_no'])
         grn_analysis['voucher_normalized'] = grn_analysis['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         
         # Normalize voucher data
-        voucher_analysis = voucher_df.copy()
+        voucher_analysis = voucher_df.copy(deep=False)
         voucher_analysis['voucher_no_normalized'] = voucher_analysis['voucher_no'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         
         # Key metrics
@@ -4868,22 +4713,6 @@ class AdvancedStockDashboard:
         for rec in recommendations:
             st.markdown(f"- {rec}")
     
-    def normalize_reference(self, ref):
-        """Normalize reference numbers by handling leading zeros."""
-        if pd.isna(ref):
-            return ref
-        
-        ref_str = str(ref).strip()
-        
-        # For numeric references, strip leading zeros and convert to int
-        if ref_str.isdigit() or (ref_str.startswith('0') and ref_str.lstrip('0').isdigit()):
-            try:
-                return int(ref_str.lstrip('0')) if ref_str.lstrip('0') else 0
-            except:
-                return ref_str
-        
-        return ref_str.upper()
-
     def create_pdf_analytics(self, filters=None):
         """Create comprehensive analytics for PDF-extracted data."""
         st.header("📄 PDF Reports Analytics")
@@ -5280,31 +5109,7 @@ class AdvancedStockDashboard:
         """Create comprehensive data tables section with filtering capabilities."""
         st.header("📋 Data Tables")
         
-        # Get list of available CSV files
-        csv_files = [
-            ("HR995 GRN Records", "hr995_grn.csv"),
-            ("HR995 Issue Records", "hr995_issue.csv"),
-            ("HR995 Voucher Records", "hr995_voucher.csv"),
-            ("HR995 Redundant Records", "hr995_redundant.csv"),
-            ("All Stock Data (Combined)", "all_stock_data.csv"),
-            ("Suppliers Master Data", "suppliers.csv"),
-            ("Stock Adjustments", "stock_adjustments.csv"),
-            ("HR185 Transactions (PDF)", "individual_hr185_transactions.csv"),
-            ("HR990 Expenditure (PDF)", "individual_hr990_expenditure.csv"),
-            ("Variance Report", "variance_report.csv"),
-            ("HR450 Data", "hr450_data.csv"),
-            ("2023 Suppliers List", "individual_2023_list_of_suppliers.csv"),
-            ("2024 Suppliers List", "individual_2024_list_of_suppliers.csv"),
-            ("Final Stock Listing 2023", "individual_final_stock_listing_2023.csv"),
-            ("Stock Balance 2023-2024", "individual_final_stock_list_2324.csv"),
-            ("Stock Adjustments 2024", "individual_stock_adjustment_item_2024.csv"),
-            ("Objective 1: Item Frequency", "objective_1_item_frequency_by_supplier.csv"),
-            ("Objective 2: Audit Trail", "objective_2_stock_audit_trail.csv"),
-            ("Objective 3: HR995 Report", "objective_3_hr995_report.csv"),
-            ("Objective 4: End-to-End Process", "objective_4_end_to_end_process.csv"),
-            ("Objective 5: Stock Balances by Year", "objective_5_stock_balances_by_year.csv"),
-            ("❌ Invalid Voucher References", "invalid_voucher_references.csv")
-        ]
+        csv_files = self.DATA_TABLES
         
         # Table selector
         st.subheader("📊 Select Data Table")
@@ -5323,10 +5128,15 @@ class AdvancedStockDashboard:
         if df is not None and not df.empty:
             # Special handling for Invalid Voucher References
             if selected_file == "invalid_voucher_references.csv":
-                # Try to load corrected version first
+                # Try to load corrected version first, or build it with the classification engine
                 corrected_file = 'output/invalid_voucher_references_corrected.csv'
+                corrected_df = None
                 if os.path.exists(corrected_file):
                     corrected_df = pd.read_csv(corrected_file)
+                else:
+                    corrected_df = self.build_corrected_invalid_vouchers()
+                
+                if corrected_df is not None:
                     st.info("📊 **Using Corrected Analysis**: PDF → GRN → Voucher linkage applied")
                     self.display_invalid_voucher_analysis(corrected_df)
                 else:
@@ -5334,6 +5144,11 @@ class AdvancedStockDashboard:
                     self.display_invalid_voucher_analysis(df)
                 return
             
+            # Search index is built once per file snapshot and shared across reruns
+            search_index = self.get_search_index(selected_file, file_snapshot(self.output_folder / selected_file), df)
+            indexed_rows = df.index
+            full_df = df
+            
             # Apply supplier filter if active
             if filters and filters.get('suppliers') and 'All Suppliers' not in filters['suppliers']:
                 supplier_cols = [col for col in df.columns if 'supplier' in col.lower()]
@@ -5366,22 +5181,17 @@ class AdvancedStockDashboard:
                     filter_column = "No filter"
             
             with col3:
-                # Number of rows to display
-                max_rows = st.number_input("Max rows to display:", 
-                                         min_value=10, max_value=10000, value=100, step=50)
+                # Rows per page (only the visible page is sent to the browser)
+                page_size = st.selectbox("Rows per page:", options=PAGE_SIZE_OPTIONS, index=1)
             
-            # Apply search filter
-            filtered_df = df.copy()
+            # Apply search filter using the precomputed index
+            filtered_df = df
             
             if search_term:
-                # Search across all text columns
-                text_columns = df.select_dtypes(include=['object', 'string']).columns
-                if len(text_columns) > 0:
-                    search_mask = df[text_columns].astype(str).apply(
-                        lambda x: x.str.contains(search_term, case=False, na=False)
-                    ).any(axis=1)
-                    filtered_df = df[search_mask]
-                    st.info(f"🔍 Search results: {len(filtered_df):,} records match '{search_term}'")
+                match_positions = search_index.search(search_term)
+                # Index positions refer to the table as loaded, before the supplier filter
+                filtered_df = df[df.index.isin(indexed_rows[match_positions])]
+                st.info(f"🔍 Search results: {len(filtered_df):,} records match '{search_term}'")
             
             # Apply column filter
             if filter_column != "No filter" and filter_column in df.columns:
@@ -5413,36 +5223,38 @@ class AdvancedStockDashboard:
                 text_cols = len(filtered_df.select_dtypes(include=['object', 'string']).columns)
                 st.metric("Text Columns", text_cols)
             
+            # Precomputed profile applies only when the whole table is in view
+            table_profile = self.get_dataset_profile(selected_file) if filtered_df is full_df else None
+            
             # Column information
             with st.expander("📋 Column Information"):
-                col_info = []
-                for col in filtered_df.columns:
-                    dtype = str(filtered_df[col].dtype)
-                    non_null = filtered_df[col].notna().sum()
-                    null_count = filtered_df[col].isna().sum()
-                    unique_count = filtered_df[col].nunique()
-                    
-                    col_info.append({
-                        'Column': col,
-                        'Data Type': dtype,
-                        'Non-Null Count': f"{non_null:,}",
-                        'Null Count': f"{null_count:,}",
-                        'Unique Values': f"{unique_count:,}"
-                    })
+                if table_profile is not None:
+                    col_info_df = column_info_table(table_profile)
+                    # Data types reflect the dashboard's date parsing, not the raw CSV
+                    col_info_df['Data Type'] = col_info_df['Column'].map(filtered_df.dtypes.astype(str)).fillna(col_info_df['Data Type'])
+                    # Columns derived at load time (period_date, scoa_*) are not in the CSV profile
+                    derived_cols = [col for col in filtered_df.columns if col not in table_profile['columns']]
+                    if derived_cols:
+                        col_info_df = pd.concat([col_info_df, self.live_column_info(filtered_df[derived_cols])], ignore_index=True)
+                    st.caption(f"Statistics from dataset profile generated {table_profile['profiled_at']}")
+                else:
+                    col_info_df = self.live_column_info(filtered_df)
                 
-                col_info_df = pd.DataFrame(col_info)
                 st.dataframe(col_info_df, use_container_width=True)
             
             # Display the filtered data table
             st.subheader(f"📊 {selected_table} Data")
             
-            # Limit rows for performance
-            display_df = filtered_df.head(max_rows)
+            # Server-side pagination: only the selected page is rendered
+            total_pages = page_count(len(filtered_df), page_size)
+            page = st.number_input(f"Page (1-{total_pages:,}):", min_value=1, max_value=total_pages,
+                                   value=1, step=1, key=f"data_table_page_{selected_file}_{total_pages}")
+            display_df = get_page(filtered_df, page, page_size)
             
-            if len(filtered_df) > max_rows:
-                st.warning(f"⚠️ Showing first {max_rows:,} rows out of {len(filtered_df):,} total records")
+            if len(filtered_df) > page_size:
+                first_row = (page - 1) * page_size + 1
+                st.caption(f"Showing rows {first_row:,}-{first_row + len(display_df) - 1:,} of {len(filtered_df):,} total records")
             
-            # Display the table with pagination-like functionality
             st.dataframe(
                 display_df,
                 use_container_width=True,
@@ -5454,18 +5266,13 @@ class AdvancedStockDashboard:
             col1, col2 = st.columns(2)
             
             with col1:
-                # Download filtered data as CSV
-                csv_data = filtered_df.to_csv(index=False)
-                st.download_button(
-                    label="📥 Download Filtered Data (CSV)",
-                    data=csv_data,
-                    file_name=f"filtered_{selected_file}",
-                    mime="text/csv"
-                )
+                # Filtered data is only serialized when an export is requested
+                st.markdown("**📥 Download Filtered Data**")
+                self.render_export_controls(filtered_df, f"filtered_{selected_file}", key=f"table_{selected_file}")
             
             with col2:
                 # Download column info
-                col_info_csv = pd.DataFrame(col_info).to_csv(index=False)
+                col_info_csv = col_info_df.to_csv(index=False)
                 st.download_button(
                     label="📋 Download Column Info (CSV)",
                     data=col_info_csv,
@@ -5481,20 +5288,33 @@ class AdvancedStockDashboard:
                 numeric_cols = filtered_df.select_dtypes(include=[np.number]).columns
                 if len(numeric_cols) > 0:
                     st.write("**Numeric Columns Summary:**")
-                    st.dataframe(filtered_df[numeric_cols].describe(), use_container_width=True)
+                    if table_profile is not None:
+                        numeric_summary = numeric_summary_table(table_profile)
+                        numeric_summary = numeric_summary[[col for col in numeric_cols if col in numeric_summary.columns]]
+                    else:
+                        numeric_summary = filtered_df[numeric_cols].describe()
+                    st.dataframe(numeric_summary, use_container_width=True)
                 
                 # Categorical analysis
                 text_cols = filtered_df.select_dtypes(include=['object', 'string']).columns
                 if len(text_cols) > 0:
                     st.write("**Categorical Columns (Top Values):**")
                     for col in text_cols[:5]:  # Show first 5 text columns
-                        if filtered_df[col].notna().sum() > 0:
+                        if table_profile is not None and col in table_profile['columns']:
+                            top_values = top_values_series(table_profile, col)
+                        elif filtered_df[col].notna().sum() > 0:
                             top_values = filtered_df[col].value_counts().head(10)
+                        else:
+                            continue
+                        if len(top_values) > 0:
                             st.write(f"*{col}:*")
                             st.bar_chart(top_values)
                 
                 # Missing data analysis
-                missing_data = filtered_df.isnull().sum()
+                if table_profile is not None:
+                    missing_data = pd.Series({col: stats['null_count'] for col, stats in table_profile['columns'].items()})
+                else:
+                    missing_data = filtered_df.isnull().sum()
                 missing_data = missing_data[missing_data > 0].sort_values(ascending=False)
                 if len(missing_data) > 0:
                     st.write("**Missing Data by Column:**")
@@ -5514,10 +5334,42 @@ class AdvancedStockDashboard:
             except Exception as e:
                 st.error(f"Error listing files: {e}")
 
+    def enable_telemetry(self):
+        """Instrument section renders for this rerun (enabled with ?debug=1)."""
+        telemetry = RenderTelemetry()
+        telemetry.activate()
+        install_plotly_chart_hook(st)
+        instrument_methods(self, telemetry)
+        
+        load_data = self.load_data
+        def counted_load_data(filename):
+            telemetry.record_cache_call('load_data')
+            df = load_data(filename)
+            telemetry.record_rows(len(df))
+            return df
+        self.load_data = counted_load_data
+        return telemetry
+    
     def run_dashboard(self):
         """Run the main dashboard application."""
+        telemetry = self.enable_telemetry() if telemetry_enabled(st.query_params) else None
+        # First run in this server process warms the shared caches in the background
+        start_background_warmup(self.warmup_tasks())
+        try:
+            self.render_dashboard(telemetry)
+        finally:
+            if telemetry is not None:
+                telemetry.deactivate()
+                metrics_log = MetricsLog(self.output_folder / "telemetry")
+                metrics_log.append(telemetry)
+                render_debug_panel(st, telemetry, metrics_log)
+    
+    def render_dashboard(self, telemetry=None):
+        """Render the sidebar and all dashboard tabs."""
         # Create sidebar filters
         filters = self.create_sidebar_filters()
+        if telemetry is not None:
+            telemetry.filters = filters
         
         # Main content
         self.create_executive_summary(filters)
@@ -5558,6 +5410,27 @@ class AdvancedStockDashboard:
         st.markdown("---")
         st.markdown("*Dashboard powered by Streamlit and Plotly* | *Data processed by Stock Data Processor*")
 
+    def build_corrected_invalid_vouchers(self):
+        """Classify invalid voucher references with the batch engine when no corrected report exists."""
+        grn_df = self.load_data("hr995_grn.csv")
+        voucher_df = self.load_data("hr995_voucher.csv")
+        if grn_df.empty or voucher_df.empty or 'voucher' not in grn_df.columns or 'voucher_no' not in voucher_df.columns:
+            return None
+        hr185_df = self.load_data("individual_hr185_transactions.csv")
+        return build_invalid_voucher_report(grn_df, voucher_df, hr185_df)
+    
+    def live_column_info(self, df):
+        """Compute the Column Information table directly from a DataFrame."""
+        non_null = df.notna().sum()
+        unique_counts = df.nunique()
+        return pd.DataFrame({
+            'Column': df.columns,
+            'Data Type': df.dtypes.astype(str).values,
+            'Non-Null Count': [f"{v:,}" for v in non_null.values],
+            'Null Count': [f"{v:,}" for v in (len(df) - non_null).values],
+            'Unique Values': [f"{v:,}" for v in unique_counts.values]
+        })
+    
     def display_invalid_voucher_analysis(self, invalid_df):
         """Display comprehensive analysis of invalid voucher references."""
         st.header("❌ Invalid Voucher References Analysis")
@@ -5827,13 +5700,7 @@ class AdvancedStockDashboard:
         # Download option
         st.subheader("💾 Download Invalid Voucher Report")
         
-        csv_data = filtered_invalid.to_csv(index=False)
-        st.download_button(
-            label="📥 Download Invalid Voucher Analysis (CSV)",
-            data=csv_data,
-            file_name=f"invalid_voucher_analysis_{datetime.now().strftime('%Y%m%d')}.csv",
-            mime="text/csv"
-        )
+        self.render_export_controls(filtered_invalid, "invalid_voucher_analysis", key="invalid_vouchers")
 
 def main():
     """Main function to run the dashboard."""
@@ -2,35 +2,302 @@
 """
 Static HTML Dashboard Exporter for IIS Hosting
 Converts the interactive Streamlit dashboard to static HTML reports that can be hosted on IIS.
+
+The export works offline: Plotly's JavaScript is written once to a local asset that
+every page references, so no CDN access is needed on the hosting server. Chart pages
+are rendered in parallel worker processes, the Data Tables page takes row counts from
+the dataset profiles (or a fast line count) instead of parsing every CSV, and the
+HTML/JS files are precompressed so IIS can serve the gzip copies directly.
+
+Exports are incremental. An export manifest records the snapshot (modification time
+and size) of every output dataset each page was built from, and each chart's figure
+JSON is kept with the snapshots of its inputs. A re-run rebuilds only the pages whose
+inputs changed, and within a rebuilt page only the charts whose inputs changed; the
+others are rendered from their serialized figures.
 """
 
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.offline import plot
-from pathlib import Path
+import gzip
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import json
+from pathlib import Path
+
+import pandas as pd
+import plotly
+import plotly.express as px
+import plotly.io as pio
+from plotly.offline import get_plotlyjs, plot
+
+from dataset_profiler import load_profile
+from table_search import file_snapshot
+
+ASSETS_FOLDER = "assets"
+PLOTLY_ASSET = f"{ASSETS_FOLDER}/plotly-{plotly.__version__}.min.js"
+PRECOMPRESS_SUFFIXES = ('.html', '.js', '.css')
+
+# Bump when page templates or chart definitions change so every page is rebuilt once
+EXPORT_VERSION = 1
+EXPORT_CACHE_FOLDER = "_export_cache"
+MANIFEST_FILE = "export_manifest.json"
+
+OBJECTIVE_FILES = [
+    ("Objective 1: Item Frequency", "objective_1_item_frequency_by_supplier.csv"),
+    ("Objective 2: Audit Trail", "objective_2_stock_audit_trail.csv"),
+    ("Objective 2: Requisition Fill", "objective_2_requisition_fill_status.csv"),
+    ("Objective 3: HR995 Report", "objective_3_hr995_report.csv"),
+    ("Objective 4: End-to-End Process", "objective_4_end_to_end_process.csv"),
+    ("Objective 5: Stock Balances", "objective_5_stock_balances_by_year.csv"),
+    ("Objective 5: Roll-Forward", "objective_5_stock_roll_forward.csv")
+]
+
+# Chart pages rendered by worker processes: page method → (HTML file, output datasets it reads).
+# None means the page reads every output CSV.
+CHART_PAGES = {
+    'create_financial_analytics': ("financial_analytics.html", ["hr995_grn.csv"]),
+    'create_supplier_analytics': ("supplier_analytics.html", ["objective_1_item_frequency_by_supplier.csv"]),
+    'create_objective_reports': ("objective_reports.html", [filename for _, filename in OBJECTIVE_FILES]),
+    'create_data_tables': ("data_tables.html", None),
+}
+PLACEHOLDER_PAGES = [
+    ("inventory_analytics.html", "📦 Inventory Analytics"),
+    ("operational_analytics.html", "⚙️ Operational Analytics")
+]
+
+# Serves the precompressed .gz copies to clients that accept gzip (requires the IIS URL Rewrite module)
+IIS_WEB_CONFIG = """<?xml version="1.0" encoding="UTF-8"?>
+<configuration>
+  <system.webServer>
+    <staticContent>
+      <remove fileExtension=".gz" />
+      <mimeMap fileExtension=".gz" mimeType="application/octet-stream" />
+    </staticContent>
+    <rewrite>
+      <rules>
+        <rule name="Serve precompressed assets" stopProcessing="true">
+          <match url="^(.*\\.(html|js|css))$" />
+          <conditions>
+            <add input="{HTTP_ACCEPT_ENCODING}" pattern="gzip" />
+            <add input="{REQUEST_FILENAME}.gz" matchType="IsFile" />
+          </conditions>
+          <action type="Rewrite" url="{R:1}.gz" />
+        </rule>
+      </rules>
+      <outboundRules>
+        <rule name="Precompressed encoding" preCondition="IsGzip">
+          <match serverVariable="RESPONSE_Content_Encoding" pattern=".*" />
+          <action type="Rewrite" value="gzip" />
+        </rule>
+        <rule name="Precompressed HTML type" preCondition="IsHtmlGzip">
+          <match serverVariable="RESPONSE_Content_Type" pattern=".*" />
+          <action type="Rewrite" value="text/html; charset=utf-8" />
+        </rule>
+        <rule name="Precompressed JS type" preCondition="IsJsGzip">
+          <match serverVariable="RESPONSE_Content_Type" pattern=".*" />
+          <action type="Rewrite" value="application/javascript" />
+        </rule>
+        <rule name="Precompressed CSS type" preCondition="IsCssGzip">
+          <match serverVariable="RESPONSE_Content_Type" pattern=".*" />
+          <action type="Rewrite" value="text/css" />
+        </rule>
+        <preConditions>
+          <preCondition name="IsGzip">
+            <add input="{REQUEST_FILENAME}" pattern="\\.gz$" />
+          </preCondition>
+          <preCondition name="IsHtmlGzip">
+            <add input="{REQUEST_FILENAME}" pattern="\\.html\\.gz$" />
+          </preCondition>
+          <preCondition name="IsJsGzip">
+            <add input="{REQUEST_FILENAME}" pattern="\\.js\\.gz$" />
+          </preCondition>
+          <preCondition name="IsCssGzip">
+            <add input="{REQUEST_FILENAME}" pattern="\\.css\\.gz$" />
+          </preCondition>
+        </preConditions>
+      </outboundRules>
+    </rewrite>
+    <urlCompression doStaticCompression="true" doDynamicCompression="false" />
+    <security>
+      <requestFiltering>
+        <hiddenSegments>
+          <add segment="_export_cache" />
+        </hiddenSegments>
+      </requestFiltering>
+    </security>
+  </system.webServer>
+</configuration>
+"""
+
+
+def count_csv_rows(file_path):
+    """
+    Count data rows in a CSV by counting line breaks in binary chunks.
+
+    Quoted fields containing line breaks are counted as extra rows; the exporter only
+    falls back to this count when no current dataset profile exists.
+    """
+    line_breaks = 0
+    last_byte = b''
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            line_breaks += chunk.count(b'\n')
+            last_byte = chunk[-1:]
+    lines = line_breaks + (1 if last_byte and last_byte != b'\n' else 0)
+    return max(lines - 1, 0)
+
+
+def csv_table_stats(output_folder, filename):
+    """
+    Return row and column counts for an output CSV without parsing it.
+
+    Uses the dataset profile when it matches the current file snapshot, otherwise a
+    fast line count and the header row.
+
+    Returns:
+        tuple: (rows, columns)
+    """
+    profile = load_profile(output_folder, filename)
+    if profile is not None:
+        return profile['row_count'], profile['column_count']
+    file_path = Path(output_folder) / filename
+    return count_csv_rows(file_path), len(pd.read_csv(file_path, nrows=0).columns)
+
+
+def write_plotly_bundle(html_output):
+    """Write the Plotly JavaScript once as a shared local asset (skipped when already present)."""
+    asset_path = Path(html_output) / PLOTLY_ASSET
+    if not asset_path.exists():
+        asset_path.parent.mkdir(parents=True, exist_ok=True)
+        asset_path.write_text(get_plotlyjs(), encoding="utf-8")
+    return asset_path
+
+
+def precompress_assets(html_output, suffixes=PRECOMPRESS_SUFFIXES):
+    """
+    Write a gzip copy next to every HTML/JS/CSS file that changed since its last compression.
+
+    Returns:
+        int: Number of files compressed
+    """
+    compressed = 0
+    for file_path in Path(html_output).rglob("*"):
+        if file_path.suffix not in suffixes or not file_path.is_file():
+            continue
+        gz_path = file_path.with_name(file_path.name + ".gz")
+        if gz_path.exists() and gz_path.stat().st_mtime_ns >= file_path.stat().st_mtime_ns:
+            continue
+        # mtime=0 keeps the output byte-identical for unchanged inputs
+        gz_path.write_bytes(gzip.compress(file_path.read_bytes(), compresslevel=9, mtime=0))
+        compressed += 1
+    return compressed
+
+
+def input_snapshot(output_folder, filenames):
+    """Return a JSON-friendly {filename: [mtime_ns, size] or None} snapshot of output datasets."""
+    snapshot = {}
+    for filename in filenames:
+        file_state = file_snapshot(Path(output_folder) / filename)
+        snapshot[filename] = list(file_state) if file_state is not None else None
+    return snapshot
+
+
+class ExportManifest:
+    """Records the input snapshot each exported page was built from."""
+    
+    def __init__(self, html_output):
+        self.path = Path(html_output) / EXPORT_CACHE_FOLDER / MANIFEST_FILE
+        self.pages = {}
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+                if manifest.get('export_version') == EXPORT_VERSION:
+                    self.pages = manifest.get('pages', {})
+            except (OSError, ValueError):
+                self.pages = {}
+    
+    def page_current(self, html_file, snapshot):
+        """Check that a page exists and was built from exactly this input snapshot."""
+        return (self.path.parent.parent / html_file).exists() and self.pages.get(html_file) == snapshot
+    
+    def record_page(self, html_file, snapshot):
+        self.pages[html_file] = snapshot
+    
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'export_version': EXPORT_VERSION, 'pages': self.pages}, f, indent=2)
+
+
+def render_page(page_method, output_folder="output", html_output="html_reports"):
+    """Render one chart page in a worker process."""
+    exporter = StaticDashboardExporter(output_folder, html_output)
+    getattr(exporter, page_method)()
+    return page_method
 
 class StaticDashboardExporter:
     """Export interactive dashboard as static HTML files for IIS hosting."""
     
-    def __init__(self):
-        self.output_folder = Path("output")
-        self.html_output = Path("html_reports")
+    def __init__(self, output_folder="output", html_output="html_reports"):
+        self.output_folder = Path(output_folder)
+        self.html_output = Path(html_output)
         self.html_output.mkdir(exist_ok=True)
+        self.figure_cache = self.html_output / EXPORT_CACHE_FOLDER / "figures"
+        self._data = {}
         
     def load_data(self, filename):
-        """Load data from CSV file."""
+        """Load data from CSV file (once per exporter)."""
+        if filename in self._data:
+            return self._data[filename]
         try:
             file_path = self.output_folder / filename
-            if file_path.exists():
-                return pd.read_csv(file_path, low_memory=False)
-            return None
+            df = pd.read_csv(file_path, low_memory=False) if file_path.exists() else None
         except Exception as e:
             print(f"Error loading {filename}: {e}")
-            return None
+            df = None
+        self._data[filename] = df
+        return df
+    
+    def page_inputs(self, page_method):
+        """Return the output datasets a chart page is built from."""
+        _, inputs = CHART_PAGES[page_method]
+        if inputs is None:
+            inputs = sorted(file.name for file in self.output_folder.glob("*.csv"))
+        return inputs
+    
+    def chart(self, chart_id, inputs, build):
+        """
+        Return the HTML div for a chart, reusing its serialized figure while its inputs are unchanged.
+        
+        Args:
+            chart_id (str): Stable chart name, used for the figure cache file
+            inputs (list): Output datasets the chart is built from
+            build (callable): Returns the Plotly figure, or None when there is no data
+        
+        Returns:
+            str or None: Chart div, or None when the chart has no data
+        """
+        snapshot = input_snapshot(self.output_folder, inputs)
+        cache_file = self.figure_cache / f"{chart_id}.json"
+        fig = None
+        if cache_file.exists():
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if cached.get('export_version') == EXPORT_VERSION and cached.get('inputs') == snapshot:
+                    fig = pio.from_json(cached['figure'])
+            except (OSError, ValueError, KeyError):
+                fig = None
+        
+        if fig is None:
+            fig = build()
+            if fig is None:
+                return None
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(cache_file, 'w', encoding='utf-8') as f:
+                json.dump({'export_version': EXPORT_VERSION, 'inputs': snapshot, 'figure': fig.to_json()}, f)
+        
+        return plot(fig, output_type='div', include_plotlyjs=False)
     
     def create_index_page(self):
         """Create main index.html page with navigation."""
@@ -199,106 +466,110 @@ class StaticDashboardExporter:
         """Create financial analytics HTML page."""
         print("📊 Creating Financial Analytics page...")
         
-        # Load GRN data
-        grn_df = self.load_data("hr995_grn.csv")
+        charts = [
+            self.chart('financial_top_suppliers', ["hr995_grn.csv"], self.build_top_suppliers_chart),
+            self.chart('financial_monthly_trend', ["hr995_grn.csv"], self.build_monthly_trend_chart)
+        ]
         
-        charts = []
-        
-        if grn_df is not None and not grn_df.empty:
-            # Top suppliers by value
-            if 'supplier_name' in grn_df.columns and 'nett_grn_amt' in grn_df.columns:
-                supplier_totals = grn_df.groupby('supplier_name')['nett_grn_amt'].agg(['sum', 'count']).reset_index()
-                supplier_totals = supplier_totals.sort_values('sum', ascending=False).head(15)
-                
-                fig1 = px.bar(supplier_totals, x='sum', y='supplier_name',
-                             title='Top 15 Suppliers by Total Value',
-                             labels={'sum': 'Total Value (R)', 'supplier_name': 'Supplier'},
-                             orientation='h')
-                fig1.update_layout(height=600)
-                charts.append(plot(fig1, output_type='div', include_plotlyjs=False))
-                
-                # Monthly trends
-                if 'fin_period' in grn_df.columns:
-                    grn_df['fin_period'] = pd.to_numeric(grn_df['fin_period'], errors='coerce')
-                    monthly_trends = grn_df.groupby('fin_period')['nett_grn_amt'].agg(['sum', 'count']).reset_index()
-                    
-                    fig2 = px.line(monthly_trends, x='fin_period', y='sum',
-                                  title='GRN Value Trend by Financial Period',
-                                  labels={'sum': 'Total Value (R)', 'fin_period': 'Financial Period'})
-                    fig2.update_layout(height=400)
-                    charts.append(plot(fig2, output_type='div', include_plotlyjs=False))
-        
-        self.create_html_page("financial_analytics.html", "💰 Financial Analytics", charts)
+        self.create_html_page("financial_analytics.html", "💰 Financial Analytics", [c for c in charts if c])
+    
+    def build_top_suppliers_chart(self):
+        """Top suppliers by total GRN value."""
+        grn_df = self.load_data("hr995_grn.csv")
+        if grn_df is None or grn_df.empty or not {'supplier_name', 'nett_grn_amt'}.issubset(grn_df.columns):
+            return None
+        supplier_totals = grn_df.groupby('supplier_name')['nett_grn_amt'].agg(['sum', 'count']).reset_index()
+        supplier_totals = supplier_totals.sort_values('sum', ascending=False).head(15)
+        
+        fig = px.bar(supplier_totals, x='sum', y='supplier_name',
+                     title='Top 15 Suppliers by Total Value',
+                     labels={'sum': 'Total Value (R)', 'supplier_name': 'Supplier'},
+                     orientation='h')
+        fig.update_layout(height=600)
+        return fig
+    
+    def build_monthly_trend_chart(self):
+        """GRN value trend by financial period."""
+        grn_df = self.load_data("hr995_grn.csv")
+        if grn_df is None or grn_df.empty or not {'supplier_name', 'nett_grn_amt', 'fin_period'}.issubset(grn_df.columns):
+            return None
+        periods = pd.to_numeric(grn_df['fin_period'], errors='coerce')
+        monthly_trends = grn_df['nett_grn_amt'].groupby(periods).agg(['sum', 'count']).rename_axis('fin_period').reset_index()
+        
+        fig = px.line(monthly_trends, x='fin_period', y='sum',
+                      title='GRN Value Trend by Financial Period',
+                      labels={'sum': 'Total Value (R)', 'fin_period': 'Financial Period'})
+        fig.update_layout(height=400)
+        return fig
     
     def create_supplier_analytics(self):
         """Create supplier analytics HTML page."""
         print("🏪 Creating Supplier Analytics page...")
         
-        # Load data
-        grn_df = self.load_data("hr995_grn.csv")
-        obj1_df = self.load_data("objective_1_item_frequency_by_supplier.csv")
-        
-        charts = []
+        inputs = ["objective_1_item_frequency_by_supplier.csv"]
+        charts = [
+            self.chart('supplier_top_items', inputs, self.build_top_items_chart),
+            self.chart('supplier_request_distribution', inputs, self.build_supplier_distribution_chart)
+        ]
         
-        if obj1_df is not None and not obj1_df.empty:
-            # Top items by frequency
-            top_items = obj1_df.head(20)
-            
-            fig1 = px.bar(top_items, x='request_count', y='item_code',
-                         title='Top 20 Most Frequently Requested Items',
-                         labels={'request_count': 'Request Count', 'item_code': 'Item Code'},
-                         orientation='h')
-            fig1.update_layout(height=600)
-            charts.append(plot(fig1, output_type='div', include_plotlyjs=False))
-            
-            # Supplier frequency analysis
-            supplier_freq = obj1_df.groupby('supplier_name')['request_count'].sum().reset_index()
-            supplier_freq = supplier_freq.sort_values('request_count', ascending=False).head(15)
-            
-            fig2 = px.pie(supplier_freq, values='request_count', names='supplier_name',
-                         title='Request Distribution by Supplier')
-            fig2.update_layout(height=500)
-            charts.append(plot(fig2, output_type='div', include_plotlyjs=False))
+        self.create_html_page("supplier_analytics.html", "🏪 Supplier Analytics", [c for c in charts if c])
+    
+    def build_top_items_chart(self):
+        """Top 20 most frequently requested items."""
+        obj1_df = self.load_data("objective_1_item_frequency_by_supplier.csv")
+        if obj1_df is None or obj1_df.empty:
+            return None
+        fig = px.bar(obj1_df.head(20), x='request_count', y='item_code',
+                     title='Top 20 Most Frequently Requested Items',
+                     labels={'request_count': 'Request Count', 'item_code': 'Item Code'},
+                     orientation='h')
+        fig.update_layout(height=600)
+        return fig
+    
+    def build_supplier_distribution_chart(self):
+        """Request distribution across the top 15 suppliers."""
+        obj1_df = self.load_data("objective_1_item_frequency_by_supplier.csv")
+        if obj1_df is None or obj1_df.empty:
+            return None
+        supplier_freq = obj1_df.groupby('supplier_name')['request_count'].sum().reset_index()
+        supplier_freq = supplier_freq.sort_values('request_count', ascending=False).head(15)
         
-        self.create_html_page("supplier_analytics.html", "🏪 Supplier Analytics", charts)
+        fig = px.pie(supplier_freq, values='request_count', names='supplier_name',
+                     title='Request Distribution by Supplier')
+        fig.update_layout(height=500)
+        return fig
     
     def create_objective_reports(self):
         """Create objective reports HTML page."""
         print("🎯 Creating Objective Reports page...")
         
-        charts = []
-        
-        # Load all objective data
-        objectives = [
-            ("Objective 1: Item Frequency", "objective_1_item_frequency_by_supplier.csv"),
-            ("Objective 2: Audit Trail", "objective_2_stock_audit_trail.csv"),
-            ("Objective 3: HR995 Report", "objective_3_hr995_report.csv"),
-            ("Objective 4: End-to-End Process", "objective_4_end_to_end_process.csv"),
-            ("Objective 5: Stock Balances", "objective_5_stock_balances_by_year.csv")
-        ]
+        inputs = [filename for _, filename in OBJECTIVE_FILES]
+        chart = self.chart('objective_record_counts', inputs, self.build_objective_counts_chart)
         
+        self.create_html_page("objective_reports.html", "🎯 Objective Reports", [chart] if chart else [])
+    
+    def build_objective_counts_chart(self):
+        """Record count and completion status per business objective."""
         summary_data = []
-        
-        for obj_name, filename in objectives:
-            df = self.load_data(filename)
-            if df is not None:
+        for obj_name, filename in OBJECTIVE_FILES:
+            if (self.output_folder / filename).exists():
+                records, _ = csv_table_stats(self.output_folder, filename)
                 summary_data.append({
                     'Objective': obj_name,
-                    'Records': len(df),
-                    'Status': 'Complete' if len(df) > 0 else 'Empty'
+                    'Records': records,
+                    'Status': 'Complete' if records > 0 else 'Empty'
                 })
         
-        if summary_data:
-            summary_df = pd.DataFrame(summary_data)
-            
-            fig = px.bar(summary_df, x='Objective', y='Records',
-                        title='Records Count by Objective',
-                        color='Status',
-                        color_discrete_map={'Complete': '#2E8B57', 'Empty': '#DC143C'})
-            fig.update_layout(height=400, xaxis_tickangle=-45)
-            charts.append(plot(fig, output_type='div', include_plotlyjs=False))
-        
-        self.create_html_page("objective_reports.html", "🎯 Objective Reports", charts)
+        if not summary_data:
+            return None
+        
+        summary_df = pd.DataFrame(summary_data)
+        fig = px.bar(summary_df, x='Objective', y='Records',
+                     title='Records Count by Objective',
+                     color='Status',
+                     color_discrete_map={'Complete': '#2E8B57', 'Empty': '#DC143C'})
+        fig.update_layout(height=400, xaxis_tickangle=-45)
+        return fig
     
     def create_data_tables(self):
         """Create data tables HTML page."""
@@ -310,11 +581,11 @@ class StaticDashboardExporter:
         
         for file in csv_files:
             try:
-                df = pd.read_csv(file, low_memory=False)
+                records, columns = csv_table_stats(self.output_folder, file.name)
                 file_stats.append({
                     'File': file.name,
-                    'Records': len(df),
-                    'Columns': len(df.columns),
+                    'Records': records,
+                    'Columns': columns,
                     'Size_MB': round(file.stat().st_size / (1024*1024), 2)
                 })
             except:
@@ -366,17 +637,19 @@ class StaticDashboardExporter:
             
             with open(self.html_output / "data_tables.html", "w", encoding="utf-8") as f:
                 f.write(html_content)
+            
+            print("✅ Created data_tables.html")
     
     def create_html_page(self, filename, title, charts):
         """Create a generic HTML page with charts."""
-        charts_html = "\\n".join(charts) if charts else "<p>No charts available for this section.</p>"
+        charts_html = "\n".join(charts) if charts else "<p>No charts available for this section.</p>"
         
         html_content = f"""
 <!DOCTYPE html>
 <html>
 <head>
     <title>{title}</title>
-    <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+    <script src="{PLOTLY_ASSET}"></script>
     <style>
         body {{ font-family: Arial, sans-serif; margin: 20px; background-color: #f5f5f5; }}
         .header {{ background: #667eea; color: white; padding: 20px; border-radius: 8px; text-align: center; margin-bottom: 20px; }}
@@ -403,38 +676,85 @@ class StaticDashboardExporter:
         
         print(f"✅ Created {filename}")
     
-    def export_all(self):
-        """Export all dashboard components as static HTML."""
+    def export_all(self, max_workers=None, precompress=True, force=False):
+        """
+        Export all dashboard components as static HTML, rebuilding only pages whose inputs changed.
+        
+        Args:
+            max_workers (int): Worker processes for the chart pages; 1 renders serially
+            precompress (bool): Write gzip copies and the IIS web.config for static serving
+            force (bool): Rebuild every page regardless of the export manifest
+        
+        Returns:
+            list: HTML files that were rebuilt
+        """
         print("🚀 EXPORTING STATIC HTML DASHBOARD FOR IIS")
         print("=" * 60)
         
-        # Create all pages
-        self.create_index_page()
-        self.create_financial_analytics()
-        self.create_supplier_analytics()
-        self.create_objective_reports()
-        self.create_data_tables()
+        # One local Plotly bundle shared by every page (no CDN access on the host)
+        write_plotly_bundle(self.html_output)
+        print(f"✅ Shared Plotly bundle: {PLOTLY_ASSET}")
+        
+        # Pages whose input snapshots match the manifest are kept as they are
+        manifest = ExportManifest(self.html_output)
+        stale_pages = {}
+        for page, (html_file, _) in CHART_PAGES.items():
+            snapshot = input_snapshot(self.output_folder, self.page_inputs(page))
+            if force or not manifest.page_current(html_file, snapshot):
+                stale_pages[page] = snapshot
+            else:
+                print(f"⏭️  {html_file} unchanged")
+        
+        max_workers = max_workers or min(len(stale_pages), os.cpu_count() or 1)
+        if max_workers > 1:
+            with ProcessPoolExecutor(max_workers=max_workers) as pool:
+                futures = [pool.submit(render_page, page, str(self.output_folder), str(self.html_output))
+                           for page in stale_pages]
+                for future in futures:
+                    future.result()
+        else:
+            for page in stale_pages:
+                getattr(self, page)()
+        
+        rebuilt = [CHART_PAGES[page][0] for page in stale_pages]
+        for page, snapshot in stale_pages.items():
+            # Snapshots were taken before rendering, so data written meanwhile is picked up next run
+            manifest.record_page(CHART_PAGES[page][0], snapshot)
         
         # Create simple placeholder pages for other sections
-        placeholder_pages = [
-            ("inventory_analytics.html", "📦 Inventory Analytics"),
-            ("operational_analytics.html", "⚙️ Operational Analytics")
-        ]
-        
-        for filename, title in placeholder_pages:
-            self.create_html_page(filename, title, [])
-        
-        print("\\n" + "=" * 60)
-        print("✅ STATIC HTML EXPORT COMPLETED!")
+        for filename, title in PLACEHOLDER_PAGES:
+            if force or not manifest.page_current(filename, {}):
+                self.create_html_page(filename, title, [])
+                manifest.record_page(filename, {})
+                rebuilt.append(filename)
+        
+        # The index shows the last update time
+        if rebuilt or not (self.html_output / "index.html").exists():
+            self.create_index_page()
+            rebuilt.append("index.html")
+        manifest.save()
+        
+        if precompress:
+            compressed = precompress_assets(self.html_output)
+            web_config = self.html_output / "web.config"
+            if not web_config.exists():
+                web_config.write_text(IIS_WEB_CONFIG, encoding="utf-8")
+            print(f"✅ Precompressed {compressed} files (gzip) for IIS static serving")
+        
+        print("\n" + "=" * 60)
+        print(f"✅ STATIC HTML EXPORT COMPLETED! ({len(rebuilt)} pages rebuilt)")
         print(f"📁 Output folder: {self.html_output.absolute()}")
         print("🌐 Copy the 'html_reports' folder to your IIS server")
         print("🎯 Access via: http://your-server/html_reports/")
         print("=" * 60)
+        return rebuilt
 
 def main():
     """Main function to export static dashboard."""
+    import sys
+    
     exporter = StaticDashboardExporter()
-    exporter.export_all()
+    exporter.export_all(force='--force' in sys.argv)
 
 if __name__ == "__main__":
     main()
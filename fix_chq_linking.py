@@ -12,6 +12,8 @@ linkage from their paired INV transactions.
 import pandas as pd
 import os
 
+from chq_linking import build_enhanced_transaction_trail
+
 def implement_chq_linking_fix():
     """Implement enhanced CHQ linking logic to fix unmatched CHQ transactions."""
     
@@ -29,96 +31,8 @@ def implement_chq_linking_fix():
         print(f"✓ Loaded {len(hr995grn_df)} HR995 GRN records")
         print()
         
-        # Normalize reference function
-        def normalize_reference(ref):
-            if pd.isna(ref):
-                return ''
-            ref_str = str(ref).strip()
-            try:
-                return str(int(ref_str))
-            except ValueError:
-                return ref_str
-        
-        # Create enhanced transaction trail with CHQ inheritance
-        hr185_df['reference_normalized'] = hr185_df['reference'].apply(normalize_reference)
-        hr995grn_df['inv_no_normalized'] = hr995grn_df['inv_no'].apply(normalize_reference)
-        
-        enhanced_trail = []
-        
-        # Process each HR185 transaction
-        for _, hr185_row in hr185_df.iterrows():
-            hr185_ref = hr185_row['reference']
-            hr185_ref_norm = normalize_reference(hr185_ref)
-            transaction_type = hr185_row['transaction_type']
-            
-            # Standard linking logic for all transactions
-            grn_matches = hr995grn_df[hr995grn_df['inv_no_normalized'] == hr185_ref_norm]
-            has_direct_match = len(grn_matches) > 0
-            
-            trail_entry = {
-                'hr185_reference': hr185_ref,
-                'hr185_reference_normalized': hr185_ref_norm,
-                'supplier_code': hr185_row['supplier_code'],
-                'supplier_name': hr185_row['supplier_name'],
-                'transaction_date': hr185_row['transaction_date'],
-                'transaction_type': transaction_type,
-                'amount': hr185_row['amount'],
-                'has_direct_grn_match': has_direct_match,
-                'grn_match_type': 'direct' if has_direct_match else 'none',
-                'grn_match_count': len(grn_matches),
-                'linking_method': 'standard'
-            }
-            
-            if has_direct_match:
-                trail_entry['grn_voucher'] = grn_matches.iloc[0]['voucher']
-                trail_entry['grn_inv_no'] = grn_matches.iloc[0]['inv_no']
-                trail_entry['grn_supplier'] = grn_matches.iloc[0]['supplier_name']
-            
-            # Enhanced CHQ linking logic
-            if transaction_type == 'CHQ' and not has_direct_match:
-                # Check if this CHQ is part of an INV-CHQ pair
-                chq_pair = pairs_df[pairs_df['chq_reference'].astype(str) == str(hr185_ref)]
-                
-                if len(chq_pair) > 0:
-                    # Get the paired INV reference
-                    paired_inv_ref = chq_pair.iloc[0]['inv_reference']
-                    paired_inv_ref_norm = normalize_reference(paired_inv_ref)
-                    
-                    # Check if the paired INV has a GRN match
-                    paired_grn_matches = hr995grn_df[hr995grn_df['inv_no_normalized'] == paired_inv_ref_norm]
-                    
-                    if len(paired_grn_matches) > 0:
-                        # CHQ inherits the match from its paired INV
-                        trail_entry['has_direct_grn_match'] = False
-                        trail_entry['has_inherited_grn_match'] = True
-                        trail_entry['grn_match_type'] = 'inherited_from_inv'
-                        trail_entry['grn_match_count'] = len(paired_grn_matches)
-                        trail_entry['linking_method'] = 'inv_chq_inheritance'
-                        trail_entry['paired_inv_reference'] = paired_inv_ref
-                        trail_entry['grn_voucher'] = paired_grn_matches.iloc[0]['voucher']
-                        trail_entry['grn_inv_no'] = paired_grn_matches.iloc[0]['inv_no']
-                        trail_entry['grn_supplier'] = paired_grn_matches.iloc[0]['supplier_name']
-                        trail_entry['match_notes'] = f'Payment for INV {paired_inv_ref}'
-                    else:
-                        trail_entry['has_inherited_grn_match'] = False
-                        trail_entry['paired_inv_reference'] = paired_inv_ref
-                        trail_entry['match_notes'] = f'Payment for INV {paired_inv_ref} (INV also unmatched)'
-                else:
-                    trail_entry['has_inherited_grn_match'] = False
-                    trail_entry['match_notes'] = 'Standalone CHQ transaction'
-            else:
-                trail_entry['has_inherited_grn_match'] = False
-                if transaction_type == 'INV':
-                    trail_entry['match_notes'] = 'Invoice transaction'
-                elif transaction_type == 'CHQ' and has_direct_match:
-                    trail_entry['match_notes'] = 'CHQ with direct GRN match'
-                else:
-                    trail_entry['match_notes'] = f'{transaction_type} transaction'
-            
-            enhanced_trail.append(trail_entry)
-        
-        # Convert to DataFrame
-        enhanced_trail_df = pd.DataFrame(enhanced_trail)
+        # Build the enhanced transaction trail with CHQ inheritance (joins, no per-row scans)
+        enhanced_trail_df = build_enhanced_transaction_trail(hr185_df, hr995grn_df, pairs_df)
         
         # Calculate summary statistics
         total_transactions = len(enhanced_trail_df)
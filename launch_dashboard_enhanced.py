@@ -50,6 +50,19 @@ def launch_enhanced_dashboard():
         "--server.port", "8502"
     ])
 
+def launch_enhanced_dashboard_warmed():
+    """Pre-load every dataset and cache, then serve the enhanced dashboard from the warmed process."""
+    print("🚀 Launching Enhanced Stock Analytics Dashboard (pre-warmed)...")
+    print("🔥 Datasets, linked data, aggregate cubes and search indexes load before serving")
+    
+    from dashboard_warmup import serve_warmed
+    from enhanced_dashboard import AdvancedStockDashboard
+    
+    serve_warmed("enhanced_dashboard.py", AdvancedStockDashboard().warmup_tasks(), [
+        "--server.headless", "true",
+        "--server.port", "8502"
+    ])
+
 def main():
     """Main launcher function."""
     print("=" * 60)
@@ -71,10 +84,11 @@ def main():
     print("\nChoose your dashboard experience:")
     print("1. 🎯 Basic Dashboard (4 charts, quick overview)")
     print("2. 🚀 Enhanced Dashboard (25+ charts, comprehensive analytics)")
-    print("3. ❌ Exit")
+    print("3. 🔥 Enhanced Dashboard, pre-warmed (first page load is fast)")
+    print("4. ❌ Exit")
     
     while True:
-        choice = input("\nEnter your choice (1, 2, or 3): ").strip()
+        choice = input("\nEnter your choice (1, 2, 3 or 4): ").strip()
         
         if choice == "1":
             launch_basic_dashboard()
@@ -83,10 +97,13 @@ def main():
             launch_enhanced_dashboard()
             break
         elif choice == "3":
+            launch_enhanced_dashboard_warmed()
+            break
+        elif choice == "4":
             print("👋 Goodbye!")
             break
         else:
-            print("❌ Invalid choice. Please enter 1, 2, or 3.")
+            print("❌ Invalid choice. Please enter 1, 2, 3 or 4.")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Price History Engine
+Per-item GRN unit price history with rolling median / MAD spike detection and as-of
+price lookups.
+
+Unit prices come from the HR995 GRN lines (nett_grn_amt / quantity, or unit_price when
+the export carries it). The observations are sorted by item and date once, and every
+observation is compared with the item's previous `window` prices:
+
+    rolling_median    median of the previous prices
+    rolling_log_mad   median absolute deviation of the previous log prices from log(rolling_median)
+    robust_z          log(price / rolling_median) / max(1.4826 × log MAD, log(1.10))
+
+Deviations are measured on log prices so that halving and doubling a price score the
+same; on raw prices the 10% scale floor capped a drop at |robust_z| = 10 while rises
+were unbounded. An observation is a spike when it has at least `min_history` previous
+prices, |robust_z| is above the threshold, and the price moved by at least
+MIN_PRICE_CHANGE (×1.5 or ÷1.5) from the median. Lump-sum item codes (REPAIR AND
+MAINTENANCE, SERVICE, PLANT HIRE, ...), where at least LUMP_SUM_QUANTITY_SHARE of the
+GRN lines are for a quantity of 1, carry per-job amounts rather than unit prices and are
+never flagged.
+
+On the August 2022 - August 2025 HR995 extract (8,346 prices) the defaults flag about
+4% of prices (348 spikes); without the lump-sum exclusion and the minimum change, and
+with deviations on raw prices, 12.8% were flagged.
+
+The previous-price windows of all items are gathered into one (observations × window)
+matrix with index arithmetic, so the medians for every item are computed in one pass
+instead of a loop per item.
+
+As-of queries ("last price of item X, or of every item, on date D") are binary searches
+over a composite (item, day) key, as in the stock ledger.
+"""
+
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stock_ledger import normalize_item_codes
+
+PRICE_HISTORY_FILE = 'price_history.csv'
+
+DEFAULT_WINDOW = 10
+DEFAULT_MIN_HISTORY = 3
+DEFAULT_SPIKE_THRESHOLD = 3.5
+
+# MAD → standard deviation for normally distributed prices
+MAD_SCALE = 1.4826
+# Floor on the robust scale as a relative price change (MAD is 0 after repeated identical prices)
+MIN_RELATIVE_SCALE = 0.10
+# Smallest price change (as a fraction of the median, either direction) that can be a spike
+MIN_PRICE_CHANGE = 0.5
+# Items with at least this share of quantity-1 GRN lines are lump-sum codes, not unit-priced stock
+LUMP_SUM_QUANTITY_SHARE = 0.9
+
+PRICE_HISTORY_COLUMNS = [
+    'item_code', 'date', 'grn_no', 'supplier_name', 'unit_price', 'lump_sum', 'history_count',
+    'rolling_median', 'rolling_log_mad', 'robust_z', 'price_ratio', 'is_spike', 'spike_direction'
+]
+
+
+def unit_prices(amount, quantity):
+    """Unit price per line, NaN where the quantity is not positive."""
+    return (amount / quantity).where(quantity > 0)
+
+
+def grn_prices(grn_df):
+    """Unit price observations (item_code, date, grn_no, supplier_name, quantity, unit_price) from GRN lines."""
+    item_col = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
+    quantity = pd.to_numeric(grn_df['quantity'], errors='coerce')
+    if 'unit_price' in grn_df.columns:
+        price = pd.to_numeric(grn_df['unit_price'], errors='coerce')
+    else:
+        price = unit_prices(pd.to_numeric(grn_df['nett_grn_amt'], errors='coerce'), quantity)
+    return pd.DataFrame({
+        'item_code': normalize_item_codes(grn_df[item_col]),
+        'date': pd.to_datetime(grn_df['date'], errors='coerce'),
+        'grn_no': grn_df['grn_no'].astype(str) if 'grn_no' in grn_df.columns else None,
+        'supplier_name': grn_df['supplier_name'] if 'supplier_name' in grn_df.columns else None,
+        'quantity': quantity,
+        'unit_price': price
+    }, index=grn_df.index)
+
+
+def previous_windows(values, group_position, window):
+    """
+    Matrix of each observation's previous `window` values within its group.
+
+    Args:
+        values (np.ndarray): Values sorted by group and date
+        group_position (np.ndarray): Position of each value within its group (0, 1, ...)
+        window (int): Number of previous values
+
+    Returns:
+        np.ndarray: (len(values), window) matrix, NaN where the group has fewer previous values
+    """
+    lags = np.arange(1, window + 1)
+    rows = np.arange(len(values))[:, None] - lags[None, :]
+    available = group_position[:, None] >= lags[None, :]
+    return np.where(available, values[np.clip(rows, 0, None)], np.nan)
+
+
+class PriceHistory:
+    """Sorted per-item unit price history with rolling spike statistics and as-of lookups."""
+
+    def __init__(self, prices, window=DEFAULT_WINDOW, min_history=DEFAULT_MIN_HISTORY,
+                 spike_threshold=DEFAULT_SPIKE_THRESHOLD):
+        """
+        Build the history from unit price observations.
+
+        Args:
+            prices (pd.DataFrame): item_code, date, grn_no, supplier_name, quantity and
+                unit_price columns (grn_prices output or the anomaly engine's typed GRN lines);
+                without quantity no item is treated as a lump-sum code
+            window (int): Number of previous prices in the rolling window
+            min_history (int): Previous prices needed before an observation can be a spike
+            spike_threshold (float): |robust_z| above which an observation is a spike
+        """
+        quantity = prices['quantity'] if 'quantity' in prices.columns else pd.Series(np.nan, index=prices.index)
+        prices = prices[['item_code', 'date', 'grn_no', 'supplier_name', 'unit_price']].assign(single=quantity == 1)
+        prices = prices.dropna(subset=['item_code', 'date'])
+        prices = prices[prices['unit_price'] > 0]
+        history = prices.sort_values(['item_code', 'date', 'grn_no'], kind='stable').reset_index(drop=True)
+        history['lump_sum'] = history.groupby('item_code', sort=False)['single'].transform('mean') >= \
+            LUMP_SUM_QUANTITY_SHARE
+
+        # Previous-price windows of every item at once
+        values = history['unit_price'].to_numpy(dtype=float)
+        position = history.groupby('item_code', sort=False).cumcount().to_numpy()
+        windows = previous_windows(values, position, window)
+        history['history_count'] = np.minimum(position, window)
+        with warnings.catch_warnings():
+            # First observations of an item have no previous prices (all-NaN windows)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            median = np.nanmedian(windows, axis=1)
+            log_mad = np.nanmedian(np.abs(np.log(windows) - np.log(median)[:, None]), axis=1)
+        history['rolling_median'] = median
+        history['rolling_log_mad'] = log_mad
+
+        log_ratio = np.log(values / median)
+        scale = np.maximum(MAD_SCALE * log_mad, np.log1p(MIN_RELATIVE_SCALE))
+        history['robust_z'] = log_ratio / scale
+        history['price_ratio'] = values / median
+        history['is_spike'] = ((history['history_count'] >= min_history) & ~history['lump_sum']
+                               & (history['robust_z'].abs() > spike_threshold)
+                               & (np.abs(log_ratio) >= np.log1p(MIN_PRICE_CHANGE)))
+        history['spike_direction'] = np.where(history['is_spike'],
+                                              np.where(history['robust_z'] > 0, 'up', 'down'), None)
+        self.history = history[PRICE_HISTORY_COLUMNS]
+
+        # Composite (item, day) search key over the sorted history
+        item_index, self.items = pd.factorize(history['item_code'], sort=True)
+        days = history['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        self._min_day = int(days.min()) if len(days) else 0
+        self._day_span = (int(days.max()) - self._min_day + 2) if len(days) else 1
+        self._keys = item_index.astype(np.int64) * self._day_span + (days - self._min_day + 1)
+        self._item_start = np.searchsorted(item_index, np.arange(len(self.items)), side='left')
+        self._item_position = {item: i for i, item in enumerate(self.items)}
+
+    def _positions(self, item_indices, as_of):
+        """History row of the last price on or before as_of for each item index (-1 if none)."""
+        day = np.datetime64(pd.Timestamp(as_of).normalize().date(), 'D').astype(np.int64)
+        offset = int(np.clip(day - self._min_day + 1, 0, self._day_span - 1))
+        positions = np.searchsorted(self._keys, item_indices.astype(np.int64) * self._day_span + offset,
+                                    side='right') - 1
+        return np.where(positions >= self._item_start[item_indices], positions, -1)
+
+    def price_as_of(self, item_code, as_of):
+        """
+        Last unit price paid for an item on or before a date.
+
+        Returns:
+            float: The unit price, NaN when the item had no GRN up to as_of
+        """
+        position = self._item_position.get(str(item_code))
+        if position is None:
+            return np.nan
+        row = self._positions(np.array([position]), as_of)[0]
+        return float(self.history['unit_price'].iat[row]) if row >= 0 else np.nan
+
+    def prices_as_of(self, as_of=None, items=None):
+        """
+        Last unit prices of all (or the given) items on or before a date.
+
+        Args:
+            as_of: Date; defaults to the last GRN date
+            items (iterable): Optional item codes to restrict to
+
+        Returns:
+            pd.DataFrame: item_code, unit_price, price_date and rolling_median (median of
+                the prices before the last one), for items with a GRN up to as_of
+        """
+        as_of = self.history['date'].max() if as_of is None else as_of
+        if items is None:
+            item_indices = np.arange(len(self.items))
+        else:
+            wanted = pd.Index(normalize_item_codes(pd.Series(list(items))).dropna().unique())
+            item_indices = self.items.get_indexer(wanted)
+            item_indices = item_indices[item_indices >= 0]
+        if len(self.items) == 0 or pd.isna(as_of):
+            return pd.DataFrame(columns=['item_code', 'unit_price', 'price_date', 'rolling_median'])
+
+        rows = self._positions(item_indices, as_of)
+        rows = rows[rows >= 0]
+        at_rows = self.history.iloc[rows]
+        return pd.DataFrame({
+            'item_code': at_rows['item_code'].to_numpy(),
+            'unit_price': at_rows['unit_price'].to_numpy(),
+            'price_date': at_rows['date'].to_numpy(),
+            'rolling_median': at_rows['rolling_median'].to_numpy()
+        })
+
+    def item_history(self, item_code):
+        """All price observations of one item in date order."""
+        position = self._item_position.get(str(item_code))
+        if position is None:
+            return self.history.iloc[0:0]
+        start = self._item_start[position]
+        end = self._item_start[position + 1] if position + 1 < len(self.items) else len(self.history)
+        return self.history.iloc[start:end]
+
+    def spikes(self):
+        """Observations flagged as spikes, largest |robust_z| first."""
+        spikes = self.history[self.history['is_spike']]
+        return spikes.loc[spikes['robust_z'].abs().sort_values(ascending=False, kind='stable').index]
+
+
+def load_price_history(output_folder="output", **options):
+    """Build the price history from hr995_grn.csv in the output folder."""
+    grn_file = Path(output_folder) / 'hr995_grn.csv'
+    if not grn_file.exists():
+        return PriceHistory(pd.DataFrame(columns=['item_code', 'date', 'grn_no', 'supplier_name', 'quantity',
+                                                  'unit_price']),
+                            **options)
+    return PriceHistory(grn_prices(pd.read_csv(grn_file, low_memory=False)), **options)
+
+
+def write_price_history(output_folder="output", **options):
+    """Build the price history and save it as price_history.csv."""
+    history = load_price_history(output_folder, **options)
+    if history.history.empty:
+        print(f"⚠️ No GRN unit prices found in {output_folder}; price history not generated")
+        return None
+    output_file = Path(output_folder) / PRICE_HISTORY_FILE
+    history.history.to_csv(output_file, index=False)
+    print(f"📄 Saved price history ({len(history.history):,} prices, {len(history.items):,} items, "
+          f"{int(history.history['is_spike'].sum()):,} spikes) to: {output_file}")
+    return history
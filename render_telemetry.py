@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""
+Dashboard Render Telemetry
+Per-section timing, row counts, cache hits/misses and figure payload sizes for a
+Streamlit dashboard rerun.
+
+Telemetry is off by default. It is enabled by opening the dashboard with
+``?debug=1`` in the URL or by setting the ``DASHBOARD_TELEMETRY=1`` environment
+variable. When enabled, every ``create_*``, ``analyze_*`` and ``display_*`` method of
+the dashboard instance is timed, a hidden debug panel is shown in the sidebar, and
+one record per rerun is appended to a rolling local metrics log so hot paths can be
+ranked per filter combination.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
+import pandas as pd
+
+METRICS_LOG_NAME = "render_metrics.jsonl"
+METRICS_LOG_MAX_BYTES = 5 * 1024 * 1024
+METRICS_LOG_BACKUPS = 3
+INSTRUMENTED_PREFIXES = ('create_', 'analyze_', 'display_')
+
+# Streamlit runs each session's script on its own thread, so the active collector is thread-local
+_active = threading.local()
+
+
+def current_telemetry():
+    """Return the telemetry collector for the current rerun, or None when disabled."""
+    return getattr(_active, 'telemetry', None)
+
+
+def note_cache_miss(cache_name):
+    """Record a cache miss; call from inside the body of a cached function."""
+    telemetry = current_telemetry()
+    if telemetry is not None:
+        telemetry.record_cache_miss(cache_name)
+
+
+def telemetry_enabled(query_params=None):
+    """Check whether telemetry was requested via environment variable or query parameter."""
+    if os.environ.get('DASHBOARD_TELEMETRY', '').lower() in ('1', 'true', 'yes'):
+        return True
+    if query_params is not None:
+        return str(query_params.get('debug', '')).lower() in ('1', 'true', 'yes')
+    return False
+
+
+class RenderTelemetry:
+    """Collects section timings and counters for one dashboard rerun."""
+
+    def __init__(self, filters=None):
+        self.started_at = datetime.now()
+        self.filters = dict(filters or {})
+        self.sections = []
+        self.cache_calls = {}
+        self.cache_misses = {}
+        self.figures = []
+        self._stack = []
+        self._run_start = time.perf_counter()
+        self.total_seconds = None
+
+    def activate(self):
+        """Make this collector the active one for the current thread."""
+        _active.telemetry = self
+
+    def deactivate(self):
+        """Stop collecting and freeze the total run time."""
+        self.total_seconds = time.perf_counter() - self._run_start
+        if current_telemetry() is self:
+            _active.telemetry = None
+
+    @contextmanager
+    def section(self, name, rows=0):
+        """Time a section render, attributing nested sections to their parent."""
+        record = {
+            'section': name,
+            'path': ' > '.join([s['section'] for s in self._stack] + [name]),
+            'depth': len(self._stack),
+            'rows': int(rows),
+            'child_seconds': 0.0
+        }
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            self._stack.pop()
+            record['seconds'] = elapsed
+            record['self_seconds'] = max(elapsed - record.pop('child_seconds'), 0.0)
+            if self._stack:
+                self._stack[-1]['child_seconds'] += elapsed
+            self.sections.append(record)
+
+    def record_rows(self, rows):
+        """Add rows loaded inside the current section to its row count."""
+        if self._stack:
+            self._stack[-1]['rows'] += int(rows)
+
+    def record_cache_call(self, cache_name):
+        self.cache_calls[cache_name] = self.cache_calls.get(cache_name, 0) + 1
+
+    def record_cache_miss(self, cache_name):
+        self.cache_misses[cache_name] = self.cache_misses.get(cache_name, 0) + 1
+
+    def record_figure(self, key, payload_bytes):
+        section = self._stack[-1]['section'] if self._stack else None
+        self.figures.append({'key': key, 'section': section, 'bytes': int(payload_bytes)})
+
+    def cache_summary(self):
+        """Return cache calls, hits and misses per cached function."""
+        rows = []
+        for cache_name, calls in self.cache_calls.items():
+            misses = min(self.cache_misses.get(cache_name, 0), calls)
+            rows.append({'cache': cache_name, 'calls': calls, 'hits': calls - misses, 'misses': misses})
+        return pd.DataFrame(rows, columns=['cache', 'calls', 'hits', 'misses'])
+
+    def sections_table(self):
+        """Return section timings with figure payloads, slowest (self time) first."""
+        if not self.sections:
+            return pd.DataFrame(columns=['section', 'path', 'seconds', 'self_seconds', 'rows', 'figure_kb'])
+        sections_df = pd.DataFrame(self.sections)
+        if self.figures:
+            payload = pd.DataFrame(self.figures).groupby('section')['bytes'].sum() / 1024
+            sections_df['figure_kb'] = sections_df['section'].map(payload).fillna(0).round(1)
+        else:
+            sections_df['figure_kb'] = 0.0
+        sections_df = sections_df.sort_values('self_seconds', ascending=False)
+        return sections_df[['section', 'path', 'seconds', 'self_seconds', 'rows', 'figure_kb']]
+
+    def to_record(self):
+        """Serialize the rerun for the metrics log."""
+        return {
+            'timestamp': self.started_at.isoformat(timespec='seconds'),
+            'filters': self.filters,
+            'filter_key': json.dumps(self.filters, sort_keys=True, default=str),
+            'total_seconds': round(self.total_seconds or 0.0, 4),
+            'sections': [
+                {k: (round(v, 4) if isinstance(v, float) else v) for k, v in section.items()}
+                for section in self.sections
+            ],
+            'cache': self.cache_summary().to_dict('records'),
+            'figure_bytes': sum(f['bytes'] for f in self.figures)
+        }
+
+
+def instrument_methods(target, telemetry, prefixes=INSTRUMENTED_PREFIXES):
+    """
+    Wrap the section methods of a dashboard instance with telemetry timing.
+
+    The wrappers are installed on the instance, so calls through ``self`` inside the
+    dashboard are timed as nested sub-sections. Row counts are the total length of any
+    DataFrame arguments.
+    """
+    for name in dir(type(target)):
+        if not name.startswith(prefixes):
+            continue
+        method = getattr(target, name, None)
+        if not callable(method):
+            continue
+
+        def make_wrapper(section_name, func):
+            @functools.wraps(func)
+            def timed(*args, **kwargs):
+                rows = 0
+                for value in list(args) + list(kwargs.values()):
+                    if isinstance(value, pd.DataFrame):
+                        rows += len(value)
+                    elif isinstance(value, dict):
+                        rows += sum(len(v) for v in value.values() if isinstance(v, pd.DataFrame))
+                with telemetry.section(section_name, rows=rows):
+                    return func(*args, **kwargs)
+            return timed
+
+        setattr(target, name, make_wrapper(name, method))
+
+
+def install_plotly_chart_hook(st_module):
+    """Wrap st.plotly_chart once so figure payload sizes are recorded while telemetry is active."""
+    if getattr(st_module.plotly_chart, '_telemetry_hook', False):
+        return
+    original = st_module.plotly_chart
+
+    @functools.wraps(original)
+    def plotly_chart(figure_or_data, *args, **kwargs):
+        telemetry = current_telemetry()
+        if telemetry is not None:
+            try:
+                payload = figure_or_data.to_json() if hasattr(figure_or_data, 'to_json') else json.dumps(figure_or_data, default=str)
+                telemetry.record_figure(kwargs.get('key'), len(payload.encode('utf-8')))
+            except Exception:
+                pass
+        return original(figure_or_data, *args, **kwargs)
+
+    plotly_chart._telemetry_hook = True
+    st_module.plotly_chart = plotly_chart
+
+
+class MetricsLog:
+    """Rolling JSON-lines log of rerun telemetry."""
+
+    def __init__(self, log_folder, max_bytes=METRICS_LOG_MAX_BYTES, backup_count=METRICS_LOG_BACKUPS):
+        self.log_path = Path(log_folder) / METRICS_LOG_NAME
+        self.log_path.parent.mkdir(parents=True, exist_ok=True)
+        self.logger = logging.getLogger(f"render_telemetry.{self.log_path}")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        if not self.logger.handlers:
+            handler = RotatingFileHandler(self.log_path, maxBytes=max_bytes,
+                                          backupCount=backup_count, encoding='utf-8')
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger.addHandler(handler)
+
+    def append(self, telemetry):
+        self.logger.info(json.dumps(telemetry.to_record(), default=str))
+
+    def hot_paths(self, limit=500):
+        """
+        Rank sections by mean self time per filter combination over recent reruns.
+
+        Args:
+            limit (int): Number of most recent log records to read
+
+        Returns:
+            pd.DataFrame: Mean/max self seconds and rerun counts per section and filter key
+        """
+        if not self.log_path.exists():
+            return pd.DataFrame()
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()[-limit:]
+
+        rows = []
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            for section in record.get('sections', []):
+                rows.append({
+                    'filter_key': record.get('filter_key', ''),
+                    'section': section['section'],
+                    'self_seconds': section.get('self_seconds', 0.0),
+                    'rows': section.get('rows', 0)
+                })
+        if not rows:
+            return pd.DataFrame()
+
+        ranking = pd.DataFrame(rows).groupby(['filter_key', 'section']).agg(
+            reruns=('self_seconds', 'count'),
+            mean_self_seconds=('self_seconds', 'mean'),
+            max_self_seconds=('self_seconds', 'max'),
+            mean_rows=('rows', 'mean')
+        ).reset_index()
+        return ranking.sort_values('mean_self_seconds', ascending=False)
+
+
+def render_debug_panel(st_module, telemetry, metrics_log=None):
+    """Render the telemetry debug panel in the sidebar."""
+    with st_module.sidebar.expander("🛠️ Render Telemetry (debug)", expanded=False):
+        st_module.metric("Rerun Time", f"{telemetry.total_seconds or 0:.2f}s")
+        total_kb = sum(f['bytes'] for f in telemetry.figures) / 1024
+        st_module.caption(f"{len(telemetry.figures)} figures, {total_kb:,.0f} KB of chart JSON")
+
+        st_module.markdown("**Slowest sections (self time):**")
+        st_module.dataframe(telemetry.sections_table().head(25), hide_index=True)
+
+        cache_df = telemetry.cache_summary()
+        if not cache_df.empty:
+            st_module.markdown("**Cache hits/misses:**")
+            st_module.dataframe(cache_df, hide_index=True)
+
+        if metrics_log is not None:
+            ranking = metrics_log.hot_paths()
+            if not ranking.empty:
+                st_module.markdown("**Hot paths across recent reruns:**")
+                st_module.dataframe(ranking.head(25), hide_index=True)
+                st_module.caption(f"Metrics log: {metrics_log.log_path}")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Requisition to GRN Matching (Objective 2)
+FIFO allocation of issued quantities against received quantities per item.
+
+Within each item, receipts (HR995 GRN lines into a store, net of returns) and issues
+(HR995 requisition lines) are laid out on a cumulative-quantity axis in date order:
+receipt k covers [received before k, received up to k) and issue j covers
+[issued before j, issued up to j). FIFO allocation is the overlap of those intervals,
+so the allocation table is built from the sorted interval end points of all items at
+once with np.searchsorted instead of nested receipt/issue loops.
+
+Stock issued before the first GRN in the history, or beyond what was received, came
+from stock on hand. Each item gets an opening-stock interval in front of its receipts,
+sized to the largest shortfall of cumulative receipts against cumulative issues; this
+also guarantees that no issue is matched to a GRN received after it.
+
+Outputs: allocation rows (requisition line ↔ GRN line), per-requisition fill status,
+and receipts not (fully) issued. Officials are the voucher authorisers of the matched
+GRNs (HR995GRN.Voucher ↔ HR995VOUCHER.Voucher No).
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stock_ledger import NON_STOCK_STORES, normalize_item_codes
+from voucher_validity import normalize_voucher_series
+
+MATCHES_FILE = 'objective_2_requisition_grn_matches.csv'
+FILL_STATUS_FILE = 'objective_2_requisition_fill_status.csv'
+UNMATCHED_RECEIPTS_FILE = 'objective_2_unmatched_receipts.csv'
+
+OPENING_STOCK = 'OPENING STOCK'
+OFFICIAL_COLUMNS = ['vouch_auth_user', 'vouch_auth_name']
+
+# Quantities below this are float noise from the cumulative sums
+QUANTITY_EPSILON = 1e-6
+
+
+def prepare_receipts(grn_df, voucher_df=None):
+    """
+    Receipt lines for allocation: stock GRN lines with a positive net quantity.
+
+    Returns:
+        pd.DataFrame: item_code, grn_no, grn_date, received_qty, supplier_name, order_no,
+            voucher and the voucher authoriser columns (when voucher data is given)
+    """
+    grn = grn_df
+    if 'store_no' in grn.columns:
+        grn = grn[~grn['store_no'].astype(str).str.strip().str.upper().isin(NON_STOCK_STORES)]
+    quantity = pd.to_numeric(grn['quantity'], errors='coerce').fillna(0.0)
+    if 'return_qty' in grn.columns:
+        quantity = quantity - pd.to_numeric(grn['return_qty'], errors='coerce').fillna(0.0)
+    item_col = 'item_no' if 'item_no' in grn.columns else 'item_code'
+
+    def column(name):
+        return grn[name] if name in grn.columns else pd.Series(np.nan, index=grn.index)
+
+    receipts = pd.DataFrame({
+        'item_code': normalize_item_codes(grn[item_col]),
+        'grn_no': column('grn_no'),
+        'grn_date': pd.to_datetime(grn['date'], errors='coerce'),
+        'received_qty': quantity,
+        'supplier_name': column('supplier_name'),
+        'order_no': column('order_no'),
+        'voucher': column('voucher'),
+        'store_no': column('store_no')
+    })
+    receipts = receipts[(receipts['received_qty'] > 0) & receipts['item_code'].notna() & receipts['grn_date'].notna()]
+
+    if voucher_df is not None and not voucher_df.empty and 'voucher_no' in voucher_df.columns:
+        officials = [col for col in OFFICIAL_COLUMNS if col in voucher_df.columns]
+        authorisers = voucher_df[officials].assign(
+            voucher_key=normalize_voucher_series(voucher_df['voucher_no'])
+        ).drop_duplicates('voucher_key')
+        receipts = receipts.assign(voucher_key=normalize_voucher_series(receipts['voucher']))
+        receipts = receipts.merge(authorisers, on='voucher_key', how='left').drop(columns=['voucher_key'])
+    for col in OFFICIAL_COLUMNS:
+        if col not in receipts.columns:
+            receipts[col] = np.nan
+    return receipts.reset_index(drop=True)
+
+
+def prepare_issues(issue_df):
+    """
+    Issue lines for allocation.
+
+    Returns:
+        pd.DataFrame: item_code, requisition_no, issue_date, issued_qty, store_no, vote_no, job_no
+    """
+    item_col = 'item_code' if 'item_code' in issue_df.columns else 'item_no'
+
+    def column(name):
+        return issue_df[name] if name in issue_df.columns else pd.Series(np.nan, index=issue_df.index)
+
+    issues = pd.DataFrame({
+        'item_code': normalize_item_codes(issue_df[item_col]),
+        'requisition_no': column('requisition_no'),
+        'issue_date': pd.to_datetime(issue_df['date'], errors='coerce'),
+        'issued_qty': pd.to_numeric(issue_df['quantity'], errors='coerce').fillna(0.0),
+        'store_no': column('store_no'),
+        'vote_no': column('vote_no'),
+        'job_no': column('job_no')
+    })
+    issues = issues[(issues['issued_qty'] > 0) & issues['item_code'].notna() & issues['issue_date'].notna()]
+    return issues.reset_index(drop=True)
+
+
+def opening_stock_needed(receipts, issues):
+    """
+    Smallest opening stock per item that keeps the running balance from going negative.
+
+    Receipts are applied before issues of the same day.
+
+    Returns:
+        pd.Series: Opening quantity per item_code (items without a shortfall are omitted)
+    """
+    events = pd.concat([
+        pd.DataFrame({'item_code': receipts['item_code'], 'date': receipts['grn_date'],
+                      'order': 0, 'quantity': receipts['received_qty']}),
+        pd.DataFrame({'item_code': issues['item_code'], 'date': issues['issue_date'],
+                      'order': 1, 'quantity': -issues['issued_qty']})
+    ], ignore_index=True).sort_values(['item_code', 'date', 'order'], kind='stable')
+    running = events['quantity'].groupby(events['item_code'], sort=False).cumsum()
+    shortfall = -running.groupby(events['item_code'], sort=False).min()
+    return shortfall[shortfall > QUANTITY_EPSILON]
+
+
+def _intervals(frame, item_position, quantity_col, span):
+    """Cumulative [start, end) quantity intervals per item as composite search keys."""
+    item_index = frame['item_code'].map(item_position).to_numpy(dtype=np.int64)
+    end = frame[quantity_col].groupby(frame['item_code'], sort=False).cumsum().to_numpy()
+    end = np.round(end, 6)
+    return item_index, item_index * span + end
+
+
+def allocate_fifo(receipts, issues):
+    """
+    Allocate issued quantities to receipts per item in FIFO date order.
+
+    Args:
+        receipts (pd.DataFrame): From prepare_receipts
+        issues (pd.DataFrame): From prepare_issues
+
+    Returns:
+        tuple: (allocations, receipts, issues) where allocations has one row per
+            (receipt, issue) overlap with receipt_id, issue_id and allocated_qty, and
+            receipts/issues are the sorted inputs with their ids (receipts include the
+            opening-stock rows, grn_no OPENING STOCK)
+    """
+    opening = opening_stock_needed(receipts, issues)
+    first_dates = issues.groupby('item_code')['issue_date'].min()
+    opening_rows = pd.DataFrame({
+        'item_code': opening.index,
+        'grn_no': OPENING_STOCK,
+        'grn_date': first_dates.reindex(opening.index).to_numpy(),
+        'received_qty': opening.to_numpy(),
+        'is_opening': True
+    })
+    receipts = pd.concat([opening_rows, receipts.assign(is_opening=False)], ignore_index=True)
+    receipts = receipts.sort_values(['item_code', 'is_opening', 'grn_date', 'grn_no'],
+                                    ascending=[True, False, True, True], kind='stable').reset_index(drop=True)
+    issues = issues.sort_values(['item_code', 'issue_date', 'requisition_no'], kind='stable').reset_index(drop=True)
+    receipts['receipt_id'] = np.arange(len(receipts))
+    issues['issue_id'] = np.arange(len(issues))
+
+    items = pd.Index(pd.concat([receipts['item_code'], issues['item_code']]).unique()).sort_values()
+    item_position = pd.Series(np.arange(len(items)), index=items)
+    totals = pd.concat([receipts.groupby('item_code')['received_qty'].sum(),
+                        issues.groupby('item_code')['issued_qty'].sum()], axis=1).max(axis=1)
+    span = float(np.ceil(totals.max())) + 1.0 if len(totals) else 1.0
+
+    receipt_item, receipt_keys = _intervals(receipts, item_position, 'received_qty', span)
+    issue_item, issue_keys = _intervals(issues, item_position, 'issued_qty', span)
+
+    # Elementary segments between consecutive interval end points of the same item
+    points = pd.DataFrame({'item': np.concatenate([receipt_item, issue_item]),
+                           'key': np.concatenate([receipt_keys, issue_keys])}).drop_duplicates('key')
+    points = points.sort_values('key', kind='stable')
+    segment_end = points['key'].to_numpy()
+    segment_start = points.groupby('item', sort=False)['key'].shift(1)
+    segment_start = segment_start.fillna(pd.Series(points['item'].to_numpy() * span, index=points.index)).to_numpy()
+    segment_item = points['item'].to_numpy()
+    length = segment_end - segment_start
+
+    # The receipt/issue whose interval contains each segment's start
+    receipt_pos = np.searchsorted(receipt_keys, segment_start, side='right')
+    issue_pos = np.searchsorted(issue_keys, segment_start, side='right')
+    has_receipt = receipt_pos < len(receipt_keys)
+    has_receipt[has_receipt] = receipt_item[receipt_pos[has_receipt]] == segment_item[has_receipt]
+    has_issue = issue_pos < len(issue_keys)
+    has_issue[has_issue] = issue_item[issue_pos[has_issue]] == segment_item[has_issue]
+
+    matched = has_receipt & has_issue & (length > QUANTITY_EPSILON)
+    allocations = pd.DataFrame({
+        'receipt_id': receipt_pos[matched],
+        'issue_id': issue_pos[matched],
+        'allocated_qty': length[matched]
+    })
+    allocations = allocations.groupby(['receipt_id', 'issue_id'], as_index=False, sort=False)['allocated_qty'].sum()
+    return allocations, receipts, issues
+
+
+def _joined_values(frame, key, column):
+    """Comma-separated distinct values of column per key (sorted, missing values skipped)."""
+    values = frame[[key, column]].dropna()
+    values = values.assign(**{column: values[column].astype(str)}).drop_duplicates()
+    return values.sort_values([key, column]).groupby(key)[column].agg(', '.join)
+
+
+def match_requisitions(grn_df, issue_df, voucher_df=None):
+    """
+    Match requisition lines to GRN lines and summarize fill status and unmatched receipts.
+
+    Args:
+        grn_df (pd.DataFrame): HR995 GRN lines
+        issue_df (pd.DataFrame): HR995 issue (requisition) lines
+        voucher_df (pd.DataFrame): HR995 vouchers for the authorising officials (optional)
+
+    Returns:
+        dict: 'matches' (allocation rows), 'fill_status' (one row per requisition) and
+            'unmatched_receipts' (GRN lines with quantity not issued)
+    """
+    receipts = prepare_receipts(grn_df, voucher_df)
+    issues = prepare_issues(issue_df)
+    allocations, receipts, issues = allocate_fifo(receipts, issues)
+
+    receipt_cols = ['receipt_id', 'grn_no', 'grn_date', 'supplier_name', 'order_no', 'voucher', 'is_opening'] + OFFICIAL_COLUMNS
+    matches = (allocations
+               .merge(issues[['issue_id', 'requisition_no', 'issue_date', 'item_code', 'store_no', 'vote_no']], on='issue_id')
+               .merge(receipts[receipt_cols], on='receipt_id'))
+    matches['days_in_stock'] = (matches['issue_date'] - matches['grn_date']).dt.days.where(~matches['is_opening'])
+
+    # Per issue line: quantity matched to GRNs vs covered by opening stock
+    grn_allocated = matches['allocated_qty'].where(~matches['is_opening'], 0.0)
+    line_totals = pd.DataFrame({
+        'issue_id': matches['issue_id'],
+        'matched_qty': grn_allocated,
+        'opening_stock_qty': matches['allocated_qty'] - grn_allocated
+    }).groupby('issue_id').sum()
+    lines = issues.join(line_totals, on='issue_id')
+    lines[['matched_qty', 'opening_stock_qty']] = lines[['matched_qty', 'opening_stock_qty']].fillna(0.0)
+
+    grn_matches = matches[~matches['is_opening']]
+    officials = pd.concat([
+        _joined_values(grn_matches, 'requisition_no', 'grn_no').rename('grn_numbers'),
+        _joined_values(grn_matches, 'requisition_no', 'supplier_name').rename('suppliers'),
+        _joined_values(grn_matches, 'requisition_no', 'vouch_auth_name').rename('officials'),
+        grn_matches.groupby('requisition_no')['days_in_stock'].mean().rename('avg_days_in_stock')
+    ], axis=1)
+    fill_status = lines.groupby('requisition_no').agg(
+        issue_date=('issue_date', 'min'),
+        store_no=('store_no', 'first'),
+        vote_no=('vote_no', 'first'),
+        lines=('issue_id', 'size'),
+        items=('item_code', 'nunique'),
+        issued_qty=('issued_qty', 'sum'),
+        matched_qty=('matched_qty', 'sum'),
+        opening_stock_qty=('opening_stock_qty', 'sum')).join(officials).reset_index()
+    fill_ratio = fill_status['matched_qty'] / fill_status['issued_qty']
+    fill_status['fill_ratio'] = fill_ratio.round(4)
+    fill_status['fill_status'] = np.select([fill_ratio >= 1 - QUANTITY_EPSILON, fill_ratio > QUANTITY_EPSILON],
+                                           ['matched', 'partially_matched'], default='unmatched')
+
+    # Receipts not (fully) issued by the end of the history
+    issued_from = allocations.groupby('receipt_id')['allocated_qty'].sum()
+    unmatched = receipts[~receipts['is_opening']].join(issued_from.rename('issued_qty'), on='receipt_id')
+    unmatched['issued_qty'] = unmatched['issued_qty'].fillna(0.0)
+    unmatched['remaining_qty'] = (unmatched['received_qty'] - unmatched['issued_qty']).round(6)
+    unmatched = unmatched[unmatched['remaining_qty'] > QUANTITY_EPSILON]
+    last_date = issues['issue_date'].max() if not issues.empty else pd.NaT
+    unmatched = unmatched.assign(days_since_receipt=(last_date - unmatched['grn_date']).dt.days)
+
+    return {
+        'matches': matches.drop(columns=['receipt_id', 'issue_id', 'is_opening'])[
+            ['requisition_no', 'issue_date', 'item_code', 'store_no', 'vote_no', 'grn_no', 'grn_date',
+             'allocated_qty', 'days_in_stock', 'supplier_name', 'order_no', 'voucher'] + OFFICIAL_COLUMNS],
+        'fill_status': fill_status.sort_values('issue_date', kind='stable'),
+        'unmatched_receipts': unmatched[
+            ['item_code', 'grn_no', 'grn_date', 'store_no', 'supplier_name', 'order_no', 'voucher',
+             'received_qty', 'issued_qty', 'remaining_qty', 'days_since_receipt'] + OFFICIAL_COLUMNS]
+    }
+
+
+def write_requisition_matching(output_folder="output"):
+    """
+    Match requisitions to GRNs for the full history in output_folder and save the reports.
+
+    Returns:
+        dict or None: The match results, or None when GRN or issue data is missing
+    """
+    output_folder = Path(output_folder)
+    grn_file, issue_file = output_folder / 'hr995_grn.csv', output_folder / 'hr995_issue.csv'
+    if not grn_file.exists() or not issue_file.exists():
+        print(f"⚠️ GRN or issue data missing in {output_folder}; requisition matching not generated")
+        return None
+    voucher_file = output_folder / 'hr995_voucher.csv'
+    voucher_df = pd.read_csv(voucher_file, low_memory=False) if voucher_file.exists() else None
+
+    results = match_requisitions(pd.read_csv(grn_file, low_memory=False),
+                                 pd.read_csv(issue_file, low_memory=False), voucher_df)
+    for key, filename in (('matches', MATCHES_FILE), ('fill_status', FILL_STATUS_FILE),
+                          ('unmatched_receipts', UNMATCHED_RECEIPTS_FILE)):
+        results[key].to_csv(output_folder / filename, index=False)
+    print(f"📄 Saved requisition matching ({len(results['matches']):,} allocations, "
+          f"{len(results['fill_status']):,} requisitions, {len(results['unmatched_receipts']):,} unmatched receipts) "
+          f"to: {output_folder}")
+    return results
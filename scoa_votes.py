@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+SCOA Vote Decomposition and Rollup Cube
+Vectorized parsing of SCOA (Standard Chart of Accounts) vote numbers.
+
+SCOA votes follow the fixed-position structure AAAABBBBBBCCCDDDDD:
+
+    AAAA    department        (positions 0-4)
+    BBBBBB  programme         (positions 4-10)
+    CCC     sub_programme     (positions 10-13)
+    DDDDD   economic_class    (positions 13-18)
+
+Votes are split with whole-column string slicing and the components are stored as
+categorical columns. The pipeline also materializes a rollup cube of amounts by each
+SCOA level and fin_period, so the SCOA compliance views aggregate a few hundred cube
+rows instead of every transaction.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SCOA_LEVELS = [
+    ('department', 0, 4),
+    ('programme', 4, 10),
+    ('sub_programme', 10, 13),
+    ('economic_class', 13, 18),
+]
+SCOA_MIN_LENGTH = 18
+VOTE_COLUMNS = ['vote_number', 'vote', 'vote_no', 'account', 'account_no']
+
+CUBE_FILE = 'scoa_rollup_cube.csv'
+CUBE_COLUMNS = ['source', 'level', 'code', 'fin_period', 'transaction_count', 'amount']
+VOTE_LENGTH_LEVEL = 'vote_length'
+NON_COMPLIANT_LEVEL = 'non_compliant_vote'
+MISSING_VOTE = '(missing)'
+
+# Datasets rolled up by the pipeline: source name → (file, amount column)
+CUBE_SOURCES = {
+    'voucher': ('hr995_voucher.csv', 'cheq_amt'),
+    'issue': ('hr995_issue.csv', 'issue_cost'),
+}
+
+
+def find_vote_column(columns):
+    """Return the first known vote number column in columns, or None."""
+    for col in VOTE_COLUMNS:
+        if col in columns:
+            return col
+    return None
+
+
+def decompose_votes(votes):
+    """
+    Split vote numbers into SCOA components with fixed-position slicing.
+
+    Args:
+        votes (pd.Series): Raw vote numbers
+
+    Returns:
+        pd.DataFrame: vote_str, vote_length, is_valid_scoa and one categorical column per
+            SCOA level (missing for votes shorter than 18 characters)
+    """
+    vote_str = votes.astype('string').str.strip()
+    vote_length = vote_str.str.len().fillna(0).astype(int)
+    is_valid = vote_length >= SCOA_MIN_LENGTH
+
+    components = pd.DataFrame({'vote_str': vote_str, 'vote_length': vote_length, 'is_valid_scoa': is_valid},
+                              index=votes.index)
+    for level, start, end in SCOA_LEVELS:
+        components[level] = vote_str.str.slice(start, end).where(is_valid).astype('category')
+    return components
+
+
+def add_scoa_columns(df, vote_column=None, prefix='scoa_'):
+    """
+    Add categorical SCOA component columns (scoa_department, ...) to a dataset.
+
+    Returns:
+        pd.DataFrame: df with the component columns plus scoa_vote_length and
+            scoa_is_valid; df unchanged when it has no vote column
+    """
+    vote_column = vote_column or find_vote_column(df.columns)
+    if vote_column is None:
+        return df
+    components = decompose_votes(df[vote_column])
+    for level, _, _ in SCOA_LEVELS:
+        df[f'{prefix}{level}'] = components[level]
+    df[f'{prefix}vote_length'] = components['vote_length']
+    df[f'{prefix}is_valid'] = components['is_valid_scoa']
+    return df
+
+
+def build_scoa_cube(df, amount_column, source, vote_column=None):
+    """
+    Roll up transaction counts and amounts by SCOA level and fin_period.
+
+    Valid votes are rolled up per SCOA level; every vote is counted by vote length, and
+    non-compliant votes are kept individually so compliance views can list them.
+
+    Args:
+        df (pd.DataFrame): Transactions with a vote column
+        amount_column (str): Amount column to sum
+        source (str): Source label stored in the cube ('voucher', 'issue', ...)
+        vote_column (str): Vote column; detected when not given
+
+    Returns:
+        pd.DataFrame: Long-format cube with CUBE_COLUMNS
+    """
+    vote_column = vote_column or find_vote_column(df.columns)
+    if vote_column is None or df.empty:
+        return pd.DataFrame(columns=CUBE_COLUMNS)
+
+    components = decompose_votes(df[vote_column])
+    base = pd.DataFrame({
+        'fin_period': pd.to_numeric(df['fin_period'], errors='coerce') if 'fin_period' in df.columns else np.nan,
+        'amount': pd.to_numeric(df[amount_column], errors='coerce') if amount_column in df.columns else np.nan
+    }, index=df.index)
+
+    def rollup(level, codes, mask=None):
+        frame = base.assign(code=codes.astype(object))
+        if mask is not None:
+            frame = frame[mask]
+        cube = frame.groupby(['code', 'fin_period'], dropna=False, sort=False).agg(
+            transaction_count=('amount', 'size'),
+            amount=('amount', 'sum')
+        ).reset_index()
+        cube = cube[cube['code'].notna()]
+        return cube.assign(source=source, level=level)
+
+    valid = components['is_valid_scoa']
+    parts = [rollup(level, components[level], valid) for level, _, _ in SCOA_LEVELS]
+    parts.append(rollup(VOTE_LENGTH_LEVEL, components['vote_length'].astype(str)))
+    parts.append(rollup(NON_COMPLIANT_LEVEL, components['vote_str'].fillna(MISSING_VOTE), ~valid))
+    return pd.concat(parts, ignore_index=True)[CUBE_COLUMNS]
+
+
+def cube_level(cube, level, source=None, fin_periods=None):
+    """
+    Aggregate one level of the cube across fin_periods.
+
+    Args:
+        cube (pd.DataFrame): SCOA rollup cube
+        level (str): SCOA level, 'vote_length' or 'non_compliant_vote'
+        source (str): Optional source filter
+        fin_periods (list): Optional fin_period filter
+
+    Returns:
+        pd.DataFrame: Count and Amount per code, largest amount first
+    """
+    rows = cube[cube['level'] == level]
+    if source is not None:
+        rows = rows[rows['source'] == source]
+    if fin_periods is not None:
+        rows = rows[rows['fin_period'].isin(fin_periods)]
+    summary = rows.groupby('code').agg(Count=('transaction_count', 'sum'), Amount=('amount', 'sum'))
+    return summary.sort_values('Amount', ascending=False)
+
+
+def write_scoa_cube(output_folder="output", sources=None):
+    """
+    Build the SCOA rollup cube for every available source dataset and save it.
+
+    Returns:
+        pd.DataFrame or None: The cube, or None when no source has vote data
+    """
+    output_folder = Path(output_folder)
+    sources = CUBE_SOURCES if sources is None else sources
+    parts = []
+    for source, (filename, amount_column) in sources.items():
+        file_path = output_folder / filename
+        if not file_path.exists():
+            continue
+        columns = pd.read_csv(file_path, nrows=0).columns
+        vote_column = find_vote_column(columns)
+        if vote_column is None:
+            continue
+        df = pd.read_csv(file_path, low_memory=False, dtype={vote_column: str})
+        parts.append(build_scoa_cube(df, amount_column, source, vote_column))
+
+    if not parts:
+        print(f"⚠️ No vote data found in {output_folder}; SCOA cube not generated")
+        return None
+    cube = pd.concat(parts, ignore_index=True)
+    output_file = output_folder / CUBE_FILE
+    cube.to_csv(output_file, index=False)
+    print(f"📄 Saved SCOA rollup cube ({len(cube):,} rows) to: {output_file}")
+    return cube
+
+
+def cube_current(output_folder="output", source='voucher'):
+    """Check that the saved cube is newer than the source dataset it rolls up."""
+    output_folder = Path(output_folder)
+    cube_file = output_folder / CUBE_FILE
+    source_file = output_folder / CUBE_SOURCES[source][0]
+    if not cube_file.exists() or not source_file.exists():
+        return False
+    return cube_file.stat().st_mtime_ns >= source_file.stat().st_mtime_ns
+
+
+def load_scoa_cube(output_folder="output"):
+    """Load the saved SCOA cube with codes as text, or None when it has not been generated."""
+    cube_file = Path(output_folder) / CUBE_FILE
+    if not cube_file.exists():
+        return None
+    return pd.read_csv(cube_file, dtype={'code': str})
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Document Sequence Analysis Engine
+Gaps, duplicates and out-of-order dates in document numbering.
+
+Document numbers (GRN numbers, voucher numbers, requisition numbers and HR185
+references) are split into a text prefix and a numeric part ("INVI006735" →
+"INVI", 6735) with one vectorized regex. Each numbering series (source, prefix and,
+optionally, store) is sorted by number once and compared with its neighbours using
+grouped diffs:
+
+    gap            numbers missing between two consecutive documents
+    duplicate      one number used by more than one document (different parties, or the
+                   same number written differently, e.g. with leading zeros)
+    out_of_order   a document dated before a lower-numbered document of its series
+                   (by more than the date tolerance)
+
+Findings are reported as number ranges, one row per gap and per run of consecutive
+flagged numbers, so the table stays small however many numbers are missing.
+
+GRN and requisition numbers are taken from counters shared by all stores, so by
+default each prefix is one series; per-store series (by_store=True) show the other
+stores' documents as gaps.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+SEQUENCE_FINDINGS_FILE = 'sequence_findings.csv'
+SEQUENCE_SUMMARY_FILE = 'sequence_summary.csv'
+
+DEFAULT_DATE_TOLERANCE_DAYS = 7
+
+FINDING_TYPES = ['gap', 'duplicate', 'out_of_order']
+
+FINDING_COLUMNS = [
+    'sequence', 'prefix', 'store_no', 'finding', 'range_start', 'range_end', 'count',
+    'date_before', 'date_after', 'detail'
+]
+SUMMARY_COLUMNS = [
+    'sequence', 'prefix', 'store_no', 'documents', 'first_number', 'last_number', 'first_date',
+    'last_date', 'gaps', 'missing_numbers', 'duplicate_numbers', 'out_of_order', 'completeness'
+]
+
+# Series key columns
+_SERIES = ['sequence', 'prefix', 'store_no']
+
+# Sequence name → (file, number column, date column, party column, store column, split column)
+SEQUENCE_SOURCES = {
+    'grn_no': ('hr995_grn.csv', 'grn_no', 'date', 'supplier', 'store_no', None),
+    'voucher_no': ('hr995_voucher.csv', 'voucher_no', 'cheq_date', 'payee_ref', None, None),
+    'grn_voucher': ('hr995_grn.csv', 'voucher', 'date', 'supplier', None, None),
+    'requisition_no': ('hr995_issue.csv', 'requisition_no', 'date', None, 'store_no', None),
+    'hr185_reference': ('individual_hr185_transactions.csv', 'reference', 'transaction_date', 'supplier_code',
+                        None, 'transaction_type'),
+}
+
+
+def split_document_numbers(values):
+    """
+    Split document numbers into prefix and numeric part.
+
+    Args:
+        values (pd.Series): Document numbers (text or numeric)
+
+    Returns:
+        pd.DataFrame: prefix (upper-case text before the trailing digits, '' if none) and
+            number (int64), for the values that end in digits
+    """
+    text = values.dropna().astype(str).str.strip().str.upper().str.replace(r'\.0$', '', regex=True)
+    parts = text.str.extract(r'^(?P<prefix>.*?)(?P<number>\d+)$').dropna(subset=['number'])
+    parts = parts[parts['number'].str.len() <= 18]
+    return parts.assign(number=parts['number'].astype(np.int64))
+
+
+def sequence_documents(df, sequence, number_col, date_col, party_col=None, store_col=None, split_col=None,
+                       by_store=False):
+    """
+    One row per document of a numbering series.
+
+    A document is a distinct (number as written, party) pair dated by its earliest line,
+    so lines of one document booked on different days (partial issues, one voucher
+    paying several GRNs) are not duplicates.
+
+    Args:
+        df (pd.DataFrame): Source lines (several lines can belong to one document)
+        sequence (str): Sequence name
+        number_col, date_col, party_col, store_col (str): Source columns (party/store optional)
+        split_col (str): Column whose values are separate series (e.g. HR185 transaction type)
+        by_store (bool): Keep each store's numbers as a separate series
+
+    Returns:
+        pd.DataFrame: sequence, prefix, store_no, number, raw, date and party columns
+    """
+    parts = split_document_numbers(df[number_col])
+    source = df.loc[parts.index]
+    documents = pd.DataFrame({
+        'sequence': sequence if split_col is None else sequence + ':' + source[split_col].astype(str),
+        'prefix': parts['prefix'],
+        'store_no': source[store_col].astype(str).str.strip() if by_store and store_col else 'ALL',
+        'number': parts['number'],
+        'raw': source[number_col].astype(str).str.strip().str.upper(),
+        'date': pd.to_datetime(source[date_col], errors='coerce'),
+        'party': source[party_col].astype(str) if party_col else ''
+    })
+    return documents.groupby(_SERIES + ['raw', 'party'], sort=False).agg(
+        number=('number', 'first'), date=('date', 'min')).reset_index()
+
+
+def _runs(flagged, value_columns):
+    """
+    Collapse flagged rows (sorted by series and number) into runs of consecutive numbers.
+
+    A row continues the run of the row before it only when both are flagged, in the same
+    series, and its number is exactly one higher; flagged 100 and 500 are two runs even
+    when no unflagged number lies between them.
+    """
+    is_flagged = flagged['_flag'].to_numpy()
+    series = flagged.groupby(_SERIES, sort=False, dropna=False).ngroup().to_numpy()
+    number = flagged['number'].to_numpy()
+    continues = np.r_[False, is_flagged[:-1] & (series[1:] == series[:-1]) & (number[1:] == number[:-1] + 1)]
+    starts = is_flagged & ~continues
+    run = np.cumsum(starts)
+    rows = flagged[is_flagged].assign(_run=run[is_flagged])
+    return rows.groupby('_run', sort=False).agg(
+        sequence=('sequence', 'first'), prefix=('prefix', 'first'), store_no=('store_no', 'first'),
+        range_start=('number', 'min'), range_end=('number', 'max'), **value_columns)
+
+
+def analyze_sequences(documents, date_tolerance_days=DEFAULT_DATE_TOLERANCE_DAYS):
+    """
+    Find gaps, duplicates and out-of-order dates in every numbering series.
+
+    Args:
+        documents (pd.DataFrame): sequence_documents output (any number of series)
+        date_tolerance_days (int): Days a document may be dated before a lower-numbered one
+
+    Returns:
+        tuple: (findings in FINDING_COLUMNS layout, per-series summary in SUMMARY_COLUMNS layout)
+    """
+    if documents.empty:
+        return pd.DataFrame(columns=FINDING_COLUMNS), pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    # One row per series and number: document count and date range
+    numbers = documents.groupby(_SERIES + ['number'], sort=True).agg(
+        documents=('raw', 'size'), date=('date', 'min'), last_date=('date', 'max')).reset_index()
+    series = numbers.groupby(_SERIES, sort=False)
+
+    # Gaps: consecutive numbers more than 1 apart
+    previous_number = series['number'].shift(1)
+    gaps = numbers[(numbers['number'] - previous_number) > 1].assign(
+        range_start=lambda g: previous_number[g.index].astype(np.int64) + 1,
+        range_end=lambda g: g['number'] - 1,
+        date_before=lambda g: series['last_date'].shift(1)[g.index],
+        date_after=lambda g: g['date'])
+    gaps = gaps.assign(finding='gap', count=gaps['range_end'] - gaps['range_start'] + 1)
+    gaps['detail'] = gaps['count'].map('{:,} missing'.format).astype(str)
+
+    # Duplicates: runs of numbers used by more than one document
+    duplicates = _runs(numbers.assign(_flag=numbers['documents'] > 1),
+                       {'count': ('documents', 'sum'), 'date_before': ('date', 'min'),
+                        'date_after': ('last_date', 'max')})
+    duplicates = duplicates.assign(finding='duplicate')
+    duplicates['detail'] = duplicates['count'].map('{:,} documents share these numbers'.format).astype(str)
+
+    # Out of order: dated before the latest date of the lower numbers in the series
+    running_latest = numbers.assign(_latest=series['date'].cummax()).groupby(_SERIES, sort=False)['_latest'].ffill()
+    latest_before = running_latest.groupby([numbers[column] for column in _SERIES], sort=False).shift(1)
+    late = numbers['date'] < latest_before - pd.Timedelta(days=date_tolerance_days)
+    out_of_order = _runs(numbers.assign(_flag=late, _latest_before=latest_before),
+                         {'count': ('number', 'size'), 'date_before': ('_latest_before', 'max'),
+                          'date_after': ('date', 'min')})
+    out_of_order = out_of_order.assign(finding='out_of_order')
+    out_of_order['detail'] = ('dated up to ' + ((out_of_order['date_before'] - out_of_order['date_after']).dt.days)
+                              .map('{:,}'.format).astype(str) + ' days before a lower number')
+
+    frames = [frame[FINDING_COLUMNS] for frame in [gaps, duplicates, out_of_order] if not frame.empty]
+    findings = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FINDING_COLUMNS)
+    findings = findings.sort_values(_SERIES + ['range_start', 'finding'], kind='stable').reset_index(drop=True)
+
+    # Per-series summary
+    summary = series.agg(documents=('documents', 'sum'), distinct=('number', 'size'),
+                         first_number=('number', 'min'), last_number=('number', 'max'),
+                         first_date=('date', 'min'), last_date=('last_date', 'max')).reset_index()
+    counts = findings.pivot_table(index=_SERIES, columns='finding', values='count', aggfunc=['size', 'sum'],
+                                  fill_value=0)
+    summary = summary.set_index(_SERIES)
+    summary['gaps'] = counts.get(('size', 'gap'), 0)
+    summary['missing_numbers'] = counts.get(('sum', 'gap'), 0)
+    summary['duplicate_numbers'] = (numbers['documents'] > 1).groupby(
+        [numbers[column] for column in _SERIES]).sum()
+    summary['out_of_order'] = counts.get(('sum', 'out_of_order'), 0)
+    summary = summary.fillna({'gaps': 0, 'missing_numbers': 0, 'duplicate_numbers': 0, 'out_of_order': 0})
+    summary['completeness'] = summary['distinct'] / (summary['last_number'] - summary['first_number'] + 1)
+    summary = summary.reset_index().astype({'gaps': int, 'missing_numbers': np.int64, 'duplicate_numbers': int,
+                                            'out_of_order': int})
+    return findings, summary[SUMMARY_COLUMNS].sort_values(_SERIES).reset_index(drop=True)
+
+
+def load_sequence_documents(output_folder="output", by_store=False):
+    """Collect the documents of every available SEQUENCE_SOURCES series from the output folder."""
+    output_folder = Path(output_folder)
+    frames = {}
+    parts = []
+    for sequence, (filename, number_col, date_col, party_col, store_col, split_col) in SEQUENCE_SOURCES.items():
+        file_path = output_folder / filename
+        if not file_path.exists():
+            continue
+        if filename not in frames:
+            frames[filename] = pd.read_csv(file_path, low_memory=False, dtype=str)
+        df = frames[filename]
+        if number_col not in df.columns or date_col not in df.columns:
+            continue
+        parts.append(sequence_documents(df, sequence, number_col, date_col,
+                                        party_col if party_col in df.columns else None,
+                                        store_col if store_col in df.columns else None,
+                                        split_col if split_col in df.columns else None, by_store))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+        columns=_SERIES + ['number', 'raw', 'date', 'party'])
+
+
+def write_sequence_analysis(output_folder="output", by_store=False, date_tolerance_days=DEFAULT_DATE_TOLERANCE_DAYS):
+    """Analyze every document numbering series and save the findings and summary tables."""
+    documents = load_sequence_documents(output_folder, by_store)
+    if documents.empty:
+        print(f"⚠️ No document numbers found in {output_folder}; sequence analysis not run")
+        return None
+    findings, summary = analyze_sequences(documents, date_tolerance_days)
+    output_folder = Path(output_folder)
+    findings.to_csv(output_folder / SEQUENCE_FINDINGS_FILE, index=False)
+    summary.to_csv(output_folder / SEQUENCE_SUMMARY_FILE, index=False)
+    print(f"📄 Saved sequence analysis ({len(findings):,} findings over {len(summary):,} numbering series) "
+          f"to: {output_folder / SEQUENCE_FINDINGS_FILE}")
+    return findings, summary
+
+
+def load_sequence_analysis(output_folder="output"):
+    """Load the saved (findings, summary) tables, or None when the analysis has not been run."""
+    output_folder = Path(output_folder)
+    findings_file, summary_file = output_folder / SEQUENCE_FINDINGS_FILE, output_folder / SEQUENCE_SUMMARY_FILE
+    if not findings_file.exists() or not summary_file.exists():
+        return None
+    dtypes = {'prefix': str, 'store_no': str}
+    findings = pd.read_csv(findings_file, dtype=dtypes, parse_dates=['date_before', 'date_after'])
+    summary = pd.read_csv(summary_file, dtype=dtypes, parse_dates=['first_date', 'last_date'])
+    return findings.fillna({'prefix': ''}), summary.fillna({'prefix': ''})
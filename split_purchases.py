@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Split-Purchase Detector
+Finds purchases from one supplier that were split into several transactions below an
+approval threshold within a few days of each other.
+
+Transactions are purchase orders (GRN lines summed per order_no, dated by their first
+GRN) and payment vouchers. They are sorted by supplier (plus vote and/or official when
+requested) and date, and rolling N-day sums, counts and maxima are computed for every
+supplier at once with grouped time-based windows. A window is flagged for the highest
+threshold its sum reaches while every transaction in it stays below that threshold.
+
+Consecutive flagged windows of one supplier overlap, so each run of overlapping
+flagged windows is reported once, by its largest window.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from scoa_votes import find_vote_column
+
+SPLIT_PURCHASES_FILE = 'split_purchase_findings.csv'
+
+DEFAULT_WINDOW_DAYS = 7
+# Default approval thresholds (Rand); set these to the municipality's SCM policy limits
+DEFAULT_THRESHOLDS = [30000.0, 200000.0]
+
+OFFICIAL_COLUMNS = ['official', 'vouch_auth_name']
+
+FINDING_COLUMNS = [
+    'source', 'supplier', 'supplier_name', 'vote', 'official', 'threshold', 'window_start', 'window_end',
+    'transactions', 'total_amount', 'largest_amount', 'score', 'references'
+]
+
+
+def order_transactions(grn_df):
+    """Purchase orders from GRN lines: supplier, first GRN date, order value and GRN numbers."""
+    grn = grn_df.assign(
+        order_key=grn_df['order_no'].fillna(grn_df['grn_no']).astype(str).str.strip(),
+        date=pd.to_datetime(grn_df['date'], errors='coerce'),
+        amount=pd.to_numeric(grn_df['nett_grn_amt'], errors='coerce'),
+        supplier=grn_df['supplier'].astype(str).str.strip().str.replace(r'\.0$', '', regex=True))
+    orders = grn.groupby(['supplier', 'order_key'], sort=False).agg(
+        supplier_name=('supplier_name', 'first'), date=('date', 'min'), amount=('amount', 'sum')).reset_index()
+    return orders.rename(columns={'order_key': 'reference'}).assign(source='purchase_order')
+
+
+def voucher_transactions(voucher_df):
+    """Payment vouchers: payee, cheque date, amount and (when available) vote and official."""
+    vouchers = pd.DataFrame({
+        'supplier': voucher_df['payee_ref'].astype(str).str.strip(),
+        'supplier_name': voucher_df['payee_name'] if 'payee_name' in voucher_df.columns else None,
+        'reference': voucher_df['voucher_no'].astype(str).str.strip(),
+        'date': pd.to_datetime(voucher_df['cheq_date'], errors='coerce'),
+        'amount': pd.to_numeric(voucher_df['cheq_amt'], errors='coerce'),
+        'source': 'voucher'
+    }, index=voucher_df.index)
+    vote_col = find_vote_column(voucher_df.columns)
+    if vote_col:
+        vouchers['vote'] = voucher_df[vote_col].astype(str).str.strip()
+    official_col = next((col for col in OFFICIAL_COLUMNS if col in voucher_df.columns), None)
+    if official_col:
+        vouchers['official'] = voucher_df[official_col].astype(str).str.strip()
+    return vouchers
+
+
+def detect_split_purchases(transactions, group_columns=('supplier',), window_days=DEFAULT_WINDOW_DAYS,
+                           thresholds=DEFAULT_THRESHOLDS):
+    """
+    Flag rolling windows whose summed value crosses a threshold that no single transaction reaches.
+
+    Args:
+        transactions (pd.DataFrame): source, supplier, supplier_name, reference, date and
+            amount columns (plus any extra group_columns)
+        group_columns (iterable): Columns defining a window group (supplier, optionally vote/official)
+        window_days (int): Rolling window length in days (window ending on each transaction)
+        thresholds (list): Approval thresholds
+
+    Returns:
+        pd.DataFrame: One row per run of overlapping flagged windows, in FINDING_COLUMNS layout
+    """
+    keys = ['source'] + list(group_columns)
+    data = transactions.dropna(subset=['date', 'amount'])
+    data = data[data['amount'] > 0].sort_values(keys + ['date'], kind='stable').reset_index(drop=True)
+    if data.empty:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+
+    # Rolling window (date - window_days, date] ending on every transaction, all groups at once
+    windows = data.groupby(keys, sort=False, dropna=False).rolling(f'{window_days}D', on='date')['amount']
+    total = windows.sum().to_numpy()
+    count = windows.count().to_numpy().astype(np.int64)
+    largest = windows.max().to_numpy()
+
+    # Highest threshold reached by the sum while every component stays below it
+    thresholds = sorted(thresholds)
+    crossed = np.zeros(len(data))
+    for threshold in thresholds:
+        crossed = np.where((total >= threshold) & (largest < threshold) & (count >= 2), threshold, crossed)
+    flagged = crossed > 0
+
+    # Runs of overlapping flagged windows within a group (same threshold)
+    group_id = data.groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+    end_pos = np.arange(len(data))
+    start_pos = end_pos - count + 1
+    previous_overlaps = np.r_[False, (group_id[1:] == group_id[:-1]) & (start_pos[1:] <= end_pos[:-1])
+                              & (crossed[1:] == crossed[:-1]) & flagged[:-1]]
+    run = np.cumsum(flagged & ~previous_overlaps)
+    windows_df = pd.DataFrame({'run': run, 'total': total, 'threshold': crossed, 'count': count,
+                               'largest': largest, 'start_pos': start_pos, 'end_pos': end_pos})[flagged]
+    if windows_df.empty:
+        return pd.DataFrame(columns=FINDING_COLUMNS)
+    best = windows_df.loc[windows_df.groupby('run')['total'].idxmax()]
+
+    # Component references of each reported window (contiguous rows start_pos..end_pos)
+    lengths = best['count'].to_numpy()
+    component_rows = np.repeat(best['start_pos'].to_numpy(), lengths) + (
+        np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+    references = pd.Series(data['reference'].to_numpy()[component_rows]).groupby(
+        np.repeat(np.arange(len(best)), lengths)).agg(', '.join)
+
+    ends = data.iloc[best['end_pos'].to_numpy()].reset_index(drop=True)
+    starts = data['date'].to_numpy()[best['start_pos'].to_numpy()]
+    findings = pd.DataFrame({
+        'source': ends['source'],
+        'supplier': ends['supplier'],
+        'supplier_name': ends['supplier_name'] if 'supplier_name' in ends.columns else None,
+        'vote': ends['vote'] if 'vote' in group_columns else None,
+        'official': ends['official'] if 'official' in group_columns else None,
+        'threshold': best['threshold'].to_numpy(),
+        'window_start': starts,
+        'window_end': ends['date'],
+        'transactions': lengths,
+        'total_amount': best['total'].to_numpy(),
+        'largest_amount': best['largest'].to_numpy(),
+        'references': references.to_numpy()
+    })
+    findings['score'] = findings['total_amount'] / findings['threshold']
+    return findings[FINDING_COLUMNS].sort_values(['threshold', 'score'], ascending=False).reset_index(drop=True)
+
+
+def load_split_purchase_transactions(output_folder="output"):
+    """Purchase orders and (when exported) payment vouchers from the output folder."""
+    output_folder = Path(output_folder)
+    parts = []
+    grn_file = output_folder / 'hr995_grn.csv'
+    if grn_file.exists():
+        parts.append(order_transactions(pd.read_csv(grn_file, low_memory=False, dtype={'order_no': str,
+                                                                                     'grn_no': str})))
+    voucher_file = output_folder / 'hr995_voucher.csv'
+    if voucher_file.exists():
+        parts.append(voucher_transactions(pd.read_csv(voucher_file, low_memory=False, dtype=str)))
+    return pd.concat(parts, ignore_index=True) if parts else None
+
+
+def write_split_purchase_findings(output_folder="output", window_days=DEFAULT_WINDOW_DAYS,
+                                  thresholds=DEFAULT_THRESHOLDS, by_vote=False, by_official=False):
+    """
+    Run the split-purchase detector and save split_purchase_findings.csv.
+
+    Args:
+        output_folder (str): Folder with the processed CSV files
+        window_days (int): Rolling window length in days
+        thresholds (list): Approval thresholds
+        by_vote (bool): Separate windows per vote number (vouchers with a vote column)
+        by_official (bool): Separate windows per authorizing official (vouchers)
+
+    Returns:
+        pd.DataFrame or None: The findings, or None when there are no transactions
+    """
+    transactions = load_split_purchase_transactions(output_folder)
+    if transactions is None:
+        print(f"⚠️ No GRN or voucher data found in {output_folder}; split-purchase detection not run")
+        return None
+    group_columns = ['supplier'] + [column for column, wanted in [('vote', by_vote), ('official', by_official)]
+                                    if wanted and column in transactions.columns]
+    findings = detect_split_purchases(transactions, group_columns, window_days, thresholds)
+    output_file = Path(output_folder) / SPLIT_PURCHASES_FILE
+    findings.to_csv(output_file, index=False)
+    print(f"📄 Saved split-purchase findings ({len(findings):,} windows from {len(transactions):,} "
+          f"transactions) to: {output_file}")
+    return findings
+
+
+def load_split_purchase_findings(output_folder="output"):
+    """Load the saved findings, or None when the detector has not been run."""
+    findings_file = Path(output_folder) / SPLIT_PURCHASES_FILE
+    if not findings_file.exists():
+        return None
+    return pd.read_csv(findings_file, dtype={'supplier': str, 'vote': str, 'official': str, 'references': str},
+                       parse_dates=['window_start', 'window_end'])
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures the cold import time of the dashboards and the processing pipeline.
+
+Each entry point is imported in a fresh interpreter with ``-X importtime`` a few times;
+the median wall time is compared against an import budget, and the audit lists the
+top-level imports that cost the most. Heavy stacks that an entry point must not load
+at import time (the PDF stack for the pipeline, unused plotting backends for the
+dashboards) are checked as well, so a stray module-level import shows up as a
+failure instead of a slow start.
+
+Usage:
+    python startup_benchmark.py [--runs N] [--top N] [module ...]
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Entry point → (import budget in seconds, modules that must stay unloaded at import).
+# Budgets leave headroom for machine noise over the measured cold import (pipeline ~0.45s,
+# dashboards ~1.1s); pandas and streamlit alone account for most of it.
+STARTUP_BUDGETS = {
+    'stock_data_processor': (0.8, ['pdfplumber', 'matplotlib', 'seaborn', 'plotly']),
+    'enhanced_dashboard': (2.0, ['pdfplumber', 'matplotlib', 'seaborn', 'pyarrow.parquet']),
+    'clean_dashboard': (2.0, ['pdfplumber', 'matplotlib', 'seaborn', 'pyarrow.parquet']),
+}
+DEFAULT_RUNS = 3
+
+_PROBE = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "import {module}\n"
+    "seconds = time.perf_counter() - start\n"
+    "print(json.dumps({{'seconds': seconds, 'modules': sorted(sys.modules)}}))\n"
+)
+
+
+def parse_importtime(stderr, module):
+    """
+    Parse ``-X importtime`` output into the imports made directly by an entry point.
+
+    Returns:
+        list: (module, cumulative seconds), most expensive first
+    """
+    pending = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Names are indented by two spaces per nesting level; children are printed before their parent
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        if depth == 1:
+            pending.append((name.strip(), int(cumulative) / 1e6))
+        elif depth == 0:
+            if name.strip() == module:
+                return sorted(pending, key=lambda item: item[1], reverse=True)
+            pending = []
+    return []
+
+
+def measure_import(module, runs=DEFAULT_RUNS):
+    """
+    Import a module in fresh interpreters and collect timings.
+
+    Returns:
+        dict: median/min seconds, loaded module names and the top-level import costs of
+            the median run
+    """
+    samples = []
+    for _ in range(runs):
+        wall_start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', _PROBE.format(module=module)],
+                                capture_output=True, text=True)
+        wall = time.perf_counter() - wall_start
+        if result.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        probe = json.loads(result.stdout.strip().splitlines()[-1])
+        samples.append({
+            'seconds': probe['seconds'],
+            'process_seconds': wall,
+            'modules': set(probe['modules']),
+            'imports': parse_importtime(result.stderr, module)
+        })
+
+    samples.sort(key=lambda sample: sample['seconds'])
+    median = samples[len(samples) // 2]
+    return {
+        'median_seconds': statistics.median(s['seconds'] for s in samples),
+        'min_seconds': samples[0]['seconds'],
+        'process_seconds': statistics.median(s['process_seconds'] for s in samples),
+        'modules': median['modules'],
+        'imports': median['imports']
+    }
+
+
+def run_benchmark(modules=None, runs=DEFAULT_RUNS, top=8):
+    """
+    Benchmark entry points against their budgets and print the audit.
+
+    Returns:
+        bool: True when every entry point is within budget and loads no forbidden module
+    """
+    modules = modules or list(STARTUP_BUDGETS)
+    all_ok = True
+    print(f"⏱️  Cold start benchmark ({runs} runs per entry point)")
+    print("=" * 60)
+    for module in modules:
+        budget, forbidden = STARTUP_BUDGETS.get(module, (None, []))
+        timing = measure_import(module, runs)
+        loaded = [name for name in forbidden if name in timing['modules']]
+        within_budget = budget is None or timing['median_seconds'] <= budget
+        ok = within_budget and not loaded
+        all_ok = all_ok and ok
+
+        budget_text = f" (budget {budget:.1f}s)" if budget is not None else ""
+        print(f"{'✅' if ok else '❌'} {module}: {timing['median_seconds']:.2f}s median, "
+              f"{timing['min_seconds']:.2f}s best, {timing['process_seconds']:.2f}s with interpreter{budget_text}")
+        for name, seconds in timing['imports'][:top]:
+            print(f"     {seconds:6.3f}s  {name}")
+        if loaded:
+            print(f"     ⚠️ Loaded at import but should be lazy: {', '.join(loaded)}")
+    return all_ok
+
+
+def main():
+    """Run the startup benchmark from the command line."""
+    args = sys.argv[1:]
+    runs, top, modules = DEFAULT_RUNS, 8, []
+    while args:
+        arg = args.pop(0)
+        if arg == '--runs':
+            runs = int(args.pop(0))
+        elif arg == '--top':
+            top = int(args.pop(0))
+        else:
+            modules.append(arg)
+    sys.exit(0 if run_benchmark(modules, runs, top) else 1)
+
+
+if __name__ == "__main__":
+    main()
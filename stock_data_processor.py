@@ -10,7 +10,6 @@ and generates various analytical reports as specified in the requirements.
 import os
 import logging
 import pandas as pd
-import pdfplumber
 from pathlib import Path
 from datetime import datetime
 import re
@@ -237,6 +236,9 @@ class StockDataProcessor:
         try:
             self.logger.info(f"Loading PDF file: {file_path}")
             
+            # The PDF stack is only loaded when a PDF is actually processed
+            import pdfplumber
+            
             tables = []
             with pdfplumber.open(file_path) as pdf:
                 for page_num, page in enumerate(pdf.pages):
@@ -635,6 +637,27 @@ class StockDataProcessor:
         except Exception as e:
             self.logger.error(f"Error generating Objective 2 report: {str(e)}")
     
+    def generate_objective_2_matching(self):
+        """
+        Objective 2: Allocate issued quantities to GRN receipts per item in FIFO order and
+        report requisition fill status and unmatched receipts.
+        """
+        self.logger.info("Generating Objective 2 requisition to GRN matching...")
+        
+        try:
+            from requisition_matching import write_requisition_matching
+            
+            results = write_requisition_matching(self.output_folder)
+            if results is not None:
+                fill_status = results['fill_status']
+                matched = (fill_status['fill_status'] == 'matched').sum()
+                self.logger.info(f"Requisition matching saved: {matched} of {len(fill_status)} requisitions fully matched")
+                print(f"[SUCCESS] Requisition matching saved: {matched:,} of {len(fill_status):,} requisitions fully matched")
+            else:
+                self.logger.warning("No GRN or issue data available for requisition matching")
+        except Exception as e:
+            self.logger.error(f"Error generating requisition matching: {str(e)}")
+    
     def generate_objective_3_report(self):
         """
         Objective 3: Generate the HR995 report.
@@ -702,6 +725,26 @@ class StockDataProcessor:
         except Exception as e:
             self.logger.error(f"Error generating Objective 4 report: {str(e)}")
     
+    def generate_objective_4_document_chain(self):
+        """
+        Objective 4: One GRN → voucher → payment → HR185 chain row per GRN document, written
+        partitioned by financial year.
+        """
+        self.logger.info("Generating Objective 4 GRN document chain...")
+        
+        try:
+            from document_chain import write_document_chain
+            
+            chain = write_document_chain(self.output_folder)
+            if chain is not None:
+                paid = (chain['chain_status'] == 'paid').sum()
+                self.logger.info(f"Document chain saved: {len(chain)} GRN documents, {paid} traced to payment")
+                print(f"[SUCCESS] Document chain saved: {len(chain):,} GRN documents, {paid:,} traced to payment")
+            else:
+                self.logger.warning("No GRN data available for the document chain")
+        except Exception as e:
+            self.logger.error(f"Error generating document chain: {str(e)}")
+    
     def generate_objective_5_report(self):
         """
         Objective 5: Stock balances per year (2022–2025), using Final Stock Lists + Adjustment reports.
@@ -745,15 +788,38 @@ class StockDataProcessor:
         except Exception as e:
             self.logger.error(f"Error generating Objective 5 report: {str(e)}")
     
+    def generate_objective_5_roll_forward(self):
+        """
+        Objective 5: Reconcile opening + receipts − issues ± adjustments against the counted
+        closing balances per store, item and financial year.
+        """
+        self.logger.info("Generating Objective 5 roll-forward reconciliation...")
+        
+        try:
+            from stock_reconciliation import write_stock_roll_forward
+            
+            table = write_stock_roll_forward(self.output_folder)
+            if table is not None:
+                differences = table['status'].isin(['surplus', 'shortage']).sum()
+                self.logger.info(f"Roll-forward reconciliation saved: {len(table)} rows, {differences} with differences")
+                print(f"[SUCCESS] Roll-forward reconciliation saved: {len(table):,} rows, {differences:,} with differences")
+            else:
+                self.logger.warning("No stock listings available for the roll-forward reconciliation")
+        except Exception as e:
+            self.logger.error(f"Error generating roll-forward reconciliation: {str(e)}")
+    
     def generate_all_reports(self):
         """Generate all analytical reports."""
         self.logger.info("Generating all analytical reports...")
         
         self.generate_objective_1_report()
         self.generate_objective_2_report()
+        self.generate_objective_2_matching()
         self.generate_objective_3_report()
         self.generate_objective_4_report()
+        self.generate_objective_4_document_chain()
         self.generate_objective_5_report()
+        self.generate_objective_5_roll_forward()
         
         self.logger.info("All reports generated successfully!")
         print("All reports generated successfully!")
@@ -857,6 +923,184 @@ class StockDataProcessor:
             self.logger.error(f"Failed to generate relationship validation report: {str(e)}")
             print(f"⚠️ Failed to generate relationship validation report: {str(e)}")
     
+    def generate_duplicate_payment_reports(self):
+        """Score duplicate, same-day and near-duplicate payments over the full voucher history."""
+        self.logger.info("Generating duplicate payment reports...")
+        
+        try:
+            from duplicate_payments import write_duplicate_payment_reports
+            
+            results = write_duplicate_payment_reports(self.output_folder)
+            if results is not None:
+                self.logger.info(f"Duplicate payment reports saved: {len(results['duplicate_vouchers'])} duplicate vouchers, "
+                                 f"{len(results['near_duplicates'])} near-duplicate pairs")
+                print(f"[SUCCESS] Duplicate payment reports saved to {self.output_folder}")
+            else:
+                self.logger.warning("No voucher data available for duplicate payment detection")
+        except Exception as e:
+            self.logger.error(f"Error generating duplicate payment reports: {str(e)}")
+    
+    def generate_price_history(self):
+        """Build the per-item unit price history with rolling spike statistics."""
+        self.logger.info("Generating price history...")
+        
+        try:
+            from price_history import write_price_history
+            
+            history = write_price_history(self.output_folder)
+            if history is not None:
+                spikes = int(history.history['is_spike'].sum())
+                self.logger.info(f"Price history saved: {len(history.history)} prices, {spikes} spikes")
+                print(f"[SUCCESS] Price history saved: {len(history.history):,} prices, {spikes:,} spikes")
+            else:
+                self.logger.warning("No GRN unit prices available for the price history")
+        except Exception as e:
+            self.logger.error(f"Error generating price history: {str(e)}")
+    
+    def generate_anomaly_scores(self):
+        """Run every anomaly detector in one batch and save the scored anomaly table."""
+        self.logger.info("Generating anomaly scores...")
+        
+        try:
+            from anomaly_engine import write_anomaly_scores
+            
+            anomalies = write_anomaly_scores(self.output_folder)
+            if anomalies is not None:
+                self.logger.info(f"Anomaly scores saved: {len(anomalies)} anomalies")
+                print(f"[SUCCESS] Anomaly scores saved: {len(anomalies):,} anomalies")
+            else:
+                self.logger.warning("No GRN or issue data available for anomaly scoring")
+        except Exception as e:
+            self.logger.error(f"Error generating anomaly scores: {str(e)}")
+    
+    def generate_sequence_analysis(self):
+        """Find gaps, duplicates and out-of-order dates in document numbering."""
+        self.logger.info("Generating document sequence analysis...")
+        
+        try:
+            from sequence_analysis import write_sequence_analysis
+            
+            result = write_sequence_analysis(self.output_folder)
+            if result is not None:
+                findings, summary = result
+                self.logger.info(f"Sequence analysis saved: {len(findings)} findings over {len(summary)} series")
+                print(f"[SUCCESS] Sequence analysis saved: {len(findings):,} findings over {len(summary):,} series")
+            else:
+                self.logger.warning("No document numbers available for sequence analysis")
+        except Exception as e:
+            self.logger.error(f"Error generating sequence analysis: {str(e)}")
+    
+    def generate_split_purchase_findings(self):
+        """Flag supplier transaction windows that split a purchase below an approval threshold."""
+        self.logger.info("Generating split-purchase findings...")
+        
+        try:
+            from split_purchases import write_split_purchase_findings
+            
+            findings = write_split_purchase_findings(self.output_folder)
+            if findings is not None:
+                self.logger.info(f"Split-purchase findings saved: {len(findings)} windows")
+                print(f"[SUCCESS] Split-purchase findings saved: {len(findings):,} windows")
+            else:
+                self.logger.warning("No GRN or voucher data available for split-purchase detection")
+        except Exception as e:
+            self.logger.error(f"Error generating split-purchase findings: {str(e)}")
+    
+    def generate_duplicate_invoice_findings(self):
+        """Group invoice numbers reused across suppliers or re-captured in a cosmetic variant."""
+        self.logger.info("Generating duplicate-invoice findings...")
+        
+        try:
+            from duplicate_invoices import write_duplicate_invoice_findings
+            
+            members = write_duplicate_invoice_findings(self.output_folder)
+            if members is not None:
+                groups = members['group_id'].nunique()
+                self.logger.info(f"Duplicate-invoice findings saved: {groups} candidate groups")
+                print(f"[SUCCESS] Duplicate-invoice findings saved: {groups:,} candidate groups")
+            else:
+                self.logger.warning("No GRN or HR185 invoice data available for duplicate-invoice detection")
+        except Exception as e:
+            self.logger.error(f"Error generating duplicate-invoice findings: {str(e)}")
+    
+    def generate_three_way_match(self):
+        """Compare GRN, HR185 invoice and voucher payment amounts per GRN document and queue exceptions."""
+        self.logger.info("Generating three-way match exceptions...")
+        
+        try:
+            from three_way_match import write_three_way_exceptions
+            
+            queue = write_three_way_exceptions(self.output_folder)
+            if queue is not None:
+                self.logger.info(f"Three-way match exceptions saved: {len(queue)} GRN documents")
+                print(f"[SUCCESS] Three-way match exceptions saved: {len(queue):,} GRN documents")
+            else:
+                self.logger.warning("No document chain available for the three-way match")
+        except Exception as e:
+            self.logger.error(f"Error generating three-way match exceptions: {str(e)}")
+    
+    def generate_scoa_cube(self):
+        """Materialize the SCOA rollup cube (amounts by SCOA level and fin_period)."""
+        self.logger.info("Generating SCOA rollup cube...")
+        
+        try:
+            from scoa_votes import write_scoa_cube
+            
+            cube = write_scoa_cube(self.output_folder)
+            if cube is not None:
+                self.logger.info(f"SCOA rollup cube saved: {len(cube)} rows")
+                print(f"[SUCCESS] SCOA rollup cube saved: {len(cube):,} rows")
+            else:
+                self.logger.warning("No vote data available for the SCOA rollup cube")
+        except Exception as e:
+            self.logger.error(f"Error generating SCOA rollup cube: {str(e)}")
+    
+    def generate_item_category_dimension(self):
+        """Classify each unique item description once and save the item → category dimension."""
+        self.logger.info("Generating item category dimension...")
+        
+        try:
+            from description_classifier import write_item_category_dimension
+            
+            dimension = write_item_category_dimension(self.output_folder)
+            if dimension is not None:
+                self.logger.info(f"Item category dimension saved: {len(dimension)} unique descriptions")
+                print(f"[SUCCESS] Item category dimension saved: {len(dimension):,} unique descriptions")
+            else:
+                self.logger.warning("No item descriptions available for the category dimension")
+        except Exception as e:
+            self.logger.error(f"Error generating item category dimension: {str(e)}")
+    
+    def generate_stock_ledger(self):
+        """Reconstruct per-item running stock balances and save the stock ledger."""
+        self.logger.info("Generating stock ledger...")
+        
+        try:
+            from stock_ledger import write_stock_ledger
+            
+            ledger = write_stock_ledger(self.output_folder)
+            if ledger is not None:
+                self.logger.info(f"Stock ledger saved: {len(ledger.ledger)} rows for {len(ledger.items)} items")
+                print(f"[SUCCESS] Stock ledger saved: {len(ledger.ledger):,} rows for {len(ledger.items):,} items")
+            else:
+                self.logger.warning("No stock movements available for the stock ledger")
+        except Exception as e:
+            self.logger.error(f"Error generating stock ledger: {str(e)}")
+    
+    def generate_dataset_profiles(self):
+        """Write profile artifacts (dtypes, nulls, distinct counts, top values, histograms) for output datasets."""
+        self.logger.info("Generating dataset profiles...")
+        
+        try:
+            from dataset_profiler import DatasetProfiler
+            
+            profiler = DatasetProfiler(self.output_folder)
+            summary = profiler.refresh_profiles()
+            self.logger.info(f"Dataset profiles: {summary['profiled']} profiled, {summary['unchanged']} unchanged, {summary['failed']} failed")
+            print(f"[SUCCESS] Dataset profiles refreshed: {summary['profiled']} profiled, {summary['unchanged']} unchanged")
+        except Exception as e:
+            self.logger.error(f"Error generating dataset profiles: {str(e)}")
+    
     def run(self):
         """Run the complete data processing pipeline with corrected business logic."""
         self.logger.info("Starting Stock Data Processing Pipeline with Corrected Business Logic...")
@@ -877,6 +1121,39 @@ class StockDataProcessor:
         # Generate analytical reports
         self.generate_all_reports()
         
+        # Queue GRN / invoice / payment amount exceptions from the document chain
+        self.generate_three_way_match()
+        
+        # Gap / duplicate / date-order checks on document numbering
+        self.generate_sequence_analysis()
+        
+        # Rolling supplier windows that cross approval thresholds in pieces
+        self.generate_split_purchase_findings()
+        
+        # Invoice numbers reused across suppliers or in cosmetic variants (same amount)
+        self.generate_duplicate_invoice_findings()
+        
+        # Precompute duplicate payment detection for the full voucher history
+        self.generate_duplicate_payment_reports()
+        
+        # Pre-aggregate SCOA votes for the compliance views
+        self.generate_scoa_cube()
+        
+        # Classify item descriptions once for category analytics
+        self.generate_item_category_dimension()
+        
+        # Reconstruct running stock balances for as-of queries
+        self.generate_stock_ledger()
+        
+        # Per-item unit price history for spike detection and valuation
+        self.generate_price_history()
+        
+        # Score every anomaly detector in one batch for the anomaly views
+        self.generate_anomaly_scores()
+        
+        # Write dataset profiles for the dashboard panels
+        self.generate_dataset_profiles()
+        
         self.logger.info("Stock Data Processing Pipeline with corrected business logic completed successfully!")
         print("\n" + "="*80)
         print("✅ Stock Data Processing Pipeline with Corrected Business Logic Completed!")
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Stock Ledger Engine
+Per-item running stock balances with as-of-date queries.
+
+Every stock movement is normalized into one ledger row (item, date, movement type,
+signed quantity):
+
+* HR995 GRN lines receive stock (quantity less returns). GRNs booked to the DIRECT
+  store are direct purchases that never enter a store and are left out.
+* HR995 issue lines issue stock.
+* HR390 ADJ/RND/WRO lines (adjustments, rounding, write-offs), which have no HR995
+  counterpart. HR390 GRN/ISS lines duplicate the HR995 movements and are not used.
+* Year-end stock listings are stock counts: a count row resets the item's balance to
+  the counted quantity, and the difference to the running balance before the count is
+  kept as the count variance.
+
+The ledger is sorted by item and date and the running balance is a grouped cumulative
+sum within each count segment, so it is built without any per-row Python work. As-of
+queries ("balance of item X, or of every item, on date D") are binary searches over a
+composite (item, day) key of the sorted ledger instead of rescans of the transactions.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+LEDGER_FILE = 'stock_ledger.csv'
+LEDGER_COLUMNS = [
+    'item_code', 'date', 'movement_type', 'source', 'reference', 'store_no',
+    'quantity', 'balance', 'count_variance'
+]
+
+NON_STOCK_STORES = {'DIRECT'}
+
+# HR390 movement types taken from the movement report, with the sign of their quantity.
+# The parsed PDF text carries unsigned quantities; write-offs reduce stock.
+HR390_MOVEMENT_SIGNS = {'ADJ': 1, 'RND': 1, 'WRO': -1}
+
+# Stock count listings: file → count date (financial year end)
+STOCK_COUNT_FILES = [
+    ('individual_final_stock_listing_2023.csv', '2023-06-30'),
+    ('individual_final_stock_list_2324.csv', '2024-06-30'),
+]
+
+# Output files the ledger is built from
+LEDGER_SOURCE_FILES = ['hr995_grn.csv', 'hr995_issue.csv', 'hr390_movement_data.csv'] + [
+    filename for filename, _ in STOCK_COUNT_FILES]
+
+# Count rows sort after the movements of the same day (counts are taken at day end)
+_MOVEMENT_ORDER = 0
+_COUNT_ORDER = 1
+
+
+def normalize_item_codes(codes):
+    """Return item codes as stripped text without a trailing '.0' from float parsing."""
+    text = codes.astype(str).str.strip().str.replace(r'\.0$', '', regex=True)
+    return text.where(codes.notna())
+
+
+def _movements(item_codes, dates, movement_type, source, quantity, reference=None, store=None):
+    index = item_codes.index
+    return pd.DataFrame({
+        'item_code': normalize_item_codes(item_codes),
+        'date': pd.to_datetime(dates, errors='coerce'),
+        'movement_type': movement_type,
+        'source': source,
+        'reference': reference.astype(str) if reference is not None else None,
+        'store_no': store if store is not None else None,
+        'quantity': pd.to_numeric(quantity, errors='coerce').fillna(0.0),
+        'is_count': False
+    }, index=index)
+
+
+def grn_movements(grn_df):
+    """Stock receipts from HR995 GRN lines (direct-store GRNs excluded)."""
+    item_col = 'item_no' if 'item_no' in grn_df.columns else 'item_code'
+    if grn_df.empty or item_col not in grn_df.columns or 'quantity' not in grn_df.columns:
+        return None
+    grn = grn_df
+    if 'store_no' in grn.columns:
+        grn = grn[~grn['store_no'].astype(str).str.strip().str.upper().isin(NON_STOCK_STORES)]
+    quantity = pd.to_numeric(grn['quantity'], errors='coerce').fillna(0.0)
+    if 'return_qty' in grn.columns:
+        quantity = quantity - pd.to_numeric(grn['return_qty'], errors='coerce').fillna(0.0)
+    return _movements(grn[item_col], grn['date'], 'GRN', 'HR995 GRN', quantity,
+                      grn['grn_no'] if 'grn_no' in grn.columns else None,
+                      grn['store_no'] if 'store_no' in grn.columns else None)
+
+
+def issue_movements(issue_df):
+    """Stock issues from HR995 issue lines."""
+    item_col = 'item_code' if 'item_code' in issue_df.columns else 'item_no'
+    if issue_df.empty or item_col not in issue_df.columns or 'quantity' not in issue_df.columns:
+        return None
+    return _movements(issue_df[item_col], issue_df['date'], 'ISS', 'HR995 Issue',
+                      -pd.to_numeric(issue_df['quantity'], errors='coerce').fillna(0.0),
+                      issue_df['requisition_no'] if 'requisition_no' in issue_df.columns else None,
+                      issue_df['store_no'] if 'store_no' in issue_df.columns else None)
+
+
+def hr390_quantities(hr390_df):
+    """
+    Extract movement quantities from parsed HR390 lines.
+
+    The HR390 parser shifts the fields of adjustment-type lines one column left, so the
+    quantity of ADJ/RND/WRO lines is in vote_no (the vote lands in line). The first
+    numeric value of vote_no, line is used.
+    """
+    quantity = pd.Series(np.nan, index=hr390_df.index)
+    for col in ('vote_no', 'line'):
+        if col in hr390_df.columns:
+            values = pd.to_numeric(hr390_df[col].astype(str).str.replace(',', '', regex=False), errors='coerce')
+            quantity = quantity.fillna(values)
+    return quantity
+
+
+def hr390_movements(hr390_df, movement_signs=None):
+    """Adjustments, rounding and write-offs from the HR390 movement report."""
+    movement_signs = HR390_MOVEMENT_SIGNS if movement_signs is None else movement_signs
+    if hr390_df is None or hr390_df.empty or 'type' not in hr390_df.columns or 'item_no' not in hr390_df.columns:
+        return None
+    types = hr390_df['type'].astype(str).str.strip().str.upper()
+    movements = hr390_df[types.isin(movement_signs)]
+    types = types[movements.index]
+    signs = types.map(movement_signs).astype(float)
+    return _movements(movements['item_no'], movements['tran_date'], types, 'HR390',
+                      hr390_quantities(movements) * signs,
+                      movements['reference'] if 'reference' in movements.columns else None,
+                      movements['store'] if 'store' in movements.columns else None)
+
+
+def stock_count_rows(listing_df, count_date, source):
+    """Stock count (balance reset) rows from a stock listing."""
+    if listing_df is None or listing_df.empty or 'item_code' not in listing_df.columns:
+        return None
+    counts = _movements(listing_df['item_code'], pd.Series(count_date, index=listing_df.index), 'COUNT', source,
+                        listing_df['quantity'],
+                        store=listing_df['store_no'] if 'store_no' in listing_df.columns else None)
+    counts['is_count'] = True
+    return counts
+
+
+class StockLedger:
+    """Sorted per-item running-balance ledger with binary-search as-of queries."""
+
+    def __init__(self, movements):
+        """
+        Build the ledger from normalized movement rows.
+
+        Args:
+            movements (pd.DataFrame): Rows from grn_movements, issue_movements,
+                hr390_movements and stock_count_rows (concatenated)
+        """
+        movements = movements.dropna(subset=['item_code', 'date'])
+        movements = movements.assign(_order=np.where(movements['is_count'], _COUNT_ORDER, _MOVEMENT_ORDER))
+        ledger = movements.sort_values(['item_code', 'date', '_order'], kind='stable').reset_index(drop=True)
+
+        # Running balance: cumulative sum within each item's count segments
+        item_groups = ledger.groupby('item_code', sort=False)
+        segment = item_groups['is_count'].cumsum()
+        ledger['balance'] = ledger['quantity'].groupby([ledger['item_code'], segment], sort=False).cumsum()
+        balance_before = ledger['balance'].groupby(ledger['item_code'], sort=False).shift(1).fillna(0.0)
+        ledger['count_variance'] = np.where(ledger['is_count'], ledger['quantity'] - balance_before, np.nan)
+
+        # Inflows and outflows to date (receipts/issues, excluding counts)
+        movement_qty = ledger['quantity'].where(~ledger['is_count'], 0.0)
+        ledger['received_to_date'] = movement_qty.clip(lower=0).groupby(ledger['item_code'], sort=False).cumsum()
+        ledger['issued_to_date'] = (-movement_qty.clip(upper=0)).groupby(ledger['item_code'], sort=False).cumsum()
+        self.ledger = ledger.drop(columns=['_order'])
+
+        # Composite (item, day) search key over the sorted ledger
+        item_index, self.items = pd.factorize(ledger['item_code'], sort=True)
+        days = ledger['date'].to_numpy(dtype='datetime64[D]').astype(np.int64)
+        self._min_day = int(days.min()) if len(days) else 0
+        self._day_span = (int(days.max()) - self._min_day + 2) if len(days) else 1
+        self._keys = item_index.astype(np.int64) * self._day_span + (days - self._min_day + 1)
+        self._item_start = np.searchsorted(item_index, np.arange(len(self.items)), side='left')
+        self._item_position = {item: i for i, item in enumerate(self.items)}
+
+    def _day_offset(self, as_of):
+        day = np.datetime64(pd.Timestamp(as_of).normalize().date(), 'D').astype(np.int64)
+        return int(np.clip(day - self._min_day + 1, 0, self._day_span - 1))
+
+    def _positions(self, item_indices, as_of):
+        """Ledger row of the last movement on or before as_of for each item index (-1 if none)."""
+        query = item_indices.astype(np.int64) * self._day_span + self._day_offset(as_of)
+        positions = np.searchsorted(self._keys, query, side='right') - 1
+        return np.where(positions >= self._item_start[item_indices], positions, -1)
+
+    def balance(self, item_code, as_of):
+        """
+        Balance of one item at the end of a date.
+
+        Returns:
+            float: Running balance, 0.0 for items without movements up to as_of
+        """
+        position = self._item_position.get(str(item_code))
+        if position is None:
+            return 0.0
+        row = self._positions(np.array([position]), as_of)[0]
+        return float(self.ledger['balance'].iat[row]) if row >= 0 else 0.0
+
+    def balances(self, as_of=None, items=None):
+        """
+        Balances of all (or the given) items at the end of a date.
+
+        Args:
+            as_of: Date; defaults to the last ledger date
+            items (iterable): Optional item codes to restrict to
+
+        Returns:
+            pd.DataFrame: item_code, balance, received_to_date, issued_to_date,
+                last_movement_date and movements_to_date, for items with movements up to as_of
+        """
+        as_of = self.ledger['date'].max() if as_of is None else as_of
+        if items is None:
+            item_indices = np.arange(len(self.items))
+        else:
+            wanted = pd.Index(normalize_item_codes(pd.Series(list(items))).dropna().unique())
+            item_indices = self.items.get_indexer(wanted)
+            item_indices = item_indices[item_indices >= 0]
+        if len(self.items) == 0 or pd.isna(as_of):
+            return pd.DataFrame(columns=['item_code', 'balance', 'received_to_date', 'issued_to_date',
+                                         'last_movement_date', 'movements_to_date'])
+
+        rows = self._positions(item_indices, as_of)
+        found = rows >= 0
+        rows, item_indices = rows[found], item_indices[found]
+        at_rows = self.ledger.iloc[rows]
+        return pd.DataFrame({
+            'item_code': self.items[item_indices],
+            'balance': at_rows['balance'].to_numpy(),
+            'received_to_date': at_rows['received_to_date'].to_numpy(),
+            'issued_to_date': at_rows['issued_to_date'].to_numpy(),
+            'last_movement_date': at_rows['date'].to_numpy(),
+            'movements_to_date': rows - self._item_start[item_indices] + 1
+        })
+
+    def item_history(self, item_code):
+        """All ledger rows of one item in date order."""
+        position = self._item_position.get(str(item_code))
+        if position is None:
+            return self.ledger.iloc[0:0]
+        start = self._item_start[position]
+        end = self._item_start[position + 1] if position + 1 < len(self.items) else len(self.ledger)
+        return self.ledger.iloc[start:end]
+
+    def count_variances(self):
+        """Stock count rows with the variance between the counted and the running balance."""
+        return self.ledger[self.ledger['is_count']]
+
+
+def build_stock_ledger(grn_df, issue_df, hr390_df=None, stock_counts=None):
+    """
+    Build the ledger from HR995 GRN/issue lines, HR390 adjustments and stock counts.
+
+    Args:
+        grn_df (pd.DataFrame): HR995 GRN lines
+        issue_df (pd.DataFrame): HR995 issue lines
+        hr390_df (pd.DataFrame): Parsed HR390 movement report (optional)
+        stock_counts (list): Optional (listing DataFrame, count date, source label) tuples
+
+    Returns:
+        StockLedger: The ledger
+    """
+    parts = [grn_movements(grn_df), issue_movements(issue_df), hr390_movements(hr390_df)]
+    for listing_df, count_date, source in stock_counts or []:
+        parts.append(stock_count_rows(listing_df, count_date, source))
+    parts = [part for part in parts if part is not None and not part.empty]
+    if not parts:
+        return StockLedger(pd.DataFrame(columns=['item_code', 'date', 'movement_type', 'source', 'reference',
+                                                 'store_no', 'quantity', 'is_count']).astype({'is_count': bool}))
+    return StockLedger(pd.concat(parts, ignore_index=True))
+
+
+def load_stock_ledger(output_folder="output"):
+    """Load the ledger sources from the output folder and build the ledger."""
+    output_folder = Path(output_folder)
+
+    def read(filename):
+        file_path = output_folder / filename
+        return pd.read_csv(file_path, low_memory=False) if file_path.exists() else None
+
+    grn_df, issue_df = read('hr995_grn.csv'), read('hr995_issue.csv')
+    stock_counts = [(read(filename), count_date, filename) for filename, count_date in STOCK_COUNT_FILES]
+    return build_stock_ledger(grn_df if grn_df is not None else pd.DataFrame(),
+                              issue_df if issue_df is not None else pd.DataFrame(),
+                              read('hr390_movement_data.csv'),
+                              [count for count in stock_counts if count[0] is not None])
+
+
+def write_stock_ledger(output_folder="output"):
+    """Build the stock ledger and save it as stock_ledger.csv."""
+    ledger = load_stock_ledger(output_folder)
+    if ledger.ledger.empty:
+        print(f"⚠️ No stock movements found in {output_folder}; stock ledger not generated")
+        return None
+    output_file = Path(output_folder) / LEDGER_FILE
+    ledger.ledger[LEDGER_COLUMNS].to_csv(output_file, index=False)
+    print(f"📄 Saved stock ledger ({len(ledger.ledger):,} rows, {len(ledger.items):,} items) to: {output_file}")
+    return ledger
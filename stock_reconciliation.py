@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Stock Roll-Forward Reconciliation (Objective 5)
+Checks yearly stock movements against the counted closing balances.
+
+For every store, item and financial year the expected closing balance is rolled
+forward from the movements:
+
+    expected closing = opening + receipts − issues + adjustments
+
+The opening is the previous year's counted closing balance; receipts, issues and
+adjustments (HR390 adjustments, rounding and write-offs) come from the same normalized
+movements as the stock ledger. The expected closing is joined against the counted
+closing in the stock listing of that year (Final stock listing 2023, Final stock list
+2324, HR450 on-hand) and the stock count variance report, and every difference is
+reported.
+
+Movements are bucketed into years with pd.cut on the closing dates, then aggregated
+with one groupby; openings, closings and reported variances are attached with joins.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from stock_ledger import grn_movements, hr390_movements, issue_movements, normalize_item_codes
+
+ROLL_FORWARD_FILE = 'objective_5_stock_roll_forward.csv'
+
+# Counted closing balances in date order: (financial year, closing date, stock listing).
+# The HR450 on-hand listing was run on 2025-07-26 and closes the 2024/25 roll-forward;
+# movements up to the run date are included.
+CLOSING_BALANCES = [
+    ('2022/23', '2023-06-30', 'individual_final_stock_listing_2023.csv'),
+    ('2023/24', '2024-06-30', 'individual_final_stock_list_2324.csv'),
+    ('2024/25', '2025-07-26', 'hr450_data.csv'),
+]
+
+# Stock count variance reports → financial year of the count they belong to
+VARIANCE_REPORTS = {'variance_report.csv': '2022/23'}
+
+# Differences smaller than this (in units) count as balanced
+QUANTITY_TOLERANCE = 0.005
+
+KEY_COLUMNS = ['financial_year', 'store_no', 'item_code']
+ROLL_FORWARD_COLUMNS = KEY_COLUMNS + [
+    'period_start', 'closing_date', 'opening_qty', 'receipts_qty', 'issues_qty', 'adjustments_qty',
+    'expected_closing_qty', 'counted_closing_qty', 'difference_qty', 'unit_price', 'difference_value',
+    'reported_shortage_qty', 'reported_surplus_qty', 'unexplained_difference_qty', 'status'
+]
+
+
+def normalize_stores(stores):
+    """
+    Return store names in the stock listing form.
+
+    The HR390 parse repeats the store name ('MAIN STORE MAIN STORE'); repeated names are
+    collapsed to one copy.
+    """
+    text = stores.astype(str).str.strip().str.upper().str.replace(r'\s+', ' ', regex=True)
+    return text.str.replace(r'^(.+) \1$', r'\1', regex=True).where(stores.notna())
+
+
+def closing_counts(listings):
+    """
+    Counted closing balances per store and item.
+
+    Args:
+        listings (list): (financial year, stock listing DataFrame) pairs
+
+    Returns:
+        pd.DataFrame: financial_year, store_no, item_code, counted_closing_qty and unit_price
+    """
+    parts = []
+    for financial_year, listing in listings:
+        if listing is None or listing.empty:
+            continue
+        parts.append(pd.DataFrame({
+            'financial_year': financial_year,
+            'store_no': normalize_stores(listing['store_no']),
+            'item_code': normalize_item_codes(listing['item_code']),
+            'counted_closing_qty': pd.to_numeric(listing['quantity'], errors='coerce'),
+            'unit_price': pd.to_numeric(listing['unit_price'], errors='coerce')
+        }))
+    if not parts:
+        return pd.DataFrame(columns=KEY_COLUMNS + ['counted_closing_qty', 'unit_price'])
+    counts = pd.concat(parts, ignore_index=True)
+    return counts.groupby(KEY_COLUMNS, as_index=False).agg(counted_closing_qty=('counted_closing_qty', 'sum'),
+                                                             unit_price=('unit_price', 'max'))
+
+
+def reported_variances(reports):
+    """
+    Shortages and surpluses reported by stock count variance reports.
+
+    Args:
+        reports (list): (financial year, variance report DataFrame) pairs
+
+    Returns:
+        pd.DataFrame: financial_year, store_no, item_code, reported_shortage_qty, reported_surplus_qty
+    """
+    parts = []
+    for financial_year, report in reports:
+        if report is None or report.empty:
+            continue
+        store_col = 'counted_store_no' if 'counted_store_no' in report.columns else 'store_no'
+        parts.append(pd.DataFrame({
+            'financial_year': financial_year,
+            'store_no': normalize_stores(report[store_col]),
+            'item_code': normalize_item_codes(report['item_code']),
+            'reported_shortage_qty': pd.to_numeric(report.get('sht_qty'), errors='coerce'),
+            'reported_surplus_qty': pd.to_numeric(report.get('surp_qty'), errors='coerce')
+        }))
+    if not parts:
+        return pd.DataFrame(columns=KEY_COLUMNS + ['reported_shortage_qty', 'reported_surplus_qty'])
+    variances = pd.concat(parts, ignore_index=True)
+    return variances.groupby(KEY_COLUMNS, as_index=False)[['reported_shortage_qty', 'reported_surplus_qty']].sum()
+
+
+def period_movements(movements, closing_dates, financial_years):
+    """
+    Sum movements per financial year, store and item.
+
+    Each movement falls in the period ending at the first closing date on or after it;
+    movements after the last closing date are not part of any period.
+
+    Returns:
+        pd.DataFrame: KEY_COLUMNS plus receipts_qty, issues_qty and adjustments_qty
+    """
+    bins = [pd.Timestamp.min] + list(closing_dates)
+    period = pd.cut(movements['date'], bins=bins, labels=financial_years, right=True)
+    quantity = movements['quantity']
+    frame = pd.DataFrame({
+        'financial_year': period.astype(object),
+        'store_no': normalize_stores(movements['store_no']),
+        'item_code': movements['item_code'],
+        'receipts_qty': quantity.where(movements['movement_type'] == 'GRN', 0.0),
+        'issues_qty': -quantity.where(movements['movement_type'] == 'ISS', 0.0),
+        'adjustments_qty': quantity.where(~movements['movement_type'].isin(['GRN', 'ISS']), 0.0)
+    })
+    frame = frame.dropna(subset=KEY_COLUMNS)
+    return frame.groupby(KEY_COLUMNS, as_index=False)[['receipts_qty', 'issues_qty', 'adjustments_qty']].sum()
+
+
+def build_roll_forward(grn_df, issue_df, hr390_df, listings, variance_reports=None, closing_dates=None):
+    """
+    Roll stock forward per store, item and financial year and reconcile against the counts.
+
+    Args:
+        grn_df (pd.DataFrame): HR995 GRN lines
+        issue_df (pd.DataFrame): HR995 issue lines
+        hr390_df (pd.DataFrame): Parsed HR390 movement report (optional)
+        listings (list): (financial year, stock listing DataFrame) pairs in date order
+        variance_reports (list): Optional (financial year, variance report DataFrame) pairs
+        closing_dates (list): Closing date per listing; defaults to CLOSING_BALANCES
+
+    Returns:
+        pd.DataFrame: Reconciliation table with ROLL_FORWARD_COLUMNS; opening_qty is missing
+            in the first year (no prior count) and counted_closing_qty for items that moved
+            but were not counted
+    """
+    financial_years = [financial_year for financial_year, _ in listings]
+    if closing_dates is None:
+        closing_lookup = {fy: date for fy, date, _ in CLOSING_BALANCES}
+        closing_dates = [closing_lookup[fy] for fy in financial_years]
+    closing_dates = [pd.Timestamp(date) for date in closing_dates]
+    period_frame = pd.DataFrame({
+        'financial_year': financial_years,
+        'period_start': [pd.NaT] + [date + pd.Timedelta(days=1) for date in closing_dates[:-1]],
+        'closing_date': closing_dates,
+        'previous_year': [None] + financial_years[:-1]
+    })
+
+    parts = [grn_movements(grn_df), issue_movements(issue_df), hr390_movements(hr390_df)]
+    parts = [part for part in parts if part is not None and not part.empty]
+    if parts:
+        movements = pd.concat(parts, ignore_index=True).dropna(subset=['item_code', 'date'])
+        moved = period_movements(movements, closing_dates, financial_years)
+    else:
+        moved = pd.DataFrame(columns=KEY_COLUMNS + ['receipts_qty', 'issues_qty', 'adjustments_qty'])
+
+    counts = closing_counts(listings)
+    openings = counts[KEY_COLUMNS + ['counted_closing_qty']].rename(
+        columns={'financial_year': 'previous_year', 'counted_closing_qty': 'opening_qty'})
+    openings = openings.merge(period_frame[['financial_year', 'previous_year']], on='previous_year')
+    openings = openings.drop(columns=['previous_year'])
+
+    # Every store/item/year with a count, an opening or a movement
+    table = counts.merge(moved, on=KEY_COLUMNS, how='outer').merge(openings, on=KEY_COLUMNS, how='outer')
+    table = table.merge(period_frame.drop(columns=['previous_year']), on='financial_year', how='left')
+    table = table.merge(reported_variances(variance_reports or []), on=KEY_COLUMNS, how='left')
+
+    for col in ['receipts_qty', 'issues_qty', 'adjustments_qty']:
+        table[col] = table[col].fillna(0.0)
+    first_year = table['financial_year'] == financial_years[0]
+    # Items absent from a count after the first year were counted as nil stock
+    table['opening_qty'] = table['opening_qty'].where(first_year, table['opening_qty'].fillna(0.0))
+    table['expected_closing_qty'] = (table['opening_qty'] + table['receipts_qty'] - table['issues_qty']
+                                     + table['adjustments_qty'])
+    table['difference_qty'] = table['counted_closing_qty'] - table['expected_closing_qty']
+    table['difference_value'] = table['difference_qty'] * table['unit_price']
+    reported_net = table['reported_surplus_qty'].fillna(0.0) - table['reported_shortage_qty'].fillna(0.0)
+    table['unexplained_difference_qty'] = table['difference_qty'] - reported_net
+
+    table['status'] = np.select(
+        [table['opening_qty'].isna(),
+         table['counted_closing_qty'].isna(),
+         table['difference_qty'].abs() <= QUANTITY_TOLERANCE,
+         table['difference_qty'] > 0],
+        ['no_opening_count', 'not_counted', 'balanced', 'surplus'],
+        default='shortage'
+    )
+    table = table.sort_values(['financial_year', 'store_no', 'item_code'], kind='stable').reset_index(drop=True)
+    return table[ROLL_FORWARD_COLUMNS]
+
+
+def summarize_roll_forward(table):
+    """
+    Year-level totals of the reconciliation.
+
+    Returns:
+        pd.DataFrame: Per financial year the item count, items per status and the absolute
+            difference quantity and value
+    """
+    status_counts = pd.crosstab(table['financial_year'], table['status'])
+    totals = table.assign(abs_difference_qty=table['difference_qty'].abs(),
+                          abs_difference_value=table['difference_value'].abs()).groupby('financial_year').agg(
+        items=('item_code', 'size'),
+        abs_difference_qty=('abs_difference_qty', 'sum'),
+        abs_difference_value=('abs_difference_value', 'sum'))
+    return totals.join(status_counts).reset_index()
+
+
+def load_roll_forward_inputs(output_folder="output"):
+    """Read the roll-forward inputs from the output folder (missing files are skipped)."""
+    output_folder = Path(output_folder)
+
+    def read(filename):
+        file_path = output_folder / filename
+        return pd.read_csv(file_path, low_memory=False) if file_path.exists() else None
+
+    listings, closing_dates = [], []
+    for financial_year, closing_date, filename in CLOSING_BALANCES:
+        listing = read(filename)
+        if listing is not None:
+            listings.append((financial_year, listing))
+            closing_dates.append(closing_date)
+    variance_reports = [(financial_year, read(filename)) for filename, financial_year in VARIANCE_REPORTS.items()]
+    return {
+        'grn_df': read('hr995_grn.csv'),
+        'issue_df': read('hr995_issue.csv'),
+        'hr390_df': read('hr390_movement_data.csv'),
+        'listings': listings,
+        'variance_reports': [report for report in variance_reports if report[1] is not None],
+        'closing_dates': closing_dates
+    }
+
+
+def write_stock_roll_forward(output_folder="output"):
+    """
+    Build the Objective 5 roll-forward reconciliation and save it.
+
+    Returns:
+        pd.DataFrame or None: The reconciliation table, or None without stock listings
+    """
+    inputs = load_roll_forward_inputs(output_folder)
+    if not inputs['listings']:
+        print(f"⚠️ No stock listings found in {output_folder}; roll-forward reconciliation not generated")
+        return None
+    for name in ('grn_df', 'issue_df'):
+        if inputs[name] is None:
+            inputs[name] = pd.DataFrame()
+    table = build_roll_forward(**inputs)
+    output_file = Path(output_folder) / ROLL_FORWARD_FILE
+    table.to_csv(output_file, index=False)
+    print(f"📄 Saved stock roll-forward reconciliation ({len(table):,} rows) to: {output_file}")
+    return table
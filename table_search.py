@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Table Search Index
+Per-table search index and server-side pagination for the dashboard Data Tables tab.
+
+The index is built once per data snapshot (file modification time and size) by
+concatenating every text column of a table into a single lowercase search column.
+Searches then run one substring scan over that column instead of stringifying every
+text column on each keystroke, and only the requested page of rows is returned.
+"""
+
+import math
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Unit separator keeps a search term from matching across column boundaries
+COLUMN_SEPARATOR = '\x1f'
+
+# Page sizes offered by the Data Tables tab
+PAGE_SIZE_OPTIONS = [50, 100, 250, 500, 1000]
+
+
+def file_snapshot(file_path):
+    """Return a token identifying the current version of a data file.
+
+    The token changes whenever the processor rewrites the file, so it can be used
+    as a cache key alongside the filename.
+    """
+    file_path = Path(file_path)
+    if not file_path.exists():
+        return None
+    stat = file_path.stat()
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class TableSearchIndex:
+    """Precomputed lowercase search column over the text columns of one table."""
+
+    def __init__(self, df, max_cached_terms=32):
+        """
+        Build the search index for a table.
+
+        Args:
+            df (pd.DataFrame): Table to index
+            max_cached_terms (int): Number of recent search results to keep
+        """
+        self.row_count = len(df)
+        self.text_columns = list(df.select_dtypes(include=['object', 'string']).columns)
+        self.max_cached_terms = max_cached_terms
+        # The index is shared across sessions; the narrowing cache is guarded by a lock
+        self._results = {}
+        self._lock = threading.Lock()
+
+        if self.text_columns and self.row_count > 0:
+            search_text = None
+            for col in self.text_columns:
+                col_text = df[col].astype(str)
+                search_text = col_text if search_text is None else search_text + COLUMN_SEPARATOR + col_text
+            self.search_text = search_text.str.lower().reset_index(drop=True)
+        else:
+            self.search_text = None
+
+    def search(self, term):
+        """
+        Find the rows whose text columns contain the search term.
+
+        Args:
+            term (str): Case-insensitive literal search term
+
+        Returns:
+            np.ndarray: Positional row numbers of matching rows (all rows for an empty term)
+        """
+        term = (term or '').strip().lower()
+        if not term:
+            return np.arange(self.row_count)
+        if self.search_text is None:
+            return np.array([], dtype=np.int64)
+
+        with self._lock:
+            if term in self._results:
+                return self._results[term]
+
+            # A longer term can only match rows the shorter cached term matched
+            candidates = None
+            for cached_term, cached in self._results.items():
+                if cached_term in term and (candidates is None or len(cached) < len(candidates)):
+                    candidates = cached
+
+        if candidates is None:
+            mask = self.search_text.str.contains(term, regex=False, na=False).to_numpy()
+            positions = np.flatnonzero(mask)
+        else:
+            subset = self.search_text.iloc[candidates]
+            mask = subset.str.contains(term, regex=False, na=False).to_numpy()
+            positions = candidates[mask]
+
+        with self._lock:
+            if term not in self._results and len(self._results) >= self.max_cached_terms:
+                self._results.pop(next(iter(self._results)))
+            self._results[term] = positions
+        return positions
+
+
+def page_count(total_rows, page_size):
+    """Return the number of pages needed to show total_rows (at least one)."""
+    return max(1, math.ceil(total_rows / page_size))
+
+
+def get_page(df, page, page_size):
+    """
+    Slice one page of rows from a table.
+
+    Args:
+        df (pd.DataFrame): Filtered table
+        page (int): 1-based page number (clamped to the valid range)
+        page_size (int): Rows per page
+
+    Returns:
+        pd.DataFrame: Rows belonging to the requested page
+    """
+    page = min(max(1, int(page)), page_count(len(df), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[start:start + page_size]
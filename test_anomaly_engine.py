@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+Test the anomaly scoring engine: thresholds, scores, severities and the supplier filter.
+"""
+
+import numpy as np
+import pandas as pd
+
+from anomaly_engine import (detect_grn_issue_ratios, detect_high_value_grns, detect_negative_stock,
+                            detect_weekend_activity, filter_supplier_anomalies, iqr_upper_fence,
+                            prepare_anomaly_inputs, run_anomaly_detectors, score_severity)
+from stock_ledger import build_stock_ledger
+
+DETECTORS = ['high_value_grn', 'weekend_activity', 'grn_issue_ratio']
+
+
+def build_inputs(with_ledger=False):
+    """
+    GRN amounts 10-200 (IQR fence R70); G1 is a two-line Saturday GRN and R1 a Sunday issue.
+    Item X is received 10 and issued 100 (under-stocked); Z is received 60 and issued 10.
+    """
+    grn = pd.DataFrame({
+        'grn_no': ['G1', 'G1', 'G2', 'G3', 'G4'],
+        'item_no': ['X', 'Y', 'X', 'Z', 'Y'],
+        'supplier_name': ['ACME', 'ACME', 'BETA', 'ACME HOLDINGS', 'BETA'],
+        'date': ['2024-01-06', '2024-01-06', '2024-01-08', '2024-01-09', '2024-01-10'],
+        'quantity': [5, 5, 5, 60, 5],
+        'nett_grn_amt': [10.0, 20.0, 30.0, 40.0, 200.0]
+    })
+    issue = pd.DataFrame({
+        'requisition_no': ['R1', 'R2', 'R3'],
+        'item_code': ['X', 'Z', 'Y'],
+        'date': ['2024-01-07', '2024-01-09', '2024-01-09'],
+        'quantity': [100, 10, 10],
+        'issue_cost': [1.0, 1.0, 1.0]
+    })
+    ledger = build_stock_ledger(grn, issue) if with_ledger else None
+    return prepare_anomaly_inputs(grn, issue, ledger)
+
+
+def test_iqr_fence_and_score():
+    """Lines above Q3 + 1.5 × IQR are flagged with score amount / fence."""
+    print("🧪 TESTING ANOMALY ENGINE")
+    assert iqr_upper_fence([10, 20, 30, 40, 200, np.nan]) == 70
+
+    hits = detect_high_value_grns(build_inputs())
+    assert hits['record_id'].tolist() == ['G4']
+    assert hits['threshold'].tolist() == [70.0]
+    assert round(hits['score'].iloc[0], 6) == round(200 / 70, 6)
+    assert hits['severity'].tolist() == ['medium']
+    print("  ✅ IQR fence and exceedance score correct")
+
+
+def test_severity_bands():
+    """Scores of 3 and above are high, 1.5 and above medium, the rest low."""
+    assert score_severity(np.array([3.0, 2.99, 1.5, 1.49, 1.0])).tolist() == \
+        ['high', 'medium', 'medium', 'low', 'low']
+
+
+def test_weekend_activity_per_document():
+    """Weekend GRN lines collapse to one row per GRN document; weekday documents are not flagged."""
+    weekend = detect_weekend_activity(build_inputs()).set_index('record_id')
+
+    assert sorted(weekend.index) == ['G1', 'R1']
+    assert weekend.loc['G1', 'value'] == 30.0
+    assert weekend.loc['G1', 'evidence'] == 'GRN dated Saturday 2024-01-06, 2 lines'
+    assert weekend.loc['G1', 'supplier_name'] == 'ACME'
+    assert weekend.loc['R1', 'record_type'] == 'Issue'
+    assert (weekend['severity'] == 'low').all()
+    print("  ✅ Weekend activity grouped per document")
+
+
+def test_grn_issue_ratios():
+    """Under-stocked items score ratio threshold / ratio, so a smaller ratio scores higher."""
+    ratios = detect_grn_issue_ratios(build_inputs()).set_index('record_id')
+
+    assert ratios.loc['X', 'detector'] == 'under_stocked_item'
+    assert round(ratios.loc['X', 'value'], 6) == 0.1
+    assert round(ratios.loc['X', 'score'], 6) == 5.0
+    assert ratios.loc['X', 'severity'] == 'high'
+    assert ratios.loc['Z', 'detector'] == 'over_stocked_item'
+    assert round(ratios.loc['Z', 'score'], 6) == 1.2
+    assert 'Y' not in ratios.index
+    print("  ✅ Over- and under-stocked scores correct")
+
+
+def test_negative_stock_from_ledger():
+    """Items with a negative ledger balance are high-severity stock anomalies."""
+    assert run_anomaly_detectors(build_inputs(), ['negative_stock']).empty
+
+    negative = detect_negative_stock(build_inputs(with_ledger=True))
+    assert negative['record_id'].tolist() == ['X']
+    assert negative['value'].tolist() == [-90.0]
+    assert negative['severity'].tolist() == ['high']
+    assert negative['date'].tolist() == [pd.Timestamp('2024-01-08')]
+    print("  ✅ Negative stock read from the ledger")
+
+
+def test_ordering_and_supplier_filter():
+    """Rows sort by severity then score; item rows list every supplier and filter on whole names."""
+    anomalies = run_anomaly_detectors(build_inputs(), DETECTORS)
+    assert list(zip(anomalies['detector'], anomalies['record_id'])) == [
+        ('under_stocked_item', 'X'), ('high_value_grn', 'G4'), ('over_stocked_item', 'Z'),
+        ('weekend_activity', 'G1'), ('weekend_activity', 'R1')]
+
+    suppliers = anomalies.set_index('record_id')['suppliers']
+    assert suppliers['X'] == 'ACME | BETA'
+    assert suppliers['Z'] == 'ACME HOLDINGS'
+    # Issue rows have no supplier of their own, and issued item Y is not an item-level row
+    assert pd.isna(suppliers['R1'])
+
+    assert sorted(filter_supplier_anomalies(anomalies, 'ACME')['record_id']) == ['G1', 'X']
+    assert sorted(filter_supplier_anomalies(anomalies, 'BETA')['record_id']) == ['G4', 'X']
+    assert filter_supplier_anomalies(anomalies, 'ACME HOLDINGS')['record_id'].tolist() == ['Z']
+    print("  ✅ Ordering and supplier filter correct")
+
+
+if __name__ == "__main__":
+    test_iqr_fence_and_score()
+    test_severity_bands()
+    test_weekend_activity_per_document()
+    test_grn_issue_ratios()
+    test_negative_stock_from_ledger()
+    test_ordering_and_supplier_filter()
+    print("\n✅ Anomaly engine tests completed!")
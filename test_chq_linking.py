@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test the INV-CHQ payment pairing and CHQ inheritance of the HR185 transaction trail.
+"""
+
+import numpy as np
+import pandas as pd
+
+from chq_linking import build_enhanced_transaction_trail, identify_inv_chq_payment_pairs, normalize_reference_series
+
+
+def build_hr185():
+    """HR185 transactions covering direct, inherited, unpaired and standalone cases."""
+    rows = [
+        # reference, supplier_code, supplier_name, transaction_date, transaction_type, amount
+        ('0001001', 'S1', 'SUPPLIER 1', '2024-01-05', 'INV', 100.0),
+        ('900001', 'S1', 'SUPPLIER 1', '2024-01-05', 'CHQ', 100.004),
+        ('4004', 'S1', 'SUPPLIER 1', '2024-01-05', 'INV', 100.5),
+        ('2002', 'S1', 'SUPPLIER 1', '2024-01-06', 'INV', 50.0),
+        ('900002', 'S1', 'SUPPLIER 1', '2024-01-06', 'CHQ', 50.0),
+        ('900003', 'S2', 'SUPPLIER 2', '2024-01-05', 'CHQ', 100.0),
+        ('3003', 'S1', 'SUPPLIER 1', '2024-01-07', 'CHQ', 20.0),
+        ('7007', 'S1', 'SUPPLIER 1', '2024-01-07', 'JNL', 5.0),
+    ]
+    return pd.DataFrame(rows, columns=['reference', 'supplier_code', 'supplier_name', 'transaction_date',
+                                       'transaction_type', 'amount'])
+
+
+def build_grn():
+    """GRN lines as read from CSV: invoice numbers are floats, one is missing."""
+    return pd.DataFrame({
+        'inv_no': [1001.0, 1001.0, 3003.0, np.nan],
+        'voucher': ['V1', 'V2', 'V3', 'V4'],
+        'supplier_name': ['SUPPLIER 1', 'SUPPLIER 1', 'SUPPLIER 1', 'SUPPLIER 9']
+    })
+
+
+def test_normalize_reference_series():
+    """Leading zeros and float suffixes are dropped; text is stripped; missing becomes ''."""
+    print("🧪 TESTING CHQ LINKING")
+    assert normalize_reference_series(pd.Series(['0001015775', ' 1015775 ', 'ABC123', None, '-007'])).tolist() == \
+        ['1015775', '1015775', 'ABC123', '', '-7']
+    assert normalize_reference_series(pd.Series([1015775.0, np.nan, 12.5])).tolist() == ['1015775', '', '12.5']
+    print("  ✅ References normalized")
+
+
+def test_inv_chq_pairs():
+    """A CHQ pays an INV of the same supplier and date whose amount agrees within one cent."""
+    pairs = identify_inv_chq_payment_pairs(build_hr185())
+
+    assert list(zip(pairs['inv_reference'], pairs['chq_reference'])) == [('0001001', '900001'), ('2002', '900002')]
+    assert pairs['inv_ref_normalized'].tolist() == ['1001', '2002']
+    assert pairs['amount'].tolist() == [100.0, 50.0]
+    assert identify_inv_chq_payment_pairs(build_hr185().iloc[0:0]).empty
+    print("  ✅ INV-CHQ pairs identified")
+
+
+def test_enhanced_transaction_trail():
+    """Unmatched CHQs inherit the GRN match of the INV they pay; others keep their own outcome."""
+    trail = build_enhanced_transaction_trail(build_hr185(), build_grn()).set_index('hr185_reference')
+
+    assert trail['grn_match_type'].to_dict() == {
+        '0001001': 'direct', '900001': 'inherited_from_inv', '4004': 'none', '2002': 'none',
+        '900002': 'none', '900003': 'none', '3003': 'direct', '7007': 'none'}
+    assert trail['grn_match_count'].to_dict() == {
+        '0001001': 2, '900001': 2, '4004': 0, '2002': 0, '900002': 0, '900003': 0, '3003': 1, '7007': 0}
+
+    inherited = trail.loc['900001']
+    assert not inherited['has_direct_grn_match'] and inherited['has_inherited_grn_match']
+    assert inherited['linking_method'] == 'inv_chq_inheritance'
+    assert inherited['paired_inv_reference'] == '0001001'
+    # The first GRN line of the paired invoice supplies the details
+    assert (inherited['grn_voucher'], inherited['grn_inv_no']) == ('V1', 1001.0)
+    assert trail.loc['3003', 'grn_voucher'] == 'V3'
+    assert pd.isna(trail.loc['900003', 'paired_inv_reference'])
+
+    assert trail['match_notes'].to_dict() == {
+        '0001001': 'Invoice transaction',
+        '900001': 'Payment for INV 0001001',
+        '4004': 'Invoice transaction',
+        '2002': 'Invoice transaction',
+        '900002': 'Payment for INV 2002 (INV also unmatched)',
+        '900003': 'Standalone CHQ transaction',
+        '3003': 'CHQ with direct GRN match',
+        '7007': 'JNL transaction'}
+    print("  ✅ Transaction trail and CHQ inheritance correct")
+
+
+if __name__ == "__main__":
+    test_normalize_reference_series()
+    test_inv_chq_pairs()
+    test_enhanced_transaction_trail()
+    print("\n✅ CHQ linking tests completed!")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the GRN document chain (Objective 4): payment-source precedence and financial-year partitions.
+"""
+
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+
+from document_chain import (UNKNOWN_PARTITION, build_document_chain, chain_partition_path, chain_partitions,
+                            financial_year_labels, load_chain_partition, write_document_chain)
+
+
+def build_sources():
+    """
+    G1 has a voucher, a cheque in HR185 and a paired invoice; G2 only the cheque and the pair;
+    G3 only the paired invoice; G4 an unpaid invoice; G5 has no parseable date.
+    """
+    grn = pd.DataFrame({
+        'grn_no': ['G1', 'G1', 'G2', 'G3', 'G4', 'G5'],
+        'item_no': ['A', 'B', 'A', 'A', 'A', 'A'],
+        'date': ['2023-06-30', '2023-06-30', '2023-07-01', '2024-03-01', '2024-07-15', 'not a date'],
+        'quantity': [2, 3, 1, 1, 1, 1],
+        'return_qty': [1, 0, 0, 0, 0, 0],
+        'nett_grn_amt': [40.0, 60.0, 200.0, 300.0, 400.0, 10.0],
+        'supplier': ['S1'] * 6,
+        'supplier_name': ['SUPPLIER 1'] * 6,
+        'order_no': ['P1', 'P1', 'P2', 'P3', 'P4', 'P5'],
+        'store_no': ['01'] * 6,
+        'inv_no': ['5001', '5001', '5002', '5003', '5004', None],
+        'voucher': ['1001', '1001', '1999', None, None, None],
+        'cheque_no': ['7001', '7001', '7002', None, None, None]
+    })
+    voucher = pd.DataFrame({'voucher_no': ['1001'], 'cheq_amt': [100.0], 'cheq/acb/bdb/ele_no': ['8001'],
+                            'cheq_date': ['2023-07-15'], 'payee_ref': ['S1']})
+    hr185 = pd.DataFrame([
+        ('5001', '2023-07-05', 'INV', 100.0), ('9001', '2023-07-05', 'CHQ', 100.0), ('7001', '2023-07-10', 'CHQ', 100.0),
+        ('5002', '2023-07-06', 'INV', 200.0), ('9002', '2023-07-06', 'CHQ', 200.0), ('7002', '2023-07-20', 'CHQ', 200.0),
+        ('5003', '2024-03-05', 'INV', 300.0), ('9003', '2024-03-05', 'CHQ', 300.0),
+        ('5004', '2024-07-20', 'INV', 400.0),
+    ], columns=['reference', 'transaction_date', 'transaction_type', 'amount'])
+    hr185 = hr185.assign(supplier_code='S1', supplier_name='SUPPLIER 1')
+    return grn, voucher, hr185
+
+
+def test_financial_year_labels():
+    """July-June years share the stock roll-forward labels; missing dates stay missing."""
+    print("🧪 TESTING GRN DOCUMENT CHAIN")
+    labels = financial_year_labels(pd.to_datetime(pd.Series(['2023-06-30', '2023-07-01', None])))
+    assert labels.iloc[:2].tolist() == ['2022/23', '2023/24']
+    assert pd.isna(labels.iloc[2])
+    assert chain_partition_path('output', '2023/24').name == 'document_chain_2023-24.csv'
+
+
+def test_payment_source_precedence():
+    """The voucher pays first, then the GRN cheque found in HR185, then the CHQ paying the invoice."""
+    chain = build_document_chain(*build_sources()).set_index('grn_no')
+
+    assert chain['payment_source'].to_dict() == {
+        'G1': 'voucher', 'G2': 'hr185_cheque', 'G3': 'hr185_inv_pair', 'G4': None, 'G5': None}
+    assert chain['payment_cheque'].to_dict() == {'G1': '8001', 'G2': '7002', 'G3': '9003', 'G4': None, 'G5': None}
+    assert chain.loc['G1', 'payment_date'] == pd.Timestamp('2023-07-15')
+    assert chain.loc['G2', 'payment_date'] == pd.Timestamp('2023-07-20')
+    assert chain.loc['G3', 'payment_date'] == pd.Timestamp('2024-03-05')
+    assert chain['chain_status'].to_dict() == {
+        'G1': 'paid', 'G2': 'paid', 'G3': 'paid', 'G4': 'invoiced', 'G5': 'received'}
+
+    # Lines collapse per document, net of returns
+    assert chain.loc['G1', 'lines'] == 2
+    assert chain.loc['G1', 'quantity'] == 4
+    assert chain.loc['G1', 'grn_amount'] == 100
+    assert chain['financial_year'].iloc[:4].tolist() == ['2022/23', '2023/24', '2023/24', '2024/25']
+    assert pd.isna(chain.loc['G5', 'financial_year'])
+    print("  ✅ Payment source precedence correct")
+
+
+def test_partitions_written_per_year():
+    """Undated GRNs go to the 'unknown' partition and partitions of vanished years are removed."""
+    grn, voucher, hr185 = build_sources()
+    with tempfile.TemporaryDirectory() as folder:
+        grn.to_csv(Path(folder) / 'hr995_grn.csv', index=False)
+        voucher.to_csv(Path(folder) / 'hr995_voucher.csv', index=False)
+        hr185.to_csv(Path(folder) / 'individual_hr185_transactions.csv', index=False)
+        stale = chain_partition_path(folder, '2019/20')
+        stale.parent.mkdir()
+        stale.write_text('financial_year,grn_no\n2019/20,G0\n')
+
+        write_document_chain(folder)
+
+        assert not stale.exists()
+        assert chain_partitions(folder) == ['2022/23', '2023/24', '2024/25', UNKNOWN_PARTITION]
+        assert load_chain_partition(folder, '2023/24')['grn_no'].tolist() == ['G2', 'G3']
+        assert load_chain_partition(folder, UNKNOWN_PARTITION)['grn_no'].tolist() == ['G5']
+        assert load_chain_partition(folder, '2019/20') is None
+    print("  ✅ Partitions written per financial year")
+
+
+if __name__ == "__main__":
+    test_financial_year_labels()
+    test_payment_source_precedence()
+    test_partitions_written_per_year()
+    print("\n✅ Document chain tests completed!")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test the canonical invoice keys and duplicate-invoice grouping.
+"""
+
+import pandas as pd
+
+from duplicate_invoices import canonical_invoice_numbers, detect_duplicate_invoices, grn_invoice_records
+
+
+def test_canonical_invoice_numbers():
+    """Prefixes, punctuation, case, leading zeros and float suffixes do not change the key."""
+    print("🧪 TESTING CANONICAL INVOICE KEYS")
+    raw = pd.Series(['INV-000123', 'inv 123', '0000123', '123.0', 123.0, 'Tax Invoice 123', 'INVNO: 123',
+                     'No. 123'])
+    assert canonical_invoice_numbers(raw).tolist() == ['123'] * len(raw)
+
+    # Prefix words are only dropped in front of the number; other letters are kept
+    raw = pd.Series(['INVOICE', 'A-00123', '123A', None, ''])
+    assert canonical_invoice_numbers(raw).tolist() == ['INVOICE', 'A00123', '123A', '', '']
+    print("  ✅ Canonical keys correct")
+
+
+def records(rows):
+    """Invoice records from (source, record_id, supplier, reference, date, amount) tuples."""
+    frame = pd.DataFrame(rows, columns=['source', 'record_id', 'supplier', 'reference', 'date', 'amount'])
+    return frame.assign(family='invoice_register', supplier_name='SUPPLIER ' + frame['supplier'],
+                        date=pd.to_datetime(frame['date']))
+
+
+def test_duplicate_grouping():
+    """Records group on (canonical key, amount); one supplier's GRN + HR185 pair is not a duplicate."""
+    members = detect_duplicate_invoices(records([
+        # Same number and amount under two suppliers, written differently
+        ('HR995GRN.inv_no', 'G1', '10', 'INV-004567', '2023-05-01', 1500.0),
+        ('HR995GRN.inv_no', 'G2', '20', '4567', '2023-08-01', 1500.0),
+        # The GRN invoice and its HR185 INV row for the same supplier
+        ('HR995GRN.inv_no', 'G3', '30', '7788', '2023-05-01', 900.0),
+        ('HR185.INV', '7788', '30', '7788', '2023-05-02', 900.0),
+        # Same number, different amount: a different invoice
+        ('HR995GRN.inv_no', 'G4', '40', '4567', '2023-05-01', 1499.0),
+        # Keys shorter than MIN_KEY_LENGTH are too generic
+        ('HR995GRN.inv_no', 'G5', '50', 'INV 12', '2023-05-01', 10.0),
+        ('HR995GRN.inv_no', 'G6', '60', '12', '2023-05-01', 10.0),
+    ]))
+
+    assert members['group_id'].nunique() == 1
+    assert sorted(members['record_id']) == ['G1', 'G2']
+    group = members.iloc[0]
+    assert group['canonical_key'] == '4567'
+    assert group['cross_supplier'] and group['format_variants'] and group['cross_period']
+    assert not group['repeated_document']
+    assert round(group['score'], 6) == 0.7
+    print("  ✅ Duplicate candidates grouped and scored")
+
+
+def test_grn_invoice_records():
+    """One record per invoice number and supplier, listing each of its GRNs once."""
+    grn = pd.DataFrame({
+        'grn_no': ['G1', 'G1', 'G2', 'G3', 'G4'],
+        'inv_no': ['INV1', 'INV1', 'INV1', 'INV2', None],
+        'supplier': [10.0, 10.0, 10.0, 10.0, 10.0],
+        'supplier_name': ['S10'] * 5,
+        'date': ['2023-05-02', '2023-05-02', '2023-05-01', '2023-05-03', '2023-05-04'],
+        'nett_grn_amt': [100.0, 50.0, 25.0, 70.0, 5.0]
+    })
+    records = grn_invoice_records(grn).set_index('reference')
+
+    assert records['record_id'].to_dict() == {'INV1': 'G1, G2', 'INV2': 'G3'}
+    assert records.loc['INV1', 'amount'] == 175.0
+    assert records.loc['INV1', 'date'] == pd.Timestamp('2023-05-01')
+    print("  ✅ GRN invoice records collapsed per invoice and supplier")
+
+
+if __name__ == "__main__":
+    test_canonical_invoice_numbers()
+    test_duplicate_grouping()
+    test_grn_invoice_records()
+    print("\n✅ Duplicate invoice tests completed!")
@@ -22,34 +22,40 @@ def test_grn_transaction_analysis():
         dashboard = AdvancedStockDashboard()
         print("✅ Dashboard class imported successfully")
         
+        # Test normalize_references
+        print("\n🔧 Testing normalize_references...")
+        test_cases = pd.Series([
+            '0001015775',  # PDF format with leading zeros
+            '1015775',     # GRN format without leading zeros
+            1015775,       # Numeric format
+            None,          # None value
+            'abc123'       # Non-numeric reference
+        ], dtype=object)
+        normalized = dashboard.normalize_references(test_cases)
+        for test_ref, value in zip(test_cases, normalized):
+            print(f"   {test_ref} → {value}")
+        assert normalized.iloc[:3].tolist() == ['1015775'] * 3
+        assert pd.isna(normalized.iloc[3])
+        assert normalized.iloc[4] == 'ABC123'
+        
         # Load required data
         print("\n📊 Loading data files...")
+        missing = [f for f in ('output/hr995_grn.csv', 'output/hr995_voucher.csv') if not os.path.exists(f)]
+        if missing:
+            print(f"⚠️  {', '.join(missing)} not found - skipping data checks")
+            return
+        
         grn_df = pd.read_csv('output/hr995_grn.csv')
         voucher_df = pd.read_csv('output/hr995_voucher.csv')
         print(f"✅ GRN data loaded: {len(grn_df):,} records")
         print(f"✅ Voucher data loaded: {len(voucher_df):,} records")
         
-        # Test normalize_reference function
-        print("\n🔧 Testing normalize_reference function...")
-        test_cases = [
-            '0001015775',  # PDF format with leading zeros
-            '1015775',     # GRN format without leading zeros
-            1015775,       # Numeric format
-            None,          # None value
-            '',            # Empty string
-            'ABC123'       # Non-numeric reference
-        ]
-        
-        for test_ref in test_cases:
-            normalized = dashboard.normalize_reference(test_ref)
-            print(f"   {test_ref} → {normalized}")
-        
         # Test data normalization
         print("\n🔄 Testing data normalization...")
         
         # Test GRN data normalization
         grn_test = grn_df.head().copy()
-        grn_test['inv_no_normalized'] = grn_test['inv_no'].apply(dashboard.normalize_reference)
+        grn_test['inv_no_normalized'] = dashboard.normalize_references(grn_test['inv_no'])
         grn_test['voucher_normalized'] = grn_test['voucher'].apply(lambda x: str(x).strip().upper() if pd.notna(x) else x)
         print(f"✅ GRN normalization successful: {len(grn_test)} test records")
         
@@ -63,12 +69,12 @@ def test_grn_transaction_analysis():
         pdf_file = 'output/individual_hr185_transactions.csv'
         if os.path.exists(pdf_file):
             pdf_df = pd.read_csv(pdf_file)
-            pdf_df['reference_normalized'] = pdf_df['reference'].apply(dashboard.normalize_reference)
+            pdf_df['reference_normalized'] = dashboard.normalize_references(pdf_df['reference'])
             print(f"✅ PDF data loaded and normalized: {len(pdf_df):,} records")
             
             # Test PDF-GRN linkage
             grn_analysis = grn_df.copy()
-            grn_analysis['inv_no_normalized'] = grn_analysis['inv_no'].apply(dashboard.normalize_reference)
+            grn_analysis['inv_no_normalized'] = dashboard.normalize_references(grn_analysis['inv_no'])
             
             pdf_linked_grns = grn_analysis[grn_analysis['inv_no_normalized'].isin(pdf_df['reference_normalized'])]
             linkage_rate = len(pdf_linked_grns) / len(grn_analysis) * 100
@@ -97,15 +103,15 @@ def test_grn_transaction_analysis():
         print("✅ GRN-Transaction Analysis is now working correctly")
         print("✅ Dashboard is ready for use")
         
-        return True
-        
     except Exception as e:
         print(f"\n❌ Test failed with error: {e}")
         import traceback
         print("\nFull error traceback:")
         traceback.print_exc()
-        return False
+        raise
 
 if __name__ == "__main__":
-    success = test_grn_transaction_analysis()
-    sys.exit(0 if success else 1)
+    try:
+        test_grn_transaction_analysis()
+    except Exception:
+        sys.exit(1)
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Test the price history spike rule, the previous-price windows and as-of price lookups.
+"""
+
+import numpy as np
+import pandas as pd
+
+from price_history import PriceHistory, grn_prices, previous_windows
+
+
+def build_history(series, quantity=5, **options):
+    """PriceHistory from {item: [unit prices]}; each item's prices fall on consecutive days."""
+    rows = []
+    for item, (start, prices) in series.items():
+        for day, price in enumerate(prices):
+            rows.append((item, pd.Timestamp(start) + pd.Timedelta(days=day), f'{item}{day}', price))
+    grn = pd.DataFrame(rows, columns=['item_no', 'date', 'grn_no', 'unit_price'])
+    grn = grn.assign(supplier_name='SUPPLIER', quantity=quantity, nett_grn_amt=grn['unit_price'] * quantity)
+    return PriceHistory(grn_prices(grn.drop(columns='unit_price')), **options)
+
+
+def last_rows(history):
+    """The last observation of every item."""
+    return history.history.groupby('item_code').tail(1).set_index('item_code')
+
+
+def test_rise_and_drop_score_alike():
+    """Doubling and halving the median price give the same |robust_z| and are both spikes."""
+    print("🧪 TESTING PRICE HISTORY")
+    last = last_rows(build_history({'UP': ('2024-01-01', [10, 10, 10, 20]),
+                                    'DOWN': ('2024-01-01', [10, 10, 10, 5])}))
+
+    assert round(last.loc['UP', 'robust_z'], 9) == round(-last.loc['DOWN', 'robust_z'], 9)
+    assert round(last.loc['UP', 'robust_z'], 6) == round(np.log(2) / np.log(1.1), 6)
+    assert last['is_spike'].all()
+    assert last['spike_direction'].to_dict() == {'DOWN': 'down', 'UP': 'up'}
+    print("  ✅ Rises and drops score symmetrically")
+
+
+def test_min_history():
+    """An observation needs min_history previous prices before it can be a spike."""
+    series = {'A': ('2024-01-01', [10, 10, 30])}
+    assert not build_history(series).history['is_spike'].any()
+    assert build_history(series, min_history=2).history['is_spike'].tolist() == [False, False, True]
+
+
+def test_lump_sum_items_never_flagged():
+    """Items bought almost only in quantities of 1 are lump-sum codes and are not flagged."""
+    series = {'SERVICE': ('2024-01-01', [10, 10, 10, 40])}
+    lump_sum = build_history(series, quantity=1).history
+    assert lump_sum['lump_sum'].all()
+    assert not lump_sum['is_spike'].any()
+
+    assert build_history(series, quantity=5).history['is_spike'].tolist() == [False, False, False, True]
+    print("  ✅ Minimum history and lump-sum exclusion respected")
+
+
+def test_minimum_price_change():
+    """A 1.4x price is past the z threshold but below the 1.5x minimum change; 1.6x is a spike."""
+    last = last_rows(build_history({'SMALL': ('2024-01-01', [10, 10, 10, 14]),
+                                    'LARGE': ('2024-01-01', [10, 10, 10, 16])}))
+
+    assert last.loc['SMALL', 'robust_z'] > 3.5
+    assert not last.loc['SMALL', 'is_spike']
+    assert last.loc['LARGE', 'is_spike']
+    print("  ✅ Minimum price change enforced")
+
+
+def test_previous_windows_stay_within_items():
+    """Windows only hold earlier prices of the same item."""
+    windows = previous_windows(np.array([1.0, 2.0, 3.0, 10.0, 20.0]), np.array([0, 1, 2, 0, 1]), 2)
+    np.testing.assert_array_equal(windows, [[np.nan, np.nan], [1, np.nan], [2, 1], [np.nan, np.nan],
+                                            [10, np.nan]])
+
+    history = build_history({'A': ('2024-01-01', [10, 10, 10]), 'B': ('2024-01-05', [50, 50])}).history
+    first_b = history[history['item_code'] == 'B'].iloc[0]
+    assert first_b['history_count'] == 0
+    assert pd.isna(first_b['rolling_median'])
+    print("  ✅ Previous-price windows do not cross items")
+
+
+def test_price_as_of():
+    """As-of lookups return the last price on or before the date, NaN before the first."""
+    history = build_history({'A': ('2024-01-01', [10, 11, 12]), 'B': ('2024-02-01', [50, 55])})
+
+    assert np.isnan(history.price_as_of('A', '2023-12-31'))
+    assert history.price_as_of('A', '2024-01-01') == 10
+    assert history.price_as_of('A', '2024-01-02 18:00') == 11
+    assert history.price_as_of('A', '2030-01-01') == 12
+    # B has no price before 1 February, although A does
+    assert np.isnan(history.price_as_of('B', '2024-01-15'))
+    assert np.isnan(history.price_as_of('MISSING', '2024-01-15'))
+
+    prices = history.prices_as_of('2024-01-15').set_index('item_code')
+    assert prices['unit_price'].to_dict() == {'A': 12}
+    prices = history.prices_as_of().set_index('item_code')
+    assert prices['unit_price'].to_dict() == {'A': 12, 'B': 55}
+    print("  ✅ As-of price lookups correct")
+
+
+if __name__ == "__main__":
+    test_rise_and_drop_score_alike()
+    test_min_history()
+    test_lump_sum_items_never_flagged()
+    test_minimum_price_change()
+    test_previous_windows_stay_within_items()
+    test_price_as_of()
+    print("\n✅ Price history tests completed!")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test the FIFO allocation of requisitions to GRNs (Objective 2).
+"""
+
+import pandas as pd
+
+from requisition_matching import OPENING_STOCK, match_requisitions
+
+
+def run_matching():
+    """
+    Item X: GRNs of 5 + 5, issues of 3, 4 and 4 (one unit more than received).
+    Item Y: issued before its only GRN.
+    """
+    grn = pd.DataFrame({
+        'item_no': ['X', 'X', 'Y', 'X'],
+        'grn_no': ['G1', 'G2', 'G3', 'G9'],
+        'date': ['2024-01-01', '2024-01-10', '2024-01-15', '2024-01-02'],
+        'quantity': [5, 5, 2, 7],
+        'supplier_name': ['S1', 'S2', 'S3', 'S1'],
+        'store_no': ['01', '01', '01', 'DIRECT']
+    })
+    issue = pd.DataFrame({
+        'item_code': ['X', 'X', 'X', 'Y'],
+        'requisition_no': ['R1', 'R2', 'R3', 'R4'],
+        'date': ['2024-01-05', '2024-01-12', '2024-01-20', '2024-01-01'],
+        'quantity': [3, 4, 4, 2],
+        'store_no': ['01', '01', '01', '01']
+    })
+    return match_requisitions(grn, issue)
+
+
+def test_fifo_allocation():
+    """Issues draw on the oldest receipts first; the shortfall is covered by opening stock."""
+    print("🧪 TESTING FIFO REQUISITION ALLOCATION")
+    matches = run_matching()['matches']
+    allocated = matches.groupby(['requisition_no', 'grn_no'])['allocated_qty'].sum().to_dict()
+
+    assert allocated == {
+        ('R1', OPENING_STOCK): 1, ('R1', 'G1'): 2,
+        ('R2', 'G1'): 3, ('R2', 'G2'): 1,
+        ('R3', 'G2'): 4,
+        ('R4', OPENING_STOCK): 2,
+    }
+    # DIRECT-store GRNs are not stock and are never allocated
+    assert 'G9' not in set(matches['grn_no'])
+    # No issue is matched to a GRN received after it
+    grn_rows = matches[matches['grn_no'] != OPENING_STOCK]
+    assert (grn_rows['grn_date'] <= grn_rows['issue_date']).all()
+    print("  ✅ FIFO allocation and opening stock correct")
+
+
+def test_fill_status_and_unmatched_receipts():
+    """Fill status follows the GRN-matched share; receipts left in stock are reported."""
+    results = run_matching()
+    fill_status = results['fill_status'].set_index('requisition_no')
+
+    assert fill_status.loc['R2', 'fill_status'] == 'matched'
+    assert fill_status.loc['R1', 'fill_status'] == 'partially_matched'
+    assert fill_status.loc['R4', 'fill_status'] == 'unmatched'
+    assert fill_status.loc['R1', 'opening_stock_qty'] == 1
+
+    unmatched = results['unmatched_receipts'].set_index('grn_no')
+    assert list(unmatched.index) == ['G3']
+    assert unmatched.loc['G3', 'remaining_qty'] == 2
+    print("  ✅ Fill status and unmatched receipts correct")
+
+
+if __name__ == "__main__":
+    test_fifo_allocation()
+    test_fill_status_and_unmatched_receipts()
+    print("\n✅ Requisition matching tests completed!")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Test the document sequence gap, duplicate and out-of-order findings.
+"""
+
+import pandas as pd
+
+from sequence_analysis import analyze_sequences, sequence_documents, split_document_numbers
+
+
+def build_documents():
+    """One GRN series: 100-103, 500-502 and 505, with duplicated and back-dated numbers."""
+    grn = pd.DataFrame({
+        'grn_no': ['100', '0100', '101', '102', '103', '500', '0500', '501', '0501', '502', '505', '103'],
+        'date': ['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-03', '2024-01-04', '2024-02-01',
+                 '2024-02-01', '2024-02-02', '2024-02-02', '2024-01-05', '2024-01-06', '2024-01-04'],
+        'supplier': ['S1', 'S2', 'S1', 'S1', 'S1', 'S1', 'S2', 'S1', 'S2', 'S1', 'S1', 'S1']
+    })
+    return sequence_documents(grn, 'grn_no', 'grn_no', 'date', party_col='supplier')
+
+
+def findings_of(findings, finding):
+    rows = findings[findings['finding'] == finding]
+    return list(zip(rows['range_start'], rows['range_end'], rows['count']))
+
+
+def test_gaps_and_duplicates():
+    """Gaps are reported per missing range; duplicates only merge consecutive numbers."""
+    print("🧪 TESTING DOCUMENT SEQUENCE ANALYSIS")
+    findings, summary = analyze_sequences(build_documents())
+
+    assert findings_of(findings, 'gap') == [(104, 499, 396), (503, 504, 2)]
+    # 100 and 500-501 are separate runs although no unflagged number lies between them
+    assert findings_of(findings, 'duplicate') == [(100, 100, 2), (500, 501, 4)]
+    # The second line of GRN 103 for the same supplier is the same document, not a duplicate
+    assert 103 not in set(findings.loc[findings['finding'] == 'duplicate', 'range_start'])
+
+    series = summary.iloc[0]
+    assert series['gaps'] == 2
+    assert series['missing_numbers'] == 398
+    assert series['duplicate_numbers'] == 3
+    print("  ✅ Gaps and duplicate runs correct")
+
+
+def test_out_of_order_dates():
+    """Numbers dated more than the tolerance before a lower number are out of order."""
+    findings, _ = analyze_sequences(build_documents(), date_tolerance_days=7)
+    # 502 (5 Jan) and 505 (6 Jan) follow 501 (2 Feb) but are not consecutive numbers
+    assert findings_of(findings, 'out_of_order') == [(502, 502, 1), (505, 505, 1)]
+
+    findings, _ = analyze_sequences(build_documents(), date_tolerance_days=60)
+    assert findings_of(findings, 'out_of_order') == []
+    print("  ✅ Out-of-order findings respect the date tolerance")
+
+
+def test_split_document_numbers():
+    """Prefixes and numeric parts are split; values without trailing digits are skipped."""
+    parts = split_document_numbers(pd.Series(['INVI006735', 'inv12', '4711.0', 'NONE', None]))
+    assert parts['prefix'].tolist() == ['INVI', 'INV', '']
+    assert parts['number'].tolist() == [6735, 12, 4711]
+
+
+if __name__ == "__main__":
+    test_gaps_and_duplicates()
+    test_out_of_order_dates()
+    test_split_document_numbers()
+    print("\n✅ Sequence analysis tests completed!")
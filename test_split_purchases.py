@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test the split-purchase rolling windows.
+"""
+
+import pandas as pd
+
+from split_purchases import detect_split_purchases, order_transactions
+
+
+def transactions(rows):
+    """Purchase-order transactions from (supplier, reference, date, amount) tuples."""
+    frame = pd.DataFrame(rows, columns=['supplier', 'reference', 'date', 'amount'])
+    return frame.assign(date=pd.to_datetime(frame['date']), supplier_name='SUPPLIER ' + frame['supplier'],
+                        source='purchase_order')
+
+
+def test_split_below_threshold_flagged_once():
+    """Three orders below R30,000 summing past it in a week are one finding, not three windows."""
+    print("🧪 TESTING SPLIT-PURCHASE WINDOWS")
+    findings = detect_split_purchases(transactions([
+        ('A', 'O1', '2024-01-01', 12000.0),
+        ('A', 'O2', '2024-01-03', 12000.0),
+        ('A', 'O3', '2024-01-05', 12000.0),
+        # One order at or above the threshold is approved on its own
+        ('B', 'O4', '2024-01-01', 25000.0),
+        ('B', 'O5', '2024-01-02', 40000.0),
+    ]), thresholds=[30000.0])
+
+    assert len(findings) == 1
+    finding = findings.iloc[0]
+    assert finding['supplier'] == 'A'
+    assert finding['transactions'] == 3
+    assert finding['total_amount'] == 36000.0
+    assert finding['references'] == 'O1, O2, O3'
+    assert finding['window_start'] == pd.Timestamp('2024-01-01')
+    assert finding['window_end'] == pd.Timestamp('2024-01-05')
+    print("  ✅ Split orders flagged once per run of windows")
+
+
+def test_window_length():
+    """The window ending on a transaction covers the previous window_days days, exclusive."""
+    rows = transactions([('A', 'O1', '2024-02-01', 16000.0), ('A', 'O2', '2024-02-08', 16000.0)])
+
+    assert detect_split_purchases(rows, window_days=7, thresholds=[30000.0]).empty
+    findings = detect_split_purchases(rows, window_days=8, thresholds=[30000.0])
+    assert findings['transactions'].tolist() == [2]
+
+    # The highest threshold the sum reaches is reported
+    findings = detect_split_purchases(rows, window_days=8, thresholds=[20000.0, 30000.0])
+    assert findings['threshold'].tolist() == [30000.0]
+    print("  ✅ Window length and thresholds respected")
+
+
+def test_order_transactions():
+    """GRN lines are summed per purchase order, falling back to the GRN number."""
+    grn = pd.DataFrame({
+        'supplier': [10.0, 10.0, 10.0],
+        'supplier_name': ['S10', 'S10', 'S10'],
+        'order_no': ['P1', 'P1', None],
+        'grn_no': ['G1', 'G2', 'G3'],
+        'date': ['2024-03-02', '2024-03-01', '2024-03-05'],
+        'nett_grn_amt': [100.0, 50.0, 70.0]
+    })
+    orders = order_transactions(grn).set_index('reference')
+
+    assert orders.loc['P1', 'amount'] == 150.0
+    assert orders.loc['P1', 'date'] == pd.Timestamp('2024-03-01')
+    assert orders.loc['G3', 'amount'] == 70.0
+    assert set(orders['supplier']) == {'10'}
+
+
+if __name__ == "__main__":
+    test_split_below_threshold_flagged_once()
+    test_window_length()
+    test_order_transactions()
+    print("\n✅ Split-purchase tests completed!")
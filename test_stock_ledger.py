@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test the stock ledger running balances and stock count resets.
+"""
+
+import pandas as pd
+
+from stock_ledger import StockLedger, grn_movements, issue_movements, stock_count_rows
+
+
+def build_ledger():
+    """Item A: receive 10, issue 3, counted at 5 on 2023-06-30, then receive 2 and issue 1."""
+    grn = pd.DataFrame({
+        'item_no': ['A', 'A', 'B', 'A'],
+        'date': ['2023-06-01', '2023-06-30', '2023-06-10', '2023-07-05'],
+        'quantity': [10, 0, 4, 2],
+        'grn_no': ['G1', 'G2', 'G3', 'G4'],
+        'store_no': ['01', '01', 'DIRECT', '01']
+    })
+    issue = pd.DataFrame({
+        'item_code': ['A', 'A'],
+        'date': ['2023-06-15', '2023-07-10'],
+        'quantity': [3, 1],
+        'requisition_no': ['R1', 'R2']
+    })
+    listing = pd.DataFrame({'item_code': ['A'], 'quantity': [5]})
+    movements = pd.concat([grn_movements(grn), issue_movements(issue),
+                           stock_count_rows(listing, '2023-06-30', 'count 2023')])
+    return StockLedger(movements)
+
+
+def test_count_resets_balance():
+    """A count row replaces the running balance and keeps the difference as count variance."""
+    print("🧪 TESTING STOCK LEDGER COUNT RESETS")
+    ledger = build_ledger()
+
+    assert ledger.balance('A', '2023-06-29') == 7
+    # The count sorts after the same day's GRN and resets 7 → 5
+    assert ledger.balance('A', '2023-06-30') == 5
+    count = ledger.ledger[ledger.ledger['movement_type'] == 'COUNT'].iloc[0]
+    assert count['count_variance'] == -2
+
+    # Movements after the count run on from the counted quantity
+    assert ledger.balance('A', '2023-07-05') == 7
+    assert ledger.balance('A', '2023-07-31') == 6
+    print("  ✅ Balances reset at the count and continue from it")
+
+
+def test_direct_store_and_as_of_queries():
+    """DIRECT-store GRNs never enter the ledger; as-of lookups before the first movement are 0."""
+    ledger = build_ledger()
+
+    assert 'B' not in set(ledger.ledger['item_code'])
+    assert ledger.balance('A', '2023-05-31') == 0.0
+    assert ledger.balance('B', '2023-07-31') == 0.0
+
+    balances = ledger.balances(as_of='2023-07-31').set_index('item_code')
+    assert balances.loc['A', 'balance'] == 6
+    # Received/issued to date exclude the count row
+    assert balances.loc['A', 'received_to_date'] == 12
+    assert balances.loc['A', 'issued_to_date'] == 4
+    print("  ✅ DIRECT store excluded and as-of balances correct")
+
+
+if __name__ == "__main__":
+    test_count_resets_balance()
+    test_direct_store_and_as_of_queries()
+    print("\n✅ Stock ledger tests completed!")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the stock roll-forward reconciliation (Objective 5) status categories.
+"""
+
+import pandas as pd
+
+from stock_reconciliation import build_roll_forward, summarize_roll_forward
+
+
+def build_table():
+    """Two counted years for store 01: items A-D each land in a different status."""
+    grn = pd.DataFrame({
+        'item_no': ['A', 'A', 'B', 'C', 'A'],
+        'date': ['2023-06-30', '2023-08-01', '2023-09-01', '2023-10-01', '2023-11-01'],
+        'quantity': [99, 5, 2, 3, 50],
+        'grn_no': ['G0', 'G1', 'G2', 'G3', 'G4'],
+        'store_no': ['01', '01', '01', '01', 'DIRECT']
+    })
+    issue = pd.DataFrame({
+        'item_code': ['A'],
+        'date': ['2024-01-15'],
+        'quantity': [3],
+        'requisition_no': ['R1'],
+        'store_no': ['01']
+    })
+    listings = [
+        ('2022/23', pd.DataFrame({'store_no': ['01', '01', '01'], 'item_code': ['A', 'B', 'D'],
+                                  'quantity': [10, 4, 2], 'unit_price': [1.0, 2.0, 5.0]})),
+        ('2023/24', pd.DataFrame({'store_no': ['01', '01', '01'], 'item_code': ['A', 'B', 'D'],
+                                  'quantity': [12, 5, 4], 'unit_price': [1.0, 2.0, 5.0]})),
+    ]
+    variance_reports = [('2023/24', pd.DataFrame({'store_no': ['01'], 'item_code': ['D'],
+                                                  'sht_qty': [0], 'surp_qty': [2]}))]
+    table = build_roll_forward(grn, issue, None, listings, variance_reports,
+                               closing_dates=['2023-06-30', '2024-06-30'])
+    return table.set_index(['financial_year', 'item_code'])
+
+
+def test_roll_forward_categories():
+    """Each store/item/year gets the status its opening, movements and count imply."""
+    print("🧪 TESTING STOCK ROLL-FORWARD CATEGORIES")
+    table = build_table()
+
+    # First year: no earlier count to open from
+    assert (table.loc['2022/23', 'status'] == 'no_opening_count').all()
+
+    # A: 10 + 5 received − 3 issued = 12 counted
+    assert table.loc[('2023/24', 'A'), 'status'] == 'balanced'
+    assert table.loc[('2023/24', 'A'), 'expected_closing_qty'] == 12
+    # B: 4 + 2 = 6 expected, 5 counted
+    assert table.loc[('2023/24', 'B'), 'status'] == 'shortage'
+    assert table.loc[('2023/24', 'B'), 'difference_value'] == -2.0
+    # C: moved but missing from the count
+    assert table.loc[('2023/24', 'C'), 'status'] == 'not_counted'
+    # D: counted 2 more than expected, all explained by the variance report
+    assert table.loc[('2023/24', 'D'), 'status'] == 'surplus'
+    assert table.loc[('2023/24', 'D'), 'unexplained_difference_qty'] == 0
+    print("  ✅ balanced / shortage / surplus / not_counted / no_opening_count")
+
+
+def test_period_boundaries_and_direct_store():
+    """A movement on the closing date belongs to that year; DIRECT-store GRNs are not stock."""
+    table = build_table()
+
+    assert table.loc[('2022/23', 'A'), 'receipts_qty'] == 99
+    assert table.loc[('2023/24', 'A'), 'receipts_qty'] == 5
+
+    summary = summarize_roll_forward(table.reset_index()).set_index('financial_year')
+    assert summary.loc['2023/24', 'items'] == 4
+    assert summary.loc['2023/24', 'abs_difference_qty'] == 3
+    print("  ✅ Period boundaries and DIRECT store exclusion correct")
+
+
+if __name__ == "__main__":
+    test_roll_forward_categories()
+    test_period_boundaries_and_direct_store()
+    print("\n✅ Stock roll-forward tests completed!")
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Test the three-way match grouping of invoices/payments and the amount tolerance.
+"""
+
+import numpy as np
+import pandas as pd
+
+from three_way_match import exception_queue, summarize_exceptions, three_way_match
+
+
+def build_chain():
+    """Minimal GRN document chain rows (one per GRN document)."""
+    rows = [
+        # grn_no, grn_amount, inv_no, hr185_inv_amount, payment_source, voucher, payment_cheque,
+        # payment_amount, hr185_inv_supplier, payment_supplier
+        ('G1', 100.0, None, np.nan, 'voucher', '1001', '5001', 380.0, None, '10'),
+        ('G2', 300.0, None, np.nan, 'voucher', '1001', '5001', 380.0, None, '10'),
+        ('G3', 1000.0, None, np.nan, 'hr185_cheque', None, '5003', 1004.0, None, '10'),
+        ('G4', 1000.0, None, np.nan, 'hr185_cheque', None, '5004', 1006.0, None, '10'),
+        ('G5', 50.0, 'INV5', 50.8, 'hr185_cheque', None, '5005', 50.0, '10', '10'),
+        ('G6', 70.0, 'INV6', 70.0, None, None, None, np.nan, '10', None),
+        ('G7', 90.0, None, np.nan, 'hr185_cheque', None, '5007', 90.0, None, '99'),
+    ]
+    chain = pd.DataFrame(rows, columns=['grn_no', 'grn_amount', 'inv_no', 'hr185_inv_amount', 'payment_source',
+                                        'voucher', 'payment_cheque', 'payment_amount', 'hr185_inv_supplier',
+                                        'payment_supplier'])
+    return chain.assign(supplier='10', supplier_name='SUPPLIER 10', financial_year='2023/24',
+                        grn_date=pd.Timestamp('2023-08-01'), payment_date=pd.Timestamp('2023-09-01'))
+
+
+def test_exception_types_and_tolerance():
+    """Differences within max(R1, 0.5%) agree; larger ones are classified by direction."""
+    print("🧪 TESTING THREE-WAY MATCH EXCEPTIONS")
+    matched = three_way_match(build_chain()).set_index('grn_no')
+    types = matched['exception_type'].to_dict()
+
+    assert types['G1'] == types['G2'] == 'underpaid'
+    assert types['G3'] is None          # R4 over on R1,000: within 0.5%
+    assert types['G4'] == 'overpaid'    # R6 over on R1,000: beyond 0.5%
+    assert types['G5'] is None          # invoice R0.80 over: within R1
+    assert types['G6'] == 'unpaid'
+    assert types['G7'] == 'supplier_mismatch'
+    print("  ✅ Exception types and tolerance correct")
+
+
+def test_payment_group_counted_once():
+    """Two GRNs paid by one voucher share its shortfall pro rata; the summary counts it once."""
+    matched = three_way_match(build_chain())
+    underpaid = matched[matched['exception_type'] == 'underpaid'].set_index('grn_no')
+
+    assert underpaid['exception_group'].nunique() == 1
+    assert (underpaid['payment_grn_total'] == 400).all()
+    assert (underpaid['group_exception_amount'] == -20).all()
+    assert underpaid.loc['G1', 'exception_amount'] == -5
+    assert underpaid.loc['G2', 'exception_amount'] == -15
+
+    summary = summarize_exceptions(exception_queue(matched)).set_index('exception_type')
+    assert summary.loc['underpaid', 'documents'] == 2
+    assert summary.loc['underpaid', 'groups'] == 1
+    assert summary.loc['underpaid', 'amount'] == 20
+    assert summary.loc['unpaid', 'amount'] == 70
+    print("  ✅ Group difference shared out and counted once")
+
+
+if __name__ == "__main__":
+    test_exception_types_and_tolerance()
+    test_payment_group_counted_once()
+    print("\n✅ Three-way match tests completed!")
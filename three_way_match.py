@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Three-Way Match Exception Engine
+Compares, per GRN document, the received amount (HR995GRN nett_grn_amt), the invoiced
+amount (HR185 INV) and the paid amount (HR995 voucher cheq_amt, or the HR185 cheque when
+no voucher is available) and queues every document that does not match.
+
+One invoice, voucher or cheque can cover several GRN documents, so amounts are compared
+per invoice and per payment: the GRN amounts sharing an invoice (or payment) are summed
+and compared with that invoice (or payment) amount, and the result is attached to each
+of its GRN documents. The group's difference (group_exception_amount) is shared out over
+its GRN documents in proportion to their GRN amounts (exception_amount), so per-document
+amounts add up to the group difference once and not once per GRN.
+
+An amount agrees when the difference is within max(absolute tolerance, percent tolerance
+× reference amount). Exception categories, in priority order:
+
+    supplier_mismatch  invoice or payment belongs to a different supplier than the GRN
+    unpaid             invoiced (or vouchered) but no payment found
+    overpaid           payment exceeds the GRN amounts it covers
+    underpaid          payment is short of the GRN amounts it covers
+    amount_mismatch    invoice amount differs from the GRN amounts it covers
+
+Runs on the GRN document chain (see document_chain) with column-wise comparisons.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chq_linking import normalize_reference_series
+from document_chain import chain_partitions, load_chain_partition
+from stock_ledger import normalize_item_codes
+from voucher_validity import normalize_voucher_series
+
+EXCEPTIONS_FILE = 'three_way_match_exceptions.csv'
+
+DEFAULT_ABSOLUTE_TOLERANCE = 1.00
+DEFAULT_PERCENT_TOLERANCE = 0.005
+
+EXCEPTION_TYPES = ['supplier_mismatch', 'unpaid', 'overpaid', 'underpaid', 'amount_mismatch']
+
+EXCEPTION_COLUMNS = [
+    'exception_type', 'exception_amount', 'group_exception_amount', 'exception_group', 'financial_year', 'grn_no',
+    'grn_date', 'supplier', 'supplier_name', 'inv_no', 'grn_amount', 'invoice_grn_total', 'hr185_inv_amount',
+    'invoice_difference', 'payment_source', 'payment_cheque', 'payment_grn_total', 'payment_amount',
+    'payment_difference', 'hr185_inv_supplier', 'payment_supplier', 'payment_date'
+] + EXCEPTION_TYPES
+
+
+def reference_keys(values):
+    """Normalized reference keys for codes that may have been read back from CSV as floats."""
+    return normalize_reference_series(normalize_item_codes(values))
+
+
+def within_tolerance(difference, reference, absolute_tolerance=DEFAULT_ABSOLUTE_TOLERANCE,
+                     percent_tolerance=DEFAULT_PERCENT_TOLERANCE):
+    """Check differences against max(absolute tolerance, percent tolerance × |reference|)."""
+    tolerance = np.maximum(absolute_tolerance, percent_tolerance * reference.abs())
+    return difference.abs() <= tolerance
+
+
+def three_way_match(chain, absolute_tolerance=DEFAULT_ABSOLUTE_TOLERANCE,
+                    percent_tolerance=DEFAULT_PERCENT_TOLERANCE, voucher_data_available=False):
+    """
+    Compare GRN, invoice and payment amounts for every GRN document.
+
+    Args:
+        chain (pd.DataFrame): GRN document chain (build_document_chain output)
+        absolute_tolerance (float): Amount difference always accepted
+        percent_tolerance (float): Accepted difference as a fraction of the reference amount
+        voucher_data_available (bool): Vouchers were loaded, so a GRN whose voucher
+            reference is not found counts as unpaid even without an HR185 invoice
+
+    Returns:
+        pd.DataFrame: The chain with group totals, differences, one boolean column per
+            exception type, exception_type (first matching type, None when matched),
+            exception_group (invoice or payment group, or the GRN itself),
+            group_exception_amount and the document's share of it, exception_amount
+    """
+    result = chain.copy()
+    grn_amount = result['grn_amount'].fillna(0.0)
+
+    # Invoice side: GRN amounts sharing an HR185 invoice
+    inv_key = reference_keys(result['inv_no']).where(result['hr185_inv_amount'].notna())
+    result['invoice_grn_total'] = grn_amount.groupby(inv_key).transform('sum')
+    result['invoice_difference'] = result['hr185_inv_amount'] - result['invoice_grn_total']
+
+    # Payment side: GRN amounts sharing a voucher or cheque
+    payment_ref = np.where(result['payment_source'] == 'voucher',
+                           normalize_voucher_series(result['voucher']),
+                           reference_keys(result['payment_cheque']))
+    payment_key = (result['payment_source'].astype(str) + ':' + pd.Series(payment_ref, index=result.index).astype(str))
+    payment_key = payment_key.where(result['payment_amount'].notna())
+    result['payment_grn_total'] = grn_amount.groupby(payment_key).transform('sum')
+    result['payment_difference'] = result['payment_amount'] - result['payment_grn_total']
+
+    supplier = reference_keys(result['supplier'])
+
+    def differs_from_grn_supplier(column):
+        other = result[column]
+        return other.notna() & (reference_keys(other) != supplier)
+
+    invoice_agrees = within_tolerance(result['invoice_difference'], result['invoice_grn_total'],
+                                      absolute_tolerance, percent_tolerance)
+    payment_agrees = within_tolerance(result['payment_difference'], result['payment_grn_total'],
+                                      absolute_tolerance, percent_tolerance)
+    paid = result['payment_amount'].notna()
+    awaiting_payment = result['hr185_inv_amount'].notna()
+    if voucher_data_available:
+        awaiting_payment |= result['voucher'].notna()
+
+    result['supplier_mismatch'] = (differs_from_grn_supplier('hr185_inv_supplier')
+                                   | differs_from_grn_supplier('payment_supplier'))
+    result['unpaid'] = awaiting_payment & ~paid
+    result['overpaid'] = paid & ~payment_agrees & (result['payment_difference'] > 0)
+    result['underpaid'] = paid & ~payment_agrees & (result['payment_difference'] < 0)
+    result['amount_mismatch'] = result['hr185_inv_amount'].notna() & ~invoice_agrees
+
+    result['exception_type'] = np.select([result[name] for name in EXCEPTION_TYPES], EXCEPTION_TYPES, default=None)
+    per_document = result['supplier_mismatch'] | result['unpaid']
+    payment_exception = ~per_document & (result['overpaid'] | result['underpaid'])
+    invoice_exception = ~per_document & ~payment_exception & result['amount_mismatch']
+    result['exception_group'] = np.select(
+        [per_document, payment_exception, invoice_exception],
+        ['grn:' + result['grn_no'].astype(str), 'payment:' + payment_key.astype(str), 'invoice:' + inv_key.astype(str)],
+        default=None)
+    result['group_exception_amount'] = np.select(
+        [per_document, payment_exception, invoice_exception],
+        [grn_amount, result['payment_difference'], result['invoice_difference']],
+        default=0.0)
+
+    # Each document's share of its group's difference, in proportion to its GRN amount
+    group_total = np.select([payment_exception, invoice_exception],
+                            [result['payment_grn_total'], result['invoice_grn_total']], default=np.nan)
+    group_size = result.groupby(result['exception_group'])['grn_no'].transform('size')
+    share = np.where(np.abs(group_total) > 0, grn_amount / np.where(group_total == 0, 1.0, group_total), 1.0 / group_size)
+    result['exception_amount'] = np.where(per_document, grn_amount,
+                                          result['group_exception_amount'] * np.nan_to_num(share, nan=0.0))
+    return result
+
+
+def exception_queue(matched):
+    """Documents with at least one exception, largest absolute (per-document) exception amount first."""
+    queue = matched[matched['exception_type'].notna()]
+    order = queue['exception_amount'].abs().sort_values(ascending=False, kind='stable').index
+    return queue.loc[order, EXCEPTION_COLUMNS].reset_index(drop=True)
+
+
+def summarize_exceptions(queue):
+    """Document count, invoice/payment group count and absolute amount per exception type.
+
+    The amount counts each group's difference once, however many GRN documents share it.
+    """
+    groups = queue.drop_duplicates(['exception_type', 'exception_group'])
+    summary = pd.DataFrame({
+        'documents': queue.groupby('exception_type')['grn_no'].size(),
+        'groups': groups.groupby('exception_type')['exception_group'].size(),
+        'amount': groups['group_exception_amount'].abs().groupby(groups['exception_type']).sum()
+    })
+    return summary.reindex(EXCEPTION_TYPES).dropna(how='all').astype({'documents': int, 'groups': int}).reset_index(
+        names='exception_type')
+
+
+def write_three_way_exceptions(output_folder="output", absolute_tolerance=DEFAULT_ABSOLUTE_TOLERANCE,
+                               percent_tolerance=DEFAULT_PERCENT_TOLERANCE):
+    """
+    Run the three-way match over every document chain partition and save the exception queue.
+
+    Returns:
+        pd.DataFrame or None: The exception queue, or None when the chain has not been built
+    """
+    output_folder = Path(output_folder)
+    years = chain_partitions(output_folder)
+    if not years:
+        print(f"⚠️ No document chain found in {output_folder}; three-way match not run")
+        return None
+    chain = pd.concat([load_chain_partition(output_folder, year) for year in years], ignore_index=True)
+    matched = three_way_match(chain, absolute_tolerance, percent_tolerance,
+                              voucher_data_available=(output_folder / 'hr995_voucher.csv').exists())
+    queue = exception_queue(matched)
+    output_file = output_folder / EXCEPTIONS_FILE
+    queue.to_csv(output_file, index=False)
+    print(f"📄 Saved three-way match exceptions ({len(queue):,} of {len(chain):,} GRN documents) to: {output_file}")
+    return queue
+
+
+def load_three_way_exceptions(output_folder="output"):
+    """Load the saved exception queue, or None when the three-way match has not been run."""
+    exceptions_file = Path(output_folder) / EXCEPTIONS_FILE
+    if not exceptions_file.exists():
+        return None
+    return pd.read_csv(exceptions_file, low_memory=False, dtype={'financial_year': str},
+                       parse_dates=['grn_date', 'payment_date'])
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Invalid Voucher Classification Engine
+Batch classification of GRN voucher references that have no matching payment voucher.
+
+Uses the corrected linkage HR185 Reference → GRN inv_no → GRN voucher → HR995 voucher_no.
+HR185 references are loaded once into a set, invalid-reason rules are applied to all
+vouchers with vectorized string checks, and the corrected report is produced in a
+single pass over the GRN table.
+"""
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from chq_linking import normalize_reference_series
+
+# Ordered (prefix, reason) rules; the first matching prefix wins
+INVALID_REASON_PREFIX_RULES = [
+    ('INVI', "INVI sequence gap or timing issue"),
+    ('999I', "Special/manual voucher not in payment system"),
+    ('SINA', "Different supplier/system voucher"),
+]
+MISSING_REASON = "Missing voucher reference"
+NUMERIC_REASON = "Numeric voucher not in payment system"
+SHORT_FORMAT_REASON = "Invalid voucher format"
+UNKNOWN_REASON = "Unknown voucher system or data entry error"
+
+REPORT_COLUMNS = [
+    'grn_no', 'inv_no', 'voucher', 'voucher_normalized', 'supplier_name', 'date',
+    'nett_grn_amt', 'invalid_reason', 'voucher_prefix', 'has_pdf_link',
+    'fin_period', 'item_no', 'description'
+]
+
+
+def normalize_voucher_series(vouchers):
+    """Normalize voucher numbers (strip + upper case), keeping missing values missing."""
+    return vouchers.where(vouchers.isna(), vouchers.astype(str).str.strip().str.upper())
+
+
+def normalize_link_reference_series(refs):
+    """Normalize invoice/HR185 references: numeric values lose leading zeros, text is upper-cased."""
+    return normalize_reference_series(refs).str.upper()
+
+
+def classify_invalid_reasons(vouchers, prefix_rules=None):
+    """
+    Classify the most likely reason each voucher reference is invalid.
+
+    Args:
+        vouchers (pd.Series): Voucher references
+        prefix_rules (list): Ordered (prefix, reason) pairs; defaults to INVALID_REASON_PREFIX_RULES
+
+    Returns:
+        pd.Series: Invalid reason per voucher
+    """
+    prefix_rules = INVALID_REASON_PREFIX_RULES if prefix_rules is None else prefix_rules
+    text = vouchers.astype(str).str.strip().str.upper()
+
+    conditions = [vouchers.isna().to_numpy()]
+    reasons = [MISSING_REASON]
+    for prefix, reason in prefix_rules:
+        conditions.append(text.str.startswith(prefix).to_numpy())
+        reasons.append(reason)
+    conditions.append(text.str.isdigit().to_numpy())
+    reasons.append(NUMERIC_REASON)
+    conditions.append((text.str.len() < 4).to_numpy())
+    reasons.append(SHORT_FORMAT_REASON)
+
+    return pd.Series(np.select(conditions, reasons, default=UNKNOWN_REASON), index=vouchers.index)
+
+
+def build_invalid_voucher_report(grn_df, voucher_df, hr185_df, prefix_rules=None):
+    """
+    Build the corrected invalid voucher report in one pass.
+
+    Args:
+        grn_df (pd.DataFrame): HR995 GRN records
+        voucher_df (pd.DataFrame): HR995 payment vouchers
+        hr185_df (pd.DataFrame): HR185 PDF transactions (may be empty)
+        prefix_rules (list): Optional override of the invalid-reason prefix rules
+
+    Returns:
+        pd.DataFrame: GRN lines whose voucher is not in the payment system, classified
+    """
+    grn_vouchers = normalize_voucher_series(grn_df['voucher'])
+    payment_vouchers = set(normalize_voucher_series(voucher_df['voucher_no']).dropna())
+
+    invalid_mask = grn_vouchers.notna() & ~grn_vouchers.isin(payment_vouchers)
+    report_df = grn_df.loc[invalid_mask].copy()
+    report_df['voucher_normalized'] = grn_vouchers[invalid_mask]
+
+    # HR185 references are normalized once and held as a set
+    if hr185_df is not None and not hr185_df.empty and 'reference' in hr185_df.columns:
+        pdf_refs = set(normalize_link_reference_series(hr185_df['reference'].dropna()))
+    else:
+        pdf_refs = set()
+
+    report_df['invalid_reason'] = classify_invalid_reasons(report_df['voucher_normalized'], prefix_rules)
+    report_df['voucher_prefix'] = report_df['voucher_normalized'].astype(str).str.extract(r'^([A-Z]*)', expand=False)
+    if 'inv_no' in report_df.columns:
+        linked = normalize_link_reference_series(report_df['inv_no']).isin(pdf_refs) & report_df['inv_no'].notna()
+    else:
+        linked = pd.Series(False, index=report_df.index)
+    report_df['has_pdf_link'] = np.where(linked, 'Yes', 'No')
+
+    available_columns = [col for col in REPORT_COLUMNS if col in report_df.columns]
+    report_df = report_df[available_columns]
+    return report_df.sort_values(['has_pdf_link', 'invalid_reason', 'voucher_normalized'],
+                                 ascending=[False, True, True])
+
+
+def write_invalid_voucher_report(output_folder="output"):
+    """
+    Load GRN, voucher and HR185 outputs once and write invalid_voucher_references_corrected.csv.
+
+    Returns:
+        pd.DataFrame or None: The report, or None when GRN/voucher data is missing
+    """
+    output_folder = Path(output_folder)
+    grn_file = output_folder / 'hr995_grn.csv'
+    voucher_file = output_folder / 'hr995_voucher.csv'
+    hr185_file = output_folder / 'individual_hr185_transactions.csv'
+
+    if not grn_file.exists() or not voucher_file.exists():
+        print(f"⚠️ GRN or voucher data missing in {output_folder}; corrected report not generated")
+        return None
+
+    grn_df = pd.read_csv(grn_file, low_memory=False)
+    voucher_df = pd.read_csv(voucher_file, low_memory=False)
+    hr185_df = pd.read_csv(hr185_file) if hr185_file.exists() else pd.DataFrame()
+
+    report_df = build_invalid_voucher_report(grn_df, voucher_df, hr185_df)
+    output_file = output_folder / 'invalid_voucher_references_corrected.csv'
+    report_df.to_csv(output_file, index=False)
+    print(f"📄 Saved corrected report to: {output_file}")
+    print(f"📊 Report contains {len(report_df)} records")
+    return report_df